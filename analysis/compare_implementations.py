@@ -9,44 +9,25 @@ import numpy as np
 from pathlib import Path
 import sys
 
+from data_processing import metrics_calculator
+from data_processing.csv_loader import get_shapes, load_benchmark_data
+from data_processing.schema import dtype_columns, shape_columns, shape_labels
+
 def load_results(results_dir='../../results/raw'):
     """Load all CSV results from the raw directory"""
-    results_path = Path(results_dir)
-    
-    if not results_path.exists():
-        print(f"Error: Results directory not found: {results_path}")
-        sys.exit(1)
-    
-    csv_files = list(results_path.glob('*.csv'))
-    
-    if not csv_files:
-        print(f"Error: No CSV files found in {results_path}")
+    try:
+        combined_df = load_benchmark_data(results_dir)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
         sys.exit(1)
     
-    print(f"Found {len(csv_files)} CSV files")
-    
-    # Load and combine all CSV files
-    dfs = []
-    for csv_file in csv_files:
-        try:
-            df = pd.read_csv(csv_file)
-            dfs.append(df)
-            print(f"  Loaded: {csv_file.name} ({len(df)} rows)")
-        except Exception as e:
-            print(f"  Error loading {csv_file.name}: {e}")
-    
-    if not dfs:
-        print("Error: No data loaded")
-        sys.exit(1)
-    
-    combined_df = pd.concat(dfs, ignore_index=True)
     print(f"\nTotal rows: {len(combined_df)}")
     
     return combined_df
 
 def calculate_statistics(df):
-    """Calculate statistics for each implementation and matrix size"""
-    grouped = df.groupby(['implementation', 'matrix_size'])
+    """Calculate statistics for each implementation and matrix size (and shape and dtype, when they vary)"""
+    grouped = df.groupby(['implementation', 'matrix_size'] + shape_columns(df) + dtype_columns(df), observed=True)
     
     stats = grouped.agg({
         'execution_time_ms': ['mean', 'std', 'min', 'max'],
@@ -58,30 +39,11 @@ def calculate_statistics(df):
     
     return stats
 
-def calculate_speedup(df, baseline='naive'):
+def calculate_speedup(df, baseline='naive', n_bootstrap=0):
     """Calculate speedup relative to baseline implementation"""
-    # Get baseline performance
-    baseline_df = df[df['implementation'] == baseline].copy()
-    baseline_grouped = baseline_df.groupby('matrix_size')['execution_time_ms'].mean()
-    
-    # Calculate speedup for each implementation
-    results = []
-    for impl in df['implementation'].unique():
-        impl_df = df[df['implementation'] == impl].copy()
-        impl_grouped = impl_df.groupby('matrix_size')['execution_time_ms'].mean()
-        
-        for size in impl_grouped.index:
-            if size in baseline_grouped.index:
-                speedup = baseline_grouped[size] / impl_grouped[size]
-                results.append({
-                    'implementation': impl,
-                    'matrix_size': size,
-                    'speedup': speedup
-                })
-    
-    return pd.DataFrame(results)
+    return metrics_calculator.calculate_speedup(df, baseline=baseline, n_bootstrap=n_bootstrap)
 
-def generate_report(df, output_dir='../../results/reports'):
+def generate_report(df, output_dir='../../results/reports', baseline='naive'):
     """Generate comparison report"""
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
@@ -98,27 +60,53 @@ def generate_report(df, output_dir='../../results/reports'):
         f.write("\n\n")
         
         # Speedup analysis
-        f.write("## Speedup Analysis (vs Naive)\n\n")
-        speedup_df = calculate_speedup(df)
-        speedup_pivot = speedup_df.pivot(
-            index='matrix_size',
+        f.write(f"## Speedup Analysis (vs {baseline})\n\n")
+        speedup_df = calculate_speedup(df, baseline=baseline)
+        # Rectangular products are told apart by their shape rather than their equivalent size
+        index = 'shape' if shape_columns(df) else 'matrix_size'
+        if index == 'shape':
+            speedup_df = speedup_df.assign(shape=shape_labels(speedup_df))
+        speedup_pivot = speedup_df.pivot_table(
+            index=index,
             columns='implementation',
-            values='speedup'
+            values='speedup',
+            observed=True
         )
         f.write(speedup_pivot.to_markdown())
         f.write("\n\n")
         
         # Best performers
         f.write("## Best Performers by Matrix Size\n\n")
-        best = df.loc[df.groupby('matrix_size')['gflops'].idxmax()]
-        f.write(best[['matrix_size', 'implementation', 'gflops']].to_markdown(index=False))
+        if index == 'shape':
+            df = df.assign(shape=shape_labels(df))
+        best = df.loc[df.groupby(index, observed=True)['gflops'].idxmax()]
+        f.write(best[[index, 'implementation', 'gflops']].to_markdown(index=False))
         f.write("\n")
+        
+        # Element types, each against float64 of the same engine
+        dtypes = None
+        if dtype_columns(df):
+            dtypes = metrics_calculator.dtype_comparison(df)
+            f.write("\n## Element Types (vs float64)\n\n")
+            f.write(dtypes.to_markdown(index=False))
+            f.write("\n")
+        
+        # Resource usage of the binary runs (peak RSS, faults, CPU time, perf counters)
+        resources = metrics_calculator.resource_usage(df)
+        if not resources.empty:
+            f.write("\n## Resource Usage\n\n")
+            f.write(resources.to_markdown(index=False))
+            f.write("\n")
     
     print(f"\nReport saved to: {report_file}")
     
     # Also save as CSV
     stats.to_csv(output_path / 'statistics.csv', index=False)
     speedup_df.to_csv(output_path / 'speedup.csv', index=False)
+    if dtypes is not None:
+        dtypes.to_csv(output_path / 'dtypes.csv', index=False)
+    if not resources.empty:
+        resources.to_csv(output_path / 'resources.csv', index=False)
 
 def main():
     print("=== Matrix Multiplication Implementation Comparison ===\n")
@@ -133,8 +121,8 @@ def main():
         print(f"  - {impl}: {count} measurements")
     
     print("\nMatrix sizes tested:")
-    for size in sorted(df['matrix_size'].unique()):
-        print(f"  - {size}x{size}")
+    for m, n, k in get_shapes(df):
+        print(f"  - {m}x{n}" if m == n == k else f"  - {m}x{k} @ {k}x{n}")
     
     # Generate reports
     print("\nGenerating comparison report...")
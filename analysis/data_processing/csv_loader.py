@@ -3,24 +3,70 @@
 Utility functions for loading and processing CSV benchmark data
 """
 
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    from .formats import run_name, source_files
+    from .metrics_calculator import bootstrap_group_quantiles, group_quantiles, sort_groups
+    from .result_store import ResultStore
+    from .schema import concat_normalized, dtype_columns, read_results_file, shape_columns
+except ImportError:
+    from formats import run_name, source_files
+    from metrics_calculator import bootstrap_group_quantiles, group_quantiles, sort_groups
+    from result_store import ResultStore
+    from schema import concat_normalized, dtype_columns, read_results_file, shape_columns
+
+def _read_csv_files(results_path: Path) -> pd.DataFrame:
+    """Parse every CSV below results_path directly (no Parquet engine available)"""
+    csv_files = list(source_files(results_path))
+    
+    if not csv_files:
+        raise FileNotFoundError(f"No CSV files found in {results_path}")
+    
+    dfs = []
+    for csv_file in csv_files:
+        try:
+            df = read_results_file(csv_file)
+            df['run'] = run_name(csv_file.relative_to(results_path))
+            dfs.append(df)
+        except Exception as e:
+            print(f"Warning: Could not load {csv_file.name}: {e}")
+    
+    if not dfs:
+        raise ValueError("No data could be loaded from CSV files")
+    
+    return concat_normalized(dfs)
 
 def load_benchmark_data(
     results_dir: str = '../../results/raw',
     implementation: Optional[str] = None,
     min_size: Optional[int] = None,
-    max_size: Optional[int] = None
+    max_size: Optional[int] = None,
+    runs: Optional[List[str]] = None
 ) -> pd.DataFrame:
     """
     Load benchmark CSV data with optional filtering
     
+    Every supported result format (legacy ``MatrixSize,TimeSeconds``, the
+    C binaries' 11-column rows, headered analysis CSVs) is normalized to the
+    canonical schema in ``schema.py``: categorical implementation, int32
+    matrix_size and m/n/k shape, execution_time_ms and gflops, plus
+    threads/processes.
+    
+    CSV files are read through the Parquet result store in
+    ``<results_dir>/.store``, so only new or changed files are parsed and the
+    filters are applied before any data is materialized. Without pyarrow the
+    CSV files are parsed directly on every call.
+    
     Args:
-        results_dir: Directory containing CSV files
+        results_dir: Directory containing CSV files (searched recursively)
         implementation: Filter by implementation name (e.g., 'naive', 'openmp')
         min_size: Minimum matrix size to include
         max_size: Maximum matrix size to include
+        runs: Only include these run subdirectories (e.g., '20250101_120000')
     
     Returns:
         Combined pandas DataFrame with all benchmark data
@@ -30,40 +76,37 @@ def load_benchmark_data(
     if not results_path.exists():
         raise FileNotFoundError(f"Results directory not found: {results_path}")
     
-    # Find all CSV files
-    csv_files = list(results_path.glob('*.csv'))
-    
-    if not csv_files:
-        raise FileNotFoundError(f"No CSV files found in {results_path}")
-    
-    # Load all CSV files
-    dfs = []
-    for csv_file in csv_files:
-        try:
-            df = pd.read_csv(csv_file)
-            dfs.append(df)
-        except Exception as e:
-            print(f"Warning: Could not load {csv_file.name}: {e}")
-    
-    if not dfs:
-        raise ValueError("No data could be loaded from CSV files")
-    
-    # Combine all dataframes
-    combined_df = pd.concat(dfs, ignore_index=True)
-    
-    # Apply filters
-    if implementation:
-        combined_df = combined_df[combined_df['implementation'] == implementation]
-    
-    if min_size:
-        combined_df = combined_df[combined_df['matrix_size'] >= min_size]
-    
-    if max_size:
-        combined_df = combined_df[combined_df['matrix_size'] <= max_size]
+    try:
+        store = ResultStore(results_path)
+        store.refresh()
+    except ImportError:
+        print("Warning: pyarrow not installed, reading CSV files without the result store")
+        store = None
     
-    # Convert timestamp if present
-    if 'timestamp' in combined_df.columns:
-        combined_df['timestamp'] = pd.to_datetime(combined_df['timestamp'], errors='coerce')
+    if store is not None:
+        if not store.runs():
+            raise FileNotFoundError(f"No CSV files found in {results_path}")
+        combined_df = store.load(
+            implementation=implementation,
+            min_size=min_size,
+            max_size=max_size,
+            runs=runs
+        )
+    else:
+        combined_df = _read_csv_files(results_path)
+        
+        # Apply filters
+        if runs is not None:
+            combined_df = combined_df[combined_df['run'].isin(runs)]
+        
+        if implementation:
+            combined_df = combined_df[combined_df['implementation'] == implementation]
+        
+        if min_size:
+            combined_df = combined_df[combined_df['matrix_size'] >= min_size]
+        
+        if max_size:
+            combined_df = combined_df[combined_df['matrix_size'] <= max_size]
     
     return combined_df
 
@@ -72,26 +115,92 @@ def get_implementations(df: pd.DataFrame) -> List[str]:
     return sorted(df['implementation'].unique())
 
 def get_matrix_sizes(df: pd.DataFrame) -> List[int]:
-    """Get list of unique matrix sizes in the dataset"""
+    """Get list of unique matrix sizes (equivalent sizes of rectangular products) in the dataset"""
     return sorted(df['matrix_size'].unique())
 
-def filter_outliers(df: pd.DataFrame, column: str = 'execution_time_ms', threshold: float = 3.0) -> pd.DataFrame:
+def get_shapes(df: pd.DataFrame) -> List[Tuple[int, int, int]]:
+    """Get list of unique (m, n, k) product shapes in the dataset, by equivalent size"""
+    shapes = df[['matrix_size', 'm', 'n', 'k']].drop_duplicates().sort_values(['matrix_size', 'm', 'n', 'k'])
+    return [(int(m), int(n), int(k)) for m, n, k in shapes[['m', 'n', 'k']].itertuples(index=False)]
+
+OUTLIER_METHODS = ('mad', 'iqr')
+
+# Default cutoffs: modified z-score 3.5 (Iglewicz & Hoaglin) and Tukey's 1.5 x IQR fences
+DEFAULT_OUTLIER_THRESHOLDS = {'mad': 3.5, 'iqr': 1.5}
+
+def group_columns(df: pd.DataFrame) -> List[str]:
+    """Columns identifying one benchmark configuration"""
+    keys = ['implementation', 'matrix_size'] + shape_columns(df) + dtype_columns(df)
+    return keys + [c for c in ('threads', 'processes') if c in df.columns]
+
+def outlier_mask(
+    df: pd.DataFrame,
+    column: str = 'execution_time_ms',
+    method: str = 'mad',
+    threshold: Optional[float] = None,
+    group_by: Optional[List[str]] = None
+) -> pd.Series:
     """
-    Remove outliers using z-score method
+    Flag outliers within each configuration (vectorized over all groups)
+    
+    - mad: |0.6745 (x - median) / MAD| > threshold; groups whose MAD is 0
+      use the mean absolute deviation (x 1.2533) instead, and groups without
+      any spread keep every row
+    - iqr: x outside [Q1 - threshold IQR, Q3 + threshold IQR]
+    
+    Returns:
+        Boolean Series aligned with df, True for outliers
+    """
+    if method not in OUTLIER_METHODS:
+        raise ValueError(f"Unknown outlier method '{method}' (choose from {', '.join(OUTLIER_METHODS)})")
+    threshold = DEFAULT_OUTLIER_THRESHOLDS[method] if threshold is None else threshold
+    group_by = group_columns(df) if group_by is None else group_by
+    
+    values = df[column].astype('float64')
+    grouped = values.groupby([df[key] for key in group_by], observed=True, sort=False)
+    
+    if method == 'iqr':
+        codes = grouped.ngroup().to_numpy()
+        quartiles = group_quantiles(*sort_groups(values.to_numpy(), codes, grouped.ngroups), [0.25, 0.75])
+        q1, q3 = quartiles[0][codes], quartiles[1][codes]
+        spread = q3 - q1
+        outliers = (values.to_numpy() < q1 - threshold * spread) | (values.to_numpy() > q3 + threshold * spread)
+        return pd.Series(outliers, index=df.index)
+    
+    median = grouped.transform('median')
+    deviation = (values - median).abs()
+    by_group = deviation.groupby([df[key] for key in group_by], observed=True, sort=False)
+    scale = by_group.transform('median') / 0.6745
+    mean_scale = by_group.transform('mean') * 1.2533
+    scale = scale.where(scale > 0, mean_scale)
+    return (scale > 0) & (deviation / scale.where(scale > 0, 1.0) > threshold)
+
+def filter_outliers(
+    df: pd.DataFrame,
+    column: str = 'execution_time_ms',
+    method: str = 'mad',
+    threshold: Optional[float] = None,
+    group_by: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Remove outliers per (implementation, matrix_size[, m, n, k, threads, processes]) group
+    
+    Timings of different configurations differ by orders of magnitude, so
+    outliers are judged against their own group with robust statistics
+    (median/MAD or quartiles), not against the whole column.
     
     Args:
         df: Input dataframe
         column: Column to check for outliers
-        threshold: Z-score threshold (default: 3.0 standard deviations)
+        method: 'mad' (modified z-score) or 'iqr' (Tukey fences)
+        threshold: Cutoff (default: 3.5 for mad, 1.5 for iqr)
+        group_by: Columns defining a group (default: the configuration columns)
     
     Returns:
         Filtered dataframe with outliers removed
     """
-    from scipy import stats
-    
-    z_scores = stats.zscore(df[column])
-    abs_z_scores = abs(z_scores)
-    filtered_df = df[abs_z_scores < threshold]
+    outliers = outlier_mask(df, column, method, threshold, group_by)
+    filtered_df = df[~outliers]
     
     removed = len(df) - len(filtered_df)
     if removed > 0:
@@ -99,19 +208,34 @@ def filter_outliers(df: pd.DataFrame, column: str = 'execution_time_ms', thresho
     
     return filtered_df
 
-def aggregate_runs(df: pd.DataFrame, group_by: List[str] = None) -> pd.DataFrame:
+def aggregate_runs(
+    df: pd.DataFrame,
+    group_by: List[str] = None,
+    percentiles: Sequence[float] = (5, 25, 75, 95, 99),
+    n_bootstrap: int = 0,
+    confidence: float = 0.95,
+    seed: Optional[int] = 0
+) -> pd.DataFrame:
     """
     Aggregate multiple runs with statistics
     
     Args:
         df: Input dataframe
-        group_by: Columns to group by (default: implementation and matrix_size)
+        group_by: Columns to group by (default: implementation, matrix_size
+            and m/n/k, threads/processes when present)
+        percentiles: Execution time percentiles to report (p<k> columns)
+        n_bootstrap: Bootstrap resamples for a confidence interval of the
+            median execution time (0 disables)
+        confidence: Confidence level of the interval
+        seed: Seed for the bootstrap random generator
     
     Returns:
-        Aggregated dataframe with mean, std, min, max
+        Aggregated dataframe with mean, std, min, max and count, the median
+        and percentiles of execution_time_ms and, with bootstrapping,
+        execution_time_ms_median_ci_low/high
     """
     if group_by is None:
-        group_by = ['implementation', 'matrix_size']
+        group_by = group_columns(df)
     
     agg_dict = {
         'execution_time_ms': ['mean', 'std', 'min', 'max', 'count'],
@@ -121,12 +245,31 @@ def aggregate_runs(df: pd.DataFrame, group_by: List[str] = None) -> pd.DataFrame
     # Only aggregate columns that exist
     agg_dict = {k: v for k, v in agg_dict.items() if k in df.columns}
     
-    grouped = df.groupby(group_by).agg(agg_dict).reset_index()
+    grouped = df.groupby(group_by, observed=True, sort=True)
+    aggregated = grouped.agg(agg_dict).reset_index()
     
     # Flatten multi-level column names
-    grouped.columns = ['_'.join(col).strip('_') for col in grouped.columns.values]
+    aggregated.columns = ['_'.join(col).strip('_') for col in aggregated.columns.values]
+    
+    if 'execution_time_ms' in df.columns:
+        # Sort once by (group, time): every quantile is then an indexed read
+        values = df['execution_time_ms'].to_numpy(dtype='float64')
+        codes = grouped.ngroup().to_numpy()
+        n_groups = len(aggregated)
+        sorted_values, starts, counts = sort_groups(values, codes, n_groups)
+        quantiles = [0.5] + [p / 100.0 for p in percentiles]
+        table = group_quantiles(sorted_values, starts, counts, quantiles)
+        aggregated['execution_time_ms_median'] = table[0]
+        for p, row in zip(percentiles, table[1:]):
+            aggregated[f'execution_time_ms_p{p:g}'] = row
+        
+        if n_bootstrap:
+            medians = bootstrap_group_quantiles(values, codes, n_groups, 0.5, n_bootstrap, seed)
+            alpha = (1.0 - confidence) / 2.0
+            aggregated['execution_time_ms_median_ci_low'] = np.nanquantile(medians, alpha, axis=0)
+            aggregated['execution_time_ms_median_ci_high'] = np.nanquantile(medians, 1.0 - alpha, axis=0)
     
-    return grouped
+    return aggregated
 
 if __name__ == '__main__':
     # Test the loader
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+On-disk result formats and store layout (standard library only)
+
+Everything here can be imported without pandas, so fast paths such as the
+``summary`` and ``report`` CLI commands can locate result files and read the
+store manifest without paying for the heavy analysis stack.
+"""
+
+import re
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Bump when the canonical schema or the manifest statistics change so cached
+# copies are rebuilt
+SCHEMA_VERSION = 5
+
+STORE_DIRNAME = '.store'
+MANIFEST_NAME = 'manifest.json'
+
+# Run name used for CSV files sitting directly in the results directory
+ROOT_RUN = 'root'
+
+# run_benchmarks.sh concatenates every CSV of a run into this file, so
+# ingesting it would count each measurement twice
+COMBINED_NAME = 'combined_results.csv'
+
+# Shape of an M x K by K x N product; files without these columns hold
+# square products, so they default to matrix_size
+SHAPE_COLUMNS = ['m', 'n', 'k']
+
+# Bytes per element of the operands and of the result, per element type
+# (int8 products accumulate into int32)
+ELEMENT_BYTES = {'float16': (2, 2), 'float32': (4, 4), 'float64': (8, 8), 'int8': (1, 4)}
+
+# Configuration-name suffix of every non-default element type
+DTYPE_SUFFIXES = {'float16': '_f16', 'float32': '_f32', 'int8': '_i8'}
+
+DEFAULT_DTYPE = 'float64'
+
+# The C binaries compute in float; rows of files written before the dtype
+# column existed are attributed float32 for these and float64 (the naive C
+# and Python implementations) for everything else. Rows with a dtype keep it.
+FLOAT32_PREFIXES = ('baseline', 'optimized', 'openmp', 'mpi', 'cuda')
+
+# Per-configuration sufficient statistics kept in the store manifest, so
+# summaries can be produced without pandas (see quick_stats.py)
+STATS_KEYS = ['implementation', 'matrix_size', 'threads', 'processes'] + SHAPE_COLUMNS + ['dtype']
+STATS_FIELDS = ['n', 'time_sum', 'time_sumsq', 'time_min', 'time_max',
+                'gflops_n', 'gflops_sum', 'gflops_sumsq', 'gflops_max']
+
+# Column order printed by the C binaries (see src/baseline/matrix_mult.c)
+BINARY_COLUMNS = [
+    'timestamp', 'implementation', 'matrix_size', 'total_time_ms', 'total_gflops',
+    'kernel_time_ms', 'h2d_time_ms', 'd2h_time_ms', 'block_size', 'node', 'verification'
+]
+
+# Alternative names found in result files
+COLUMN_ALIASES = {
+    'total_time_ms': 'execution_time_ms',
+    'time_ms': 'execution_time_ms',
+    'total_gflops': 'gflops',
+}
+
+LEGACY = 'legacy'
+BINARY = 'binary'
+HEADERED = 'headered'
+
+PARALLELISM_PATTERN = re.compile(r'^(\d+)([tp])$')
+
+def detect_schema(path: Path) -> str:
+    """
+    Detect the result format of a CSV file from its first line
+
+    Returns:
+        One of 'legacy', 'binary' or 'headered'
+    """
+    with open(path) as f:
+        first = f.readline().strip()
+
+    fields = first.split(',')
+    if fields[0] == 'MatrixSize':
+        return LEGACY
+    if 'implementation' in fields or 'matrix_size' in fields:
+        return HEADERED
+    if len(fields) == len(BINARY_COLUMNS):
+        return BINARY
+    raise ValueError(f"Unrecognized result format in {Path(path).name}: {first[:80]!r}")
+
+
+def legacy_implementation_name(path: Path) -> str:
+    """Implementation name for a legacy file, e.g. 'c_optimized_result.csv' -> 'c_optimized'"""
+    return re.sub(r'_result$', '', Path(path).stem)
+
+
+def run_name(rel_path: Path) -> str:
+    """Run a CSV belongs to, from its path relative to the results directory"""
+    rel_path = Path(rel_path)
+    return rel_path.parts[0] if len(rel_path.parts) > 1 else ROOT_RUN
+
+
+def source_files(results_dir: Path) -> Iterator[Path]:
+    """Every result CSV below results_dir, excluding the store and combined files"""
+    for csv_file in Path(results_dir).rglob('*.csv'):
+        if csv_file.name == COMBINED_NAME or STORE_DIRNAME in csv_file.parts:
+            continue
+        yield csv_file
+
+
+def latest_run(results_dir: Path) -> Optional[Path]:
+    """Most recently modified run directory below results_dir (None if there is none)"""
+    subdirs = [d for d in Path(results_dir).iterdir()
+               if d.is_dir() and not d.name.startswith('.')]
+    return max(subdirs, key=lambda d: d.stat().st_mtime) if subdirs else None
+
+
+def shape_label(size: int, m: int, n: int, k: int) -> str:
+    """'N' for a square product, 'MxNxK' for a rectangular one"""
+    return str(size) if m == n == k == size else f'{m}x{n}x{k}'
+
+
+def default_dtype(implementation: str) -> str:
+    """Element type of rows recorded without a dtype (older files only)"""
+    return 'float32' if implementation.startswith(FLOAT32_PREFIXES) else DEFAULT_DTYPE
+
+
+def dtype_family(implementation: str, dtype: str) -> str:
+    """Implementation name without its element-type suffix ('numpy_matmul_f32' -> 'numpy_matmul')"""
+    suffix = DTYPE_SUFFIXES.get(dtype)
+    if not suffix:
+        return implementation
+    return re.sub(rf'{re.escape(suffix)}(?=_|$)', '', implementation, count=1)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Per-run statistics of every historical run
+
+Keeps an index of the sufficient statistics (see quick_stats.ConfigStats) of
+every CSV below a results directory, per run, in
+``<results_dir>/.store/history.json``. Refreshing only looks at files that are
+new or changed since the last refresh: their statistics come from the result
+store manifest when it is current, otherwise the file is read with
+``quick_stats.iter_rows`` (pandas only for the legacy and headerless
+formats). Runs are ordered by name, which sorts the timestamped run
+directories of run_benchmarks.sh chronologically.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List
+
+try:
+    from .formats import (MANIFEST_NAME, SCHEMA_VERSION, STATS_FIELDS, STORE_DIRNAME,
+                          run_name, source_files)
+    from .quick_stats import KEY_LENGTH, ConfigKey, ConfigStats, iter_rows
+except ImportError:
+    from formats import (MANIFEST_NAME, SCHEMA_VERSION, STATS_FIELDS, STORE_DIRNAME,
+                         run_name, source_files)
+    from quick_stats import KEY_LENGTH, ConfigKey, ConfigStats, iter_rows
+
+HISTORY_NAME = 'history.json'
+
+
+def _file_stats(csv_file: Path) -> List[list]:
+    stats: Dict[ConfigKey, ConfigStats] = {}
+    for row in iter_rows(csv_file):
+        stats.setdefault(row[:KEY_LENGTH], ConfigStats()).add(*row[KEY_LENGTH:])
+    return [list(config) + [getattr(s, name) for name in STATS_FIELDS] for config, s in stats.items()]
+
+
+class RunHistory:
+    """Incrementally maintained per-run, per-configuration statistics"""
+
+    def __init__(self, results_dir):
+        self.results_dir = Path(results_dir)
+        self.path = self.results_dir / STORE_DIRNAME / HISTORY_NAME
+        self._sources = self._read(self.path)
+
+    @staticmethod
+    def _read(path: Path) -> Dict[str, dict]:
+        try:
+            with open(path) as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return index['sources'] if index.get('schema_version') == SCHEMA_VERSION else {}
+
+    def _write(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'schema_version': SCHEMA_VERSION, 'sources': self._sources}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self) -> int:
+        """
+        Index new or changed CSV files and forget deleted ones
+
+        Returns:
+            Number of CSV files (re)indexed
+        """
+        if not self.results_dir.exists():
+            raise FileNotFoundError(f"Results directory not found: {self.results_dir}")
+
+        manifest = self._read(self.results_dir / STORE_DIRNAME / MANIFEST_NAME)
+        seen = set()
+        indexed = 0
+        for csv_file in source_files(self.results_dir):
+            key = csv_file.relative_to(self.results_dir).as_posix()
+            seen.add(key)
+            stat = csv_file.stat()
+            entry = self._sources.get(key)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                continue
+
+            stored = manifest.get(key)
+            try:
+                if stored and stored['mtime_ns'] == stat.st_mtime_ns and stored['size'] == stat.st_size:
+                    rows = stored['stats']
+                else:
+                    rows = _file_stats(csv_file)
+            except (ValueError, KeyError, IndexError) as e:
+                print(f"Warning: Could not load {csv_file.name}: {e}")
+                continue
+            self._sources[key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                                  'run': run_name(Path(key)), 'stats': rows}
+            indexed += 1
+
+        removed = [key for key in self._sources if key not in seen]
+        for key in removed:
+            del self._sources[key]
+
+        if indexed or removed:
+            self._write()
+        return indexed
+
+    def runs(self) -> List[str]:
+        """Run names in chronological (name) order"""
+        return sorted({entry['run'] for entry in self._sources.values()})
+
+    def run_stats(self, run: str) -> Dict[ConfigKey, ConfigStats]:
+        """Statistics of every configuration measured in one run"""
+        stats: Dict[ConfigKey, ConfigStats] = {}
+        for entry in self._sources.values():
+            if entry['run'] != run:
+                continue
+            for row in entry['stats']:
+                config = tuple(row[:KEY_LENGTH])
+                stats.setdefault(config, ConfigStats()).merge(ConfigStats.from_fields(row[KEY_LENGTH:]))
+        return stats
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Derived metrics: speedup, parallel efficiency, batch-size saturation,
+element-type comparison, resource usage, group quantiles and bootstrap
+confidence intervals
+
+All metrics are computed with one groupby over the measurements and one merge
+against the baseline, so the cost is linear in the number of rows regardless
+of how many implementations and sizes are present.
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .formats import DEFAULT_DTYPE, dtype_family
+    from .schema import dtype_columns, shape_columns
+except ImportError:
+    from formats import DEFAULT_DTYPE, dtype_family
+    from schema import dtype_columns, shape_columns
+
+# Bound on bootstrap draws materialized at once (n_resamples x rows)
+BOOTSTRAP_BATCH_ELEMENTS = 4_000_000
+
+
+def _group_keys(df: pd.DataFrame) -> List[str]:
+    keys = ['implementation', 'matrix_size'] + shape_columns(df) + dtype_columns(df)
+    return keys + [c for c in ('threads', 'processes') if c in df.columns]
+
+
+def _workers(df: pd.DataFrame) -> pd.Series:
+    """Number of workers (threads x processes) behind each measurement"""
+    workers = pd.Series(1, index=df.index, dtype='int32')
+    for column in ('threads', 'processes'):
+        if column in df.columns:
+            workers *= df[column].astype('int32')
+    return workers
+
+
+def sort_groups(values: np.ndarray, codes: np.ndarray, n_groups: int):
+    """
+    Sort values by (group, value)
+
+    Returns:
+        (sorted values, group start offsets, group sizes); group g occupies
+        sorted[starts[g]:starts[g] + counts[g]] in ascending order
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes = np.asarray(codes)
+    order = np.lexsort((values, codes))
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return values[order], starts, counts
+
+
+def _quantile_positions(starts: np.ndarray, counts: np.ndarray, q: float):
+    """Neighbouring indices and weight of the linearly interpolated q-quantile of each group"""
+    position = (np.maximum(counts, 1) - 1) * q
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(counts - 1, 0))
+    return starts + lower, starts + upper, position - lower
+
+
+def group_quantiles(sorted_values: np.ndarray, starts: np.ndarray, counts: np.ndarray,
+                    quantiles: Sequence[float]) -> np.ndarray:
+    """
+    Quantiles of every group from the output of ``sort_groups``
+
+    Returns:
+        Array of shape (len(quantiles), n_groups); NaN for empty groups
+    """
+    result = np.full((len(quantiles), len(counts)), np.nan)
+    present = counts > 0
+    for row, q in enumerate(quantiles):
+        lower, upper, weight = _quantile_positions(starts[present], counts[present], q)
+        result[row, present] = sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+    return result
+
+
+def _bootstrap_draws(counts: np.ndarray, starts: np.ndarray, n_resamples: int, seed: Optional[int]):
+    """
+    Batches of resampled row indices into the group-sorted values
+
+    Each yielded array has shape (batch, rows); every row's replacement is
+    drawn from its own group's slice, so group g stays in columns
+    starts[g]:starts[g] + counts[g].
+    """
+    rng = np.random.default_rng(seed)
+    row_start = np.repeat(starts, counts)
+    row_count = np.repeat(counts, counts)
+    rows = int(counts.sum())
+    batch = max(1, BOOTSTRAP_BATCH_ELEMENTS // max(rows, 1))
+    for first in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - first)
+        yield first, row_start + (rng.random((size, rows)) * row_count).astype(np.int64)
+
+
+def bootstrap_group_means(
+    values: np.ndarray,
+    codes: np.ndarray,
+    n_groups: int,
+    n_resamples: int = 1000,
+    seed: Optional[int] = 0
+) -> np.ndarray:
+    """
+    Bootstrap the mean of every group at once
+
+    Rows are sorted by group, and each batch of resamples draws every row's
+    replacement from its own group's slice of the sorted array, so a single
+    np.add.reduceat produces the resampled means of all groups.
+
+    Args:
+        values: Measurement per row
+        codes: Group index (0..n_groups-1) per row
+        n_groups: Number of groups
+        n_resamples: Number of bootstrap resamples
+        seed: Seed for the random generator
+
+    Returns:
+        Array of shape (n_resamples, n_groups) with resampled group means
+    """
+    values, starts, counts = sort_groups(values, codes, n_groups)
+    present = counts > 0
+
+    means = np.full((n_resamples, n_groups), np.nan)
+    for first, draws in _bootstrap_draws(counts, starts, n_resamples, seed):
+        sums = np.add.reduceat(values[draws], starts[present], axis=1)
+        means[first:first + len(draws), present] = sums / counts[present]
+
+    return means
+
+
+def bootstrap_group_quantiles(
+    values: np.ndarray,
+    codes: np.ndarray,
+    n_groups: int,
+    q: float = 0.5,
+    n_resamples: int = 1000,
+    seed: Optional[int] = 0
+) -> np.ndarray:
+    """
+    Bootstrap a quantile (default: the median) of every group at once
+
+    A resampled quantile is an order statistic of the resample, and its
+    distribution is known exactly: with the m values of a group sorted, the
+    k-th smallest of m draws is at or below position p when at least k + 1
+    draws land in positions 0..p, i.e. with probability
+    P(Binomial(m, (p + 1) / m) >= k + 1) = I_{(p+1)/m}(k + 1, m - k). The
+    bootstrap therefore samples positions from that CDF (one betainc over all
+    rows, one searchsorted per batch) instead of drawing m values per group
+    and resample, which makes the cost independent of the group sizes.
+    The quantile is taken as the nearest-rank order statistic k = round(q (m - 1)).
+
+    Returns:
+        Array of shape (n_resamples, n_groups) with resampled group quantiles
+    """
+    from scipy.special import betainc
+
+    values, starts, counts = sort_groups(values, codes, n_groups)
+    present = np.flatnonzero(counts > 0)
+    rank = np.rint(q * (counts - 1)).astype(np.int64)
+
+    # CDF of the resampled order statistic over each group's positions,
+    # shifted by the group index so the concatenation stays sorted
+    group = np.repeat(np.arange(n_groups), counts)
+    position = np.arange(len(values)) - starts[group] + 1
+    m, k = counts[group], rank[group]
+    cdf = betainc(k + 1.0, (m - k).astype(np.float64), position / m) + group
+
+    rng = np.random.default_rng(seed)
+    result = np.full((n_resamples, n_groups), np.nan)
+    batch = max(1, BOOTSTRAP_BATCH_ELEMENTS // max(len(present), 1))
+    for first in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - first)
+        targets = present + rng.random((size, len(present)))
+        index = np.searchsorted(cdf, targets, side='left')
+        index = np.minimum(index, (starts + counts - 1)[present])
+        result[first:first + size, present] = values[index]
+
+    return result
+
+
+def calculate_speedup(
+    df: pd.DataFrame,
+    baseline: str = 'naive',
+    time_column: str = 'execution_time_ms',
+    n_bootstrap: int = 0,
+    confidence: float = 0.95,
+    seed: Optional[int] = 0
+) -> pd.DataFrame:
+    """
+    Calculate speedup and parallel efficiency relative to a baseline
+
+    Args:
+        df: Measurements in the canonical schema
+        baseline: Implementation used as reference (e.g., 'naive', 'baseline', 'optimized_O3')
+        time_column: Column holding the per-run time
+        n_bootstrap: Number of bootstrap resamples for confidence intervals (0 disables)
+        confidence: Confidence level of the intervals
+        seed: Seed for the bootstrap random generator
+
+    Returns:
+        One row per (implementation, matrix_size[, m, n, k, dtype, threads, processes])
+        (m/n/k for rectangular products, dtype for mixed element types, see
+        schema.shape_columns and schema.dtype_columns) with
+        time_mean, baseline_time_mean, speedup, workers and efficiency
+        (speedup / workers); with bootstrapping also speedup_ci_low and
+        speedup_ci_high
+    """
+    keys = _group_keys(df)
+    data = df[keys + [time_column]].dropna(subset=[time_column])
+    data = data.assign(workers=_workers(data))
+
+    grouped = data.groupby(keys, observed=True, sort=True)
+    stats = grouped.agg(time_mean=(time_column, 'mean'), workers=('workers', 'max')).reset_index()
+    stats['_group'] = np.arange(len(stats))
+
+    # The baseline time for each size (shape) is its least parallel configuration
+    sizes = ['matrix_size'] + shape_columns(df)
+    base = stats[stats['implementation'] == baseline]
+    base = base.loc[base.groupby(sizes)['workers'].idxmin()]
+    base = base[sizes + ['time_mean', '_group']].rename(
+        columns={'time_mean': 'baseline_time_mean', '_group': '_baseline_group'}
+    )
+
+    result = stats.merge(base, on=sizes, how='inner')
+    result['speedup'] = result['baseline_time_mean'] / result['time_mean']
+    result['efficiency'] = result['speedup'] / result['workers']
+
+    if n_bootstrap and not result.empty:
+        means = bootstrap_group_means(
+            data[time_column].to_numpy(), grouped.ngroup().to_numpy(), len(stats),
+            n_resamples=n_bootstrap, seed=seed
+        )
+        ratios = means[:, result['_baseline_group'].to_numpy()] / means[:, result['_group'].to_numpy()]
+        alpha = (1.0 - confidence) / 2.0
+        result['speedup_ci_low'] = np.nanquantile(ratios, alpha, axis=0)
+        result['speedup_ci_high'] = np.nanquantile(ratios, 1.0 - alpha, axis=0)
+
+    result = result.drop(columns=['_group', '_baseline_group'])
+    return result.sort_values(keys, ignore_index=True)
+
+
+def batch_saturation(df: pd.DataFrame, tolerance: float = 0.1) -> pd.DataFrame:
+    """
+    Batch size at which per-call overhead stops mattering, per batched configuration
+
+    Batched engines record batch_size and matrix_latency_us; their
+    configuration names carry the batch as a ``_b<batch>`` tag
+    (numpy_batched_parallel_b256_4t), which is dropped to form the family.
+
+    Args:
+        df: Measurements in the canonical schema
+        tolerance: A batch saturates when its mean per-matrix latency is within
+            this fraction of the family's best latency at that size
+
+    Returns:
+        One row per (family, matrix_size[, threads]) with the smallest
+        saturating batch_size, its matrix_latency_us, the best_latency_us,
+        single_latency_us (batch 1, NaN if not measured) and overhead_fraction,
+        the share of the single-matrix latency that batching removes
+    """
+    columns = ['family', 'matrix_size', 'batch_size', 'matrix_latency_us',
+               'best_latency_us', 'single_latency_us', 'overhead_fraction']
+    if 'batch_size' not in df.columns:
+        return pd.DataFrame(columns=columns)
+    data = df.dropna(subset=['batch_size', 'matrix_latency_us'])
+    data = data.assign(family=data['implementation'].astype(str).str.replace(r'_b\d+', '', regex=True))
+    keys = ['family', 'matrix_size'] + [c for c in ('threads',) if c in data.columns]
+
+    latency = data.groupby(keys + ['batch_size'], observed=True)['matrix_latency_us'].mean().reset_index()
+    best = latency.groupby(keys)['matrix_latency_us'].transform('min')
+    latency = latency.assign(best_latency_us=best)
+    saturated = latency[latency['matrix_latency_us'] <= best * (1.0 + tolerance)]
+    result = saturated.loc[saturated.groupby(keys)['batch_size'].idxmin()]
+
+    single = latency[latency['batch_size'] == 1][keys + ['matrix_latency_us']]
+    result = result.merge(single.rename(columns={'matrix_latency_us': 'single_latency_us'}), on=keys, how='left')
+    result['overhead_fraction'] = 1.0 - result['best_latency_us'] / result['single_latency_us']
+    result['batch_size'] = result['batch_size'].astype('int64')
+    return result[keys + columns[2:]].sort_values(keys, ignore_index=True)
+
+
+def dtype_comparison(df: pd.DataFrame, reference: str = DEFAULT_DTYPE) -> pd.DataFrame:
+    """
+    Throughput and memory traffic of every element type against a reference type
+
+    Configuration names carry a non-default element type as a suffix after
+    the engine name (numpy_matmul_f32, numpy_parallel_i8_static_4t), which
+    is dropped to form the family compared across types.
+
+    Args:
+        df: Measurements in the canonical schema
+        reference: Element type the others are compared with
+
+    Returns:
+        One row per (family, matrix_size[, m, n, k], dtype), for families
+        measured in more than one element type, with the mean
+        gflops, execution_time_ms and bytes_moved, the effective
+        bandwidth_gbs (bytes_moved over the time), the speedup over the
+        family's reference type and its memory_ratio (bytes_moved relative to
+        the reference); both NaN when the reference type was not measured
+    """
+    data = df.assign(family=[dtype_family(impl, dtype) for impl, dtype in
+                             zip(df['implementation'].astype(str), df['dtype'].astype(str))])
+    data['dtype'] = data['dtype'].astype(str)
+    data = data[data.groupby('family')['dtype'].transform('nunique') > 1]
+    sizes = ['matrix_size'] + shape_columns(df)
+    keys = ['family'] + sizes + [c for c in ('threads', 'processes') if c in df.columns]
+    stats = data.groupby(keys + ['dtype'], observed=True).agg(
+        gflops=('gflops', 'mean'), execution_time_ms=('execution_time_ms', 'mean'),
+        bytes_moved=('bytes_moved', 'mean')
+    ).reset_index()
+    stats['bandwidth_gbs'] = stats['bytes_moved'] / (stats['execution_time_ms'] * 1e6)
+
+    base = stats[stats['dtype'] == reference][keys + ['execution_time_ms', 'bytes_moved']]
+    result = stats.merge(base, on=keys, how='left', suffixes=('', '_reference'))
+    result['speedup'] = result['execution_time_ms_reference'] / result['execution_time_ms']
+    result['memory_ratio'] = result['bytes_moved'] / result['bytes_moved_reference']
+    columns = keys + ['dtype', 'gflops', 'execution_time_ms', 'bytes_moved', 'bandwidth_gbs',
+                      'speedup', 'memory_ratio']
+    return result[columns].sort_values(keys + ['dtype'], ignore_index=True)
+
+
+def resource_usage(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Resource usage and hardware counters of the binary runs, per configuration
+
+    Binaries are reaped with os.wait4 and, with --perf, run under perf stat
+    (see harness.runners.rusage_columns); engine runs carry none of these
+    columns and are left out.
+
+    Args:
+        df: Measurements in the canonical schema
+
+    Returns:
+        One row per (implementation, matrix_size[, m, n, k, dtype, threads,
+        processes]) with the number of runs, the largest peak_rss_mib,
+        rss_upper_bound (True when a peak did not exceed the harness's own, so
+        only bounds the binary's footprint from above), and the mean page
+        faults, context switches and user/system CPU time per run; with perf
+        counters also the mean perf_ipc and perf_llc_misses
+    """
+    measures = {
+        'minor_faults': 'mean', 'major_faults': 'mean',
+        'voluntary_ctx_switches': 'mean', 'involuntary_ctx_switches': 'mean',
+        'user_time_ms': 'mean', 'system_time_ms': 'mean',
+        'perf_ipc': 'mean', 'perf_llc_misses': 'mean',
+    }
+    keys = _group_keys(df)
+    if 'peak_rss_kb' not in df.columns:
+        return pd.DataFrame(columns=keys + ['runs', 'peak_rss_mib', 'rss_upper_bound'])
+
+    data = df[df['peak_rss_kb'].notna()]
+    launcher = data['launcher_rss_kb'] if 'launcher_rss_kb' in data.columns else np.nan
+    data = data.assign(peak_rss_mib=data['peak_rss_kb'] / 1024.0,
+                       rss_upper_bound=data['peak_rss_kb'] <= launcher)
+    aggregations = {'runs': ('peak_rss_kb', 'size'), 'peak_rss_mib': ('peak_rss_mib', 'max'),
+                    'rss_upper_bound': ('rss_upper_bound', 'any')}
+    aggregations.update({c: (c, how) for c, how in measures.items()
+                         if c in data.columns and data[c].notna().any()})
+    result = data.groupby(keys, observed=True).agg(**aggregations).reset_index()
+    return result.sort_values(keys, ignore_index=True)
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Pandas-free summaries and reports of benchmark results
+
+Statistics are merged from the per-configuration sufficient statistics that
+the result store keeps in its manifest, so a summary of ingested results
+never needs pandas, pyarrow or matplotlib and starts in a fraction of the
+time of the full analysis scripts. CSV files that are new or changed since
+the last ingest are read row by row: headered files (everything the harness
+writes) with the csv module, the legacy and headerless binary formats with
+the canonical schema reader, which imports pandas on first use.
+"""
+
+import csv
+import json
+import math
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from .formats import (COLUMN_ALIASES, HEADERED, MANIFEST_NAME, PARALLELISM_PATTERN, SCHEMA_VERSION,
+                          SHAPE_COLUMNS, STATS_FIELDS, STATS_KEYS, STORE_DIRNAME, default_dtype,
+                          detect_schema, run_name, shape_label, source_files)
+except ImportError:
+    from formats import (COLUMN_ALIASES, HEADERED, MANIFEST_NAME, PARALLELISM_PATTERN, SCHEMA_VERSION,
+                         SHAPE_COLUMNS, STATS_FIELDS, STATS_KEYS, STORE_DIRNAME, default_dtype,
+                         detect_schema, run_name, shape_label, source_files)
+
+# (implementation, matrix_size, threads, processes, m, n, k, dtype)
+ConfigKey = Tuple[str, int, int, int, int, int, int, str]
+
+KEY_LENGTH = len(STATS_KEYS)
+
+
+def _number(text: str, default: float = math.nan) -> float:
+    """Like pd.to_numeric(errors='coerce').fillna(default)"""
+    try:
+        value = float(text)
+    except ValueError:
+        return default
+    return default if math.isnan(value) else value
+
+
+def _headered_rows(csv_file: Path) -> Iterator[tuple]:
+    """
+    ``schema.iter_rows`` of a headered file, with the csv module
+
+    Fills in the same defaults as ``schema.normalize``: threads and processes
+    from the block_size tag, m/n/k from matrix_size and the dtype from the
+    implementation.
+    """
+    with open(csv_file, newline='') as f:
+        reader = csv.reader(f)
+        columns: Dict[str, int] = {}
+        for i, name in enumerate(next(reader)):
+            columns.setdefault(COLUMN_ALIASES.get(name, name), i)
+
+        def field(row: List[str], name: str) -> str:
+            i = columns.get(name)
+            return row[i] if i is not None and i < len(row) else ''
+
+        for row in reader:
+            if not row:
+                continue
+            implementation = field(row, 'implementation')
+            size = int(float(field(row, 'matrix_size')))
+            parallelism = {'threads': 1, 'processes': 1}
+            tag = PARALLELISM_PATTERN.match(field(row, 'block_size'))
+            for name in parallelism:
+                if name in columns:
+                    parallelism[name] = int(_number(field(row, name), 1.0))
+                elif tag and tag.group(2) == name[0]:
+                    parallelism[name] = int(tag.group(1))
+            shape = [int(_number(field(row, c), size)) for c in SHAPE_COLUMNS]
+            yield (implementation, size, parallelism['threads'], parallelism['processes'], *shape,
+                   field(row, 'dtype') or default_dtype(implementation),
+                   _number(field(row, 'execution_time_ms')), _number(field(row, 'gflops')))
+
+
+def iter_rows(csv_file: Path) -> Iterator[tuple]:
+    """
+    The STATS_KEYS, time and GFLOPS of every measurement in a result file
+
+    Headered files are read without pandas; the other formats go through
+    ``schema.iter_rows``, imported on first use.
+    """
+    if detect_schema(csv_file) == HEADERED:
+        return _headered_rows(csv_file)
+    try:
+        from .schema import iter_rows as read_rows
+    except ImportError:
+        from schema import iter_rows as read_rows
+    return read_rows(csv_file)
+
+
+class ConfigStats:
+    """Running count/sum/sum of squares/extremes of time and GFLOPS"""
+
+    __slots__ = STATS_FIELDS
+
+    def __init__(self):
+        self.n = self.gflops_n = 0
+        self.time_sum = self.time_sumsq = 0.0
+        self.gflops_sum = self.gflops_sumsq = 0.0
+        self.time_min = math.inf
+        self.time_max = self.gflops_max = -math.inf
+
+    def add(self, time_ms: float, gflops: float):
+        if math.isnan(time_ms):
+            return
+        self.n += 1
+        self.time_sum += time_ms
+        self.time_sumsq += time_ms * time_ms
+        self.time_min = min(self.time_min, time_ms)
+        self.time_max = max(self.time_max, time_ms)
+        if not math.isnan(gflops):
+            self.gflops_n += 1
+            self.gflops_sum += gflops
+            self.gflops_sumsq += gflops * gflops
+            self.gflops_max = max(self.gflops_max, gflops)
+
+    def merge(self, other: 'ConfigStats'):
+        self.n += other.n
+        self.time_sum += other.time_sum
+        self.time_sumsq += other.time_sumsq
+        self.time_min = min(self.time_min, other.time_min)
+        self.time_max = max(self.time_max, other.time_max)
+        self.gflops_n += other.gflops_n
+        self.gflops_sum += other.gflops_sum
+        self.gflops_sumsq += other.gflops_sumsq
+        self.gflops_max = max(self.gflops_max, other.gflops_max)
+
+    @classmethod
+    def from_fields(cls, values: List) -> 'ConfigStats':
+        stats = cls()
+        for name, value in zip(STATS_FIELDS, values):
+            if value is not None:
+                setattr(stats, name, value)
+        return stats
+
+    @staticmethod
+    def _std(n: int, total: float, sumsq: float) -> float:
+        if n < 2:
+            return math.nan
+        return math.sqrt(max(sumsq - total * total / n, 0.0) / (n - 1))
+
+    @property
+    def time_mean(self) -> float:
+        return self.time_sum / self.n if self.n else math.nan
+
+    @property
+    def time_std(self) -> float:
+        return self._std(self.n, self.time_sum, self.time_sumsq)
+
+    @property
+    def gflops_mean(self) -> float:
+        return self.gflops_sum / self.gflops_n if self.gflops_n else math.nan
+
+    @property
+    def gflops_std(self) -> float:
+        return self._std(self.gflops_n, self.gflops_sum, self.gflops_sumsq)
+
+
+def _read_manifest(results_dir: Path) -> Dict[str, dict]:
+    try:
+        with open(results_dir / STORE_DIRNAME / MANIFEST_NAME) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if manifest.get('schema_version') != SCHEMA_VERSION:
+        return {}
+    return manifest['sources']
+
+
+def collect_stats(results_dir, runs: Optional[List[str]] = None) -> Dict[ConfigKey, ConfigStats]:
+    """
+    Gather per-configuration statistics for every CSV below results_dir
+
+    Args:
+        results_dir: Directory containing CSV files (searched recursively)
+        runs: Only include these run subdirectories
+
+    Returns:
+        Mapping of (implementation, matrix_size, threads, processes, m, n, k) to statistics
+    """
+    results_dir = Path(results_dir)
+    if not results_dir.exists():
+        raise FileNotFoundError(f"Results directory not found: {results_dir}")
+
+    manifest = _read_manifest(results_dir)
+    stats: Dict[ConfigKey, ConfigStats] = {}
+
+    for csv_file in source_files(results_dir):
+        key = csv_file.relative_to(results_dir).as_posix()
+        if runs is not None and run_name(Path(key)) not in runs:
+            continue
+
+        entry = manifest.get(key)
+        stat = csv_file.stat()
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            for row in entry['stats']:
+                config = tuple(row[:KEY_LENGTH])
+                stats.setdefault(config, ConfigStats()).merge(ConfigStats.from_fields(row[KEY_LENGTH:]))
+            continue
+
+        try:
+            for row in iter_rows(csv_file):
+                stats.setdefault(row[:KEY_LENGTH], ConfigStats()).add(*row[KEY_LENGTH:])
+        except (ValueError, KeyError, IndexError) as e:
+            print(f"Warning: Could not load {csv_file.name}: {e}")
+
+    return stats
+
+
+def _group(stats: Dict[ConfigKey, ConfigStats], fields: Tuple[int, ...]) -> Dict[tuple, ConfigStats]:
+    """Merge configurations sharing the key fields at the given positions"""
+    grouped: Dict[tuple, ConfigStats] = {}
+    for config, config_stats in stats.items():
+        grouped.setdefault(tuple(config[i] for i in fields), ConfigStats()).merge(config_stats)
+    return dict(sorted(grouped.items()))
+
+
+# Key positions of the implementation, of the product (matrix_size, m, n, k)
+# and of the element type
+IMPLEMENTATION = (0,)
+SHAPE = (1, 4, 5, 6)
+DTYPE = (7,)
+
+
+def _fmt(value: float, digits: int = 3) -> str:
+    return 'nan' if value is None or math.isnan(value) or math.isinf(value) else f'{value:.{digits}f}'
+
+
+def _markdown_table(headers: List[str], rows: List[List[str]]) -> str:
+    lines = ['| ' + ' | '.join(headers) + ' |', '|' + '|'.join('---' for _ in headers) + '|']
+    lines += ['| ' + ' | '.join(row) + ' |' for row in rows]
+    return '\n'.join(lines)
+
+
+def print_summary(stats: Dict[ConfigKey, ConfigStats]):
+    """Print per-implementation summary statistics"""
+    print("\n" + "="*60)
+    print("PERFORMANCE SUMMARY")
+    print("="*60)
+
+    print(f"{'implementation':<24}{'runs':>6}{'gflops mean':>14}{'gflops max':>12}{'time_ms mean':>14}")
+    for (implementation,), s in _group(stats, IMPLEMENTATION).items():
+        print(f"{implementation:<24}{s.n:>6}{_fmt(s.gflops_mean, 2):>14}"
+              f"{_fmt(s.gflops_max, 2):>12}{_fmt(s.time_mean, 2):>14}")
+
+    print("="*60)
+
+
+def write_report(stats: Dict[ConfigKey, ConfigStats], output_dir, baseline: str = 'naive') -> Path:
+    """
+    Write the comparison report (markdown plus statistics/speedup CSVs)
+
+    Returns:
+        Path of the markdown report
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    # Keyed by (implementation, shape); shape is (matrix_size, m, n, k)
+    by_shape = {(impl, tuple(shape)): s for (impl, *shape), s in _group(stats, IMPLEMENTATION + SHAPE).items()}
+    # m, n and k columns only when there are rectangular products (see schema.shape_columns)
+    rectangular = any(not (m == n == k) for _, (_, m, n, k) in by_shape)
+    shape_headers = ['matrix_size', 'm', 'n', 'k'] if rectangular else ['matrix_size']
+    # Likewise a dtype column only for mixed element types (see schema.dtype_columns)
+    dtypes = {config[0]: config[DTYPE[0]] for config in stats}
+    by_dtype = {dtype: s for (dtype,), s in _group(stats, DTYPE).items()}
+    dtype_headers = ['dtype'] if len(by_dtype) > 1 else []
+    stat_headers = ['implementation'] + shape_headers + dtype_headers + [
+                    'execution_time_ms_mean', 'execution_time_ms_std',
+                    'execution_time_ms_min', 'execution_time_ms_max',
+                    'gflops_mean', 'gflops_std', 'gflops_max']
+
+    def shape_fields(shape) -> List[str]:
+        return [str(d) for d in shape[:len(shape_headers)]]
+
+    stat_rows = [
+        [impl] + shape_fields(shape) + [dtypes[impl]] * len(dtype_headers)
+        + [_fmt(s.time_mean), _fmt(s.time_std), _fmt(s.time_min), _fmt(s.time_max),
+           _fmt(s.gflops_mean), _fmt(s.gflops_std), _fmt(s.gflops_max)]
+        for (impl, shape), s in by_shape.items()
+    ]
+
+    # Like metrics_calculator.calculate_speedup, the baseline time for each
+    # shape is the least parallel configuration of the baseline implementation
+    # (ties go to the first in dtype, threads, processes order)
+    baseline_configs: Dict[tuple, Tuple[tuple, float]] = {}
+    for (impl, size, threads, processes, m, n, k, dtype), s in sorted(stats.items()):
+        if impl != baseline or not s.n:
+            continue
+        shape = (size, m, n, k)
+        rank = (threads * processes, dtype, threads, processes)
+        if shape not in baseline_configs or rank < baseline_configs[shape][0]:
+            baseline_configs[shape] = (rank, s.time_mean)
+    baseline_times = {shape: time_mean for shape, (_, time_mean) in baseline_configs.items()}
+    speedup = {
+        (impl, shape): baseline_times[shape] / s.time_mean
+        for (impl, shape), s in by_shape.items()
+        if shape in baseline_times and s.time_mean > 0
+    }
+    implementations = sorted({impl for impl, _ in speedup})
+    shapes = sorted({shape for _, shape in speedup})
+
+    best: Dict[tuple, Tuple[str, float]] = {}
+    for (impl, shape), s in by_shape.items():
+        if s.gflops_n and (shape not in best or s.gflops_max > best[shape][1]):
+            best[shape] = (impl, s.gflops_max)
+
+    size_header = 'shape' if rectangular else 'matrix_size'
+    report_file = output_path / 'comparison_report.md'
+    with open(report_file, 'w') as f:
+        f.write("# Matrix Multiplication Performance Comparison Report\n\n")
+
+        f.write("## Summary Statistics\n\n")
+        f.write(_markdown_table(stat_headers, stat_rows))
+        f.write("\n\n")
+
+        f.write(f"## Speedup Analysis (vs {baseline})\n\n")
+        f.write(_markdown_table(
+            [size_header] + implementations,
+            [[shape_label(*shape)] + [_fmt(speedup.get((impl, shape), math.nan)) for impl in implementations]
+             for shape in shapes]
+        ))
+        f.write("\n\n")
+
+        f.write(f"## Best Performers by Matrix {'Shape' if rectangular else 'Size'}\n\n")
+        f.write(_markdown_table(
+            [size_header, 'implementation', 'gflops'],
+            [[shape_label(*shape), impl, _fmt(gflops)] for shape, (impl, gflops) in sorted(best.items())]
+        ))
+        f.write("\n")
+
+        if dtype_headers:
+            f.write("\n## Throughput by Element Type\n\n")
+            f.write(_markdown_table(
+                ['dtype', 'configurations', 'gflops_mean', 'gflops_max'],
+                [[dtype, str(sum(1 for d in dtypes.values() if d == dtype)), _fmt(s.gflops_mean), _fmt(s.gflops_max)]
+                 for dtype, s in by_dtype.items()]
+            ))
+            f.write("\n")
+
+    with open(output_path / 'statistics.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(stat_headers)
+        writer.writerows(stat_rows)
+
+    with open(output_path / 'speedup.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['implementation'] + shape_headers + ['speedup'])
+        writer.writerows([impl] + shape_fields(shape) + [_fmt(value, 6)]
+                         for (impl, shape), value in sorted(speedup.items()))
+
+    return report_file
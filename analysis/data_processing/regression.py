@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Cross-run performance regression detection
+
+The latest run is compared, configuration by configuration, against a
+rolling baseline: the pooled measurements of the same configuration in the
+``window`` most recent earlier runs that measured it. A configuration is a
+regression when its mean time is higher by at least ``min_change`` (relative)
+and a one-sided Welch t-test on the two samples rejects "not slower" at
+level ``alpha``. Both tests run on the sufficient statistics kept by
+history.RunHistory, so no raw data is reloaded.
+"""
+
+import math
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+try:
+    from .formats import shape_label
+    from .history import RunHistory
+    from .quick_stats import ConfigKey, ConfigStats
+except ImportError:
+    from formats import shape_label
+    from history import RunHistory
+    from quick_stats import ConfigKey, ConfigStats
+
+REGRESSION = 'regression'
+IMPROVEMENT = 'improvement'
+UNCHANGED = 'unchanged'
+NEW = 'new'
+INSUFFICIENT = 'insufficient_data'
+
+
+def _betacf(a: float, b: float, x: float) -> float:
+    """Continued fraction of the incomplete beta function (modified Lentz)"""
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 301):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= d * c
+        if abs(d * c - 1.0) < 1e-14:
+            break
+    return result
+
+
+def _betainc(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta function I_x(a, b)"""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                     + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def t_sf(t: float, df: float) -> float:
+    """P(T > t) for Student's t distribution with df degrees of freedom"""
+    tail = 0.5 * _betainc(df / 2.0, 0.5, df / (df + t * t))
+    return tail if t > 0 else 1.0 - tail
+
+
+def welch_slower(current: ConfigStats, baseline: ConfigStats) -> float:
+    """One-sided Welch p-value of "current is not slower than baseline" """
+    var_c, var_b = current.time_std ** 2, baseline.time_std ** 2
+    se_c, se_b = var_c / current.n, var_b / baseline.n
+    se = se_c + se_b
+    diff = current.time_mean - baseline.time_mean
+    if se == 0.0:
+        return 0.0 if diff > 0 else 1.0
+    df = se * se / (se_c * se_c / (current.n - 1) + se_b * se_b / (baseline.n - 1))
+    return t_sf(diff / math.sqrt(se), df)
+
+
+@dataclass
+class Verdict:
+    """Comparison of one configuration between the latest run and its baseline"""
+    implementation: str
+    matrix_size: int
+    threads: int
+    processes: int
+    m: int
+    n: int
+    k: int
+    dtype: str
+    status: str
+    time_mean_ms: float
+    baseline_mean_ms: Optional[float] = None
+    change: Optional[float] = None
+    p_value: Optional[float] = None
+    baseline_runs: Optional[List[str]] = None
+
+    def describe(self) -> str:
+        shape = shape_label(self.matrix_size, self.m, self.n, self.k)
+        config = f"{self.implementation} N={shape} t={self.threads} p={self.processes}"
+        if self.change is None:
+            return f"{config}: {self.status}"
+        return (f"{config}: {self.status} ({self.baseline_mean_ms:.3f} -> {self.time_mean_ms:.3f} ms, "
+                f"{self.change:+.1%}, p={self.p_value:.2g})")
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def detect_regressions(
+    history: RunHistory,
+    latest: Optional[str] = None,
+    window: int = 5,
+    alpha: float = 0.01,
+    min_change: float = 0.05
+) -> List[Verdict]:
+    """
+    Compare every configuration of ``latest`` (default: the newest run)
+    against its rolling baseline
+
+    Args:
+        history: Refreshed run history
+        latest: Run under test
+        window: Earlier runs (that measured the configuration) pooled as baseline
+        alpha: Significance level of the one-sided tests
+        min_change: Smallest relative change of the mean reported as a
+            regression or improvement
+
+    Returns:
+        One Verdict per configuration of the latest run
+    """
+    runs = history.runs()
+    if latest is None:
+        if not runs:
+            return []
+        latest = runs[-1]
+    if latest not in runs:
+        raise ValueError(f"Run not found: {latest}")
+    earlier = [history.run_stats(run) for run in runs[:runs.index(latest)]]
+    earlier_names = runs[:runs.index(latest)]
+
+    verdicts = []
+    for config, current in sorted(history.run_stats(latest).items()):
+        if current.n == 0:
+            continue
+        verdict = Verdict(*config, status=NEW, time_mean_ms=current.time_mean)
+        previous = [(name, stats[config]) for name, stats in zip(earlier_names, earlier)
+                    if config in stats and stats[config].n][-window:]
+        if previous:
+            baseline = ConfigStats()
+            for _, stats in previous:
+                baseline.merge(stats)
+            verdict.baseline_mean_ms = baseline.time_mean
+            verdict.baseline_runs = [name for name, _ in previous]
+            verdict.change = current.time_mean / baseline.time_mean - 1.0
+            if current.n < 2 or baseline.n < 2:
+                verdict.status = INSUFFICIENT
+            else:
+                slower = welch_slower(current, baseline)
+                faster = welch_slower(baseline, current)
+                if verdict.change >= min_change and slower < alpha:
+                    verdict.status, verdict.p_value = REGRESSION, slower
+                elif verdict.change <= -min_change and faster < alpha:
+                    verdict.status, verdict.p_value = IMPROVEMENT, faster
+                else:
+                    verdict.status, verdict.p_value = UNCHANGED, min(slower, faster)
+        verdicts.append(verdict)
+    return verdicts
+
+
+def summarize(verdicts: List[Verdict], latest: str) -> Dict:
+    """Machine-readable verdict of a regression check"""
+    counts: Dict[str, int] = {}
+    for verdict in verdicts:
+        counts[verdict.status] = counts.get(verdict.status, 0) + 1
+    return {
+        'run': latest,
+        'regressed': counts.get(REGRESSION, 0) > 0,
+        'counts': counts,
+        'configurations': [verdict.to_dict() for verdict in verdicts],
+    }
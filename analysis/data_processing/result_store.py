@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Incremental columnar store for benchmark CSV results
+
+CSV files under a results directory are ingested once into Parquet files
+partitioned by run and implementation:
+
+    <results_dir>/.store/run=<run>/implementation=<impl>/<source>.parquet
+
+Every file is normalized to the canonical schema (see schema.py) on ingest.
+A manifest records the mtime and size of every ingested CSV, so later loads
+only parse files that are new or changed. Filters on implementation/run prune
+whole partitions, and size filters are pushed down to Parquet row groups.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+try:
+    from .formats import (MANIFEST_NAME, SCHEMA_VERSION, STATS_FIELDS, STATS_KEYS, STORE_DIRNAME,
+                          run_name, source_files)
+    from .schema import concat_normalized, read_results_file
+except ImportError:
+    from formats import (MANIFEST_NAME, SCHEMA_VERSION, STATS_FIELDS, STATS_KEYS, STORE_DIRNAME,
+                         run_name, source_files)
+    from schema import concat_normalized, read_results_file
+
+ROW_GROUP_SIZE = 4096
+
+
+def _sufficient_stats(df: pd.DataFrame) -> list:
+    """Count/sum/sum of squares/extremes of time and GFLOPS per configuration"""
+    time = df['execution_time_ms']
+    gflops = df['gflops'].astype('float64')
+    parts = pd.DataFrame({
+        **{k: df[k] for k in STATS_KEYS},
+        'time': time, 'time_sq': time ** 2,
+        'gflops': gflops, 'gflops_sq': gflops ** 2,
+    })
+    aggregations = {
+        'n': ('time', 'count'), 'time_sum': ('time', 'sum'), 'time_sumsq': ('time_sq', 'sum'),
+        'time_min': ('time', 'min'), 'time_max': ('time', 'max'),
+        'gflops_n': ('gflops', 'count'), 'gflops_sum': ('gflops', 'sum'),
+        'gflops_sumsq': ('gflops_sq', 'sum'), 'gflops_max': ('gflops', 'max'),
+    }
+    # 'n' is also a shape key, so the count is aggregated as 'count' and named afterwards
+    stats = parts.groupby(STATS_KEYS, observed=True).agg(
+        **{'count' if field == 'n' else field: aggregations[field] for field in STATS_FIELDS}
+    )
+    stats.columns = STATS_FIELDS
+    stats = stats.reset_index(names=[f'key_{k}' for k in STATS_KEYS])
+    stats['key_implementation'] = stats['key_implementation'].astype(str)
+    # JSON round trip turns NumPy scalars into plain numbers and NaN into null
+    return json.loads(stats.to_json(orient='values'))
+
+
+class ResultStore:
+    """Parquet-backed cache of every CSV below a results directory"""
+
+    def __init__(self, results_dir: str, store_dir: Optional[str] = None):
+        self.results_dir = Path(results_dir)
+        self.store_dir = Path(store_dir) if store_dir else self.results_dir / STORE_DIRNAME
+        self.manifest_path = self.store_dir / MANIFEST_NAME
+        self._manifest = self._read_manifest()
+
+    def _read_manifest(self) -> Dict[str, dict]:
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+        # Files ingested under an older schema are treated as changed
+        if manifest.get('schema_version') != SCHEMA_VERSION:
+            return {key: dict(entry, mtime_ns=None)
+                    for key, entry in manifest.get('sources', {}).items()}
+        return manifest['sources']
+
+    def _write_manifest(self):
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'schema_version': SCHEMA_VERSION, 'sources': self._manifest},
+                      f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _drop_source(self, key: str):
+        entry = self._manifest.pop(key, None)
+        if entry is None:
+            return
+        for part in entry['files']:
+            try:
+                (self.store_dir / part).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _ingest(self, csv_file: Path, key: str, stat: os.stat_result):
+        df = read_results_file(csv_file).sort_values('matrix_size', kind='stable')
+        run = run_name(Path(key))
+        source_id = hashlib.sha1(key.encode()).hexdigest()[:16]
+
+        files = []
+        for impl, impl_df in df.groupby('implementation', sort=False, observed=True):
+            part_dir = Path(f'run={quote(run, safe="")}') / f'implementation={quote(str(impl), safe="")}'
+            (self.store_dir / part_dir).mkdir(parents=True, exist_ok=True)
+            part = part_dir / f'{source_id}.parquet'
+            tmp_path = self.store_dir / part.with_suffix('.tmp')
+            impl_df.drop(columns='implementation').to_parquet(
+                tmp_path, engine='pyarrow', index=False, row_group_size=ROW_GROUP_SIZE
+            )
+            os.replace(tmp_path, self.store_dir / part)
+            files.append(part.as_posix())
+
+        self._manifest[key] = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'run': run,
+            'files': files,
+            'stats': _sufficient_stats(df),
+        }
+
+    def refresh(self) -> int:
+        """
+        Ingest new or changed CSV files and forget deleted ones
+
+        Returns:
+            Number of CSV files (re)ingested
+        """
+        import pyarrow  # noqa: F401  (fail early if the Parquet engine is missing)
+
+        if not self.results_dir.exists():
+            raise FileNotFoundError(f"Results directory not found: {self.results_dir}")
+
+        seen = set()
+        ingested = 0
+        for csv_file in source_files(self.results_dir):
+            key = csv_file.relative_to(self.results_dir).as_posix()
+            seen.add(key)
+            stat = csv_file.stat()
+            entry = self._manifest.get(key)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                continue
+
+            self._drop_source(key)
+            try:
+                self._ingest(csv_file, key, stat)
+                ingested += 1
+            except Exception as e:
+                print(f"Warning: Could not load {csv_file.name}: {e}")
+
+        removed = [key for key in self._manifest if key not in seen]
+        for key in removed:
+            self._drop_source(key)
+
+        if ingested or removed:
+            self._write_manifest()
+
+        return ingested
+
+    def runs(self) -> List[str]:
+        """Get sorted list of run names present in the store"""
+        return sorted({entry['run'] for entry in self._manifest.values()})
+
+    def load(
+        self,
+        implementation: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        runs: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Load stored results, reading only the partitions and row groups
+        that can match the filters
+
+        Args:
+            implementation: Only load this implementation
+            min_size: Minimum matrix size to include
+            max_size: Maximum matrix size to include
+            runs: Only load these run directories
+
+        Returns:
+            Combined DataFrame in the canonical schema, plus a 'run' column
+        """
+        import pyarrow.parquet as pq
+
+        filters = []
+        if min_size:
+            filters.append(('matrix_size', '>=', min_size))
+        if max_size:
+            filters.append(('matrix_size', '<=', max_size))
+
+        tables = []
+        for entry in self._manifest.values():
+            if runs is not None and entry['run'] not in runs:
+                continue
+            for part in entry['files']:
+                impl = unquote(Path(part).parent.name.split('=', 1)[1])
+                if implementation and impl != implementation:
+                    continue
+                df = pq.read_table(self.store_dir / part, filters=filters or None).to_pandas()
+                if df.empty:
+                    continue
+                df.insert(1, 'implementation', pd.Categorical([impl] * len(df)))
+                df['run'] = pd.Categorical([entry['run']] * len(df))
+                tables.append(df)
+
+        return concat_normalized(tables)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Roofline annotation of benchmark results
+
+Peaks come from the per-host cache written by scripts/machine_peaks.py
+(src/python/harness/peaks.py). For every measurement:
+
+- arithmetic_intensity: 2 M N K FLOPs over the compulsory traffic of reading
+  A and B and writing C once (the bytes_moved column: M K + K N + M N
+  elements, 3 N^2 for square products, at the element sizes of the row's
+  dtype column; only rows of files without one fall back to
+  formats.default_dtype), in FLOP/byte
+- peak_gflops / bandwidth_gbs: the roofs for the row's worker count
+  (per-core peak x workers, capped at the measured all-core value); the
+  compute roof is the GEMM rate of the row's dtype (float32 for the C
+  binaries). Peaks cached before they were measured per element type only
+  roof float64 rows; re-run scripts/machine_peaks.py --force for the others
+- roofline_gflops: min(peak_gflops, arithmetic_intensity x bandwidth_gbs)
+- pct_peak / pct_roofline: achieved GFLOPS as a percentage of both
+- bound: 'memory' left of the ridge point, 'compute' right of it
+
+Rows are matched to peaks by their node column; rows without one (legacy
+files) use the peaks of ``default_host``.
+"""
+
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .formats import DEFAULT_DTYPE, default_dtype
+    from .schema import dtype_columns, shape_columns, traffic_bytes
+except ImportError:
+    from formats import DEFAULT_DTYPE, default_dtype
+    from schema import dtype_columns, shape_columns, traffic_bytes
+
+ROOFLINE_COLUMNS = ['arithmetic_intensity', 'peak_gflops', 'bandwidth_gbs', 'roofline_gflops',
+                    'pct_peak', 'pct_roofline', 'bound']
+
+
+def load_peaks(path=None) -> Dict[str, dict]:
+    """Cached peaks per hostname ({} when nothing was measured yet)"""
+    # Reader only: src/python/harness/peaks.py (PeaksCache) owns the file, its
+    # location and the variable overriding it; the analysis tools do not import
+    # the harness, so those two are repeated here
+    path = Path(path or os.environ.get('MATMUL_PEAKS_CACHE')
+                or Path.home() / '.cache' / 'matmul-bench' / 'peaks.json')
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def gemm_peak(peaks: dict, dtype: str, per_core: bool = False) -> float:
+    """GEMM roof of one element type in a host's peaks (NaN when it was not measured)"""
+    suffix = '_core' if per_core else ''
+    rates = peaks.get('gemm_gflops' + suffix)
+    if rates is None:
+        # Measured before per-type peaks: the float64 rate only
+        return peaks.get('peak_gflops' + suffix, np.nan) if dtype == DEFAULT_DTYPE else np.nan
+    return rates.get(dtype, np.nan)
+
+
+def annotate_roofline(
+    df: pd.DataFrame,
+    peaks: Dict[str, dict],
+    default_host: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Add the roofline columns (see module docstring) to a copy of df
+
+    Rows whose host has no measured peaks get NaN roofs and no bound.
+    """
+    default_host = default_host or socket.gethostname()
+    result = df.copy()
+    if 'node' in df.columns:
+        hosts = df['node'].astype(object).where(df['node'].astype(object).isin(list(peaks)), default_host)
+    else:
+        hosts = pd.Series(default_host, index=df.index)
+
+    def peak_column(key):
+        return hosts.map(lambda host: peaks.get(host, {}).get(key, np.nan)).astype('float64')
+
+    if 'dtype' in df.columns:
+        dtypes = df['dtype'].astype(str)
+    else:
+        dtypes = df['implementation'].astype(str).map(default_dtype)
+
+    def gemm_column(per_core):
+        pairs = pd.MultiIndex.from_arrays([hosts.astype(str), dtypes])
+        rates = {pair: gemm_peak(peaks.get(pair[0], {}), pair[1], per_core) for pair in pairs.unique()}
+        return pd.Series([rates[pair] for pair in pairs], index=df.index, dtype='float64')
+
+    workers = pd.Series(1.0, index=df.index)
+    for column in ('threads', 'processes'):
+        if column in df.columns:
+            workers *= df[column].fillna(1).astype('float64')
+    workers = np.minimum(workers, peak_column('cores').fillna(1.0))
+
+    m, n, k = (df[c].astype('float64') for c in ('m', 'n', 'k'))
+    traffic = df['bytes_moved'] if 'bytes_moved' in df.columns else traffic_bytes(df)
+    batch = pd.to_numeric(df['batch_size'], errors='coerce').fillna(1.0) if 'batch_size' in df.columns else 1.0
+    intensity = 2.0 * m * n * k * batch / traffic.astype('float64')
+    peak = np.minimum(gemm_column(per_core=True) * workers, gemm_column(per_core=False))
+    bandwidth = np.minimum(peak_column('bandwidth_gbs_core') * workers, peak_column('bandwidth_gbs'))
+    roof = np.minimum(peak, intensity * bandwidth)
+    gflops = df['gflops'].astype('float64')
+
+    result['arithmetic_intensity'] = intensity
+    result['peak_gflops'] = peak
+    result['bandwidth_gbs'] = bandwidth
+    result['roofline_gflops'] = roof
+    result['pct_peak'] = 100.0 * gflops / peak
+    result['pct_roofline'] = 100.0 * gflops / roof
+    result['bound'] = pd.Categorical(
+        np.where(peak.isna(), None, np.where(intensity * bandwidth < peak, 'memory', 'compute')),
+        categories=['memory', 'compute']
+    )
+    return result
+
+
+def roofline_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """Mean GFLOPS and roofline position per (implementation, size[, shape, dtype, threads, processes])"""
+    keys = ['implementation', 'matrix_size'] + shape_columns(df) + dtype_columns(df)
+    keys += [c for c in ('threads', 'processes') if c in df.columns]
+    values = ['gflops', 'arithmetic_intensity', 'roofline_gflops', 'pct_peak', 'pct_roofline']
+    summary = df.groupby(keys, observed=True)[values].mean()
+    summary['bound'] = df.groupby(keys, observed=True)['bound'].agg(
+        lambda b: b.mode().iat[0] if b.notna().any() else None
+    )
+    return summary.reset_index()
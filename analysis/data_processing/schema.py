@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Result schema detection and normalization
+
+The repository produces three kinds of result files:
+
+- legacy:   ``MatrixSize,TimeSeconds`` (results/*.csv)
+- binary:   headerless 11-column rows printed by the C binaries
+            (timestamp,implementation,matrix_size,total_time_ms,total_gflops,
+            kernel_time_ms,h2d_time_ms,d2h_time_ms,block_size,node,verification),
+            or the same columns with a header line (CUDA)
+- analysis: headered ``timestamp,implementation,matrix_size,execution_time_ms,
+            gflops,threads,processes,node`` (naive C and the SLURM scripts)
+
+The m, n and k columns hold the shape of rectangular products (A is m x k,
+B is k x n, matrix_size their equivalent size); files written before they
+existed only hold square products, so missing values are filled from
+matrix_size. Likewise, files without a dtype column are attributed the
+element type their implementation computes in (``formats.default_dtype``),
+and bytes_moved, the compulsory traffic of one multiply, is derived from
+the shape and the element sizes of the dtype when it was not recorded.
+
+Every file is mapped onto one canonical, compactly typed schema so that the
+plotting and report functions never have to guess column names.
+"""
+
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .formats import (BINARY, BINARY_COLUMNS, COLUMN_ALIASES, ELEMENT_BYTES, LEGACY, PARALLELISM_PATTERN,
+                          SHAPE_COLUMNS, STATS_KEYS, default_dtype, detect_schema, legacy_implementation_name,
+                          shape_label)
+except ImportError:
+    from formats import (BINARY, BINARY_COLUMNS, COLUMN_ALIASES, ELEMENT_BYTES, LEGACY, PARALLELISM_PATTERN,
+                         SHAPE_COLUMNS, STATS_KEYS, default_dtype, detect_schema, legacy_implementation_name,
+                         shape_label)
+
+CANONICAL_DTYPES = {
+    'timestamp': 'datetime64[ns]',
+    'implementation': 'category',
+    'matrix_size': 'int32',
+    'm': 'int32',
+    'n': 'int32',
+    'k': 'int32',
+    'dtype': 'category',
+    'execution_time_ms': 'float64',
+    'gflops': 'float32',
+    'bytes_moved': 'float64',
+    'kernel_time_ms': 'float32',
+    'h2d_time_ms': 'float32',
+    'd2h_time_ms': 'float32',
+    'threads': 'int16',
+    'processes': 'int16',
+    'block_size': 'category',
+    'node': 'category',
+    'verification': 'category',
+}
+
+CANONICAL_COLUMNS = list(CANONICAL_DTYPES)
+
+# Resource usage (os.wait4) and perf counter columns of binary runs. They stay
+# extra columns, present only in files that recorded them, but are typed like
+# the canonical ones; float64 because runs without them are NaN.
+RESOURCE_DTYPES = {
+    'peak_rss_kb': 'float64',
+    'launcher_rss_kb': 'float64',
+    'minor_faults': 'float64',
+    'major_faults': 'float64',
+    'voluntary_ctx_switches': 'float64',
+    'involuntary_ctx_switches': 'float64',
+    'user_time_ms': 'float64',
+    'system_time_ms': 'float64',
+    'perf_cycles': 'float64',
+    'perf_instructions': 'float64',
+    'perf_ipc': 'float64',
+    'perf_llc_misses': 'float64',
+}
+
+# Dtypes used while parsing, before the frame is normalized
+_READ_DTYPES = {
+    'implementation': 'category',
+    'matrix_size': 'int32',
+    'execution_time_ms': 'float64',
+    'total_time_ms': 'float64',
+    'gflops': 'float32',
+    'total_gflops': 'float32',
+    'kernel_time_ms': 'float32',
+    'h2d_time_ms': 'float32',
+    'd2h_time_ms': 'float32',
+    'block_size': 'category',
+    'node': 'category',
+    'verification': 'category',
+    'dtype': 'category',
+}
+
+DEFAULT_CHUNKSIZE = 1_000_000
+
+# (implementation, matrix_size, threads, processes, m, n, k, dtype, execution_time_ms, gflops)
+Row = Tuple[str, int, int, int, int, int, int, str, float, float]
+
+
+def _normalize_legacy(chunk: pd.DataFrame, implementation: str) -> pd.DataFrame:
+    sizes = chunk['MatrixSize'].astype('int32')
+    seconds = chunk['TimeSeconds'].astype('float64')
+    return pd.DataFrame({
+        'implementation': implementation,
+        'matrix_size': sizes,
+        'execution_time_ms': seconds * 1000.0,
+        'gflops': 2.0 * sizes.astype('float64') ** 3 / (seconds * 1e9),
+    })
+
+
+def _parallelism_from_block_size(block_size: pd.Series):
+    """Derive threads/processes from the '8t' / '4p' tags in the block_size field"""
+    parsed = block_size.astype('string').str.extract(PARALLELISM_PATTERN)
+    count = pd.to_numeric(parsed[0], errors='coerce')
+    threads = count.where(parsed[1] == 't', 1)
+    processes = count.where(parsed[1] == 'p', 1)
+    return threads, processes
+
+
+def normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Map a frame onto the canonical schema
+
+    Known aliases are renamed, missing canonical columns are added, derived
+    columns (threads/processes, the m/n/k shape of square products, the
+    dtype and bytes_moved of older files) are filled in, and every canonical
+    column is cast to its compact dtype. Extra columns are kept after the
+    canonical ones; the resource usage columns among them are cast to
+    RESOURCE_DTYPES.
+    """
+    df = df.rename(columns={k: v for k, v in COLUMN_ALIASES.items() if k in df.columns})
+
+    if 'block_size' in df.columns and ('threads' not in df.columns or 'processes' not in df.columns):
+        threads, processes = _parallelism_from_block_size(df['block_size'])
+        if 'threads' not in df.columns:
+            df['threads'] = threads
+        if 'processes' not in df.columns:
+            df['processes'] = processes
+
+    for column, dtype in CANONICAL_DTYPES.items():
+        if column not in df.columns:
+            if column in ('threads', 'processes'):
+                df[column] = 1
+            elif dtype == 'datetime64[ns]':
+                df[column] = pd.NaT
+            elif dtype == 'category':
+                df[column] = pd.Series(pd.Categorical([None] * len(df)), index=df.index)
+            else:
+                df[column] = np.nan
+
+        series = df[column]
+        if column == 'dtype':
+            defaults = df['implementation'].astype(str).map(default_dtype)
+            names = series.astype('string').replace('', pd.NA)
+            df[column] = names.fillna(defaults.astype('string')).astype('category')
+        elif column == 'bytes_moved':
+            df[column] = pd.to_numeric(series, errors='coerce').fillna(traffic_bytes(df))
+        elif dtype == 'datetime64[ns]':
+            if not pd.api.types.is_datetime64_any_dtype(series):
+                series = pd.to_datetime(series, format='%Y-%m-%d %H:%M:%S', errors='coerce')
+            # pandas may parse at a coarser unit than the canonical one
+            df[column] = series.astype(dtype)
+        elif dtype == 'category':
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                df[column] = series.astype('string').astype('category')
+        elif column in SHAPE_COLUMNS:
+            df[column] = pd.to_numeric(series, errors='coerce').fillna(df['matrix_size']).astype(dtype)
+        elif dtype in ('int16', 'int32'):
+            default = 1 if column in ('threads', 'processes') else 0
+            df[column] = pd.to_numeric(series, errors='coerce').fillna(default).astype(dtype)
+        elif series.dtype != dtype:
+            df[column] = pd.to_numeric(series, errors='coerce').astype(dtype)
+
+    for column, dtype in RESOURCE_DTYPES.items():
+        if column in df.columns and df[column].dtype != dtype:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(dtype)
+
+    extra = [c for c in df.columns if c not in CANONICAL_DTYPES]
+    return df[CANONICAL_COLUMNS + extra]
+
+
+def shape_columns(df: pd.DataFrame) -> List[str]:
+    """
+    The m/n/k columns when df holds rectangular products, otherwise none
+
+    Group keys and report indexes add these, so results of square products
+    keep their matrix_size-only layout.
+    """
+    if not all(c in df.columns for c in SHAPE_COLUMNS):
+        return []
+    m, n, k = (df[c] for c in SHAPE_COLUMNS)
+    return list(SHAPE_COLUMNS) if ((m != n) | (n != k)).any() else []
+
+
+def traffic_bytes(df: pd.DataFrame) -> pd.Series:
+    """
+    Compulsory traffic of every row's multiply in bytes
+
+    A (m x k) and B (k x n) read once at the dtype's element size and C
+    (m x n) written once at its accumulator size, times the batch size of
+    batched rows. Unknown dtypes give NaN.
+    """
+    dtypes = df['dtype'].astype(str)
+    operand, result = (dtypes.map(lambda name: ELEMENT_BYTES.get(name, (np.nan, np.nan))[i]).astype('float64')
+                       for i in (0, 1))
+    m, n, k = (df[c].astype('float64') for c in SHAPE_COLUMNS)
+    traffic = (m * k + k * n) * operand + m * n * result
+    if 'batch_size' in df.columns:
+        traffic *= pd.to_numeric(df['batch_size'], errors='coerce').fillna(1.0)
+    return traffic
+
+
+def dtype_columns(df: pd.DataFrame) -> List[str]:
+    """
+    The dtype column when df holds more than one element type, otherwise none
+
+    Like ``shape_columns``, so results of a single element type keep their layout.
+    """
+    return ['dtype'] if 'dtype' in df.columns and df['dtype'].nunique() > 1 else []
+
+
+def shape_labels(df: pd.DataFrame) -> pd.Series:
+    """
+    Product shape of every row, 'N' for square and 'MxNxK' for rectangular ones
+
+    Returned as an ordered categorical sorted by (matrix_size, m, n, k), so
+    pivots indexed by it list shapes in size order.
+    """
+    keys = df[['matrix_size'] + list(SHAPE_COLUMNS)].astype('int64')
+    labels = [shape_label(*row) for row in keys.itertuples(index=False)]
+    order = keys.assign(label=labels).drop_duplicates('label').sort_values(['matrix_size'] + list(SHAPE_COLUMNS))
+    return pd.Series(pd.Categorical(labels, categories=order['label'], ordered=True), index=df.index, name='shape')
+
+
+def concat_normalized(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate normalized frames without losing the categorical dtypes"""
+    frames = [f for f in frames if not f.empty] or frames[:1]
+    if not frames:
+        return normalize(pd.DataFrame())
+    if len(frames) == 1:
+        return frames[0]
+
+    categorical = {c for c, t in CANONICAL_DTYPES.items() if t == 'category'}
+    categorical |= {c for f in frames for c in f.columns if isinstance(f[c].dtype, pd.CategoricalDtype)}
+    dtypes = {}
+    for column in categorical:
+        values = set()
+        for f in frames:
+            if column not in f.columns:
+                continue
+            series = f[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                values.update(series.cat.categories)
+            else:
+                values.update(series.dropna().unique())
+        dtypes[column] = pd.CategoricalDtype(sorted(values, key=str))
+
+    frames = [f.astype({c: t for c, t in dtypes.items() if c in f.columns}) for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def iter_results_file(path, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """
+    Stream a result file of any supported format as canonical chunks
+
+    Args:
+        path: CSV file to read
+        chunksize: Maximum number of rows per yielded chunk
+    """
+    path = Path(path)
+    schema = detect_schema(path)
+
+    if schema == LEGACY:
+        reader = pd.read_csv(path, dtype={'MatrixSize': 'int32', 'TimeSeconds': 'float64'},
+                             chunksize=chunksize)
+        implementation = legacy_implementation_name(path)
+        for chunk in reader:
+            yield normalize(_normalize_legacy(chunk, implementation))
+        return
+
+    if schema == BINARY:
+        reader = pd.read_csv(path, header=None, names=BINARY_COLUMNS, dtype=_READ_DTYPES,
+                             chunksize=chunksize)
+    else:
+        with open(path) as f:
+            header = f.readline().strip().split(',')
+        dtypes = {c: t for c, t in _READ_DTYPES.items() if c in header}
+        reader = pd.read_csv(path, dtype=dtypes, chunksize=chunksize)
+
+    for chunk in reader:
+        yield normalize(chunk)
+
+
+def read_results_file(path, chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+    """Read a whole result file of any supported format into the canonical schema"""
+    return concat_normalized(list(iter_results_file(path, chunksize)))
+
+
+def iter_rows(path, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[Row]:
+    """
+    The STATS_KEYS, time and GFLOPS of every measurement in a result file, as plain tuples
+
+    Read with ``iter_results_file``, so the pandas-free summaries (quick_stats,
+    history) see the same normalized values as the rest of the analysis; they
+    only call this for files the store manifest does not cover yet.
+    """
+    for chunk in iter_results_file(path, chunksize):
+        columns = [chunk[c].astype(str) if c in ('implementation', 'dtype') else chunk[c].astype('int64')
+                   for c in STATS_KEYS]
+        columns += [chunk['execution_time_ms'].astype('float64'), chunk['gflops'].astype('float64')]
+        yield from zip(*(column.tolist() for column in columns))
@@ -5,51 +5,40 @@ Generate speedup comparison plots for matrix multiplication implementations
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
 import sys
 
-# Set plot style
-sns.set_theme(style="whitegrid")
-plt.rcParams['figure.figsize'] = (12, 8)
-plt.rcParams['font.size'] = 12
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from data_processing import metrics_calculator
+from data_processing.csv_loader import load_benchmark_data
+from visualization.render import PlotJob, aggregate_for_plotting, render_plots
+
+def _pyplot():
+    """Import pyplot lazily and apply the plot style"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    # Set plot style
+    sns.set_theme(style="whitegrid")
+    plt.rcParams['figure.figsize'] = (12, 8)
+    plt.rcParams['font.size'] = 12
+    return plt
 
 def load_results(results_dir='../../results/raw'):
     """Load all CSV results"""
-    results_path = Path(results_dir)
-    csv_files = list(results_path.glob('*.csv'))
-    
-    if not csv_files:
-        print(f"Error: No CSV files found in {results_path}")
+    try:
+        return load_benchmark_data(results_dir)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
         sys.exit(1)
-    
-    dfs = [pd.read_csv(f) for f in csv_files]
-    return pd.concat(dfs, ignore_index=True)
 
 def calculate_speedup(df, baseline='naive'):
     """Calculate speedup relative to baseline"""
-    baseline_df = df[df['implementation'] == baseline].copy()
-    baseline_grouped = baseline_df.groupby('matrix_size')['execution_time_ms'].mean()
-    
-    speedup_data = []
-    for impl in df['implementation'].unique():
-        impl_df = df[df['implementation'] == impl].copy()
-        impl_grouped = impl_df.groupby('matrix_size')['execution_time_ms'].mean()
-        
-        for size in impl_grouped.index:
-            if size in baseline_grouped.index:
-                speedup = baseline_grouped[size] / impl_grouped[size]
-                speedup_data.append({
-                    'implementation': impl,
-                    'matrix_size': size,
-                    'speedup': speedup
-                })
-    
-    return pd.DataFrame(speedup_data)
+    return metrics_calculator.calculate_speedup(df, baseline=baseline)
 
 def plot_speedup_comparison(df, output_dir='../../results/plots'):
     """Generate speedup comparison plot"""
+    plt = _pyplot()
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
@@ -97,12 +86,13 @@ def plot_speedup_comparison(df, output_dir='../../results/plots'):
 
 def plot_gflops_comparison(df, output_dir='../../results/plots'):
     """Generate GFLOPS comparison plot"""
+    plt = _pyplot()
     output_path = Path(output_dir)
     
     plt.figure(figsize=(14, 8))
     
     # Group by implementation and matrix size
-    grouped = df.groupby(['implementation', 'matrix_size'])['gflops'].mean().reset_index()
+    grouped = df.groupby(['implementation', 'matrix_size'], observed=True)['gflops'].mean().reset_index()
     
     for impl in grouped['implementation'].unique():
         impl_data = grouped[grouped['implementation'] == impl]
@@ -137,11 +127,12 @@ def plot_gflops_comparison(df, output_dir='../../results/plots'):
 
 def plot_execution_time(df, output_dir='../../results/plots'):
     """Generate execution time comparison plot"""
+    plt = _pyplot()
     output_path = Path(output_dir)
     
     plt.figure(figsize=(14, 8))
     
-    grouped = df.groupby(['implementation', 'matrix_size'])['execution_time_ms'].mean().reset_index()
+    grouped = df.groupby(['implementation', 'matrix_size'], observed=True)['execution_time_ms'].mean().reset_index()
     
     for impl in grouped['implementation'].unique():
         impl_data = grouped[grouped['implementation'] == impl]
@@ -182,15 +173,17 @@ def main():
     df = load_results()
     print(f"Loaded {len(df)} measurements\n")
     
-    # Generate plots
-    print("Generating speedup comparison plot...")
-    plot_speedup_comparison(df)
-    
-    print("Generating GFLOPS comparison plot...")
-    plot_gflops_comparison(df)
-    
-    print("Generating execution time plot...")
-    plot_execution_time(df)
+    # Generate plots (independent figures render in parallel, unchanged ones are cached)
+    print("Generating speedup, GFLOPS and execution time plots...")
+    plot_df = aggregate_for_plotting(df)
+    render_plots(
+        [
+            PlotJob(plot_speedup_comparison, plot_df),
+            PlotJob(plot_gflops_comparison, plot_df),
+            PlotJob(plot_execution_time, plot_df),
+        ],
+        output_dir='../../results/plots'
+    )
     
     print("\n=== Visualization Complete ===")
 
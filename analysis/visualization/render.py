@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Parallel, cached rendering of independent plots
+
+Each plot is described by a PlotJob: a module-level function with the usual
+``func(df, output_dir, **params)`` signature, the (already aggregated) data it
+draws and its parameters. Jobs are rendered in a process pool on the Agg
+backend into a content-addressed cache keyed on the hash of the data, the
+parameters and the plotting function's source. A job whose key is already
+cached is not redrawn; its files are copied from the cache instead.
+
+The cache is shared by the plots of every run, so it is capped at
+CACHE_MAX_ENTRIES: after rendering, the least recently used entries beyond
+the cap are deleted (never those of the current call).
+"""
+
+import contextlib
+import hashlib
+import inspect
+import io
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+CACHE_DIRNAME = '.cache'
+
+# Cached plots kept per cache directory, counting the ones just rendered
+CACHE_MAX_ENTRIES = 64
+
+# Bump to invalidate every cached plot (e.g. after a global style change)
+RENDER_VERSION = 1
+
+PLOT_KEYS = ['implementation', 'matrix_size', 'm', 'n', 'k', 'dtype', 'threads', 'processes']
+
+
+@dataclass
+class PlotJob:
+    """One independent figure (or set of files) produced by a plot function"""
+    func: Callable
+    data: pd.DataFrame
+    params: Dict = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return self.func.__name__
+
+    def cache_key(self) -> str:
+        digest = hashlib.sha256()
+        digest.update(f'{RENDER_VERSION}:{self.func.__module__}.{self.func.__qualname__}'.encode())
+        digest.update(inspect.getsource(self.func).encode())
+        digest.update(repr(sorted(self.params.items())).encode())
+        digest.update(repr([(c, str(t)) for c, t in self.data.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(self.data, index=False).to_numpy().tobytes())
+        return digest.hexdigest()[:24]
+
+
+def aggregate_for_plotting(df: pd.DataFrame, values: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Mean of every value column per (implementation, size, threads, processes)
+
+    Plots only draw means, so rendering from this frame gives the same figures
+    while keeping the cache key and the data shipped to workers small.
+    """
+    if values is None:
+        values = ['execution_time_ms', 'gflops']
+    keys = [k for k in PLOT_KEYS if k in df.columns]
+    values = [v for v in values if v in df.columns]
+    return df.groupby(keys, observed=True)[values].mean().reset_index()
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+def _render(job: PlotJob, key: str, cache_dir: Path, display_dir: Path) -> str:
+    """Render a job into cache_dir/<key>; returns the captured output"""
+    _init_worker()
+    import matplotlib.pyplot as plt
+
+    target = cache_dir / key
+    tmp_dir = cache_dir / f'{key}.tmp-{os.getpid()}'
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            job.func(job.data, tmp_dir, **job.params)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    finally:
+        plt.close('all')
+
+    try:
+        os.replace(tmp_dir, target)
+    except OSError:
+        # Another process cached the same key first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return log.getvalue().replace(str(tmp_dir), str(display_dir))
+
+
+def _same_file(cached: Path, destination: Path) -> bool:
+    try:
+        a, b = cached.stat(), destination.stat()
+    except FileNotFoundError:
+        return False
+    return a.st_size == b.st_size and a.st_mtime_ns == b.st_mtime_ns
+
+
+def prune_cache(cache_dir: Path, keep: List[str], max_entries: int = CACHE_MAX_ENTRIES) -> int:
+    """
+    Delete the least recently used cache entries beyond max_entries
+
+    Entries are ordered by mtime, which ``render_plots`` refreshes on every
+    use; the entries in ``keep`` and renders still in progress are never
+    deleted.
+
+    Returns:
+        Number of entries deleted
+    """
+    keep = set(keep)
+    others = [d for d in cache_dir.iterdir()
+              if d.is_dir() and d.name not in keep and '.tmp-' not in d.name]
+    others.sort(key=lambda d: d.stat().st_mtime_ns, reverse=True)
+    stale = others[max(0, max_entries - len(keep)):]
+    for entry in stale:
+        shutil.rmtree(entry, ignore_errors=True)
+    return len(stale)
+
+
+def render_plots(
+    jobs: List[PlotJob],
+    output_dir,
+    cache_dir=None,
+    max_workers: Optional[int] = None,
+    max_cache_entries: int = CACHE_MAX_ENTRIES
+) -> Dict[str, List[Path]]:
+    """
+    Render plot jobs in parallel, reusing cached output for unchanged inputs
+
+    Args:
+        jobs: Plots to produce
+        output_dir: Directory receiving the final files
+        cache_dir: Content-addressed plot cache (default: <output_dir>/.cache)
+        max_workers: Size of the process pool (default: one per pending job,
+            capped at the CPU count; 1 renders in-process)
+        max_cache_entries: Cache entries kept afterwards, least recently
+            used ones are deleted first (see ``prune_cache``)
+
+    Returns:
+        Mapping of job name to the files it produced in output_dir
+    """
+    output_dir = Path(output_dir)
+    cache_dir = Path(cache_dir) if cache_dir else output_dir / CACHE_DIRNAME
+    output_dir.mkdir(parents=True, exist_ok=True)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    keys = [job.cache_key() for job in jobs]
+    pending = [(job, key) for job, key in zip(jobs, keys) if not (cache_dir / key).is_dir()]
+
+    for job, key in zip(jobs, keys):
+        if (cache_dir / key).is_dir():
+            print(f"  {job.name}: unchanged, using cached plot")
+
+    if pending:
+        workers = max_workers or min(len(pending), os.cpu_count() or 1)
+        if workers <= 1:
+            logs = [_render(job, key, cache_dir, output_dir) for job, key in pending]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = [pool.submit(_render, job, key, cache_dir, output_dir)
+                           for job, key in pending]
+                logs = [f.result() for f in futures]
+        for log in logs:
+            print(log, end='')
+
+    produced = {}
+    for job, key in zip(jobs, keys):
+        files = []
+        for cached in sorted((cache_dir / key).iterdir()):
+            destination = output_dir / cached.name
+            if not _same_file(cached, destination):
+                shutil.copy2(cached, destination)
+            files.append(destination)
+        produced[job.name] = files
+        os.utime(cache_dir / key)
+
+    prune_cache(cache_dir, keys, max_cache_entries)
+    return produced
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Usage: python scripts/analyze.py {summary,report,plot,speedup,stats,regress,roofline,batch,dtypes,resources} [results_directory] [options]
+
+summary and report take their statistics from the result store manifest and
+read the harness's headered CSV files that are not ingested yet with the csv
+module (pandas only for legacy and headerless files), so they are cheap
+enough to run after every benchmark job. matplotlib and seaborn are imported
+only by the subcommands that need them.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'analysis'))
+from data_processing.formats import latest_run
+
+DEFAULT_RESULTS_DIR = 'results/raw'
+
+def select_runs(args):
+    """Resolve --run/--latest into (results_dir, runs, output_name)"""
+    results_dir = Path(args.results_dir)
+    if not results_dir.exists():
+        print(f"Error: Results directory not found: {results_dir}")
+        sys.exit(1)
+
+    if args.latest:
+        latest = latest_run(results_dir)
+        if latest is None:
+            print(f"Error: No run directories found in {results_dir}")
+            sys.exit(1)
+        print(f"Using most recent results: {latest}")
+        return results_dir, [latest.name], latest.name
+
+    if args.run:
+        return results_dir, args.run, '_'.join(args.run)
+
+    return results_dir, None, results_dir.name
+
+def cmd_summary(args):
+    from data_processing import quick_stats
+
+    results_dir, runs, _ = select_runs(args)
+    stats = quick_stats.collect_stats(results_dir, runs=runs)
+    if not stats:
+        print("Error: No data loaded")
+        sys.exit(1)
+    quick_stats.print_summary(stats)
+
+def cmd_report(args):
+    results_dir, runs, _ = select_runs(args)
+
+    if args.full:
+        from compare_implementations import generate_report
+        from data_processing.csv_loader import load_benchmark_data
+
+        df = load_benchmark_data(results_dir, runs=runs)
+        generate_report(df, output_dir=args.output_dir, baseline=args.baseline)
+        return
+
+    from data_processing import quick_stats
+
+    stats = quick_stats.collect_stats(results_dir, runs=runs)
+    if not stats:
+        print("Error: No data loaded")
+        sys.exit(1)
+    report_file = quick_stats.write_report(stats, args.output_dir, baseline=args.baseline)
+    print(f"Report saved to: {report_file}")
+
+def cmd_plot(args):
+    from data_processing.csv_loader import load_benchmark_data
+    from plot_results import generate_plots, print_summary
+
+    results_dir, runs, output_name = select_runs(args)
+    output_dir = Path(args.output_dir) if args.output_dir else Path('results/plots') / output_name
+
+    df = load_benchmark_data(results_dir, runs=runs)
+    if df.empty:
+        print("Error: No data loaded")
+        sys.exit(1)
+
+    print(f"Generating plots in {output_dir}...")
+    generate_plots(df, output_dir)
+    print_summary(df)
+
+def cmd_speedup(args):
+    from data_processing.csv_loader import load_benchmark_data
+    from data_processing.metrics_calculator import calculate_speedup
+
+    results_dir, runs, _ = select_runs(args)
+    df = load_benchmark_data(results_dir, runs=runs)
+    speedup_df = calculate_speedup(
+        df,
+        baseline=args.baseline,
+        n_bootstrap=args.bootstrap,
+        confidence=args.confidence
+    )
+    if speedup_df.empty:
+        print(f"Error: No measurements for baseline '{args.baseline}'")
+        sys.exit(1)
+
+    print(speedup_df.to_string(index=False, float_format=lambda v: f'{v:.3f}'))
+    if args.output:
+        speedup_df.to_csv(args.output, index=False)
+        print(f"\nSaved: {args.output}")
+
+def cmd_stats(args):
+    from data_processing.csv_loader import aggregate_runs, filter_outliers, load_benchmark_data
+
+    results_dir, runs, _ = select_runs(args)
+    df = load_benchmark_data(results_dir, runs=runs)
+    if df.empty:
+        print("Error: No data loaded")
+        sys.exit(1)
+    if args.outliers != 'none':
+        df = filter_outliers(df, method=args.outliers, threshold=args.threshold)
+
+    stats = aggregate_runs(df, percentiles=args.percentiles, n_bootstrap=args.bootstrap,
+                           confidence=args.confidence)
+    print(stats.to_string(index=False, float_format=lambda v: f'{v:.3f}'))
+    if args.output:
+        stats.to_csv(args.output, index=False)
+        print(f"\nSaved: {args.output}")
+
+def cmd_regress(args):
+    import json
+    from data_processing.history import RunHistory
+    from data_processing.regression import REGRESSION, detect_regressions, summarize
+
+    history = RunHistory(args.results_dir)
+    history.refresh()
+    runs = history.runs()
+    if not runs:
+        print(f"Error: No runs found in {args.results_dir}")
+        sys.exit(1)
+    latest = args.run[-1] if args.run else runs[-1]
+
+    try:
+        verdicts = detect_regressions(history, latest, window=args.window, alpha=args.alpha,
+                                      min_change=args.min_change)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    verdict = summarize(verdicts, latest)
+
+    if args.json:
+        print(json.dumps(verdict, indent=2))
+    else:
+        print(f"=== Regression check: {latest} vs up to {args.window} earlier runs ===")
+        for v in verdicts:
+            marker = '✗' if v.status == REGRESSION else '•'
+            print(f"  {marker} {v.describe()}")
+        print(', '.join(f"{count} {status}" for status, count in sorted(verdict['counts'].items())))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(verdict, f, indent=2)
+        if not args.json:
+            print(f"Verdict written to {args.output}")
+    sys.exit(1 if verdict['regressed'] else 0)
+
+def cmd_roofline(args):
+    from data_processing.csv_loader import load_benchmark_data
+    from data_processing.roofline import annotate_roofline, load_peaks, roofline_summary
+
+    peaks = load_peaks(args.peaks)
+    if not peaks:
+        print("Error: No machine peaks measured yet (run scripts/machine_peaks.py on the benchmark host)")
+        sys.exit(1)
+
+    results_dir, runs, _ = select_runs(args)
+    df = annotate_roofline(load_benchmark_data(results_dir, runs=runs), peaks, default_host=args.host)
+    summary = roofline_summary(df)
+    print(summary.to_string(index=False, float_format=lambda v: f'{v:.2f}'))
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"\nSaved: {args.output}")
+
+def cmd_batch(args):
+    from data_processing.csv_loader import load_benchmark_data
+    from data_processing.metrics_calculator import batch_saturation
+
+    results_dir, runs, _ = select_runs(args)
+    saturation = batch_saturation(load_benchmark_data(results_dir, runs=runs), tolerance=args.tolerance)
+    if saturation.empty:
+        print("Error: No batched measurements (run batched engines with --batches)")
+        sys.exit(1)
+    print(saturation.to_string(index=False, float_format=lambda v: f'{v:.3f}'))
+    if args.output:
+        saturation.to_csv(args.output, index=False)
+        print(f"\nSaved: {args.output}")
+
+def cmd_dtypes(args):
+    from data_processing.csv_loader import load_benchmark_data
+    from data_processing.metrics_calculator import dtype_comparison
+
+    results_dir, runs, _ = select_runs(args)
+    comparison = dtype_comparison(load_benchmark_data(results_dir, runs=runs), reference=args.reference)
+    if comparison.empty:
+        print("Error: No engine measured in more than one element type (run engines with --dtypes)")
+        sys.exit(1)
+    print(comparison.to_string(index=False, float_format=lambda v: f'{v:.3f}'))
+    if args.output:
+        comparison.to_csv(args.output, index=False)
+        print(f"\nSaved: {args.output}")
+
+def cmd_resources(args):
+    from data_processing.csv_loader import load_benchmark_data
+    from data_processing.metrics_calculator import resource_usage
+
+    results_dir, runs, _ = select_runs(args)
+    usage = resource_usage(load_benchmark_data(results_dir, runs=runs))
+    if usage.empty:
+        print("Error: No resource usage recorded (only binary runs carry it)")
+        sys.exit(1)
+    print(usage.to_string(index=False, float_format=lambda v: f'{v:.3f}'))
+    if args.output:
+        usage.to_csv(args.output, index=False)
+        print(f"\nSaved: {args.output}")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Analyze matrix multiplication benchmark results')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_command(name, func, help_text):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument('results_dir', nargs='?', default=DEFAULT_RESULTS_DIR,
+                         help=f'Results directory (default: {DEFAULT_RESULTS_DIR})')
+        selection = sub.add_mutually_exclusive_group()
+        selection.add_argument('--run', action='append',
+                               help='Only use this run subdirectory (repeatable)')
+        selection.add_argument('--latest', action='store_true',
+                               help='Only use the most recent run subdirectory')
+        sub.set_defaults(func=func)
+        return sub
+
+    add_command('summary', cmd_summary, 'Print per-implementation summary statistics')
+
+    report = add_command('report', cmd_report, 'Write the markdown/CSV comparison report')
+    report.add_argument('--output-dir', default='results/reports')
+    report.add_argument('--baseline', default='naive')
+    report.add_argument('--full', action='store_true',
+                        help='Build the report with pandas from the full measurements')
+
+    plot = add_command('plot', cmd_plot, 'Render all plots')
+    plot.add_argument('--output-dir', help='Default: results/plots/<run>')
+
+    speedup = add_command('speedup', cmd_speedup, 'Print speedup and parallel efficiency')
+    speedup.add_argument('--baseline', default='naive')
+    speedup.add_argument('--bootstrap', type=int, default=0,
+                         help='Bootstrap resamples for confidence intervals (0 disables)')
+    speedup.add_argument('--confidence', type=float, default=0.95)
+    speedup.add_argument('--output', help='Also save the table as CSV')
+
+    stats = add_command('stats', cmd_stats, 'Print robust per-configuration statistics')
+    stats.add_argument('--outliers', choices=['mad', 'iqr', 'none'], default='mad',
+                       help='Per-configuration outlier filter (default: mad)')
+    stats.add_argument('--threshold', type=float,
+                       help='Outlier cutoff (default: 3.5 for mad, 1.5 for iqr)')
+    stats.add_argument('--percentiles', type=float, nargs='+', default=[5, 25, 75, 95, 99])
+    stats.add_argument('--bootstrap', type=int, default=0,
+                       help='Bootstrap resamples for a median confidence interval (0 disables)')
+    stats.add_argument('--confidence', type=float, default=0.95)
+    stats.add_argument('--output', help='Also save the table as CSV')
+
+    regress = add_command('regress', cmd_regress,
+                          'Compare the latest run (or --run) with earlier runs; exit 1 on slowdowns')
+    regress.add_argument('--window', type=int, default=5,
+                         help='Earlier runs pooled into the baseline of each configuration')
+    regress.add_argument('--alpha', type=float, default=0.01, help='Significance level')
+    regress.add_argument('--min-change', type=float, default=0.05,
+                         help='Smallest relative slowdown reported (default: 0.05 = 5%%)')
+    regress.add_argument('--json', action='store_true', help='Print the verdict as JSON')
+    regress.add_argument('--output', help='Also write the JSON verdict to this file')
+
+    roofline = add_command('roofline', cmd_roofline, 'Print arithmetic intensity and percent of peak/roofline')
+    roofline.add_argument('--peaks', help='Machine peaks cache (default: ~/.cache/matmul-bench/peaks.json)')
+    roofline.add_argument('--host', help='Peaks used for rows without a node column (default: this host)')
+    roofline.add_argument('--output', help='Also save every annotated row as CSV')
+
+    batch = add_command('batch', cmd_batch,
+                        'Print the batch size where per-matrix latency stops improving')
+    batch.add_argument('--tolerance', type=float, default=0.1,
+                       help='Latency within this fraction of the best counts as saturated')
+    batch.add_argument('--output', help='Also save the table as CSV')
+
+    dtypes = add_command('dtypes', cmd_dtypes,
+                         'Compare throughput and bytes moved of each element type')
+    dtypes.add_argument('--reference', default='float64',
+                        help='Element type the others are compared with (default: float64)')
+    dtypes.add_argument('--output', help='Also save the table as CSV')
+
+    resources = add_command('resources', cmd_resources,
+                            'Print peak RSS, page faults, context switches, CPU time and perf counters')
+    resources.add_argument('--output', help='Also save the table as CSV')
+
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Measure this host's memory bandwidth and FLOP-rate roofs
+Usage: python scripts/machine_peaks.py [--force] [--cores N] [--cache PATH]
+
+Results are cached per hostname (default ~/.cache/matmul-bench/peaks.json,
+override with MATMUL_PEAKS_CACHE), so run it once per machine, e.g. at the
+start of a SLURM job; `analyze.py roofline` and the plots read the cache.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src' / 'python'))
+from harness.peaks import PeaksCache
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Measure machine peaks for roofline analysis')
+    parser.add_argument('--force', action='store_true', help='Measure again even if the host is cached')
+    parser.add_argument('--cores', type=int, help='Cores for the all-core measurement (default: all available)')
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--cache', help='Peaks cache file')
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    cache = PeaksCache(args.cache)
+    cached = not args.force and cache.get() is not None
+    if not cached:
+        print("Measuring STREAM bandwidth and GEMM rate per element type (one core, then all cores)...")
+    peaks = cache.measure(force=args.force, cores=args.cores, repeats=args.repeats)
+
+    print(f"=== Machine peaks: {peaks['host']} ({peaks['cpu_model']}, {peaks['cores']} cores) ===")
+    print(f"{'':<16}{'1 core':>12}{'all cores':>12}")
+    for dtype, gflops in peaks['gemm_gflops'].items():
+        print(f"{dtype + ' GFLOPS':<16}{peaks['gemm_gflops_core'][dtype]:>12.2f}{gflops:>12.2f}")
+    for kernel in peaks['stream_gbs']:
+        print(f"{kernel + ' GB/s':<16}{peaks['stream_gbs_core'][kernel]:>12.2f}{peaks['stream_gbs'][kernel]:>12.2f}")
+    ridges = ', '.join(f"{dtype} {gflops / peaks['bandwidth_gbs']:.2f}" for dtype, gflops in peaks['gemm_gflops'].items())
+    print(f"Ridge points (FLOP/byte): {ridges}")
+    print(f"{'Cached' if cached else 'Saved'} in {cache.path}")
+
+if __name__ == '__main__':
+    main()
@@ -6,53 +6,53 @@ Usage: python plot_results.py [results_directory]
 
 import sys
 import os
+import re
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 from pathlib import Path
 
-# Set style
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (12, 8)
-plt.rcParams['font.size'] = 10
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'analysis'))
+from data_processing.csv_loader import load_benchmark_data
+from data_processing.formats import SHAPE_COLUMNS, latest_run
+from data_processing.metrics_calculator import calculate_speedup
+from data_processing.roofline import ROOFLINE_COLUMNS, annotate_roofline, load_peaks
+from data_processing.schema import shape_labels
+from visualization.render import PlotJob, aggregate_for_plotting, render_plots
 
-def load_results(results_dir):
-    """Load all CSV files from results directory"""
-    csv_files = list(Path(results_dir).glob("*.csv"))
+def _pyplot():
+    """Import pyplot lazily and apply the plot style"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     
-    if not csv_files:
-        print(f"No CSV files found in {results_dir}")
-        return None
-    
-    print(f"Loading {len(csv_files)} CSV files...")
-    
-    dfs = []
-    for csv_file in csv_files:
-        try:
-            df = pd.read_csv(csv_file)
-            dfs.append(df)
-        except Exception as e:
-            print(f"Warning: Could not load {csv_file}: {e}")
-    
-    if not dfs:
+    # Set style
+    sns.set_style("whitegrid")
+    plt.rcParams['figure.figsize'] = (12, 8)
+    plt.rcParams['font.size'] = 10
+    return plt
+
+def load_results(results_dir, runs=None):
+    """Load all CSV files from results directory (optionally only some runs)"""
+    try:
+        combined = load_benchmark_data(results_dir, runs=runs)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Warning: {e}")
         return None
     
-    # Combine all dataframes
-    combined = pd.concat(dfs, ignore_index=True)
     print(f"Loaded {len(combined)} benchmark results")
     return combined
 
 def plot_execution_time(df, output_dir):
     """Plot execution time comparison"""
+    plt = _pyplot()
     plt.figure(figsize=(14, 8))
     
     # Group by implementation and matrix size
     pivot_data = df.pivot_table(
-        values='total_time_ms',
+        values='execution_time_ms',
         index='matrix_size',
         columns='implementation',
-        aggfunc='mean'
+        aggfunc='mean',
+        observed=True
     )
     
     pivot_data.plot(kind='bar', width=0.8)
@@ -71,14 +71,16 @@ def plot_execution_time(df, output_dir):
 
 def plot_gflops(df, output_dir):
     """Plot GFLOPS comparison"""
+    plt = _pyplot()
     plt.figure(figsize=(14, 8))
     
     # Group by implementation and matrix size
     pivot_data = df.pivot_table(
-        values='total_gflops',
+        values='gflops',
         index='matrix_size',
         columns='implementation',
-        aggfunc='mean'
+        aggfunc='mean',
+        observed=True
     )
     
     pivot_data.plot(kind='bar', width=0.8)
@@ -96,44 +98,23 @@ def plot_gflops(df, output_dir):
 
 def plot_speedup(df, output_dir, baseline='baseline'):
     """Plot speedup relative to baseline"""
+    plt = _pyplot()
     plt.figure(figsize=(14, 8))
     
-    # Calculate speedup for each implementation
-    baseline_df = df[df['implementation'] == baseline].copy()
+    speedup_df = calculate_speedup(df, baseline=baseline)
+    speedup_df = speedup_df[speedup_df['implementation'] != baseline]
     
-    if baseline_df.empty:
+    if speedup_df.empty:
         print(f"Warning: No baseline '{baseline}' found, skipping speedup plot")
+        plt.close()
         return
     
-    speedup_data = []
-    for impl in df['implementation'].unique():
-        if impl == baseline:
-            continue
-        
-        impl_df = df[df['implementation'] == impl].copy()
-        
-        for size in df['matrix_size'].unique():
-            baseline_time = baseline_df[baseline_df['matrix_size'] == size]['total_time_ms'].mean()
-            impl_time = impl_df[impl_df['matrix_size'] == size]['total_time_ms'].mean()
-            
-            if pd.notna(baseline_time) and pd.notna(impl_time) and impl_time > 0:
-                speedup = baseline_time / impl_time
-                speedup_data.append({
-                    'implementation': impl,
-                    'matrix_size': size,
-                    'speedup': speedup
-                })
-    
-    if not speedup_data:
-        print("Warning: Could not calculate speedup")
-        return
-    
-    speedup_df = pd.DataFrame(speedup_data)
     pivot_speedup = speedup_df.pivot_table(
         values='speedup',
         index='matrix_size',
         columns='implementation',
-        aggfunc='mean'
+        aggfunc='mean',
+        observed=True
     )
     
     pivot_speedup.plot(kind='bar', width=0.8)
@@ -150,41 +131,194 @@ def plot_speedup(df, output_dir, baseline='baseline'):
     print(f"✓ Saved: {output_path}")
     plt.close()
 
+def plot_shape_comparison(df, output_dir):
+    """Plot GFLOPS of every rectangular product shape per implementation"""
+    plt = _pyplot()
+    plt.figure(figsize=(14, 8))
+    
+    pivot_data = df.assign(shape=shape_labels(df)).pivot_table(
+        values='gflops',
+        index='shape',
+        columns='implementation',
+        aggfunc='mean',
+        observed=True
+    )
+    
+    pivot_data.plot(kind='bar', width=0.8)
+    plt.title('Performance by Matrix Shape (GFLOPS)', fontsize=16, fontweight='bold')
+    plt.xlabel('Shape (M x N x K)', fontsize=12)
+    plt.ylabel('GFLOPS', fontsize=12)
+    plt.xticks(rotation=45, ha='right')
+    plt.legend(title='Implementation', bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    
+    output_path = os.path.join(output_dir, 'shape_comparison.png')
+    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    print(f"✓ Saved: {output_path}")
+    plt.close()
+
+def plot_roofline(df, output_dir):
+    """Plot achieved GFLOPS against arithmetic intensity under the machine roofs"""
+    plt = _pyplot()
+    data = df.dropna(subset=['arithmetic_intensity', 'peak_gflops'])
+    if data.empty:
+        print("Warning: No measured machine peaks for these hosts, skipping roofline plot")
+        return
+    plt.figure(figsize=(12, 8))
+    
+    intensity = np.logspace(np.log10(data['arithmetic_intensity'].min() / 4),
+                            np.log10(data['arithmetic_intensity'].max() * 4), 200)
+    roofs = data[['peak_gflops', 'bandwidth_gbs']]
+    top, bottom = roofs.max(), roofs.min()
+    for label, roof in (('Highest roofs', top), ('Lowest roofs', bottom)):
+        plt.plot(intensity, np.minimum(roof['peak_gflops'], intensity * roof['bandwidth_gbs']),
+                 color='black', linestyle='-' if roof is top else '--',
+                 label=f"{label}: {roof['peak_gflops']:.1f} GFLOPS, {roof['bandwidth_gbs']:.1f} GB/s")
+        if np.allclose(top.to_numpy(), bottom.to_numpy(), rtol=1e-3):
+            break
+    
+    for implementation in sorted(data['implementation'].astype(str).unique()):
+        points = data[data['implementation'] == implementation]
+        plt.scatter(points['arithmetic_intensity'], points['gflops'], label=implementation, s=30)
+    
+    plt.xscale('log')
+    plt.yscale('log')
+    plt.title('Roofline', fontsize=16, fontweight='bold')
+    plt.xlabel('Arithmetic Intensity (FLOP/byte)', fontsize=12)
+    plt.ylabel('GFLOPS', fontsize=12)
+    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.grid(True, which='both', alpha=0.3)
+    plt.tight_layout()
+    
+    output_path = os.path.join(output_dir, 'roofline.png')
+    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    print(f"✓ Saved: {output_path}")
+    plt.close()
+
+# Stacked segments of the phase breakdown: --phases columns of the Python
+# engines (io: out-of-core tile loads and writes), plus the distributed
+# engines' communication time
+PHASE_SEGMENTS = ['allocation', 'initialization', 'distribution', 'io', 'compute', 'comm', 'gather', 'verification']
+PHASE_COLUMNS = [f'{segment}_time_ms' for segment in PHASE_SEGMENTS]
+
+def plot_phase_breakdown(df, output_dir):
+    """Stacked bars of per-phase time at the largest size of every configuration"""
+    plt = _pyplot()
+    data = df.dropna(subset=['allocation_time_ms'])
+    if data.empty:
+        print("Warning: No phase timings (run with --phases), skipping phase breakdown plot")
+        return
+    data = data.loc[data.groupby('implementation', observed=True)['matrix_size'].idxmax()]
+    data = data.sort_values('implementation')
+    segments = data.reindex(columns=PHASE_COLUMNS).fillna(0.0)
+    # Time of the measured multiply not covered by any phase (dispatch, synchronization)
+    in_multiply = segments[['distribution_time_ms', 'io_time_ms', 'compute_time_ms', 'comm_time_ms', 'gather_time_ms']].sum(axis=1)
+    segments['other_time_ms'] = (data['execution_time_ms'] - in_multiply).clip(lower=0.0)
+    
+    plt.figure(figsize=(max(8, len(data) * 1.2), 6))
+    labels = [f"{impl}\n{shape}" for impl, shape in zip(data['implementation'].astype(str), shape_labels(data))]
+    bottom = np.zeros(len(data))
+    for column in segments.columns:
+        values = segments[column].to_numpy()
+        if not values.any():
+            continue
+        plt.bar(labels, values, bottom=bottom, label=column.removesuffix('_time_ms'))
+        bottom += values
+    
+    plt.title('Phase Breakdown', fontsize=16, fontweight='bold')
+    plt.ylabel('Time (ms)', fontsize=12)
+    plt.xticks(rotation=45, ha='right')
+    plt.legend(title='Phase (allocation/initialization once per size)', bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.grid(True, axis='y', alpha=0.3)
+    plt.gca().xaxis.grid(False)
+    plt.tight_layout()
+    
+    output_path = os.path.join(output_dir, 'phase_breakdown.png')
+    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    print(f"✓ Saved: {output_path}")
+    plt.close()
+
+def plot_batch_scaling(df, output_dir):
+    """Plot per-matrix latency and throughput of the batched engines against batch size"""
+    plt = _pyplot()
+    data = df.dropna(subset=['batch_size'])
+    if data.empty:
+        print("Warning: No batched measurements, skipping batch scaling plot")
+        return
+    families = data['implementation'].astype(str).str.replace(r'_b\d+', '', regex=True)
+    fig, (latency_ax, throughput_ax) = plt.subplots(1, 2, figsize=(16, 6))
+    
+    for (family, size), points in data.groupby([families, 'matrix_size'], observed=True):
+        points = points.sort_values('batch_size')
+        label = f'{family} {size}x{size}'
+        latency_ax.plot(points['batch_size'], points['matrix_latency_us'], marker='o', label=label)
+        throughput_ax.plot(points['batch_size'], points['matrices_per_s'], marker='o', label=label)
+    
+    for ax, ylabel in ((latency_ax, 'Latency per Matrix (µs)'), (throughput_ax, 'Matrices per Second')):
+        ax.set_xscale('log', base=2)
+        ax.set_yscale('log')
+        ax.set_xlabel('Batch Size', fontsize=12)
+        ax.set_ylabel(ylabel, fontsize=12)
+        ax.grid(True, which='both', alpha=0.3)
+    latency_ax.set_title('Per-Matrix Latency', fontsize=14, fontweight='bold')
+    throughput_ax.set_title('Throughput', fontsize=14, fontweight='bold')
+    throughput_ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    fig.suptitle('Batched Small-Matrix Scaling', fontsize=16, fontweight='bold')
+    plt.tight_layout()
+    
+    output_path = os.path.join(output_dir, 'batch_scaling.png')
+    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    print(f"✓ Saved: {output_path}")
+    plt.close()
+
 def plot_scaling(df, output_dir):
-    """Plot scaling for OpenMP and MPI"""
-    # OpenMP thread scaling
-    openmp_data = df[df['implementation'].str.contains('openmp', case=False, na=False)]
-    if not openmp_data.empty and 'threads' in openmp_data.columns:
+    """Plot scaling for OpenMP, the parallel Python engines, MPI and the 2D grid engines"""
+    plt = _pyplot()
+    # Thread scaling, one plot per family (openmp_4t -> openmp, numpy_parallel_static_4t -> numpy_parallel_static)
+    threaded = df[df['threads'] > 1] if 'threads' in df.columns else df.iloc[0:0]
+    families = threaded['implementation'].astype(str).str.replace(r'_\d+t$', '', regex=True).unique()
+    for family in sorted(families):
+        family_data = df[df['implementation'].astype(str).str.fullmatch(rf'{re.escape(family)}_\d+t')]
+        if family_data.empty:
+            continue
         plt.figure(figsize=(12, 6))
         
-        for size in sorted(openmp_data['matrix_size'].unique()):
-            size_data = openmp_data[openmp_data['matrix_size'] == size]
-            plt.plot(size_data['threads'], size_data['total_gflops'], 
+        for size in sorted(family_data['matrix_size'].unique()):
+            size_data = family_data[family_data['matrix_size'] == size].sort_values('threads')
+            plt.plot(size_data['threads'], size_data['gflops'], 
                     marker='o', label=f'{size}x{size}')
         
-        plt.title('OpenMP Thread Scaling', fontsize=16, fontweight='bold')
+        title = 'OpenMP' if family == 'openmp' else family
+        plt.title(f'{title} Thread Scaling', fontsize=16, fontweight='bold')
         plt.xlabel('Number of Threads', fontsize=12)
         plt.ylabel('GFLOPS', fontsize=12)
         plt.legend(title='Matrix Size')
         plt.grid(True, alpha=0.3)
         plt.tight_layout()
         
-        output_path = os.path.join(output_dir, 'openmp_scaling.png')
+        output_path = os.path.join(output_dir, f'{family}_scaling.png')
         plt.savefig(output_path, dpi=300, bbox_inches='tight')
         print(f"✓ Saved: {output_path}")
         plt.close()
     
-    # MPI process scaling
-    mpi_data = df[df['implementation'].str.contains('mpi', case=False, na=False)]
-    if not mpi_data.empty and 'processes' in mpi_data.columns:
+    # Process scaling: MPI (1D row split) and the 2D grid engines on one plot
+    processed = df[df['implementation'].astype(str).str.contains(r'_\d+p$', regex=True, na=False)]
+    if not processed.empty and 'processes' in processed.columns:
         plt.figure(figsize=(12, 6))
+        families = processed['implementation'].astype(str).str.replace(r'_\d+p$', '', regex=True)
+        markers = dict(zip(sorted(families.unique()), 'so^Dvx'))
         
-        for size in sorted(mpi_data['matrix_size'].unique()):
-            size_data = mpi_data[mpi_data['matrix_size'] == size]
-            plt.plot(size_data['processes'], size_data['total_gflops'], 
-                    marker='s', label=f'{size}x{size}')
+        for family in sorted(families.unique()):
+            family_data = processed[families == family]
+            for size in sorted(family_data['matrix_size'].unique()):
+                size_data = family_data[family_data['matrix_size'] == size].sort_values('processes')
+                label = f'{size}x{size}' if len(markers) == 1 else f'{family} {size}x{size}'
+                plt.plot(size_data['processes'], size_data['gflops'], 
+                        marker=markers.get(family, 'o'), label=label)
         
-        plt.title('MPI Process Scaling', fontsize=16, fontweight='bold')
+        title = 'MPI' if list(markers) == ['mpi'] else 'MPI vs 2D Grid'
+        plt.title(f'{title} Process Scaling', fontsize=16, fontweight='bold')
         plt.xlabel('Number of Processes', fontsize=12)
         plt.ylabel('GFLOPS', fontsize=12)
         plt.legend(title='Matrix Size')
@@ -202,41 +336,89 @@ def print_summary(df):
     print("PERFORMANCE SUMMARY")
     print("="*60)
     
-    summary = df.groupby('implementation').agg({
-        'total_gflops': ['mean', 'max'],
-        'total_time_ms': 'mean'
+    summary = df.groupby('implementation', observed=True).agg({
+        'gflops': ['mean', 'max'],
+        'execution_time_ms': 'mean'
     }).round(2)
     
     print(summary)
     print("="*60)
 
+def split_shapes(df):
+    """Rows of square products and rows of rectangular ones"""
+    if not all(c in df.columns for c in SHAPE_COLUMNS):
+        return df, df.iloc[0:0]
+    square = (df['m'] == df['n']) & (df['n'] == df['k'])
+    return df[square], df[~square]
+
+def generate_plots(df, output_dir, cache_dir=Path("results/plots") / ".cache", peaks=None):
+    """
+    Render every plot for df into output_dir (unchanged plots come from the cache)
+    
+    The size-indexed plots draw square products only; rectangular ones get
+    a per-shape comparison instead. The roofline plot is added when machine
+    peaks were measured (peaks defaults to the scripts/machine_peaks.py
+    cache), the phase breakdown when engines were run with --phases, and
+    the batch scaling plot when batched engines were measured.
+    """
+    plot_df = aggregate_for_plotting(df)
+    square_df, rectangular_df = split_shapes(plot_df)
+    jobs = [
+        PlotJob(plot_execution_time, square_df),
+        PlotJob(plot_gflops, square_df),
+        PlotJob(plot_speedup, square_df),
+        PlotJob(plot_scaling, square_df),
+    ]
+    if not rectangular_df.empty:
+        jobs.append(PlotJob(plot_shape_comparison, rectangular_df))
+    if 'batch_size' in df.columns:
+        batch_values = ['batch_size', 'matrix_latency_us', 'matrices_per_s']
+        jobs.append(PlotJob(plot_batch_scaling, aggregate_for_plotting(df, batch_values)))
+    if 'allocation_time_ms' in df.columns:
+        jobs.append(PlotJob(plot_phase_breakdown, aggregate_for_plotting(df, ['execution_time_ms'] + PHASE_COLUMNS)))
+    peaks = load_peaks() if peaks is None else peaks
+    if peaks:
+        roofline_values = ['gflops'] + [c for c in ROOFLINE_COLUMNS if c != 'bound']
+        jobs.append(PlotJob(plot_roofline, aggregate_for_plotting(annotate_roofline(df, peaks), roofline_values)))
+    return render_plots(jobs, output_dir, cache_dir=cache_dir)
+
+def resolve_results(results_dir=None):
+    """
+    Pick the data to plot: an explicit directory, or the most recent run
+    read through the shared store of results/raw
+    
+    Returns:
+        (results_dir, runs, output_name)
+    """
+    if results_dir is not None:
+        return results_dir, None, Path(results_dir).name
+    
+    # Find most recent results directory
+    results_base = Path("results/raw")
+    if not results_base.exists():
+        print("Error: results/raw directory not found")
+        print("Usage: python plot_results.py [results_directory]")
+        sys.exit(1)
+    
+    # Get most recent timestamp directory
+    latest = latest_run(results_base)
+    if latest is None:
+        print("Error: No results found in results/raw/")
+        sys.exit(1)
+    
+    print(f"Using most recent results: {latest}")
+    return results_base, [latest.name], latest.name
+
 def main():
     """Main function"""
-    if len(sys.argv) > 1:
-        results_dir = sys.argv[1]
-    else:
-        # Find most recent results directory
-        results_base = Path("results/raw")
-        if not results_base.exists():
-            print("Error: results/raw directory not found")
-            print("Usage: python plot_results.py [results_directory]")
-            sys.exit(1)
-        
-        # Get most recent timestamp directory
-        subdirs = [d for d in results_base.iterdir() if d.is_dir()]
-        if not subdirs:
-            print("Error: No results found in results/raw/")
-            sys.exit(1)
-        
-        results_dir = max(subdirs, key=os.path.getmtime)
-        print(f"Using most recent results: {results_dir}")
+    results_dir, runs, output_name = resolve_results(sys.argv[1] if len(sys.argv) > 1 else None)
     
     # Create output directory for plots
-    output_dir = Path("results/plots") / Path(results_dir).name
+    output_dir = Path("results/plots") / output_name
     output_dir.mkdir(parents=True, exist_ok=True)
     
     # Load results
-    df = load_results(results_dir)
+    df = load_results(results_dir, runs=runs)
     if df is None or df.empty:
         print("Error: No data loaded")
         sys.exit(1)
@@ -245,10 +427,7 @@ def main():
     
     # Generate plots
     try:
-        plot_execution_time(df, output_dir)
-        plot_gflops(df, output_dir)
-        plot_speedup(df, output_dir)
-        plot_scaling(df, output_dir)
+        generate_plots(df, output_dir)
         
         # Print summary
         print_summary(df)
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Run matrix multiplication benchmarks with warmup and adaptive repetitions
+Usage: python scripts/run_benchmarks.py [--sizes 512 1024 ...] [options]
+
+Python counterpart of run_benchmarks.sh: the same binaries and configurations,
+but every (binary, size) pair is warmed up and repeated until the median time
+is stable. Results go to results/raw/<timestamp>/<configuration>.csv.
+
+--engines adds in-process Python engines (src/python/engines) to the run;
+they write the same CSV format as the C binaries. --phases splits their time
+into allocation, initialization, distribution, I/O, compute and gather columns.
+
+--dtypes runs the engines once per element type (float16, float32, float64,
+or int8 with int32 accumulation); every record carries its dtype and the
+bytes the product moves at that element size.
+
+Sparse engines (sparse_dense, sparse_csr_dense, sparse_csr_csr and the
+sparse_auto dispatcher) run once per --densities and --structures value;
+scripts/sparse_crossover.py sweeps them for the crossover densities.
+
+--sizes also takes rectangular shapes MxNxK (A is M x K, B is K x N), e.g.
+--sizes 1024 8192x64x1024 64x8192x1024; engines that only multiply square
+matrices skip them.
+
+Every product is checked with Freivalds' algorithm (--verify-rounds, O(N^2)
+per round): the verdict goes to the verification column and its cost to
+verification_time_ms.
+
+With --concurrent, independent configurations run side by side: each one gets
+exclusive physical cores (one per thread or process, within one NUMA node
+where it fits) and runs pinned to them, so jobs do not compete for cores.
+Records carry the CPUs (cpu_affinity) and NUMA nodes each measurement ran on.
+
+With --adaptive, --sizes is only the coarse starting grid: intervals where two
+configurations cross over or GFLOPS jumps are bisected until --min-gap or the
+--sweep-budget is reached.
+
+Every measured repetition is journaled (<output_dir>/.journal/) before it
+reaches the CSV files. --resume DIR continues an interrupted sweep in DIR:
+sizes already measured are skipped, an interrupted size keeps its earlier
+repetitions, and new --sizes or configurations extend the sweep in place.
+"""
+
+import argparse
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src' / 'python'))
+from engines import DEFAULT_ELEMENT_TYPE, ELEMENT_TYPES, available_engines, element_type, get_engine, phases
+from engines.pool import BLAS_THREAD_VARIABLES
+from engines.sparse import DEFAULT_DENSITY, DEFAULT_STRUCTURE, STRUCTURES
+from harness import AdaptiveSweep, BinaryBenchmark, EngineBenchmark, ResultWriter, Shape, SweepJournal
+from harness.cli import add_policy_arguments, policy_from_args
+from harness.density import configuration_name
+from harness.journal import STOP_JOURNALED, ConfigurationJournal
+from harness.scheduler import CoreScheduler, Job, cores_needed
+from harness.runners import BenchmarkError, perf_available
+from harness.sysinfo import memory_bytes
+from harness.verify import DEFAULT_ROUNDS
+
+DEFAULT_SIZES = [512, 1024, 2048, 4096]
+DEFAULT_THREADS = [1, 2, 4, 8, 16]
+DEFAULT_PROCESSES = [1, 2, 4, 8]
+OPT_LEVELS = ['O1', 'O2', 'O3', 'Ofast']
+SCHEDULES = ['static', 'dynamic', 'guided']
+DEFAULT_BATCHES = [1, 16, 256, 4096]
+# Share of physical memory the A, B and C stacks of a batched configuration may take
+BATCH_MEMORY_FRACTION = 0.5
+
+def discover_benchmarks(bin_dir, threads, processes):
+    """Build the benchmark configurations for every binary present in bin_dir"""
+    bin_dir = Path(bin_dir)
+    benchmarks = []
+
+    if (bin_dir / 'baseline').is_file():
+        benchmarks.append(BinaryBenchmark('baseline', [str(bin_dir / 'baseline')]))
+
+    for opt in OPT_LEVELS:
+        binary = bin_dir / f'optimized_{opt}'
+        if binary.is_file():
+            benchmarks.append(BinaryBenchmark(f'optimized_{opt}', [str(binary)]))
+
+    if (bin_dir / 'openmp').is_file():
+        for t in threads:
+            benchmarks.append(BinaryBenchmark(
+                f'openmp_{t}t', [str(bin_dir / 'openmp')], env={'OMP_NUM_THREADS': str(t)}
+            ))
+
+    if (bin_dir / 'mpi').is_file():
+        if shutil.which('mpirun'):
+            for p in processes:
+                benchmarks.append(BinaryBenchmark(
+                    f'mpi_{p}p', ['mpirun', '-np', str(p), str(bin_dir / 'mpi')]
+                ))
+        else:
+            print("⚠ mpirun not found, skipping MPI")
+
+    return benchmarks
+
+def engine_benchmarks(names, threads, schedules, processes, batches=DEFAULT_BATCHES,
+                      dtypes=(DEFAULT_ELEMENT_TYPE,), densities=(DEFAULT_DENSITY,),
+                      structures=(DEFAULT_STRUCTURE,)):
+    """
+    Benchmark configurations for the requested Python engines ('all' selects every one)
+
+    Parallel engines get one configuration per (schedule, thread count), named
+    like the OpenMP binaries (e.g. numpy_parallel_dynamic_4t); distributed
+    engines one per process count, named like the MPI binary (numpy_summa_4p);
+    batched engines one per batch size (numpy_batched_matmul_b256, and
+    numpy_batched_parallel_b256_4t per thread count); sparse engines one per
+    (structure, density) of their generated inputs (sparse_csr_dense_banded_d0.01).
+
+    All of them are repeated for every element type in dtypes the engine
+    supports, with the type's suffix after the engine name
+    (numpy_matmul_f32, numpy_parallel_i8_static_4t); float64 has none.
+    """
+    if 'all' in names:
+        names = available_engines()
+    benchmarks = []
+    for name in names:
+        supported = get_engine(name).element_types
+        for dtype in dtypes:
+            if dtype not in supported:
+                print(f"⚠ Skipping {name} with {dtype} (supports {', '.join(supported)})")
+                continue
+            benchmarks += _engine_configurations(name, dtype, threads, schedules, processes, batches,
+                                                 densities, structures)
+    return benchmarks
+
+def _engine_configurations(name, dtype, threads, schedules, processes, batches, densities, structures):
+    """Configurations of one engine and element type (see engine_benchmarks)"""
+    base = name + element_type(dtype).suffix
+
+    def make(**options):
+        engine = get_engine(name, **options)
+        engine.use_element_type(dtype)
+        return engine
+
+    engine = make()
+    if engine.sparse:
+        return [EngineBenchmark(make(density=d, structure=s), name=configuration_name(name, dtype, s, d))
+                for s in structures for d in densities]
+    if engine.batched:
+        benchmarks = []
+        for b in batches:
+            if not engine.parallel:
+                benchmarks.append(EngineBenchmark(make(batch=b), name=f'{base}_b{b}'))
+                continue
+            for t in threads:
+                benchmarks.append(EngineBenchmark(make(batch=b, workers=t), name=f'{base}_b{b}_{t}t'))
+        return benchmarks
+    if engine.distributed:
+        benchmarks = []
+        for p in processes:
+            try:
+                benchmarks.append(EngineBenchmark(make(processes=p), name=f'{base}_{p}p'))
+            except ValueError as e:
+                print(f"⚠ Skipping {name} with {p} processes: {e}")
+        return benchmarks
+    if not engine.parallel:
+        return [EngineBenchmark(engine, name=base)]
+    return [EngineBenchmark(make(workers=t, schedule=schedule), name=f'{base}_{schedule}_{t}t')
+            for schedule in schedules for t in threads]
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Run matrix multiplication benchmarks')
+    parser.add_argument('--sizes', type=Shape.parse, nargs='+', default=DEFAULT_SIZES,
+                        help='Matrix sizes N, or rectangular shapes MxNxK (M x K times K x N)')
+    parser.add_argument('--threads', type=int, nargs='+', default=DEFAULT_THREADS,
+                        help='OpenMP thread counts')
+    parser.add_argument('--processes', type=int, nargs='+', default=DEFAULT_PROCESSES,
+                        help='MPI process counts (also the grid sizes of distributed engines)')
+    parser.add_argument('--only', nargs='+', help='Only run these configurations (e.g. baseline openmp_4t)')
+    parser.add_argument('--engines', nargs='+', default=[], choices=available_engines() + ['all'],
+                        metavar='ENGINE',
+                        help=f"Also run in-process Python engines: {', '.join(available_engines())} or all")
+    parser.add_argument('--schedules', nargs='+', default=['static'], choices=SCHEDULES,
+                        help='Work schedules of parallel engines (run once per --threads value)')
+    parser.add_argument('--batches', type=int, nargs='+', default=DEFAULT_BATCHES,
+                        help='Batch sizes of batched engines (matrices per call)')
+    parser.add_argument('--batch-memory-mb', type=float,
+                        help='Skip sizes whose A, B and C stacks of a batched engine exceed this many MiB '
+                             f'(default: {100 * BATCH_MEMORY_FRACTION:.0f}%% of physical memory)')
+    parser.add_argument('--densities', type=float, nargs='+', default=[DEFAULT_DENSITY],
+                        help='Fractions of nonzero elements of the inputs of sparse engines')
+    parser.add_argument('--structures', nargs='+', default=[DEFAULT_STRUCTURE], choices=STRUCTURES,
+                        help='Nonzero patterns of the inputs of sparse engines')
+    parser.add_argument('--dtypes', nargs='+', default=[DEFAULT_ELEMENT_TYPE], choices=list(ELEMENT_TYPES),
+                        help='Element types of the Python engines (int8 accumulates in int32); '
+                             'the C binaries always use float32')
+    parser.add_argument('--bin-dir', default='bin')
+    parser.add_argument('--results-dir', default='results/raw')
+    parser.add_argument('--output-dir', help='Default: <results-dir>/<timestamp>')
+    parser.add_argument('--resume', metavar='DIR',
+                        help='Continue the sweep in DIR: skip measured sizes, finish interrupted ones '
+                             'and add new sizes or configurations')
+
+    policy = add_policy_arguments(parser)
+    policy.add_argument('--timeout', type=float, help='Seconds before a single run is killed')
+    policy.add_argument('--perf', action='store_true',
+                        help='Record cycles, instructions and LLC misses of the C binaries with perf stat')
+    policy.add_argument('--verify-rounds', type=int, default=DEFAULT_ROUNDS,
+                        help="Freivalds rounds checking every product (wrong results pass with "
+                             "probability <= 2^-rounds; 0 disables the check)")
+    policy.add_argument('--verify-tolerance', type=float,
+                        help='Relative rounding error allowed per element of C by the check '
+                             '(default: from N and the result dtype)')
+    policy.add_argument('--phases', action='store_true',
+                        help='Time the allocation/initialization/distribution/io/compute/gather phases '
+                             'of Python engines into per-phase columns')
+
+    concurrent = parser.add_argument_group('concurrent scheduling')
+    concurrent.add_argument('--concurrent', action='store_true',
+                            help='Run configurations side by side on disjoint cores (pinned with '
+                                 'sched_setaffinity, NUMA-aware); one core per thread or process')
+    concurrent.add_argument('--max-jobs', type=int,
+                            help='Most configurations running at once (default: as many as the cores fit)')
+
+    sweep = parser.add_argument_group('adaptive sweep')
+    sweep.add_argument('--adaptive', action='store_true',
+                       help='Refine --sizes around crossovers and GFLOPS discontinuities')
+    sweep.add_argument('--sweep-budget', type=float, default=3600.0,
+                       help='Wall-clock seconds for the whole sweep')
+    sweep.add_argument('--min-gap', type=int, default=32,
+                       help='Do not split size intervals narrower than this')
+    sweep.add_argument('--jump-threshold', type=float, default=0.15,
+                       help='Relative GFLOPS change between neighbouring sizes treated as a discontinuity')
+    return parser
+
+def batch_memory_budget(args) -> int:
+    """Bytes the operand stacks of a batched configuration may take (0: no limit)"""
+    if args.batch_memory_mb is not None:
+        return int(args.batch_memory_mb * 2 ** 20)
+    return int(memory_bytes() * BATCH_MEMORY_FRACTION)
+
+def _over_budget(benchmark, size, batch_memory):
+    """Operand bytes of a batched engine configuration at size when they exceed batch_memory, else None"""
+    if not (batch_memory and isinstance(benchmark, EngineBenchmark) and benchmark.engine.batched):
+        return None
+    needed = benchmark.operand_bytes(size)
+    return needed if needed > batch_memory else None
+
+def run_fixed(benchmarks, sizes, policy, output_dir, batch_memory=0):
+    """Measure every configuration at every size; returns the number of failures"""
+    return sum(run_configuration(benchmark, sizes, policy, output_dir, batch_memory=batch_memory)
+               for benchmark in benchmarks)
+
+def run_configuration(benchmark, sizes, policy, output_dir, log=print, batch_memory=0):
+    """
+    Measure one configuration at every size; returns the number of failures
+
+    Sizes whose operand stacks of a batched engine exceed batch_memory bytes
+    are skipped (with a log line) rather than run out of memory.
+    """
+    failures = 0
+    log(f"Running {benchmark.name}...")
+    # The journal first: it repairs the result file before the writer appends to it
+    with ConfigurationJournal(output_dir, benchmark.name) as journal, \
+            ResultWriter(output_dir / f'{benchmark.name}.csv') as writer:
+        for size in sizes:
+            if not (size.is_square or benchmark.rectangular):
+                log(f"  {size}: skipped (square matrices only)")
+                continue
+            needed = _over_budget(benchmark, size, batch_memory)
+            if needed is not None:
+                log(f"  {size}: skipped (batch of {benchmark.engine.batch} needs {needed / 2 ** 30:.1f} GiB "
+                    f"for A, B and C, over the {batch_memory / 2 ** 30:.1f} GiB batch memory budget)")
+                continue
+            try:
+                result = journal.measure(benchmark, size, policy, on_records=writer.write)
+            except BenchmarkError as e:
+                log(f"  ✗ {e}")
+                failures += 1
+                continue
+            label = f"{size.m}x{size.m}" if size.is_square else f"{size.m}x{size.k} @ {size.k}x{size.n}"
+            if result.stop_reason == STOP_JOURNALED:
+                log(f"  {label}: already measured (median {result.median_ms:.3f} ms over "
+                    f"{len(result.times_ms)} runs)")
+                continue
+            log(f"  {label}: median {result.median_ms:.3f} ms over "
+                f"{len(result.times_ms)} runs (±{100 * result.rel_ci / 2:.1f}%, {result.stop_reason})")
+            last = result.records[-1]
+            if 'io_read_bytes' in last:
+                log(f"    I/O per run: read {last['io_read_bytes'] / 2 ** 20:.1f} MiB, "
+                    f"wrote {last['io_write_bytes'] / 2 ** 20:.1f} MiB, "
+                    f"{last['io_bandwidth_mbs']:.0f} MB/s")
+            if 'matrix_latency_us' in last:
+                log(f"    {result.median_ms * 1e3 / last['batch_size']:.3f} us per matrix, "
+                    f"{last['batch_size'] / result.median_ms * 1e3:,.0f} matrices/s")
+            if 'peak_rss_kb' in last:
+                rss = last['peak_rss_kb']
+                bound = 'at most ' if rss <= last['launcher_rss_kb'] else ''
+                log(f"    peak RSS {bound}{rss / 1024:.1f} MiB, "
+                    f"{last['involuntary_ctx_switches']} involuntary context switches"
+                    + (f", IPC {last['perf_ipc']:.2f}" if 'perf_ipc' in last else ''))
+    return failures
+
+def _scheduled_configuration(payload, log):
+    """Runner of one scheduled job (in its pinned process)"""
+    benchmark, sizes, policy, output_dir, phase_timing, batch_memory = payload
+    phases.enable(phase_timing)
+    return run_configuration(benchmark, sizes, policy, output_dir, log=log, batch_memory=batch_memory)
+
+def run_concurrent(benchmarks, args, policy, output_dir):
+    """Run configurations concurrently on disjoint pinned cores; returns the number of failures"""
+    scheduler = CoreScheduler(max_jobs=args.max_jobs)
+    print(f"Scheduling on {scheduler.topology.describe()}\n")
+    jobs = []
+    for benchmark in benchmarks:
+        width = cores_needed(benchmark)
+        # In-process engines: BLAS gets exactly the job's cores
+        env = {name: str(width) for name in BLAS_THREAD_VARIABLES} if isinstance(benchmark, EngineBenchmark) else {}
+        payload = (benchmark, args.sizes, policy, output_dir, args.phases, batch_memory_budget(args))
+        jobs.append(Job(benchmark.name, width, payload, env))
+    return scheduler.run(jobs, _scheduled_configuration)
+
+def run_adaptive(benchmarks, args, policy, output_dir):
+    """Bisection-refined sweep over all configurations; returns the number of failures"""
+    batch_memory, largest = batch_memory_budget(args), max(size.m for size in args.sizes)
+    for benchmark in [b for b in benchmarks if _over_budget(b, largest, batch_memory)]:
+        print(f"⚠ Skipping {benchmark.name}: its stacks at N={largest} exceed the batch memory budget")
+        benchmarks.remove(benchmark)
+    journal = SweepJournal(output_dir)
+    for benchmark in benchmarks:
+        journal.configuration(benchmark.name)
+    writers = {b.name: ResultWriter(output_dir / f'{b.name}.csv') for b in benchmarks}
+
+    def on_records(name, records):
+        writers[name].write(records)
+        print(f"  {name} {records[0]['matrix_size']}: {records[0]['total_time_ms']:.3f} ms")
+
+    sweep = AdaptiveSweep(
+        benchmarks,
+        [size.m for size in args.sizes],
+        policy=policy,
+        budget_s=args.sweep_budget,
+        min_gap=args.min_gap,
+        jump_threshold=args.jump_threshold,
+        on_records=on_records,
+        journal=journal
+    )
+    try:
+        findings = sweep.run()
+    finally:
+        for writer in writers.values():
+            writer.close()
+        journal.close()
+
+    for error in sweep.errors:
+        print(f"  ✗ {error}")
+    print(f"\nMeasured {sweep.measured_points()} (configuration, size) points")
+    if findings:
+        print("Findings:")
+        for finding in findings:
+            print(f"  • {finding.describe()}")
+    else:
+        print("No crossovers or discontinuities found")
+    return len(sweep.errors)
+
+def main():
+    args = build_parser().parse_args()
+
+    policy = policy_from_args(args)
+    args.sizes = [size if isinstance(size, Shape) else Shape.square(size) for size in args.sizes]
+    if args.adaptive and not all(size.is_square for size in args.sizes):
+        print("Error: --adaptive bisects square sizes only, rectangular shapes are not supported")
+        sys.exit(1)
+    if args.adaptive and args.concurrent:
+        print("Error: --adaptive compares configurations as it goes and cannot run them --concurrent")
+        sys.exit(1)
+
+    benchmarks = discover_benchmarks(args.bin_dir, args.threads, args.processes)
+    benchmarks += engine_benchmarks(args.engines, args.threads, args.schedules, args.processes, args.batches,
+                                    args.dtypes, args.densities, args.structures)
+    if args.only:
+        benchmarks = [b for b in benchmarks if b.name in args.only]
+    if not benchmarks:
+        print(f"Error: No benchmark binaries found in {args.bin_dir}/ (run ./scripts/build.sh) "
+              f"and no --engines selected")
+        sys.exit(1)
+    if args.perf and not perf_available():
+        print("⚠ perf not found, recording resource usage without hardware counters")
+        args.perf = False
+    phases.enable(args.phases)
+    for benchmark in benchmarks:
+        benchmark.timeout = args.timeout
+        benchmark.verify_rounds = args.verify_rounds
+        benchmark.verify_tolerance = args.verify_tolerance
+        if isinstance(benchmark, BinaryBenchmark):
+            benchmark.perf = args.perf
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if args.resume:
+        output_dir = Path(args.resume)
+        if not output_dir.is_dir():
+            print(f"Error: --resume {output_dir}: no such sweep directory")
+            sys.exit(1)
+    else:
+        output_dir = Path(args.output_dir) if args.output_dir else Path(args.results_dir) / timestamp
+        output_dir.mkdir(parents=True, exist_ok=True)
+    print(f"=== Matrix Multiplication Benchmark Suite ===")
+    print(f"Results will be {'added to' if args.resume else 'saved to'}: {output_dir}\n")
+
+    if args.adaptive:
+        failures = run_adaptive(benchmarks, args, policy, output_dir)
+    elif args.concurrent:
+        failures = run_concurrent(benchmarks, args, policy, output_dir)
+    else:
+        failures = run_fixed(benchmarks, args.sizes, policy, output_dir, batch_memory_budget(args))
+
+    print(f"\n=== Benchmark Complete ===")
+    print(f"Results saved to: {output_dir}/")
+    print(f"\nTo summarize results, run:\n  python scripts/analyze.py summary {output_dir}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
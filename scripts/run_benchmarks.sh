@@ -1,6 +1,8 @@
 #!/bin/bash
 # Run all matrix multiplication benchmarks
 # Outputs results to results/raw/ directory
+# Each binary runs once per size; scripts/run_benchmarks.py adds warmup and
+# adaptive repetitions for statistically meaningful results
 
 set -e
 
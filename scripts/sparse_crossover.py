@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Measure where the sparse kernels stop paying off against the dense one
+Usage: python scripts/sparse_crossover.py [--sizes 512 1024 2048] [--densities 0.001 0.01 0.1 ...]
+                                          [--structures uniform banded block]
+
+The dense (np.matmul), CSR x dense and CSR x CSR paths multiply the same
+generated inputs at every (structure, size, density) point. Prints the
+median times per density and the located crossovers; raw records go to
+results/raw/<timestamp>/ and the summary to crossover.json next to them.
+The measured dispatch thresholds are stored in the cache sparse_auto
+reads ($MATMUL_SPARSE_THRESHOLDS or ~/.cache/matmul-bench/sparse.json)
+unless --no-save is given.
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src' / 'python'))
+from engines import DEFAULT_ELEMENT_TYPE
+from engines.dtypes import FLOAT_TYPES
+from engines.sparse import STRUCTURES, SparseThresholds
+from harness import DensitySweep, ResultWriter
+from harness.cli import add_policy_arguments, policy_from_args
+from harness.density import DEFAULT_DENSITIES, PATH_ENGINES
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Sparse/dense crossover density sweep')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[512, 1024, 2048])
+    parser.add_argument('--densities', type=float, nargs='+', default=DEFAULT_DENSITIES,
+                        help='Fractions of nonzero elements of the generated inputs')
+    parser.add_argument('--structures', nargs='+', default=list(STRUCTURES), choices=STRUCTURES,
+                        help='Nonzero patterns: uniform, a band around the diagonal, or dense 32x32 blocks')
+    parser.add_argument('--dtype', default=DEFAULT_ELEMENT_TYPE, choices=FLOAT_TYPES)
+    parser.add_argument('--verify-rounds', type=int, default=0,
+                        help="Freivalds rounds checking every product (0 disables the check)")
+    parser.add_argument('--thresholds-cache', help='Dispatch threshold cache (default: the one sparse_auto reads)')
+    parser.add_argument('--no-save', action='store_true', help='Do not store the measured thresholds')
+    parser.add_argument('--results-dir', default='results/raw')
+    parser.add_argument('--output-dir', help='Default: <results-dir>/<timestamp>')
+    add_policy_arguments(parser)
+    return parser
+
+def print_table(sweep):
+    print(f"\n{'structure':<10}{'N':>6}{'density':>9}" + ''.join(f'{path:>12}' for path in sweep.paths)
+          + f"{'fastest':>12}")
+    for structure in sweep.structures:
+        for size in sorted(sweep.sizes):
+            for density in sorted(sweep.densities):
+                times = {path: sweep.medians.get((path, structure, size), {}).get(density)
+                         for path in sweep.paths}
+                cells = ''.join(f'{t:>12.2f}' if t is not None else f"{'-':>12}" for t in times.values())
+                measured = {path: t for path, t in times.items() if t is not None}
+                fastest = min(measured, key=measured.get) if measured else '-'
+                print(f"{structure:<10}{size:>6}{density:>9g}{cells}{fastest:>12}")
+
+def main():
+    args = build_parser().parse_args()
+    if not all(0 < d <= 1 for d in args.densities):
+        print("Error: --densities must lie in (0, 1]")
+        sys.exit(1)
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    output_dir = Path(args.output_dir) if args.output_dir else Path(args.results_dir) / timestamp
+    output_dir.mkdir(parents=True, exist_ok=True)
+    print(f"=== Sparse/dense crossover ({', '.join(PATH_ENGINES.values())}) ===")
+    print(f"Results will be saved to: {output_dir}\n")
+
+    writers = {}
+
+    def on_records(name, records):
+        if name not in writers:
+            writers[name] = ResultWriter(output_dir / f'{name}.csv')
+        writers[name].write(records)
+        print(f"  {name} {records[0]['matrix_size']}: {records[0]['total_time_ms']:.2f} ms")
+
+    sweep = DensitySweep(
+        args.densities,
+        args.structures,
+        args.sizes,
+        dtype=args.dtype,
+        policy=policy_from_args(args),
+        verify_rounds=args.verify_rounds,
+        on_records=on_records
+    )
+    try:
+        crossovers = sweep.run()
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    for error in sweep.errors:
+        print(f"  ✗ {error}")
+    print_table(sweep)
+
+    print("\nCrossovers:")
+    for crossover in crossovers:
+        print(f"  • {crossover.describe()}")
+    if not crossovers:
+        print("  none: the same path is fastest at every measured density")
+
+    cache = None if args.no_save else SparseThresholds(args.thresholds_cache)
+    thresholds = {}
+    print("\nDispatch thresholds (sparse_auto):")
+    for structure in args.structures:
+        for size in sorted(args.sizes):
+            measured = sweep.thresholds(structure, size)
+            if measured is None:
+                continue
+            thresholds.setdefault(structure, {})[str(size)] = measured
+            print(f"  {structure:<8} N={size:<6} CSR x CSR below {measured['csr_csr_below']:.3g}, "
+                  f"dense from {measured['dense_above']:.3g}")
+            if cache is not None:
+                cache.store(size, args.dtype, structure, measured)
+    if cache is not None and thresholds:
+        print(f"Stored in {cache.cache_path}")
+
+    summary = {
+        'dtype': args.dtype,
+        'medians_ms': {
+            f'{path}/{structure}/{size}': {f'{d:g}': t for d, t in sorted(points.items())}
+            for (path, structure, size), points in sweep.medians.items()
+        },
+        'crossovers': [
+            {'structure': c.structure, 'size': c.size, 'slower': c.slower, 'faster': c.faster,
+             'low': c.low, 'high': c.high, 'estimate': c.estimate}
+            for c in crossovers
+        ],
+        'thresholds': thresholds
+    }
+    with open(output_dir / 'crossover.json', 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"\nSummary written to {output_dir / 'crossover.json'}")
+    sys.exit(1 if sweep.errors else 0)
+
+if __name__ == '__main__':
+    main()
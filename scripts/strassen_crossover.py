@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Measure where Strassen / Strassen-Winograd overtake the plain blocked kernel
+Usage: python scripts/strassen_crossover.py [--sizes 512 1024 2048 4096] [--cutoffs 64 128 256]
+
+Every (algorithm, cutoff) configuration is swept against numpy_blocked with
+the adaptive sweep, which bisects size intervals where the two swap order.
+Prints the median times, speedup and peak memory per size and the located
+crossovers; raw records go to results/raw/<timestamp>/ and the summary to
+crossover.json next to them.
+"""
+
+import argparse
+import json
+import math
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src' / 'python'))
+from engines import get_engine
+from harness import AdaptiveSweep, EngineBenchmark, ResultWriter
+from harness.cli import add_policy_arguments, policy_from_args
+from harness.sweep import CROSSOVER
+
+REFERENCE = 'numpy_blocked'
+ALGORITHMS = ['numpy_strassen', 'numpy_winograd']
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Strassen/Winograd crossover against the blocked kernel')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[512, 1024, 2048, 4096])
+    parser.add_argument('--cutoffs', type=int, nargs='+', default=[64, 128, 256],
+                        help='Base-case sizes below which the recursion calls np.matmul')
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS, choices=ALGORITHMS)
+    parser.add_argument('--min-gap', type=int, default=128,
+                        help='Stop bisecting a crossover interval below this width')
+    parser.add_argument('--sweep-budget', type=float, default=3600.0,
+                        help='Wall-clock seconds for the whole sweep')
+    parser.add_argument('--results-dir', default='results/raw')
+    parser.add_argument('--output-dir', help='Default: <results-dir>/<timestamp>')
+    add_policy_arguments(parser)
+    return parser
+
+def build_benchmarks(algorithms, cutoffs):
+    benchmarks = [EngineBenchmark(get_engine(REFERENCE))]
+    for algorithm in algorithms:
+        for cutoff in cutoffs:
+            benchmarks.append(EngineBenchmark(get_engine(algorithm, cutoff=cutoff),
+                                              name=f'{algorithm}_c{cutoff}'))
+    return benchmarks
+
+def print_table(sweep, benchmarks, peaks):
+    reference = sweep.medians.get(REFERENCE, {})
+    print(f"\n{'configuration':<26}{'N':>6}{'median ms':>12}{'speedup':>10}{'peak MiB':>10}")
+    for benchmark in benchmarks:
+        for size, time_ms in sorted(sweep.medians.get(benchmark.name, {}).items()):
+            speedup = reference[size] / time_ms if size in reference else math.nan
+            peak = peaks[benchmark.name].get(size, math.nan) / 2 ** 20
+            print(f"{benchmark.name:<26}{size:>6}{time_ms:>12.2f}{speedup:>10.2f}{peak:>10.1f}")
+
+def main():
+    args = build_parser().parse_args()
+
+    benchmarks = build_benchmarks(args.algorithms, args.cutoffs)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    output_dir = Path(args.output_dir) if args.output_dir else Path(args.results_dir) / timestamp
+    output_dir.mkdir(parents=True, exist_ok=True)
+    print(f"=== Strassen/Winograd crossover vs {REFERENCE} ===")
+    print(f"Results will be saved to: {output_dir}\n")
+
+    writers = {b.name: ResultWriter(output_dir / f'{b.name}.csv') for b in benchmarks}
+    peaks = {b.name: {} for b in benchmarks}
+    by_name = {b.name: b for b in benchmarks}
+
+    def on_records(name, records):
+        writers[name].write(records)
+        size = records[0]['matrix_size']
+        if size not in peaks[name]:
+            peaks[name][size] = by_name[name].peak_memory(size)
+            print(f"  {name} {size}: {records[0]['total_time_ms']:.2f} ms, "
+                  f"peak {peaks[name][size] / 2 ** 20:.1f} MiB")
+
+    sweep = AdaptiveSweep(
+        benchmarks,
+        args.sizes,
+        policy=policy_from_args(args),
+        budget_s=args.sweep_budget,
+        min_gap=args.min_gap,
+        jump_threshold=math.inf,
+        on_records=on_records,
+        reference=REFERENCE
+    )
+    try:
+        findings = sweep.run()
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    for error in sweep.errors:
+        print(f"  ✗ {error}")
+    print_table(sweep, benchmarks, peaks)
+
+    crossovers = [f for f in findings if f.kind == CROSSOVER]
+    print("\nCrossovers:")
+    for finding in crossovers:
+        print(f"  • {finding.describe()}")
+    faster_everywhere = [
+        b.name for b in benchmarks[1:]
+        if b.name in sweep.medians and sweep.medians[b.name]
+        and not any(b.name in f.benchmarks for f in crossovers)
+        and all(t < sweep.medians[REFERENCE].get(s, math.inf) for s, t in sweep.medians[b.name].items())
+    ]
+    for name in faster_everywhere:
+        print(f"  • {name} is faster than {REFERENCE} at every measured size")
+    if not crossovers and not faster_everywhere:
+        print(f"  none: {REFERENCE} is faster at every measured size")
+
+    summary = {
+        'reference': REFERENCE,
+        'medians_ms': {name: {str(s): t for s, t in sorted(points.items())}
+                       for name, points in sweep.medians.items()},
+        'peak_memory_bytes': {name: {str(s): p for s, p in sorted(points.items())}
+                              for name, points in peaks.items()},
+        'crossovers': [
+            {'slower': f.benchmarks[0], 'faster': f.benchmarks[1], 'low': f.low, 'high': f.high,
+             'estimate': f.estimate}
+            for f in crossovers
+        ]
+    }
+    with open(output_dir / 'crossover.json', 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"\nSummary written to {output_dir / 'crossover.json'}")
+    sys.exit(1 if sweep.errors else 0)
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,7 @@
 #include <string.h>
 #include <sys/time.h>
 #include <mpi.h>
+#include <math.h>
 
 #ifdef _WIN32
 #include <winsock2.h>
@@ -32,34 +33,74 @@ void get_hostname(char *hostname, size_t size) {
     }
 }
 
-// Calculate GFLOPS
-double calculate_gflops(int N, double time_ms) {
-    double ops = 2.0 * N * N * N;
+// Calculate GFLOPS of an M x K by K x N product
+double calculate_gflops(int M, int N, int K, double time_ms) {
+    double ops = 2.0 * M * N * K;
     double gflops = ops / (time_ms * 1e6);
     return gflops;
 }
 
+// Edge of the square product with the same operation count (the matrix_size
+// column; equal to N for square products)
+int equivalent_size(int M, int N, int K) {
+    return (int)llround(cbrt((double)M * N * K));
+}
+
+// Largest operand accepted (elements): the 10000 x 10000 limit of square runs
+#define MAX_ELEMENTS (10000LL * 10000LL)
+
+// Dimensions are positive and no operand exceeds MAX_ELEMENTS
+int valid_shape(int M, int N, int K) {
+    return M > 0 && N > 0 && K > 0 && (long long)M * K <= MAX_ELEMENTS
+        && (long long)K * N <= MAX_ELEMENTS && (long long)M * N <= MAX_ELEMENTS;
+}
+
 // Initialize matrix with random values (same seed for all processes)
-void init_matrix(float *matrix, int N) {
-    for (int i = 0; i < N * N; i++) {
+void init_matrix(float *matrix, int rows, int cols) {
+    for (size_t i = 0; i < (size_t)rows * cols; i++) {
         matrix[i] = (float)rand() / RAND_MAX;
     }
 }
 
 // Local matrix multiplication: compute rows [start_row, end_row) of C
 void matrix_multiply_rows(const float *A, const float *B, float *C, 
-                          int N, int start_row, int num_rows) {
+                          int N, int K, int start_row, int num_rows) {
     for (int i = 0; i < num_rows; i++) {
         for (int j = 0; j < N; j++) {
             float sum = 0.0f;
-            for (int k = 0; k < N; k++) {
-                sum += A[i * N + k] * B[k * N + j];
+            for (int k = 0; k < K; k++) {
+                sum += A[i * K + k] * B[k * N + j];
             }
             C[i * N + j] = sum;
         }
     }
 }
 
+// Write A (M x K), B (K x N) and C (M x N) as raw row-major float32 files A.f32,
+// B.f32 and C.f32 into $MATMUL_DUMP_DIR (when set) so the harness can verify C
+// outside the timed region
+int dump_matrices(const float *A, const float *B, const float *C, int M, int N, int K) {
+    const char *dir = getenv("MATMUL_DUMP_DIR");
+    if (!dir || !*dir) {
+        return 0;
+    }
+    const float *matrices[3] = {A, B, C};
+    const char *names[3] = {"A", "B", "C"};
+    size_t counts[3] = {(size_t)M * K, (size_t)K * N, (size_t)M * N};
+    char path[4096];
+    for (int m = 0; m < 3; m++) {
+        snprintf(path, sizeof(path), "%s/%s.f32", dir, names[m]);
+        FILE *f = fopen(path, "wb");
+        if (!f || fwrite(matrices[m], sizeof(float), counts[m], f) != counts[m]) {
+            fprintf(stderr, "Warning: Could not write %s\n", path);
+            if (f) fclose(f);
+            return -1;
+        }
+        fclose(f);
+    }
+    return 0;
+}
+
 int main(int argc, char *argv[]) {
     int rank, size;
     
@@ -68,35 +109,46 @@ int main(int argc, char *argv[]) {
     MPI_Comm_rank(MPI_COMM_WORLD, &rank);
     MPI_Comm_size(MPI_COMM_WORLD, &size);
     
-    // Parse matrix size from command line
-    int N = 1024;
-    if (argc > 1) {
-        N = atoi(argv[1]);
-        if (N <= 0 || N > 10000) {
-            if (rank == 0) {
-                fprintf(stderr, "Error: Matrix size must be between 1 and 10000\n");
-            }
-            MPI_Finalize();
-            return 1;
+    // Parse the shape from the command line: N (square) or M N K, where A is
+    // M x K and B is K x N
+    int M = 1024, N = 1024, K = 1024;
+    if (argc == 2) {
+        M = N = K = atoi(argv[1]);
+    } else if (argc == 4) {
+        M = atoi(argv[1]);
+        N = atoi(argv[2]);
+        K = atoi(argv[3]);
+    } else if (argc != 1) {
+        if (rank == 0) {
+            fprintf(stderr, "Usage: %s [N | M N K]\n", argv[0]);
+        }
+        MPI_Finalize();
+        return 1;
+    }
+    if (!valid_shape(M, N, K)) {
+        if (rank == 0) {
+            fprintf(stderr, "Error: Matrix dimensions must be positive and no matrix larger than 10000 x 10000\n");
         }
+        MPI_Finalize();
+        return 1;
     }
     
-    // Calculate rows per process
-    int rows_per_proc = N / size;
-    int remainder = N % size;
+    // Calculate rows (of A and C) per process
+    int rows_per_proc = M / size;
+    int remainder = M % size;
     int start_row = rank * rows_per_proc + (rank < remainder ? rank : remainder);
     int num_rows = rows_per_proc + (rank < remainder ? 1 : 0);
     
     // Allocate matrices
-    float *A_local = (float*)malloc(num_rows * N * sizeof(float));
-    float *B = (float*)malloc(N * N * sizeof(float));
-    float *C_local = (float*)malloc(num_rows * N * sizeof(float));
+    float *A_local = (float*)malloc((size_t)num_rows * K * sizeof(float));
+    float *B = (float*)malloc((size_t)K * N * sizeof(float));
+    float *C_local = (float*)malloc((size_t)num_rows * N * sizeof(float));
     float *A_full = NULL;
     float *C_full = NULL;
     
     if (rank == 0) {
-        A_full = (float*)malloc(N * N * sizeof(float));
-        C_full = (float*)malloc(N * N * sizeof(float));
+        A_full = (float*)malloc((size_t)M * K * sizeof(float));
+        C_full = (float*)malloc((size_t)M * N * sizeof(float));
     }
     
     if (!A_local || !B || !C_local || (rank == 0 && (!A_full || !C_full))) {
@@ -110,41 +162,48 @@ int main(int argc, char *argv[]) {
     // Initialize matrices on rank 0
     if (rank == 0) {
         srand(42);
-        init_matrix(A_full, N);
-        init_matrix(B, N);
+        init_matrix(A_full, M, K);
+        init_matrix(B, K, N);
     }
     
     // Broadcast B to all processes
-    MPI_Bcast(B, N * N, MPI_FLOAT, 0, MPI_COMM_WORLD);
+    MPI_Bcast(B, K * N, MPI_FLOAT, 0, MPI_COMM_WORLD);
     
-    // Scatter rows of A to all processes
+    // Scatter rows of A to all processes (rows of C are gathered the same way)
     int *sendcounts = NULL;
     int *displs = NULL;
+    int *recvcounts = NULL;
+    int *recvdispls = NULL;
     
     if (rank == 0) {
         sendcounts = (int*)malloc(size * sizeof(int));
         displs = (int*)malloc(size * sizeof(int));
+        recvcounts = (int*)malloc(size * sizeof(int));
+        recvdispls = (int*)malloc(size * sizeof(int));
         
         for (int i = 0; i < size; i++) {
             int rows = rows_per_proc + (i < remainder ? 1 : 0);
-            sendcounts[i] = rows * N;
-            displs[i] = (i * rows_per_proc + (i < remainder ? i : remainder)) * N;
+            int first = i * rows_per_proc + (i < remainder ? i : remainder);
+            sendcounts[i] = rows * K;
+            displs[i] = first * K;
+            recvcounts[i] = rows * N;
+            recvdispls[i] = first * N;
         }
     }
     
     MPI_Scatterv(A_full, sendcounts, displs, MPI_FLOAT,
-                 A_local, num_rows * N, MPI_FLOAT, 0, MPI_COMM_WORLD);
+                 A_local, num_rows * K, MPI_FLOAT, 0, MPI_COMM_WORLD);
     
     // Synchronize before timing
     MPI_Barrier(MPI_COMM_WORLD);
     double start_time = MPI_Wtime();
     
     // Perform local matrix multiplication
-    matrix_multiply_rows(A_local, B, C_local, N, start_row, num_rows);
+    matrix_multiply_rows(A_local, B, C_local, N, K, start_row, num_rows);
     
     // Gather results
     MPI_Gatherv(C_local, num_rows * N, MPI_FLOAT,
-                C_full, sendcounts, displs, MPI_FLOAT, 0, MPI_COMM_WORLD);
+                C_full, recvcounts, recvdispls, MPI_FLOAT, 0, MPI_COMM_WORLD);
     
     // Synchronize after computation
     MPI_Barrier(MPI_COMM_WORLD);
@@ -153,7 +212,7 @@ int main(int argc, char *argv[]) {
     // Output results from rank 0
     if (rank == 0) {
         double elapsed_ms = (end_time - start_time) * 1000.0;
-        double gflops = calculate_gflops(N, elapsed_ms);
+        double gflops = calculate_gflops(M, N, K, elapsed_ms);
         
         // Get hostname
         char hostname[256];
@@ -170,8 +229,11 @@ int main(int argc, char *argv[]) {
         
         // Output in CSV format
         printf("%s,%s,%d,%.3f,%.3f,%.3f,0.000,0.000,%dp,%s,N/A\n",
-               timestamp, impl_name, N, elapsed_ms, gflops, elapsed_ms, 
+               timestamp, impl_name, equivalent_size(M, N, K), elapsed_ms, gflops, elapsed_ms, 
                size, hostname);
+        
+        // Optional dump for verification (outside the timed region)
+        dump_matrices(A_full, B, C_full, M, N, K);
     }
     
     // Cleanup
@@ -183,6 +245,8 @@ int main(int argc, char *argv[]) {
         free(C_full);
         free(sendcounts);
         free(displs);
+        free(recvcounts);
+        free(recvdispls);
     }
     
     MPI_Finalize();
@@ -32,13 +32,19 @@ void get_hostname(char *hostname, size_t size) {
     }
 }
 
-// Calculate GFLOPS
-double calculate_gflops(int N, double time_ms) {
-    double ops = 2.0 * N * N * N;
+// Calculate GFLOPS of an M x K by K x N product
+double calculate_gflops(int M, int N, int K, double time_ms) {
+    double ops = 2.0 * M * N * K;
     double gflops = ops / (time_ms * 1e6);
     return gflops;
 }
 
+// Edge of the square product with the same operation count (the matrix_size
+// column; equal to N for square products)
+int equivalent_size(int M, int N, int K) {
+    return (int)llround(cbrt((double)M * N * K));
+}
+
 // Get optimization level from preprocessor
 const char* get_opt_level() {
 #if defined(__OPTIMIZE__)
@@ -58,44 +64,86 @@ const char* get_opt_level() {
 #endif
 }
 
+// Largest operand accepted (elements): the 10000 x 10000 limit of square runs
+#define MAX_ELEMENTS (10000LL * 10000LL)
+
+// Dimensions are positive and no operand exceeds MAX_ELEMENTS
+int valid_shape(int M, int N, int K) {
+    return M > 0 && N > 0 && K > 0 && (long long)M * K <= MAX_ELEMENTS
+        && (long long)K * N <= MAX_ELEMENTS && (long long)M * N <= MAX_ELEMENTS;
+}
+
 // Initialize matrix with random values
-void init_matrix(float *matrix, int N) {
-    for (int i = 0; i < N * N; i++) {
+void init_matrix(float *matrix, int rows, int cols) {
+    for (size_t i = 0; i < (size_t)rows * cols; i++) {
         matrix[i] = (float)rand() / RAND_MAX;
     }
 }
 
 // Matrix multiplication: C = A * B
-void matrix_multiply(const float *A, const float *B, float *C, int N) {
-    for (int i = 0; i < N; i++) {
+void matrix_multiply(const float *A, const float *B, float *C, int M, int N, int K) {
+    for (int i = 0; i < M; i++) {
         for (int j = 0; j < N; j++) {
             float sum = 0.0f;
-            for (int k = 0; k < N; k++) {
-                sum += A[i * N + k] * B[k * N + j];
+            for (int k = 0; k < K; k++) {
+                sum += A[i * K + k] * B[k * N + j];
             }
             C[i * N + j] = sum;
         }
     }
 }
 
-int main(int argc, char *argv[]) {
-    // Parse matrix size from command line
-    int N = 1024;
-    if (argc > 1) {
-        N = atoi(argv[1]);
-        if (N <= 0 || N > 10000) {
-            fprintf(stderr, "Error: Matrix size must be between 1 and 10000\n");
-            return 1;
+// Write A (M x K), B (K x N) and C (M x N) as raw row-major float32 files A.f32,
+// B.f32 and C.f32 into $MATMUL_DUMP_DIR (when set) so the harness can verify C
+// outside the timed region
+int dump_matrices(const float *A, const float *B, const float *C, int M, int N, int K) {
+    const char *dir = getenv("MATMUL_DUMP_DIR");
+    if (!dir || !*dir) {
+        return 0;
+    }
+    const float *matrices[3] = {A, B, C};
+    const char *names[3] = {"A", "B", "C"};
+    size_t counts[3] = {(size_t)M * K, (size_t)K * N, (size_t)M * N};
+    char path[4096];
+    for (int m = 0; m < 3; m++) {
+        snprintf(path, sizeof(path), "%s/%s.f32", dir, names[m]);
+        FILE *f = fopen(path, "wb");
+        if (!f || fwrite(matrices[m], sizeof(float), counts[m], f) != counts[m]) {
+            fprintf(stderr, "Warning: Could not write %s\n", path);
+            if (f) fclose(f);
+            return -1;
         }
+        fclose(f);
+    }
+    return 0;
+}
+
+int main(int argc, char *argv[]) {
+    // Parse the shape from the command line: N (square) or M N K, where A is
+    // M x K and B is K x N
+    int M = 1024, N = 1024, K = 1024;
+    if (argc == 2) {
+        M = N = K = atoi(argv[1]);
+    } else if (argc == 4) {
+        M = atoi(argv[1]);
+        N = atoi(argv[2]);
+        K = atoi(argv[3]);
+    } else if (argc != 1) {
+        fprintf(stderr, "Usage: %s [N | M N K]\n", argv[0]);
+        return 1;
+    }
+    if (!valid_shape(M, N, K)) {
+        fprintf(stderr, "Error: Matrix dimensions must be positive and no matrix larger than 10000 x 10000\n");
+        return 1;
     }
     
     // Seed random number generator
     srand(42);
     
     // Allocate matrices
-    float *A = (float*)malloc(N * N * sizeof(float));
-    float *B = (float*)malloc(N * N * sizeof(float));
-    float *C = (float*)malloc(N * N * sizeof(float));
+    float *A = (float*)malloc((size_t)M * K * sizeof(float));
+    float *B = (float*)malloc((size_t)K * N * sizeof(float));
+    float *C = (float*)malloc((size_t)M * N * sizeof(float));
     
     if (!A || !B || !C) {
         fprintf(stderr, "Error: Memory allocation failed\n");
@@ -104,8 +152,8 @@ int main(int argc, char *argv[]) {
     }
     
     // Initialize matrices
-    init_matrix(A, N);
-    init_matrix(B, N);
+    init_matrix(A, M, K);
+    init_matrix(B, K, N);
     
     // Get hostname
     char hostname[256];
@@ -125,15 +173,18 @@ int main(int argc, char *argv[]) {
     
     // Perform matrix multiplication and measure time
     double start_time = get_time_ms();
-    matrix_multiply(A, B, C, N);
+    matrix_multiply(A, B, C, M, N, K);
     double end_time = get_time_ms();
     
     double elapsed_ms = end_time - start_time;
-    double gflops = calculate_gflops(N, elapsed_ms);
+    double gflops = calculate_gflops(M, N, K, elapsed_ms);
     
     // Output in CSV format
     printf("%s,%s,%d,%.3f,%.3f,%.3f,0.000,0.000,N/A,%s,N/A\n",
-           timestamp, impl_name, N, elapsed_ms, gflops, elapsed_ms, hostname);
+           timestamp, impl_name, equivalent_size(M, N, K), elapsed_ms, gflops, elapsed_ms, hostname);
+    
+    // Optional dump for verification (outside the timed region)
+    dump_matrices(A, B, C, M, N, K);
     
     // Cleanup
     free(A);
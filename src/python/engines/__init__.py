@@ -0,0 +1,25 @@
+"""
+In-process matrix multiplication engines
+
+Every engine implements ``multiply(A, B, out=None)`` and registers itself
+under the implementation name used in result files. The harness benchmarks
+them through ``harness.EngineBenchmark``, so Python tiers land in the same
+11-column CSV files as the C binaries.
+"""
+
+from .base import Engine, EngineError, available_engines, get_engine, register
+from .dtypes import DEFAULT_ELEMENT_TYPE, ELEMENT_TYPES, ElementType, element_type
+from . import pure
+from . import numpy_engines, blocked, strassen, parallel, distributed, out_of_core, batched, sparse
+
+__all__ = [
+    'DEFAULT_ELEMENT_TYPE',
+    'ELEMENT_TYPES',
+    'ElementType',
+    'Engine',
+    'EngineError',
+    'available_engines',
+    'element_type',
+    'get_engine',
+    'register',
+]
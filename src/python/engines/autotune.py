@@ -0,0 +1,188 @@
+"""
+Tile-size autotuner for the blocked engine
+
+The search space is pruned with the cache sizes the kernel exposes in
+/sys/devices/system/cpu/cpu0/cache: a tile shape is only tried when the three
+tiles of one tile product (A, B and the product) fit in L2 but overflow L1,
+the range where blocking pays off. The winner is stored per
+(host, dtype, size class) in a JSON tuning cache, so later runs reuse it
+without searching. Rectangular (m x k) @ (k x n) products are tuned on their
+own shape, with a size class per dimension.
+"""
+
+import os
+import socket
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from .blocked import DEFAULT_TILE, BlockedEngine, Tile, tile_label
+from .json_cache import CACHE_DIR, load_json, write_json
+
+CACHE_SYSFS = Path('/sys/devices/system/cpu/cpu0/cache')
+
+# Used when sysfs is unavailable (macOS, containers without /sys)
+FALLBACK_CACHE_SIZES = {1: 32 * 1024, 2: 256 * 1024, 3: 8 * 1024 * 1024}
+
+# Edge lengths from the src/cache_opt blocking experiment
+TILE_EDGES = (16, 32, 64, 128, 256, 512)
+
+TUNING_CACHE_ENV = 'MATMUL_TUNING_CACHE'
+DEFAULT_TUNING_CACHE = CACHE_DIR / 'tiles.json'
+
+
+def _parse_size(text: str) -> int:
+    text = text.strip().upper()
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if text and text[-1] in units:
+        return int(text[:-1]) * units[text[-1]]
+    return int(text)
+
+
+def cache_sizes(sysfs: Path = CACHE_SYSFS) -> Dict[int, int]:
+    """
+    Data/unified cache size in bytes per level, from sysfs
+
+    Returns:
+        {level: bytes}, falling back to FALLBACK_CACHE_SIZES for missing levels
+    """
+    sizes = {}
+    for index in sorted(sysfs.glob('index*')):
+        try:
+            if (index / 'type').read_text().strip() == 'Instruction':
+                continue
+            level = int((index / 'level').read_text())
+            sizes[level] = _parse_size((index / 'size').read_text())
+        except (OSError, ValueError):
+            continue
+    return {**FALLBACK_CACHE_SIZES, **sizes}
+
+
+def size_class(n: int) -> int:
+    """Smallest power of two >= n; sizes in one class share a tuned tile"""
+    return 1 << max(0, n - 1).bit_length()
+
+
+def shape_class(m: int, n: int = None, k: int = None) -> str:
+    """Size class of a product: one for square shapes, MxNxK of the per-dimension classes otherwise"""
+    classes = {size_class(d) for d in (m, n or m, k or m)}
+    if len(classes) == 1:
+        return str(classes.pop())
+    return 'x'.join(str(size_class(d)) for d in (m, n or m, k or m))
+
+
+def tile_footprint(tile: Tile, itemsize: int) -> int:
+    tm, tn, tk = tile
+    return (tm * tk + tk * tn + tm * tn) * itemsize
+
+
+def candidate_tiles(m: int, itemsize: int, caches: Dict[int, int] = None, limit: int = 8,
+                    n: int = None, k: int = None) -> List[Tile]:
+    """
+    Pruned tile shapes worth measuring for an (m x k) @ (k x n) multiply (n and k default to m)
+
+    Square tiles and tiles with a halved or doubled shared dimension, whose
+    footprint lies between L1 and L2. The untuned DEFAULT_TILE is always
+    included so the tuned result can be compared against it.
+    """
+    n, k = n or m, k or m
+    caches = caches or cache_sizes()
+    l1, l2 = caches[1], caches[2]
+    shapes = set()
+    for edge in TILE_EDGES:
+        if edge > min(m, n):
+            continue
+        for tk in (edge // 2, edge, edge * 2):
+            if tk in TILE_EDGES and tk <= k:
+                shapes.add((edge, edge, tk))
+    fitting = [t for t in shapes if l1 < tile_footprint(t, itemsize) <= l2]
+    if not fitting:
+        fitting = [min(shapes, key=lambda t: tile_footprint(t, itemsize))] if shapes else []
+    # Largest tiles first: with NumPy, per-tile call overhead favours bigger tiles
+    fitting.sort(key=lambda t: tile_footprint(t, itemsize), reverse=True)
+    candidates = fitting[:limit]
+    if DEFAULT_TILE not in candidates:
+        candidates.append(DEFAULT_TILE)
+    return candidates
+
+
+class TileTuner:
+    """
+    Finds and caches the fastest BlockedEngine tile per (host, dtype, size class)
+
+    Args:
+        cache_path: JSON tuning cache, default $MATMUL_TUNING_CACHE or
+            ~/.cache/matmul-bench/tiles.json
+        repeats: Timed multiplies per candidate (the best one counts)
+        limit: Maximum number of candidates per search
+    """
+
+    def __init__(self, cache_path=None, repeats: int = 3, limit: int = 8):
+        self.cache_path = Path(cache_path or os.environ.get(TUNING_CACHE_ENV) or DEFAULT_TUNING_CACHE)
+        self.repeats = repeats
+        self.limit = limit
+        self._cache = load_json(self.cache_path)
+
+    @staticmethod
+    def key(m: int, dtype, n: int = None, k: int = None) -> str:
+        return f'{socket.gethostname()}/{np.dtype(dtype).name}/{shape_class(m, n, k)}'
+
+    def cached(self, m: int, dtype, n: int = None, k: int = None):
+        """Cache entry for this size class, or None"""
+        return self._cache.get(self.key(m, dtype, n, k))
+
+    def tile_for(self, m: int, dtype=np.float64, n: int = None, k: int = None) -> Tile:
+        """Tuned tile for an (m x k) @ (k x n) multiply (n and k default to m), searching only on a cache miss"""
+        entry = self.cached(m, dtype, n, k)
+        if entry is None:
+            entry = self.tune(m, dtype, n, k)
+        return tuple(entry['tile'])
+
+    def _time(self, engine: BlockedEngine, A, B, C) -> float:
+        engine.setup(A.shape[0], B.shape[1], A.shape[1])
+        best = float('inf')
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            engine.multiply(A, B, out=C)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    def tune(self, m: int, dtype=np.float64, n: int = None, k: int = None) -> dict:
+        """Measure every candidate on an (m x k) @ (k x n) product and store the fastest"""
+        n, k = n or m, k or m
+        dtype = np.dtype(dtype)
+        candidates = candidate_tiles(m, dtype.itemsize, limit=self.limit, n=n, k=k)
+        label = str(m) if m == n == k else f'{m}x{n}x{k}'
+        print(f"Tuning {BlockedEngine.name} tiles for N={label} ({dtype.name}, {len(candidates)} candidates)...")
+
+        engine = BlockedEngine()
+        engine.use_element_type(dtype.name)
+        A = engine.random_matrix(m, 0, cols=k)
+        B = engine.random_matrix(k, 1, cols=n)
+        C = engine.allocate(m, n)
+
+        flops = 2.0 * m * n * k
+        results = {}
+        for tile in candidates:
+            engine.tile = tile
+            results[tile_label(tile)] = flops / self._time(engine, A, B, C) / 1e9
+
+        best = max(results, key=results.get)
+        entry = {
+            'tile': [int(t) for t in best.split('x')],
+            'gflops': results[best],
+            'default_gflops': results[tile_label(DEFAULT_TILE)],
+            'tuned_at_size': label,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'candidates': results
+        }
+        print(f"  tuned {best}: {entry['gflops']:.2f} GFLOPS "
+              f"(untuned {tile_label(DEFAULT_TILE)}: {entry['default_gflops']:.2f} GFLOPS)")
+
+        # Re-read before writing so concurrent tuners do not drop each other's entries
+        self._cache = {**load_json(self.cache_path), self.key(m, dtype, n, k): entry}
+        write_json(self.cache_path, self._cache)
+        return entry
@@ -0,0 +1,143 @@
+"""
+Engine interface and registry
+
+An engine multiplies two square matrices in its own native representation
+(nested lists, flat ``array`` buffers, NumPy arrays); engines with
+``rectangular`` set also take an M x K by K x N product, and engines listing
+more than float64 in ``element_types`` can switch to other element types
+(see dtypes.py). Converting the inputs
+and allocating the output happen outside the timed region, so only
+``multiply`` is measured, like the kernel in the C binaries.
+"""
+
+import random
+from typing import Dict, List, Type
+
+from .dtypes import DEFAULT_ELEMENT_TYPE, element_type
+
+_REGISTRY: Dict[str, Type['Engine']] = {}
+
+
+class EngineError(RuntimeError):
+    """An engine failed to compute a product"""
+
+
+class Engine:
+    """
+    Base class of all matmul engines
+
+    Subclasses set ``name`` (the implementation column in result files) and
+    implement ``multiply``. The default representation is a list of row lists
+    of Python floats; engines with another layout override ``from_rows``,
+    ``to_rows`` and ``allocate``.
+    """
+    name = ''
+    description = ''
+    # Engines taking a ``workers`` option; the scripts expand them over --threads
+    parallel = False
+    # Engines taking a ``processes`` option; the scripts expand them over --processes
+    distributed = False
+    # Engines multiplying (batch, n, n) stacks; the scripts expand them over --batches
+    batched = False
+    # Matrices per multiply call
+    batch = 1
+    # Engines multiplying M x K by K x N operands (``random_matrix`` and
+    # ``allocate`` then take a column count)
+    rectangular = False
+    # Engines multiplying generated sparse inputs; the scripts expand them over
+    # --densities and --structures (see sparse.py)
+    sparse = False
+    # Element types (see dtypes.py) the engine can multiply; Python floats are float64
+    element_types = (DEFAULT_ELEMENT_TYPE,)
+    element_type = DEFAULT_ELEMENT_TYPE
+    # Engines whose rounding error grows faster than an inner product's (Strassen-type
+    # recursions); their results are verified against the worst-case bound (see harness.verify)
+    worst_case_rounding = False
+    # Extra measurements of the last multiply (e.g. I/O bytes), added to its result record
+    last_stats: Dict[str, float] = {}
+
+    @property
+    def block_size(self) -> str:
+        """Value of the block_size column in result files"""
+        return 'N/A'
+
+    def use_element_type(self, name: str):
+        """Multiply ``name`` elements from now on (call before creating matrices)"""
+        element_type(name)
+        if name not in self.element_types:
+            raise ValueError(f"Engine '{self.name}' does not support {name} "
+                             f"(supported: {', '.join(self.element_types)})")
+        self.element_type = name
+
+    def setup(self, m: int, n: int = None, k: int = None):
+        """
+        Per-size preparation (scratch buffers, tuning), run outside the timed region
+
+        Square products pass their size only; rectangular engines also get
+        the n and k of an (m x k) @ (k x n) product.
+        """
+
+    def workspace_bytes(self, m: int, n: int = None, k: int = None) -> int:
+        """Scratch memory ``setup`` allocates for an n x n (or (m x k) @ (k x n)) multiply"""
+        return 0
+
+    def random_matrix(self, n: int, seed: int = 42, cols: int = None):
+        """Random n x cols (default n x n) matrix with values in [0, 1) in the engine's representation"""
+        rng = random.Random(seed)
+        return self.from_rows([[rng.random() for _ in range(cols or n)] for _ in range(n)])
+
+    def operands(self, A, B):
+        """The generated inputs in the layouts ``multiply`` takes (converted outside the timed region)"""
+        return A, B
+
+    def from_rows(self, rows: List[List[float]]):
+        return rows
+
+    def to_rows(self, matrix) -> List[List[float]]:
+        return matrix
+
+    def to_array(self, matrix):
+        """NumPy view or copy of a matrix, for result verification"""
+        import numpy as np
+        return np.asarray(self.to_rows(matrix), dtype=np.float64)
+
+    def allocate(self, n: int, cols: int = None):
+        return [[0.0] * (cols or n) for _ in range(n)]
+
+    def multiply(self, A, B, out=None):
+        """
+        Compute C = A @ B
+
+        Args:
+            A, B: n x n matrices in the engine's representation (M x K and
+                K x N for rectangular engines)
+            out: Optional preallocated result (from ``allocate``) written in place
+
+        Returns:
+            The result matrix (``out`` when given)
+        """
+        raise NotImplementedError
+
+
+def register(cls: Type[Engine]) -> Type[Engine]:
+    """Class decorator adding an engine to the registry under ``cls.name``"""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} has no engine name")
+    if cls.name in _REGISTRY and _REGISTRY[cls.name] is not cls:
+        raise ValueError(f"Engine '{cls.name}' is already registered by {_REGISTRY[cls.name].__name__}")
+    _REGISTRY[cls.name] = cls
+    return cls
+
+
+def get_engine(name: str, **options) -> Engine:
+    """Instantiate a registered engine by name"""
+    try:
+        cls = _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown engine '{name}' (available: {', '.join(available_engines())})")
+    return cls(**options)
+
+
+def available_engines() -> List[str]:
+    return sorted(_REGISTRY)
+
@@ -0,0 +1,184 @@
+"""
+Batched engines: stacks of small matrices multiplied in one call
+
+Below N of about 64, one multiply is mostly call and dispatch overhead, so
+single-matrix sweeps measure the interpreter rather than the arithmetic.
+These engines take (batch, n, n) operands and multiply every pair
+A[i] @ B[i] in one ``multiply`` call; the harness reports per-matrix latency
+and throughput per batch size, which shows where the per-call overhead
+stops mattering.
+
+- numpy_batched_matmul: one stacked ``np.matmul`` over the whole batch
+- numpy_batched_blocked: the batch in cache-sized chunks (the A, B and C
+  matrices of a chunk fit in L2), one stacked ``np.matmul`` per chunk
+- numpy_batched_parallel: the batch split into contiguous ranges over a
+  persistent shared-memory process pool, one stacked ``np.matmul`` per worker
+"""
+
+import os
+from typing import Dict
+
+import numpy as np
+
+from .autotune import cache_sizes
+from .base import register
+from .dtypes import ELEMENT_TYPES
+from .numpy_engines import NumpyEngine, random_array
+from .parallel import static_range
+from .phases import phase
+from .pool import SharedArrays, serve
+
+DEFAULT_BATCH = 1024
+
+
+class BatchedEngine(NumpyEngine):
+    """
+    Shared representation: C-contiguous (batch, n, n) stacks (float64 unless switched)
+
+    Args:
+        batch: Matrices per multiply
+    """
+    batched = True
+
+    def __init__(self, batch: int = DEFAULT_BATCH):
+        if batch < 1:
+            raise ValueError(f"Batch size must be positive, got {batch}")
+        self.batch = batch
+
+    @property
+    def block_size(self) -> str:
+        return f'b{self.batch}'
+
+    def random_matrix(self, n: int, seed: int = 42):
+        return random_array(np.random.default_rng(seed), (self.batch, n, n), self.dtype)
+
+    def from_rows(self, rows):
+        """A stack from nested lists; a single matrix is repeated ``batch`` times"""
+        source = np.asarray(rows, dtype=self.dtype)
+        if source.ndim == 2:
+            source = np.broadcast_to(source, (self.batch,) + source.shape)
+        return np.ascontiguousarray(source)
+
+    def allocate(self, n: int):
+        return np.empty((self.batch, n, n), dtype=self.accumulator)
+
+
+@register
+class StackedMatmulEngine(BatchedEngine):
+    name = 'numpy_batched_matmul'
+    description = 'Stacked np.matmul over a (batch, n, n) batch'
+    element_types = tuple(ELEMENT_TYPES)
+
+    def multiply(self, A, B, out=None):
+        return np.matmul(A, B, out=out, dtype=self.accumulator)
+
+
+@register
+class BlockedBatchEngine(BatchedEngine):
+    """
+    Stacked matmul over cache-sized chunks of the batch
+
+    Args:
+        batch: Matrices per multiply
+        chunk: Matrices per chunk; default: as many as fit (A, B and C) in L2
+    """
+    name = 'numpy_batched_blocked'
+    description = 'Stacked np.matmul over L2-sized chunks of the batch'
+    element_types = tuple(ELEMENT_TYPES)
+
+    def __init__(self, batch: int = DEFAULT_BATCH, chunk: int = None):
+        super().__init__(batch)
+        self.chunk = chunk
+        self._chunks: Dict[int, int] = {}
+
+    def setup(self, n: int):
+        if n not in self._chunks:
+            # A, B and C of one matrix
+            matrix_bytes = n * n * (2 * np.dtype(self.dtype).itemsize + np.dtype(self.accumulator).itemsize)
+            self._chunks[n] = self.chunk or max(1, cache_sizes()[2] // matrix_bytes)
+
+    def multiply(self, A, B, out=None):
+        n = A.shape[-1]
+        self.setup(n)
+        out = self.allocate(n) if out is None else out
+        chunk = self._chunks[n]
+        for b0 in range(0, A.shape[0], chunk):
+            np.matmul(A[b0:b0 + chunk], B[b0:b0 + chunk], out=out[b0:b0 + chunk], dtype=self.accumulator)
+        return out
+
+
+def _worker(index, tasks, done):
+    def handle(task, cache):
+        cache.retain(task['segments'])
+        shape, dtype = tuple(task['shape']), np.dtype(task['dtype'])
+        A, B, C = (cache.array(name, shape, dtype) for name in task['segments'])
+        start, stop = static_range(shape[0], task['workers'], index)
+        np.matmul(A[start:stop], B[start:stop], out=C[start:stop])
+
+    serve(index, tasks, done, handle)
+
+
+@register
+class BatchSplitEngine(SharedArrays, BatchedEngine):
+    """
+    The batch split into contiguous ranges over a shared-memory process pool
+
+    Stacks from ``random_matrix``/``allocate``/``from_rows`` are backed by
+    shared memory already; other arrays are copied into staging segments
+    before each multiply (timed as the distribution phase).
+
+    Args:
+        batch: Matrices per multiply
+        workers: Worker processes (reported as the threads column)
+    """
+    name = 'numpy_batched_parallel'
+    description = 'Stacked np.matmul over batch ranges on a shared-memory process pool'
+    parallel = True
+
+    def __init__(self, batch: int = DEFAULT_BATCH, workers: int = None):
+        super().__init__(batch)
+        self.workers = workers or len(os.sched_getaffinity(0))
+        self._init_shared()
+
+    @property
+    def block_size(self) -> str:
+        return f'{self.workers}t'
+
+    def random_matrix(self, n: int, seed: int = 42):
+        stack = self._shared_array((self.batch, n, n))
+        stack[...] = super().random_matrix(n, seed)
+        return stack
+
+    def from_rows(self, rows):
+        source = super().from_rows(rows)
+        stack = self._shared_array(source.shape)
+        stack[...] = source
+        return stack
+
+    def allocate(self, n: int):
+        return self._shared_array((self.batch, n, n))
+
+    def setup(self, n: int):
+        self._start_pool(self.workers, _worker)
+
+    def multiply(self, A, B, out=None):
+        self.setup(A.shape[-1])
+        staged_out = out is None or self._owner(out) is None
+        C = self._scratch('C', A.shape) if staged_out else out
+        with phase('distribution'):
+            segments = [self._segment_of(A, 'A'), self._segment_of(B, 'B'), self._owner(C)]
+
+        with phase('compute'):
+            self._pool.run({
+                'segments': segments,
+                'shape': A.shape,
+                'dtype': np.dtype(self.dtype).str,
+                'workers': self.workers,
+            })
+
+        with phase('gather'):
+            if out is None:
+                return C.copy()
+            if C is not out:
+                np.copyto(out, C)
+        return out
@@ -0,0 +1,137 @@
+"""
+Cache-blocked NumPy engines
+
+The Python counterpart of the loop-blocking experiment in src/cache_opt:
+C is computed tile by tile, and every tile product runs on contiguous copies
+of the A and B tiles so it reads straight through memory. All scratch space
+is allocated in ``setup`` and reused by every ``multiply`` of that size.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+from .base import register
+from .dtypes import ELEMENT_TYPES
+from .numpy_engines import NumpyEngine
+
+Tile = Tuple[int, int, int]
+
+# Untuned tile (rows of A/C, columns of B/C, shared dimension)
+DEFAULT_TILE: Tile = (64, 64, 64)
+
+
+def tile_label(tile: Tile) -> str:
+    return 'x'.join(str(t) for t in tile)
+
+
+class _Workspace:
+    """Packed-B (k x n) buffer with its tile views, plus A-tile and product (accumulator) scratch"""
+
+    def __init__(self, k: int, n: int, tile: Tile, dtype, accumulator):
+        tm, tn, tk = tile
+        self.key = (k, n, tile, dtype)
+        self.packed_b = np.empty(k * n, dtype=dtype)
+        self.b_tiles = []
+        offset = 0
+        for k0 in range(0, k, tk):
+            kk = min(tk, k - k0)
+            row = []
+            for j0 in range(0, n, tn):
+                nj = min(tn, n - j0)
+                row.append(self.packed_b[offset:offset + kk * nj].reshape(kk, nj))
+                offset += kk * nj
+            self.b_tiles.append(row)
+        self.a_buf = np.empty(tm * tk, dtype=dtype)
+        self.product = np.empty(tm * tn, dtype=accumulator)
+
+
+@register
+class BlockedEngine(NumpyEngine):
+    """
+    Tiled matmul with packed, contiguous tiles
+
+    B is packed tile by tile once per multiply; each A tile is packed once per
+    (i, k) block and reused across the whole j loop. Rectangular operands use
+    the same tiles, cut short at the edges of each dimension.
+
+    Args:
+        tile: (tm, tn, tk) tile shape, DEFAULT_TILE when omitted
+    """
+    name = 'numpy_blocked'
+    description = 'NumPy tiled matmul over packed contiguous tiles'
+    rectangular = True
+    element_types = tuple(ELEMENT_TYPES)
+
+    def __init__(self, tile: Tile = None):
+        self.tile = tuple(tile) if tile else DEFAULT_TILE
+        self._workspace = None
+
+    @property
+    def block_size(self) -> str:
+        return tile_label(self.tile)
+
+    def setup(self, m: int, n: int = None, k: int = None):
+        self._workspace_for(k or m, n or m)
+
+    def workspace_bytes(self, m: int, n: int = None, k: int = None) -> int:
+        tm, tn, tk = self.tile
+        return (((k or m) * (n or m) + tm * tk) * np.dtype(self.dtype).itemsize
+                + tm * tn * np.dtype(self.accumulator).itemsize)
+
+    def _workspace_for(self, k: int, n: int) -> _Workspace:
+        if self._workspace is None or self._workspace.key != (k, n, self.tile, self.dtype):
+            self._workspace = _Workspace(k, n, self.tile, self.dtype, self.accumulator)
+        return self._workspace
+
+    def multiply(self, A, B, out=None):
+        (m, k), n = A.shape, B.shape[1]
+        tm, tn, tk = self.tile
+        ws = self._workspace_for(k, n)
+        C = out if out is not None else self.allocate(m, n)
+        C.fill(0)
+
+        for kb, k0 in enumerate(range(0, k, tk)):
+            for jb, j0 in enumerate(range(0, n, tn)):
+                tile = ws.b_tiles[kb][jb]
+                np.copyto(tile, B[k0:k0 + tile.shape[0], j0:j0 + tile.shape[1]])
+
+        for i0 in range(0, m, tm):
+            mi = min(tm, m - i0)
+            for kb, k0 in enumerate(range(0, k, tk)):
+                kk = min(tk, k - k0)
+                a = ws.a_buf[:mi * kk].reshape(mi, kk)
+                np.copyto(a, A[i0:i0 + mi, k0:k0 + kk])
+                for jb, j0 in enumerate(range(0, n, tn)):
+                    b = ws.b_tiles[kb][jb]
+                    nj = b.shape[1]
+                    product = ws.product[:mi * nj].reshape(mi, nj)
+                    np.matmul(a, b, out=product, dtype=self.accumulator)
+                    C[i0:i0 + mi, j0:j0 + nj] += product
+        return C
+
+
+@register
+class TunedBlockedEngine(BlockedEngine):
+    """
+    BlockedEngine whose tile comes from the autotuner
+
+    The first size of each size class triggers a search (outside the timed
+    region, in ``setup``); later sizes and later runs reuse the cached tile.
+
+    Args:
+        tuner: TileTuner to use, a default one with the default cache file when omitted
+    """
+    name = 'numpy_blocked_tuned'
+    description = 'NumPy tiled matmul with an autotuned tile shape'
+
+    def __init__(self, tuner=None):
+        super().__init__()
+        self.tuner = tuner
+
+    def setup(self, m: int, n: int = None, k: int = None):
+        if self.tuner is None:
+            from .autotune import TileTuner
+            self.tuner = TileTuner()
+        self.tile = self.tuner.tile_for(m, self.dtype, n, k)
+        super().setup(m, n, k)
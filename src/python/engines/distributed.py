@@ -0,0 +1,380 @@
+"""
+2D-decomposed engines: SUMMA and Cannon on a local process grid
+
+Unlike src/mpi, which broadcasts all of B to every rank, each rank of a
+pr x pc grid owns one block of A, B and C (O(N^2/p) each) in its own shared
+memory segment, plus a few block-sized receive buffers. "Communication" is a
+rank copying another rank's block (or panel) into its receive buffer, the
+one-sided equivalent of a message; barriers order the steps that need it.
+
+- SUMMA works on any grid: for every K panel, rank (i, j) fetches the A panel
+  from the owner in its grid row and the B panel from the owner in its grid
+  column, then accumulates their product into its C block.
+- Cannon needs a square grid: after the initial skew, A blocks shift left and
+  B blocks shift up by one rank per step, through double-buffered exposed
+  receive buffers.
+
+Every rank times its copies and barrier waits (communication) separately
+from its local products (computation); the slowest rank's totals are
+reported in ``last_stats``.
+"""
+
+import math
+import os
+import time
+import weakref
+from threading import BrokenBarrierError
+from typing import List, Tuple
+
+import numpy as np
+
+from .base import register
+from .numpy_engines import NumpyEngine, random_array
+from .parallel import static_range
+from .phases import phase
+from .pool import SPAWN, WorkerPool, create_segment, release_segments, serve
+
+
+def grid_shape(processes: int) -> Tuple[int, int]:
+    """Most square pr x pc grid with pr * pc == processes (pr <= pc)"""
+    rows = max(d for d in range(1, math.isqrt(processes) + 1) if processes % d == 0)
+    return rows, processes // rows
+
+
+def partition(n: int, parts: int) -> List[Tuple[int, int]]:
+    return [static_range(n, parts, i) for i in range(parts)]
+
+
+class DistributedMatrix:
+    """
+    An n x n matrix stored as a pr x pc grid of blocks, one shared segment per block
+
+    Block (i, j) covers rows ``row_bounds[i]`` and columns ``col_bounds[j]``;
+    the parent process never holds the whole matrix unless ``gather`` is called.
+    """
+
+    def __init__(self, n: int, grid: Tuple[int, int], dtype):
+        self.n = n
+        self.grid = grid
+        self.dtype = np.dtype(dtype)
+        self.row_bounds = partition(n, grid[0])
+        self.col_bounds = partition(n, grid[1])
+        self.segments = [
+            [create_segment(self._block_shape(i, j)[0] * self._block_shape(i, j)[1] * self.dtype.itemsize)
+             for j in range(grid[1])]
+            for i in range(grid[0])
+        ]
+        self._finalizer = weakref.finalize(self, release_segments, [s for row in self.segments for s in row])
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.n, self.n
+
+    def _block_shape(self, i: int, j: int) -> Tuple[int, int]:
+        (r0, r1), (c0, c1) = self.row_bounds[i], self.col_bounds[j]
+        return r1 - r0, c1 - c0
+
+    def block(self, i: int, j: int) -> np.ndarray:
+        return np.ndarray(self._block_shape(i, j), dtype=self.dtype, buffer=self.segments[i][j].buf)
+
+    def names(self) -> List[List[str]]:
+        return [[segment.name for segment in row] for row in self.segments]
+
+    def scatter(self, array):
+        for i, (r0, r1) in enumerate(self.row_bounds):
+            for j, (c0, c1) in enumerate(self.col_bounds):
+                self.block(i, j)[...] = array[r0:r1, c0:c1]
+
+    def gather(self, out=None) -> np.ndarray:
+        out = np.empty(self.shape, dtype=self.dtype) if out is None else out
+        for i, (r0, r1) in enumerate(self.row_bounds):
+            for j, (c0, c1) in enumerate(self.col_bounds):
+                out[r0:r1, c0:c1] = self.block(i, j)
+        return out
+
+    def close(self):
+        self._finalizer()
+
+
+class _Rank:
+    """One rank's view of a task: its coordinates, blocks and timers"""
+
+    def __init__(self, task, cache, index):
+        self.task, self.cache = task, cache
+        self.pr, self.pc = task['grid']
+        self.i, self.j = divmod(index, self.pc)
+        self.rows, self.cols = task['row_bounds'], task['col_bounds']
+        self.dtype = np.dtype(task['dtype'])
+        self.slots = self.workspace(index)
+        self.comm = 0.0
+        self.compute = 0.0
+        self.comm_bytes = 0
+
+    def remote(self, matrix: str, i: int, j: int) -> np.ndarray:
+        (r0, r1), (c0, c1) = self.rows[i], self.cols[j]
+        return self.cache.array(self.task[matrix][i][j], (r1 - r0, c1 - c0), self.dtype)
+
+    def workspace(self, rank: int) -> List[np.ndarray]:
+        """Receive buffers of ``rank`` (this rank's own, or a neighbour's)"""
+        task = self.task
+        return list(self.cache.array(task['workspace'][rank], (task['slots'], task['slot_size']), self.dtype))
+
+    def slot(self, index: int, shape, slots=None) -> np.ndarray:
+        slots = self.slots if slots is None else slots
+        return slots[index][:shape[0] * shape[1]].reshape(shape)
+
+    def fetch(self, source: np.ndarray, slot: int) -> np.ndarray:
+        start = time.perf_counter()
+        target = self.slot(slot, source.shape)
+        np.copyto(target, source)
+        self.comm += time.perf_counter() - start
+        self.comm_bytes += target.nbytes
+        return target
+
+    def wait(self, barrier):
+        start = time.perf_counter()
+        barrier.wait()
+        self.comm += time.perf_counter() - start
+
+    def accumulate(self, C, a, b, product_slot: int):
+        start = time.perf_counter()
+        product = self.slot(product_slot, (a.shape[0], b.shape[1]))
+        np.matmul(a, b, out=product)
+        C += product
+        self.compute += time.perf_counter() - start
+
+    def stats(self):
+        return {'comm_s': self.comm, 'compute_s': self.compute, 'comm_bytes': self.comm_bytes}
+
+
+def _summa(rank: _Rank, barrier):
+    i, j = rank.i, rank.j
+    C = rank.remote('C', i, j)
+    C.fill(0)
+    # K panels: every panel lies inside one A column block and one B row block
+    breaks = sorted({b for bounds in (rank.cols, rank.rows) for b, _ in bounds} | {rank.task['n']})
+    for k0, k1 in zip(breaks, breaks[1:]):
+        a_owner = next(q for q, (c0, c1) in enumerate(rank.cols) if c0 <= k0 < c1)
+        b_owner = next(q for q, (r0, r1) in enumerate(rank.rows) if r0 <= k0 < r1)
+        a_block = rank.remote('A', i, a_owner)
+        b_block = rank.remote('B', b_owner, j)
+        a_offset = k0 - rank.cols[a_owner][0]
+        b_offset = k0 - rank.rows[b_owner][0]
+        a_panel = a_block[:, a_offset:a_offset + k1 - k0]
+        b_panel = b_block[b_offset:b_offset + k1 - k0]
+        if a_owner != j:
+            a_panel = rank.fetch(a_panel, 0)
+        if b_owner != i:
+            b_panel = rank.fetch(b_panel, 1)
+        rank.accumulate(C, a_panel, b_panel, 2)
+    rank.wait(barrier)
+
+
+def _cannon(rank: _Rank, barrier):
+    q, i, j = rank.pr, rank.i, rank.j
+    C = rank.remote('C', i, j)
+    C.fill(0)
+
+    def a_shape(k):
+        return rank.rows[i][1] - rank.rows[i][0], rank.cols[k][1] - rank.cols[k][0]
+
+    def b_shape(k):
+        return rank.rows[k][1] - rank.rows[k][0], rank.cols[j][1] - rank.cols[j][0]
+
+    # Slots: A buffers 0/1, B buffers 2/3, product 4. Neighbours read our
+    # buffers through our workspace segment.
+    k = (i + j) % q
+    rank.fetch(rank.remote('A', i, k), 0)
+    rank.fetch(rank.remote('B', k, j), 2)
+    rank.wait(barrier)
+
+    # At step s our A/B sit in buffer s % 2; the right neighbour holds the A
+    # block we need next and the lower neighbour the B block, so we copy those
+    # into buffer (s + 1) % 2, which nobody reads until after the barrier.
+    right = rank.workspace(i * q + (j + 1) % q)
+    below = rank.workspace(((i + 1) % q) * q + j)
+    for step in range(q):
+        k = (i + j + step) % q
+        current, following = step % 2, (step + 1) % 2
+        if step < q - 1:
+            k_next = (k + 1) % q
+            rank.fetch(rank.slot(current, a_shape(k_next), right), following)
+            rank.fetch(rank.slot(2 + current, b_shape(k_next), below), 2 + following)
+        rank.accumulate(C, rank.slot(current, a_shape(k)), rank.slot(2 + current, b_shape(k)), 4)
+        rank.wait(barrier)
+
+
+ALGORITHMS = {'summa': (_summa, 3), 'cannon': (_cannon, 5)}
+
+
+def _rank_worker(index, tasks, done, barrier):
+    def handle(task, cache):
+        cache.retain([task['workspace'][index]] + [name for m in 'ABC' for row in task[m] for name in row])
+        rank = _Rank(task, cache, index)
+        try:
+            ALGORITHMS[task['algorithm']][0](rank, barrier)
+        except BrokenBarrierError:
+            raise RuntimeError('another rank failed')
+        except Exception:
+            barrier.abort()
+            raise
+        stats = rank.stats()
+        del rank
+        return stats
+
+    serve(index, tasks, done, handle)
+
+
+def _release(pool, segments):
+    if pool is not None:
+        pool.close()
+    release_segments(segments)
+
+
+class _GridEngine(NumpyEngine):
+    """
+    Shared setup of the grid engines
+
+    Matrices from ``random_matrix``/``allocate``/``from_rows`` are
+    DistributedMatrix objects; plain arrays are scattered into staging
+    matrices before a multiply.
+
+    Args:
+        processes: Ranks in the grid (reported as the processes column)
+    """
+    algorithm = ''
+    distributed = True
+
+    def __init__(self, processes: int = None):
+        self.processes = processes or len(os.sched_getaffinity(0))
+        self.grid = grid_shape(self.processes)
+        self._pool = None
+        self._barrier = None
+        self._workspace = []
+        self._workspace_key = None
+        self._staging = {}
+        self._finalizer = weakref.finalize(self, _release, None, self._workspace)
+
+    @property
+    def block_size(self) -> str:
+        return f'{self.processes}p'
+
+    def random_matrix(self, n: int, seed: int = 42):
+        matrix = DistributedMatrix(n, self.grid, self.dtype)
+        for i in range(self.grid[0]):
+            for j in range(self.grid[1]):
+                block = matrix.block(i, j)
+                block[...] = random_array(np.random.default_rng([seed, i, j]), block.shape, self.dtype)
+        return matrix
+
+    def from_rows(self, rows):
+        source = super().from_rows(rows)
+        matrix = DistributedMatrix(source.shape[0], self.grid, self.dtype)
+        matrix.scatter(source)
+        return matrix
+
+    def to_rows(self, matrix):
+        return matrix.gather().tolist()
+
+    def to_array(self, matrix):
+        return matrix.gather() if isinstance(matrix, DistributedMatrix) else matrix
+
+    def allocate(self, n: int):
+        return DistributedMatrix(n, self.grid, self.dtype)
+
+    def _slot_size(self, n: int) -> int:
+        return math.ceil(n / self.grid[0]) * math.ceil(n / self.grid[1])
+
+    def workspace_bytes(self, n: int) -> int:
+        slots = ALGORITHMS[self.algorithm][1]
+        return self.processes * slots * self._slot_size(n) * np.dtype(self.dtype).itemsize
+
+    def setup(self, n: int):
+        if self._pool is None:
+            self._barrier = SPAWN.Barrier(self.processes)
+            self._pool = WorkerPool(self.processes, _rank_worker, (self._barrier,))
+            self._finalizer.detach()
+            self._finalizer = weakref.finalize(self, _release, self._pool, self._workspace)
+        if self._workspace_key != n:
+            release_segments(self._workspace)
+            slots = ALGORITHMS[self.algorithm][1]
+            nbytes = slots * self._slot_size(n) * np.dtype(self.dtype).itemsize
+            self._workspace[:] = [create_segment(nbytes) for _ in range(self.processes)]
+            self._workspace_key = n
+
+    def close(self):
+        """Stop the ranks and free their workspace segments"""
+        self._finalizer()
+        self._pool = None
+
+    def _distributed(self, matrix, role: str) -> DistributedMatrix:
+        if isinstance(matrix, DistributedMatrix) and matrix.grid == self.grid:
+            return matrix
+        n = matrix.shape[0]
+        staged = self._staging.get((role, n))
+        if staged is None:
+            staged = self._staging[role, n] = DistributedMatrix(n, self.grid, self.dtype)
+        if isinstance(matrix, DistributedMatrix):
+            matrix = matrix.gather()
+        if role != 'C':
+            staged.scatter(matrix)
+        return staged
+
+    def multiply(self, A, B, out=None):
+        n = A.shape[0]
+        self.setup(n)
+        C = self._distributed(out, 'C') if out is not None else self.allocate(n)
+
+        with phase('distribution'):
+            A, B = self._distributed(A, 'A'), self._distributed(B, 'B')
+        self._barrier.reset()
+        with phase('compute'):
+            results = self._pool.run({
+                'algorithm': self.algorithm,
+                'n': n,
+                'grid': self.grid,
+                'dtype': np.dtype(self.dtype).str,
+                'row_bounds': partition(n, self.grid[0]),
+                'col_bounds': partition(n, self.grid[1]),
+                'A': A.names(),
+                'B': B.names(),
+                'C': C.names(),
+                'workspace': [segment.name for segment in self._workspace],
+                'slots': ALGORITHMS[self.algorithm][1],
+                'slot_size': self._slot_size(n)
+            })
+
+        comm = max(r['comm_s'] for r in results)
+        compute = max(r['compute_s'] for r in results)
+        self.last_stats = {
+            'kernel_time_ms': compute * 1e3,
+            'compute_time_ms': compute * 1e3,
+            'comm_time_ms': comm * 1e3,
+            'comm_bytes': sum(r['comm_bytes'] for r in results)
+        }
+
+        if out is None or out is C:
+            return C
+        with phase('gather'):
+            C.gather(out)
+        return out
+
+
+@register
+class SummaEngine(_GridEngine):
+    name = 'numpy_summa'
+    description = 'SUMMA on a 2D process grid over shared-memory blocks'
+    algorithm = 'summa'
+
+
+@register
+class CannonEngine(_GridEngine):
+    name = 'numpy_cannon'
+    description = "Cannon's algorithm on a square process grid over shared-memory blocks"
+    algorithm = 'cannon'
+
+    def __init__(self, processes: int = None):
+        # Default: the largest square grid that fits the available cores
+        super().__init__(processes or math.isqrt(len(os.sched_getaffinity(0))) ** 2)
+        if self.grid[0] != self.grid[1]:
+            raise ValueError(f"Cannon needs a square process count, got {self.processes}")
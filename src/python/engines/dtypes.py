@@ -0,0 +1,48 @@
+"""
+Element types of the benchmarked products
+
+An element type is the storage type of A and B plus the type C is
+accumulated and stored in. Floating-point types accumulate in themselves;
+int8 accumulates in int32, as integer GEMM kernels do, so products of
+full-range int8 operands stay exact up to K = 2^31 / 128^2 (131072).
+
+Engines list the types they support in ``Engine.element_types`` and switch
+with ``Engine.use_element_type``; the harness records the type in the dtype
+column of every result.
+"""
+
+from typing import Dict, NamedTuple
+
+
+class ElementType(NamedTuple):
+    """Operand storage type (the dtype column value) and accumulator type, with their sizes"""
+    name: str
+    accumulator: str
+    itemsize: int
+    accumulator_itemsize: int
+    # Appended to configuration names by the scripts (none for the default type)
+    suffix: str
+
+    def traffic_bytes(self, m: int, n: int, k: int) -> int:
+        """Compulsory traffic of an M x K by K x N product: A and B read once, C written once"""
+        return (m * k + k * n) * self.itemsize + m * n * self.accumulator_itemsize
+
+
+ELEMENT_TYPES: Dict[str, ElementType] = {t.name: t for t in (
+    ElementType('float16', 'float16', 2, 2, '_f16'),
+    ElementType('float32', 'float32', 4, 4, '_f32'),
+    ElementType('float64', 'float64', 8, 8, ''),
+    ElementType('int8', 'int32', 1, 4, '_i8'),
+)}
+
+FLOAT_TYPES = ('float16', 'float32', 'float64')
+
+DEFAULT_ELEMENT_TYPE = 'float64'
+
+
+def element_type(name: str) -> ElementType:
+    """Look up an element type by name"""
+    try:
+        return ELEMENT_TYPES[name]
+    except KeyError:
+        raise ValueError(f"Unknown element type '{name}' (available: {', '.join(ELEMENT_TYPES)})")
@@ -0,0 +1,34 @@
+"""
+JSON files of per-host measurements under ~/.cache/matmul-bench
+
+The tile tuner (tiles.json), the sparse dispatch thresholds (sparse.json) and
+the machine peaks (peaks.json, see harness/peaks.py) each keep what they
+measured in one such file. Writers re-read the file right before changing it
+and replace it atomically, so concurrent runs neither read a partial file
+nor drop each other's entries.
+"""
+
+import json
+import os
+from pathlib import Path
+
+CACHE_DIR = Path.home() / '.cache' / 'matmul-bench'
+
+
+def load_json(path: Path) -> dict:
+    """Contents of a cache file ({} when it is missing or unreadable)"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_json(path: Path, data: dict):
+    """Replace a cache file with data through a per-process temporary file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'{path.name}.tmp-{os.getpid()}')
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
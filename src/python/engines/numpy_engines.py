@@ -0,0 +1,79 @@
+"""
+NumPy engines
+
+``@`` dispatches to the BLAS NumPy was built against; ``einsum`` without
+``optimize`` uses NumPy's own contraction loop, which shows what the BLAS
+call is worth.
+
+NumPy engines run every floating-point element type; engines listing
+ELEMENT_TYPES also multiply int8 operands into int32 results, passing the
+accumulator as the ``dtype`` of the NumPy call.
+"""
+
+from typing import List
+
+import numpy as np
+
+from .base import Engine, register
+from .dtypes import ELEMENT_TYPES, FLOAT_TYPES, element_type
+
+
+def random_array(rng: np.random.Generator, shape, dtype) -> np.ndarray:
+    """Uniform values in [0, 1) for floating-point dtypes, over the whole range for integer ones"""
+    dtype = np.dtype(dtype)
+    if dtype.kind in 'iu':
+        info = np.iinfo(dtype)
+        return rng.integers(info.min, info.max, size=shape, dtype=dtype, endpoint=True)
+    if dtype in (np.float32, np.float64):
+        return rng.random(shape, dtype=dtype)
+    return rng.random(shape, dtype=np.float32).astype(dtype)
+
+
+class NumpyEngine(Engine):
+    """Shared representation: C-contiguous ndarrays (float64 unless switched)"""
+    element_types = FLOAT_TYPES
+    # Operand and result dtypes of the element type
+    dtype = np.float64
+    accumulator = np.float64
+
+    def use_element_type(self, name: str):
+        super().use_element_type(name)
+        self.dtype = np.dtype(name).type
+        self.accumulator = np.dtype(element_type(name).accumulator).type
+
+    def random_matrix(self, n: int, seed: int = 42, cols: int = None):
+        return random_array(np.random.default_rng(seed), (n, cols or n), self.dtype)
+
+    def from_rows(self, rows: List[List[float]]):
+        return np.ascontiguousarray(rows, dtype=self.dtype)
+
+    def to_rows(self, matrix) -> List[List[float]]:
+        return matrix.tolist()
+
+    def to_array(self, matrix):
+        return matrix
+
+    def allocate(self, n: int, cols: int = None):
+        return np.empty((n, cols or n), dtype=self.accumulator)
+
+
+@register
+class MatmulEngine(NumpyEngine):
+    name = 'numpy_matmul'
+    description = 'NumPy @ (BLAS gemm)'
+    rectangular = True
+    element_types = tuple(ELEMENT_TYPES)
+
+    def multiply(self, A, B, out=None):
+        return np.matmul(A, B, out=out, dtype=self.accumulator)
+
+
+@register
+class EinsumEngine(NumpyEngine):
+    name = 'numpy_einsum'
+    description = "NumPy einsum('ik,kj->ij') without BLAS dispatch"
+    rectangular = True
+    element_types = tuple(ELEMENT_TYPES)
+
+    def multiply(self, A, B, out=None):
+        return np.einsum('ik,kj->ij', A, B, out=out, optimize=False, dtype=self.accumulator)
@@ -0,0 +1,277 @@
+"""
+Out-of-core engine for matrices larger than RAM
+
+Operands are ``.npy`` files opened as memory maps (``np.load(mmap_mode='r')``
+reads them anywhere). The product is computed one square tile of C at a time:
+
+    for each tile row i, tile column j:   C_ij  (t x t, in memory)
+        for each k:
+            load A_ik, B_kj                (t x t each)
+            C_ij += A_ik @ B_kj
+        write C_ij
+
+C_ij stays in memory while all of its k terms are accumulated, and every
+loaded tile takes part in t^3 multiply-adds, so a multiply reads 2 N^3 / t
+elements, with t ~ sqrt(budget). Streaming all of B once per row panel of A
+instead reads N^3 / rows, and a panel of N-element rows gets shorter as N
+grows. A tile is t row segments of t contiguous
+elements in the file. A background thread loads the next A/B tile pair into
+a second pair of buffers while the current one is multiplied, and the tile
+edge t is the largest for which all buffers fit in ``memory_budget`` bytes.
+Bytes read and written and the achieved I/O bandwidth of the last multiply
+are available in ``last_stats``; waiting for a tile and writing C are timed
+as the 'io' phase.
+"""
+
+import itertools
+import math
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
+
+import numpy as np
+
+from .base import EngineError, register
+from .numpy_engines import NumpyEngine, random_array
+from .phases import phase
+
+BUDGET_ENV = 'MATMUL_OOC_BUDGET_MB'
+WORKDIR_ENV = 'MATMUL_OOC_WORKDIR'
+DEFAULT_BUDGET_MB = 1024
+
+# Tile-sized buffers held at once: A x2 and B x2 (double buffering), C, product
+TILE_BUFFERS = 6
+
+
+def create_matrix_file(path, rows: int, cols: int, dtype=np.float64) -> np.memmap:
+    """Create an uninitialized matrix file and return it mapped read-write"""
+    return np.lib.format.open_memmap(str(path), mode='w+', dtype=dtype, shape=(rows, cols))
+
+
+def open_matrix_file(path, writable: bool = False) -> np.memmap:
+    """Map an existing matrix file"""
+    return np.load(str(path), mmap_mode='r+' if writable else 'r')
+
+
+def write_random_matrix(path, n: int, seed: int = 42, dtype=np.float64,
+                        chunk_bytes: int = 64 * 2 ** 20) -> np.memmap:
+    """Write an n x n matrix of uniform [0, 1) values (see ``random_array``) chunk by chunk; returns it mapped read-only"""
+    matrix = create_matrix_file(path, n, n, dtype)
+    rng = np.random.default_rng(seed)
+    rows = max(1, chunk_bytes // max(1, n * matrix.itemsize))
+    for r0 in range(0, n, rows):
+        matrix[r0:r0 + rows] = random_array(rng, (min(rows, n - r0), n), dtype)
+    matrix.flush()
+    del matrix
+    return open_matrix_file(path)
+
+
+def tile_edge(n: int, itemsize: int, memory_budget: int) -> int:
+    """Largest tile edge for which TILE_BUFFERS square tiles fit in the budget"""
+    edge = math.isqrt(memory_budget // (TILE_BUFFERS * itemsize))
+    if edge < 1:
+        raise EngineError(
+            f"Memory budget of {memory_budget / 2 ** 20:.3f} MiB is too small for N={n} "
+            f"(needs at least {TILE_BUFFERS * itemsize} bytes)"
+        )
+    return min(n, edge)
+
+
+def _tile(buffer: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Contiguous rows x cols view at the start of a flat tile buffer"""
+    return buffer[:rows * cols].reshape(rows, cols)
+
+
+class _Prefetcher(threading.Thread):
+    """
+    Loads the A/B tile pairs of a multiply in order on a background thread
+
+    Each kind ('A', 'B') has two buffers cycling through a free queue: the
+    loader fills a free buffer and hands it over, the consumer gives it back
+    when done, so at most one tile pair is loaded ahead.
+    """
+
+    def __init__(self, A, B, edge: int, buffers):
+        super().__init__(daemon=True)
+        self.A, self.B, self.edge = A, B, edge
+        self.free = {kind: queue.Queue() for kind in buffers}
+        for kind, pair in buffers.items():
+            for buffer in pair:
+                self.free[kind].put(buffer)
+        self.ready = queue.Queue()
+        self.bytes_read = 0
+        self.read_seconds = 0.0
+        self.error = None
+        self._cancelled = threading.Event()
+
+    def _load(self, kind, source, r0, c0):
+        buffer = self.free[kind].get()
+        if self._cancelled.is_set():
+            return None
+        rows, cols = min(self.edge, source.shape[0] - r0), min(self.edge, source.shape[1] - c0)
+        tile = _tile(buffer, rows, cols)
+        start = time.perf_counter()
+        np.copyto(tile, source[r0:r0 + rows, c0:c0 + cols])
+        self.read_seconds += time.perf_counter() - start
+        self.bytes_read += tile.nbytes
+        return buffer, tile
+
+    def run(self):
+        n, edge = self.A.shape[0], self.edge
+        try:
+            for i0, j0 in itertools.product(range(0, n, edge), repeat=2):
+                for k0 in range(0, n, edge):
+                    for kind, source, r0, c0 in (('A', self.A, i0, k0), ('B', self.B, k0, j0)):
+                        item = self._load(kind, source, r0, c0)
+                        if item is None:
+                            return
+                        self.ready.put((kind,) + item)
+        except Exception as e:
+            self.error = e
+            self.ready.put(None)
+
+    def next(self, kind):
+        item = self.ready.get()
+        if item is None:
+            raise EngineError(f"tile loading failed: {self.error}")
+        assert item[0] == kind
+        return item[1:]
+
+    def release(self, kind, buffer):
+        self.free[kind].put(buffer)
+
+    def cancel(self):
+        self._cancelled.set()
+        for kind in self.free:
+            self.free[kind].put(None)
+
+
+@register
+class OutOfCoreEngine(NumpyEngine):
+    """
+    Square-tiled matmul over memory-mapped .npy files
+
+    Args:
+        memory_budget: Bytes of tile buffers, default $MATMUL_OOC_BUDGET_MB MiB (1024)
+        workdir: Directory for input/output files created by the engine, default
+            $MATMUL_OOC_WORKDIR or a temporary directory removed with the engine
+    """
+    name = 'numpy_out_of_core'
+    description = 'Square tiles streamed from memory-mapped .npy files with background prefetch'
+
+    def __init__(self, memory_budget: int = None, workdir=None):
+        budget_mb = float(os.environ.get(BUDGET_ENV, DEFAULT_BUDGET_MB))
+        self.memory_budget = int(memory_budget or budget_mb * 2 ** 20)
+        workdir = workdir or os.environ.get(WORKDIR_ENV)
+        if workdir:
+            self.workdir = Path(workdir)
+            self.workdir.mkdir(parents=True, exist_ok=True)
+        else:
+            self.workdir = Path(tempfile.mkdtemp(prefix='matmul-ooc-'))
+            weakref.finalize(self, shutil.rmtree, str(self.workdir), True)
+        self.last_stats = {}
+        self._edge = None
+        self._buffers = None
+        self._files = 0
+
+    @property
+    def block_size(self) -> str:
+        return str(self._edge) if self._edge else 'N/A'
+
+    def _new_path(self, label: str) -> Path:
+        self._files += 1
+        return self.workdir / f'{label}-{os.getpid()}-{self._files}.npy'
+
+    def random_matrix(self, n: int, seed: int = 42):
+        return write_random_matrix(self._new_path('input'), n, seed, self.dtype)
+
+    def from_rows(self, rows):
+        source = np.asarray(rows, dtype=self.dtype)
+        matrix = create_matrix_file(self._new_path('input'), *source.shape, dtype=self.dtype)
+        matrix[...] = source
+        matrix.flush()
+        return matrix
+
+    def to_rows(self, matrix):
+        return np.asarray(matrix).tolist()
+
+    def allocate(self, n: int):
+        return create_matrix_file(self._new_path('output'), n, n, self.dtype)
+
+    def workspace_bytes(self, n: int) -> int:
+        itemsize = np.dtype(self.dtype).itemsize
+        return TILE_BUFFERS * tile_edge(n, itemsize, self.memory_budget) ** 2 * itemsize
+
+    def setup(self, n: int):
+        edge = tile_edge(n, np.dtype(self.dtype).itemsize, self.memory_budget)
+        if self._buffers is None or self._edge != edge:
+            self._edge = edge
+            tile = lambda: np.empty(edge * edge, dtype=self.dtype)
+            self._buffers = {
+                'A': [tile() for _ in range(2)],
+                'B': [tile() for _ in range(2)],
+                'C': tile(),
+                'product': tile()
+            }
+
+    def multiply(self, A, B, out=None):
+        n = A.shape[0]
+        self.setup(n)
+        edge = self._edge
+        C = out if out is not None else self.allocate(n)
+
+        loader = _Prefetcher(A, B, edge, {'A': self._buffers['A'], 'B': self._buffers['B']})
+        bytes_written = 0
+        write_seconds = 0.0
+        stall_seconds = 0.0
+        loader.start()
+        try:
+            for i0 in range(0, n, edge):
+                rows = min(edge, n - i0)
+                for j0 in range(0, n, edge):
+                    cols = min(edge, n - j0)
+                    c_tile = _tile(self._buffers['C'], rows, cols)
+                    c_tile.fill(0)
+                    product = _tile(self._buffers['product'], rows, cols)
+
+                    for _ in range(0, n, edge):
+                        wait = time.perf_counter()
+                        with phase('io'):
+                            a_buffer, a_tile = loader.next('A')
+                            b_buffer, b_tile = loader.next('B')
+                        stall_seconds += time.perf_counter() - wait
+                        np.matmul(a_tile, b_tile, out=product)
+                        c_tile += product
+                        loader.release('A', a_buffer)
+                        loader.release('B', b_buffer)
+
+                    write = time.perf_counter()
+                    with phase('io'):
+                        C[i0:i0 + rows, j0:j0 + cols] = c_tile
+                    write_seconds += time.perf_counter() - write
+                    bytes_written += c_tile.nbytes
+
+                # One flush per tile row bounds the dirty pages of C
+                if isinstance(C, np.memmap):
+                    write = time.perf_counter()
+                    with phase('io'):
+                        C.flush()
+                    write_seconds += time.perf_counter() - write
+        finally:
+            loader.cancel()
+            loader.join()
+
+        io_seconds = loader.read_seconds + write_seconds
+        self.last_stats = {
+            'io_read_bytes': loader.bytes_read,
+            'io_write_bytes': bytes_written,
+            'io_time_ms': io_seconds * 1e3,
+            'io_stall_ms': stall_seconds * 1e3,
+            'io_bandwidth_mbs': (loader.bytes_read + bytes_written) / io_seconds / 1e6 if io_seconds > 0 else 0.0
+        }
+        return C
@@ -0,0 +1,232 @@
+"""
+Shared-memory multiprocess engine
+
+The Python counterpart of src/openmp (parallel outer row loop) and the row
+split of src/mpi: a persistent pool of worker processes computes bands of C
+with ``np.matmul``. A, B and C live in ``multiprocessing.shared_memory``
+segments that the workers map once, so a multiply moves no matrix data
+between processes; only a small task message per worker is sent.
+
+Work units are rows, columns or square tiles of C, or slices of the shared
+dimension K, handed out with OpenMP-style scheduling:
+
+- static: contiguous equal blocks with the remainder spread like
+  src/mpi (or round-robin chunks when ``chunk`` is given)
+- dynamic: workers claim ``chunk`` units at a time from a shared counter
+- guided: like dynamic, but each claim takes remaining / workers units
+  (never fewer than ``chunk``), so claims shrink towards the end
+
+The default band, 'auto', picks the partitioning per shape (see
+``choose_band``): row bands collapse when M is small, because a
+tall-skinny B times a short-wide A leaves fewer rows than workers.
+"""
+
+import math
+import os
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from .base import register
+from .dtypes import ELEMENT_TYPES
+from .numpy_engines import NumpyEngine
+from .phases import phase
+from .pool import SPAWN, SharedArrays, serve
+
+SCHEDULES = ('static', 'dynamic', 'guided')
+BANDS = ('auto', 'rows', 'columns', 'depth', 'tiles')
+
+# Fewest units per worker for an output dimension to be worth splitting
+MIN_UNITS_PER_WORKER = 4
+
+
+def choose_band(m: int, n: int, k: int, workers: int) -> str:
+    """
+    Partitioning of an M x K by K x N product over ``workers``
+
+    Splits the larger dimension of C: row bands when M >= N, column bands
+    otherwise. When both are too short to give every worker
+    MIN_UNITS_PER_WORKER rows or columns and K is longer still, K is split
+    instead: every worker multiplies a slice of A's columns by the matching
+    rows of B into a private partial product, and the partials are summed.
+    """
+    if workers > 1 and max(m, n) < workers * MIN_UNITS_PER_WORKER and k > max(m, n):
+        return 'depth'
+    return 'rows' if m >= n else 'columns'
+
+
+def static_range(units: int, workers: int, index: int) -> Tuple[int, int]:
+    """Contiguous block of worker ``index``, remainder spread over the first workers"""
+    per_worker, remainder = divmod(units, workers)
+    start = index * per_worker + min(index, remainder)
+    return start, start + per_worker + (1 if index < remainder else 0)
+
+
+def _claims(task, index, counter, lock) -> Iterator[Tuple[int, int]]:
+    """Unit ranges worker ``index`` computes for one task"""
+    units, workers, schedule, chunk = task['units'], task['workers'], task['schedule'], task['chunk']
+    if schedule == 'static':
+        if chunk is None:
+            yield static_range(units, workers, index)
+        else:
+            for start in range(index * chunk, units, workers * chunk):
+                yield start, min(start + chunk, units)
+        return
+
+    minimum = chunk or 1
+    while True:
+        with lock:
+            start = counter.value
+            if start >= units:
+                return
+            if schedule == 'guided':
+                size = max(minimum, math.ceil((units - start) / workers))
+            else:
+                size = minimum
+            stop = min(units, start + size)
+            counter.value = stop
+        yield start, stop
+
+
+def _compute(task, A, B, C, start: int, stop: int):
+    """Units [start, stop) of the task's band; with band='depth', C is the worker's partial product"""
+    band = task['band']
+    if band == 'rows':
+        np.matmul(A[start:stop], B, out=C[start:stop], dtype=C.dtype)
+        return
+    if band == 'columns':
+        np.matmul(A, B[:, start:stop], out=C[:, start:stop], dtype=C.dtype)
+        return
+    if band == 'depth':
+        C += np.matmul(A[:, start:stop], B[start:stop], dtype=C.dtype)
+        return
+    n, tile = task['shape'][1], task['tile']
+    per_row = math.ceil(n / tile)
+    for unit in range(start, stop):
+        r0, c0 = (unit // per_row) * tile, (unit % per_row) * tile
+        np.matmul(A[r0:r0 + tile], B[:, c0:c0 + tile], out=C[r0:r0 + tile, c0:c0 + tile], dtype=C.dtype)
+
+
+def _worker(index, tasks, done, counter, lock):
+    def handle(task, cache):
+        cache.retain(task['segments'])
+        m, n, k = task['shape']
+        dtype, accumulator = np.dtype(task['dtype']), np.dtype(task['accumulator'])
+        shapes = [(m, k), (k, n), (m, n), (task['workers'], m, n)]
+        dtypes = [dtype, dtype, accumulator, accumulator]
+        A, B, C, *partials = (cache.array(name, shape, dtype)
+                              for name, shape, dtype in zip(task['segments'], shapes, dtypes))
+        if partials:
+            C = partials[0][index]
+            C.fill(0)
+        for start, stop in _claims(task, index, counter, lock):
+            _compute(task, A, B, C, start, stop)
+
+    serve(index, tasks, done, handle)
+
+
+@register
+class ParallelEngine(SharedArrays, NumpyEngine):
+    """
+    Banded matmul on a persistent shared-memory process pool
+
+    Matrices from ``random_matrix``/``allocate``/``from_rows`` are backed by
+    shared memory already; other arrays are copied into staging segments
+    before each multiply. The band used is reported in the partition column.
+
+    Args:
+        workers: Worker processes (reported as the threads column)
+        schedule: 'static', 'dynamic' or 'guided'
+        chunk: Units per claim (dynamic), minimum claim (guided), or
+            round-robin chunk (static; None means one block per worker)
+        band: 'rows', 'columns' or 'tiles' of C, 'depth' (slices of K, summed
+            afterwards), or 'auto' to choose per shape with ``choose_band``
+        tile: Tile edge for band='tiles'
+    """
+    name = 'numpy_parallel'
+    description = 'NumPy bands on a shared-memory process pool (static/dynamic/guided)'
+    parallel = True
+    rectangular = True
+    element_types = tuple(ELEMENT_TYPES)
+
+    def __init__(self, workers: int = None, schedule: str = 'static', chunk: int = None,
+                 band: str = 'auto', tile: int = 256):
+        if schedule not in SCHEDULES:
+            raise ValueError(f"Unknown schedule '{schedule}' (choose from {', '.join(SCHEDULES)})")
+        if band not in BANDS:
+            raise ValueError(f"Unknown band '{band}' (choose from {', '.join(BANDS)})")
+        self.workers = workers or len(os.sched_getaffinity(0))
+        self.schedule = schedule
+        self.chunk = chunk
+        self.band = band
+        self.tile = tile
+        self._init_shared()
+
+    @property
+    def block_size(self) -> str:
+        return f'{self.workers}t'
+
+    def _role_dtype(self, role: str):
+        """Operands hold the element type, C and the 'partials' of band='depth' its accumulator"""
+        return self.dtype if role in ('A', 'B') else self.accumulator
+
+    def random_matrix(self, n: int, seed: int = 42, cols: int = None):
+        array = self._shared_array((n, cols or n))
+        array[...] = super().random_matrix(n, seed, cols)
+        return array
+
+    def from_rows(self, rows):
+        source = super().from_rows(rows)
+        array = self._shared_array(source.shape)
+        array[...] = source
+        return array
+
+    def allocate(self, n: int, cols: int = None):
+        return self._shared_array((n, cols or n), self.accumulator)
+
+    def setup(self, m: int, n: int = None, k: int = None):
+        if self._pool is None:
+            # Kept on the engine: the parent must hold them while workers unpickle them
+            self._counter = SPAWN.Value('q', 0, lock=False)
+            self._lock = SPAWN.Lock()
+            self._start_pool(self.workers, _worker, (self._counter, self._lock))
+
+    def multiply(self, A, B, out=None):
+        (m, k), n = A.shape, B.shape[1]
+        self.setup(m)
+        band = choose_band(m, n, k, self.workers) if self.band == 'auto' else self.band
+        staged_out = out is None or self._owner(out) is None
+        C = self._scratch('C', (m, n)) if staged_out else out
+
+        with phase('distribution'):
+            segments = [self._segment_of(A, 'A'), self._segment_of(B, 'B'), self._owner(C)]
+        if band == 'depth':
+            partials = self._scratch('partials', (self.workers, m, n))
+            segments.append(self._owner(partials))
+        units = {'rows': m, 'columns': n, 'depth': k}.get(band)
+        if units is None:
+            units = math.ceil(m / self.tile) * math.ceil(n / self.tile)
+        self._counter.value = 0
+        self.last_stats = {'partition': band}
+        with phase('compute'):
+            self._pool.run({
+                'segments': segments,
+                'shape': (m, n, k),
+                'dtype': np.dtype(self.dtype).str,
+                'accumulator': np.dtype(self.accumulator).str,
+                'units': units,
+                'workers': self.workers,
+                'schedule': self.schedule,
+                'chunk': self.chunk,
+                'band': band,
+                'tile': self.tile
+            })
+
+        with phase('gather'):
+            if band == 'depth':
+                np.sum(partials, axis=0, out=C)
+            if out is None:
+                return C.copy()
+            if C is not out:
+                np.copyto(out, C)
+        return out
@@ -0,0 +1,111 @@
+"""
+Phase timing for engines and the harness
+
+Code marks where its phases run, either as a block or a whole function:
+
+    from .phases import phase, timed
+
+    with phase('distribution'):
+        scatter(A)
+
+    @timed('gather')
+    def collect(self, C): ...
+
+Timing is off by default: ``phase`` then returns a shared no-op context
+manager and ``timed`` calls straight through, so the marks cost one global
+lookup and a call. ``enable`` turns it on for the process; ``collect``
+returns the accumulated seconds per phase and starts a new measurement.
+
+Phases are exclusive: a phase entered inside another pauses the outer one,
+so, e.g., the distribution an engine does inside the harness's compute phase
+is not counted as compute as well.
+"""
+
+import functools
+import time
+from typing import Dict
+
+# Phases reported in result files, in execution order
+PHASES = ('allocation', 'initialization', 'distribution', 'io', 'compute', 'gather', 'verification')
+
+_enabled = False
+_seconds: Dict[str, float] = {}
+_stack = []
+
+
+class _Phase:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        now = time.perf_counter()
+        if _stack:
+            outer = _stack[-1]
+            _seconds[outer.name] = _seconds.get(outer.name, 0.0) + now - outer.start
+        _stack.append(self)
+        self.start = now
+        return self
+
+    def __exit__(self, *exc):
+        now = time.perf_counter()
+        _seconds[self.name] = _seconds.get(self.name, 0.0) + now - self.start
+        _stack.pop()
+        if _stack:
+            _stack[-1].start = now
+        return False
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+def enable(on: bool = True):
+    """Turn phase timing on (or off) and discard anything accumulated"""
+    global _enabled
+    _enabled = on
+    _seconds.clear()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def phase(name: str):
+    """Context manager timing its block as ``name``"""
+    return _Phase(name) if _enabled else _NO_PHASE
+
+
+def timed(name: str):
+    """Decorator timing every call of the function as phase ``name``"""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with _Phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def collect() -> Dict[str, float]:
+    """Seconds per phase since the last collect, then reset"""
+    seconds = dict(_seconds)
+    _seconds.clear()
+    return seconds
+
+
+def phase_columns(seconds: Dict[str, float]) -> Dict[str, float]:
+    """``<phase>_time_ms`` record columns for every reported phase"""
+    return {f'{name}_time_ms': seconds.get(name, 0.0) * 1e3 for name in PHASES}
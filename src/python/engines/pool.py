@@ -0,0 +1,238 @@
+"""
+Persistent worker processes over shared memory
+
+Shared by the multiprocess engines: a pool of spawned workers that map
+``multiprocessing.shared_memory`` segments by name, receive one small task
+message per call, and report back a result (or an error) per worker.
+``SharedArrays`` gives an engine arrays backed by such segments.
+"""
+
+import contextlib
+import math
+import os
+import queue
+import weakref
+from multiprocessing import get_context, shared_memory
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .base import EngineError
+
+SPAWN = get_context('spawn')
+
+# Keep NumPy's BLAS single-threaded inside workers so the worker count is the
+# only source of parallelism
+BLAS_THREAD_VARIABLES = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+
+@contextlib.contextmanager
+def single_threaded_blas():
+    saved = {name: os.environ.get(name) for name in BLAS_THREAD_VARIABLES}
+    os.environ.update({name: '1' for name in BLAS_THREAD_VARIABLES})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def create_segment(nbytes: int) -> shared_memory.SharedMemory:
+    return shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+
+
+def release_segments(segments: Iterable[shared_memory.SharedMemory]):
+    for segment in segments:
+        segment.close()
+        segment.unlink()
+
+
+class SegmentCache:
+    """Segments a worker has mapped, by name; mapping happens once per segment"""
+
+    def __init__(self):
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+
+    def array(self, name: str, shape, dtype) -> np.ndarray:
+        if name not in self._segments:
+            self._segments[name] = shared_memory.SharedMemory(name=name)
+        return np.ndarray(shape, dtype=dtype, buffer=self._segments[name].buf)
+
+    def retain(self, names: Sequence[str]):
+        """Unmap every segment not in names (the owner may be about to free it)"""
+        keep = set(names)
+        for name in [name for name in self._segments if name not in keep]:
+            self._segments.pop(name).close()
+
+    def close(self):
+        self.retain(())
+
+
+def serve(index: int, tasks, done, handler: Callable):
+    """
+    Worker loop: run ``handler(task, cache)`` for every task until None arrives
+
+    Arrays built from the cache must not outlive the handler call, or their
+    segments cannot be unmapped.
+    """
+    cache = SegmentCache()
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        try:
+            done.put((index, None, handler(task, cache)))
+        except Exception as e:
+            done.put((index, f'{type(e).__name__}: {e}', None))
+    cache.close()
+
+
+class WorkerPool:
+    """
+    ``workers`` spawned processes running ``target(index, tasks, done, *args)``
+
+    ``target`` must be a module-level function that calls ``serve``.
+    """
+
+    def __init__(self, workers: int, target: Callable, args: tuple = ()):
+        self.done = SPAWN.Queue()
+        self.tasks = [SPAWN.Queue() for _ in range(workers)]
+        self.processes = [
+            SPAWN.Process(target=target, args=(i, self.tasks[i], self.done) + tuple(args), daemon=True)
+            for i in range(workers)
+        ]
+        with single_threaded_blas():
+            for process in self.processes:
+                process.start()
+
+    def run(self, tasks) -> List[object]:
+        """
+        Send one task to every worker (the same dict, or a list with one per
+        worker) and return the results in worker order
+        """
+        per_worker = tasks if isinstance(tasks, list) else [tasks] * len(self.tasks)
+        for channel, task in zip(self.tasks, per_worker):
+            channel.put(task)
+
+        results = [None] * len(self.tasks)
+        errors = []
+        pending = len(self.tasks)
+        while pending:
+            try:
+                index, error, result = self.done.get(timeout=1.0)
+            except queue.Empty:
+                dead = [p.exitcode for p in self.processes if not p.is_alive()]
+                if dead:
+                    raise EngineError(f"{len(dead)} worker(s) exited (exit codes {dead})")
+                continue
+            pending -= 1
+            results[index] = result
+            if error:
+                errors.append(error)
+        if errors:
+            raise EngineError(f"worker failed: {errors[0]}")
+        return results
+
+    def close(self):
+        for channel in self.tasks:
+            channel.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+
+def _release(pool, segments):
+    if pool is not None:
+        pool.close()
+    release_segments(segments.values())
+
+
+class SharedArrays:
+    """
+    Mixin of the pool engines: arrays in shared segments the workers map by name
+
+    Matrices from ``random_matrix``/``allocate``/``from_rows`` should come
+    from ``_shared_array``; ``_segment_of`` names the segment behind an array
+    and copies other arrays into a staging segment per role and shape.
+
+    Inputs made after a multiply start a new generation: the segments of the
+    previous one (earlier inputs and outputs, staging) are unlinked at once,
+    so a multi-size sweep holds one size's segments in /dev/shm. A segment is
+    unmapped when its array is garbage; until then the array stays usable and
+    is staged like any other array if it is multiplied again.
+    """
+
+    def _init_shared(self):
+        self._pool = None
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+        self._owners: Dict[int, str] = {}
+        self._arrays: Dict[str, weakref.ref] = {}
+        self._staging: Dict[Tuple[str, tuple], np.ndarray] = {}
+        self._multiplied = False
+        self._finalizer = weakref.finalize(self, _release, None, self._segments)
+
+    def _role_dtype(self, role: str):
+        """Element type of a role's staging array ('A', 'B', 'C', ...)"""
+        return self.dtype
+
+    def _shared_array(self, shape, dtype=None, staging: bool = False) -> np.ndarray:
+        if not staging and self._multiplied:
+            self._retire(list(self._segments))
+        dtype = np.dtype(dtype or self.dtype)
+        segment = create_segment(math.prod(shape) * dtype.itemsize)
+        self._segments[segment.name] = segment
+        array = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+        self._owners[array.__array_interface__['data'][0]] = segment.name
+        self._arrays[segment.name] = weakref.ref(array)
+        return array
+
+    def _retire(self, names: Iterable[str]):
+        """Unlink segments now and unmap each one once its array is garbage"""
+        names = set(names)
+        for name in names:
+            segment = self._segments.pop(name)
+            segment.unlink()
+            array = self._arrays.pop(name)()
+            if array is None:
+                segment.close()
+            else:
+                weakref.finalize(array, segment.close)
+        self._owners = {address: name for address, name in self._owners.items() if name not in names}
+        self._staging = {key: array for key, array in self._staging.items()
+                         if self._owners.get(array.__array_interface__['data'][0]) is not None}
+        self._multiplied = False
+
+    def _owner(self, array) -> Optional[str]:
+        return self._owners.get(array.__array_interface__['data'][0])
+
+    def _scratch(self, role: str, shape) -> np.ndarray:
+        """Shared staging array of ``role``, reused while its shape and type match"""
+        staged = self._staging.get((role, shape))
+        if staged is None or staged.dtype != self._role_dtype(role):
+            staged = self._staging[role, shape] = self._shared_array(shape, self._role_dtype(role), staging=True)
+        return staged
+
+    def _segment_of(self, array, role: str) -> str:
+        """Name of the segment backing ``array``, staging a copy when it has none"""
+        self._multiplied = True
+        name = self._owner(array)
+        if name is not None and array.flags.c_contiguous and array.dtype == self._role_dtype(role):
+            return name
+        staged = self._scratch(role, array.shape)
+        np.copyto(staged, array)
+        return self._owner(staged)
+
+    def _start_pool(self, workers: int, target: Callable, args: tuple = ()):
+        if self._pool is None:
+            self._pool = WorkerPool(workers, target, args)
+            self._finalizer.detach()
+            self._finalizer = weakref.finalize(self, _release, self._pool, self._segments)
+
+    def close(self):
+        """Stop the workers and free every shared segment"""
+        self._finalizer()
+        self._pool = None
@@ -0,0 +1,95 @@
+"""
+Pure-Python reference engines
+
+These are the interpreter-bound tiers: they show how much of the gap to the
+C binaries is loop overhead versus memory layout.
+"""
+
+from array import array
+from typing import List
+
+from .base import Engine, register
+
+
+@register
+class NaiveEngine(Engine):
+    """Triple loop over nested lists, the same loop order as src/baseline"""
+    name = 'python_naive'
+    description = 'Pure-Python triple loop (i, j, k)'
+    rectangular = True
+
+    def multiply(self, A, B, out=None):
+        m, n, inner = len(A), len(B[0]), len(B)
+        C = out if out is not None else self.allocate(m, n)
+        for i in range(m):
+            row_a = A[i]
+            row_c = C[i]
+            for j in range(n):
+                total = 0.0
+                for k in range(inner):
+                    total += row_a[k] * B[k][j]
+                row_c[j] = total
+        return C
+
+
+@register
+class TransposedEngine(Engine):
+    """Transposes B once so every entry is a dot product of two contiguous rows"""
+    name = 'python_transposed'
+    description = 'Pure-Python row-dot with transposed B'
+    rectangular = True
+
+    def multiply(self, A, B, out=None):
+        m = len(A)
+        C = out if out is not None else self.allocate(m, len(B[0]))
+        columns = list(zip(*B))
+        for i in range(m):
+            row_a = A[i]
+            C[i][:] = [sum(a * b for a, b in zip(row_a, col)) for col in columns]
+        return C
+
+
+@register
+class FlatArrayEngine(Engine):
+    """
+    Row-major matrices in flat ``array('d')`` buffers
+
+    Same memory layout as the C binaries. The inner loop runs i-k-j so both
+    B and C are walked with unit stride.
+    """
+    name = 'python_array'
+    description = "Pure-Python i-k-j loop over flat array('d') buffers"
+
+    def from_rows(self, rows: List[List[float]]):
+        return array('d', (x for row in rows for x in row))
+
+    def to_rows(self, matrix) -> List[List[float]]:
+        n = _order(matrix)
+        return [list(matrix[i * n:(i + 1) * n]) for i in range(n)]
+
+    def allocate(self, n: int):
+        return array('d', bytes(8 * n * n))
+
+    def multiply(self, A, B, out=None):
+        n = _order(A)
+        if out is None:
+            C = self.allocate(n)
+        else:
+            C = out
+            C[:] = self.allocate(n)
+        for i in range(n):
+            c_row = i * n
+            a_row = i * n
+            for k in range(n):
+                a = A[a_row + k]
+                b_row = k * n
+                for j in range(n):
+                    C[c_row + j] += a * B[b_row + j]
+        return C
+
+
+def _order(flat) -> int:
+    n = int(round(len(flat) ** 0.5))
+    if n * n != len(flat):
+        raise ValueError(f"Flat buffer of length {len(flat)} is not a square matrix")
+    return n
@@ -0,0 +1,418 @@
+"""
+Sparse engines and the density dispatcher
+
+Sparse operands are stored in CSR form: row pointers, column indices and
+values in three flat arrays, with int32 indices whenever the dimensions
+allow (halving the index traffic against int64). Two kernels use them:
+
+- CSR x dense: each row of C is the sum of the rows of B selected by the
+  column indices of the same row of A, scaled by A's values. Rows are
+  processed in ELLPACK-style slots: with the rows ordered by length, step j
+  gathers the B rows of the j-th value of every row that long, and adds
+  them to a contiguous prefix of the (permuted) result.
+- CSR x CSR: Gustavson's row-by-row product in expand-sort-compress form:
+  every partial product a_ik * b_kj is expanded, sorted by (i, j) and the
+  duplicates summed, one row panel at a time. The result is CSR again.
+
+The sparse engines multiply inputs generated with a given density and
+structure (uniform, banded or block-sparse, see ``random_sparse``), so the
+density sweep can run every path on the same matrices. ``sparse_auto``
+estimates the density and structure of its operands and dispatches to the
+dense, CSR x dense or CSR x CSR path at the thresholds the sweep measured
+(scripts/sparse_crossover.py), stored per (host, dtype, structure, size
+class) in a JSON cache like the tile autotuner's.
+"""
+
+import math
+import os
+import socket
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .autotune import size_class
+from .base import register
+from .json_cache import CACHE_DIR, load_json, write_json
+from .numpy_engines import NumpyEngine, random_array
+
+STRUCTURES = ('uniform', 'banded', 'block')
+DEFAULT_DENSITY = 0.05
+DEFAULT_STRUCTURE = 'uniform'
+# Edge of the dense blocks of block-sparse matrices, and of the tiles the
+# structure estimate counts them in
+BLOCK_EDGE = 32
+# Partial products expanded at once by CSR x CSR
+PANEL_ELEMENTS = 2 ** 22
+
+DENSE = 'dense'
+CSR_DENSE = 'csr_dense'
+CSR_CSR = 'csr_csr'
+
+THRESHOLDS_ENV = 'MATMUL_SPARSE_THRESHOLDS'
+DEFAULT_THRESHOLDS_CACHE = CACHE_DIR / 'sparse.json'
+
+# Used until the sweep has measured this host (roughly what it finds for
+# uniform inputs at N = 512 on one core): dense when A is at least
+# dense_above dense, else CSR x CSR while B is below csr_csr_below, else CSR x dense
+DEFAULT_THRESHOLDS = {'csr_csr_below': 0.05, 'dense_above': 0.03}
+
+
+def index_dtype(limit: int):
+    """Smallest index type holding values up to limit"""
+    return np.int32 if limit <= np.iinfo(np.int32).max else np.int64
+
+
+class CSRMatrix:
+    """
+    Compressed sparse row matrix
+
+    Args:
+        shape: (rows, columns)
+        indptr: rows + 1 offsets into indices/data; row i is indptr[i]:indptr[i + 1]
+        indices: Column index of every stored value, sorted within each row
+        data: The stored values
+    """
+
+    def __init__(self, shape: Tuple[int, int], indptr, indices, data):
+        self.shape = tuple(shape)
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @classmethod
+    def empty(cls, shape: Tuple[int, int], dtype=np.float64) -> 'CSRMatrix':
+        m, n = shape
+        idx = index_dtype(max(m, n))
+        return cls(shape, np.zeros(m + 1, dtype=idx), np.empty(0, dtype=idx), np.empty(0, dtype=dtype))
+
+    @classmethod
+    def from_dense(cls, dense: np.ndarray) -> 'CSRMatrix':
+        m, n = dense.shape
+        rows, cols = np.nonzero(dense)
+        idx = index_dtype(max(n, rows.size))
+        indptr = np.zeros(m + 1, dtype=idx)
+        np.cumsum(np.bincount(rows, minlength=m), out=indptr[1:])
+        return cls(dense.shape, indptr, cols.astype(idx), np.ascontiguousarray(dense[rows, cols]))
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def nnz(self) -> int:
+        return int(self.indptr[-1])
+
+    @property
+    def density(self) -> float:
+        return self.nnz / max(1, self.shape[0] * self.shape[1])
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes
+
+    def row_ids(self) -> np.ndarray:
+        """Row index of every stored value"""
+        return np.repeat(np.arange(self.shape[0], dtype=self.indices.dtype), np.diff(self.indptr))
+
+    def to_dense(self, out: np.ndarray = None) -> np.ndarray:
+        dense = out if out is not None else np.empty(self.shape, dtype=self.dtype)
+        dense.fill(0)
+        dense[self.row_ids(), self.indices] = self.data
+        return dense
+
+
+def sparse_pattern(rng: np.random.Generator, shape, density: float, structure: str) -> np.ndarray:
+    """
+    Boolean mask of the nonzeros of a random sparse matrix
+
+    uniform: every element is nonzero with probability ``density``
+    banded: a full band around the (scaled) diagonal, as wide as the density requires
+    block: BLOCK_EDGE x BLOCK_EDGE blocks, each dense with probability ``density``
+    """
+    m, n = shape
+    if structure == 'uniform':
+        return rng.random(shape) < density
+    if structure == 'banded':
+        half_width = max(0.0, (density * n - 1) / 2)
+        diagonal = np.arange(m)[:, None] * (n / m)
+        return np.abs(np.arange(n)[None, :] - diagonal) <= half_width
+    if structure == 'block':
+        blocks = rng.random((-(-m // BLOCK_EDGE), -(-n // BLOCK_EDGE))) < density
+        return np.repeat(np.repeat(blocks, BLOCK_EDGE, axis=0), BLOCK_EDGE, axis=1)[:m, :n]
+    raise ValueError(f"Unknown sparsity structure '{structure}' (available: {', '.join(STRUCTURES)})")
+
+
+def random_sparse(rng: np.random.Generator, shape, density: float, structure: str, dtype) -> np.ndarray:
+    """Dense array with the values of ``random_array`` on a ``sparse_pattern`` and zeros elsewhere"""
+    values = random_array(rng, shape, dtype)
+    values[~sparse_pattern(rng, shape, density, structure)] = 0
+    return values
+
+
+def estimate_structure(A: CSRMatrix) -> str:
+    """
+    Classify the nonzero pattern of A as banded, block or uniform
+
+    Banded when the nonzeros fill at least half of the band spanned by the
+    farthest one from the diagonal (and the band leaves out at least half of
+    the matrix); block when they fill at least half of the BLOCK_EDGE x
+    BLOCK_EDGE tiles they touch.
+    """
+    m, n = A.shape
+    if A.nnz == 0:
+        return 'uniform'
+    rows = A.row_ids()
+    band = m * min(n, 2 * math.floor(np.abs(A.indices - rows * (n / m)).max()) + 1)
+    if A.nnz >= band / 2 and band <= m * n / 2:
+        return 'banded'
+    tile_columns = -(-n // BLOCK_EDGE)
+    tiles = np.bincount((rows // BLOCK_EDGE).astype(np.int64) * tile_columns + A.indices // BLOCK_EDGE,
+                        minlength=-(-m // BLOCK_EDGE) * tile_columns)
+    if A.nnz >= np.count_nonzero(tiles) * BLOCK_EDGE * BLOCK_EDGE / 2:
+        return 'block'
+    return 'uniform'
+
+
+def _row_panels(work: np.ndarray, budget: int):
+    """Row ranges whose cumulative work (per-row prefix sums, length rows + 1) stays within budget"""
+    rows = work.size - 1
+    r0 = 0
+    while r0 < rows:
+        r1 = int(np.searchsorted(work, work[r0] + budget, side='right')) - 1
+        r1 = min(rows, max(r1, r0 + 1))
+        yield r0, r1
+        r0 = r1
+
+
+def csr_dense(A: CSRMatrix, B: np.ndarray, out: np.ndarray, accumulator=None) -> np.ndarray:
+    """C = A @ B for CSR A and dense B, written into the dense ``out``"""
+    m = A.shape[0]
+    lengths = np.diff(A.indptr)
+    # Longest rows first: the rows still active at slot j are a prefix of the permuted result
+    order = np.argsort(-lengths, kind='stable')
+    starts = A.indptr[:-1][order]
+    active = m - np.searchsorted(lengths[order][::-1], np.arange(lengths.max(initial=0)), side='right')
+    nonempty = active[0] if active.size else 0
+    permuted = np.empty(out.shape, dtype=accumulator or out.dtype)
+    permuted[nonempty:] = 0
+    gathered = np.empty((nonempty, B.shape[1]), dtype=B.dtype)
+    for slot, rows in enumerate(active):
+        positions = starts[:rows] + slot
+        np.take(B, A.indices[positions], axis=0, out=gathered[:rows])
+        gathered[:rows] *= A.data[positions, None]
+        if slot == 0:
+            permuted[:rows] = gathered[:rows]
+        else:
+            permuted[:rows] += gathered[:rows]
+    out[order] = permuted
+    return out
+
+
+def csr_csr(A: CSRMatrix, B: CSRMatrix, out: CSRMatrix = None, accumulator=None) -> CSRMatrix:
+    """C = A @ B for CSR A and B, as CSR (``out`` is refilled in place when given)"""
+    m, n = A.shape[0], B.shape[1]
+    b_lengths = np.diff(B.indptr)
+    # Partial products contributed by every stored value of A, and their prefix sums per row of A
+    fanout = b_lengths[A.indices]
+    work = np.concatenate(([0], np.cumsum(fanout, dtype=np.int64)))[A.indptr]
+    counts = np.zeros(m, dtype=np.int64)
+    indices, data = [], []
+    for r0, r1 in _row_panels(work, PANEL_ELEMENTS):
+        s0, s1 = A.indptr[r0], A.indptr[r1]
+        repeats = fanout[s0:s1]
+        total = int(repeats.sum())
+        if total == 0:
+            continue
+        # Expand: position of every partial product within B's values
+        first = np.repeat(B.indptr[A.indices[s0:s1]], repeats)
+        ends = np.cumsum(repeats)
+        positions = first + np.arange(total) - np.repeat(ends - repeats, repeats)
+        rows = np.repeat(np.arange(r0, r1), np.diff(A.indptr[r0:r1 + 1]))
+        keys = np.repeat(rows.astype(np.int64) * n, repeats) + B.indices[positions]
+        products = np.repeat(A.data[s0:s1], repeats) * B.data[positions]
+        # Sort and compress: sum the partial products of every (i, j)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        data.append(np.add.reduceat(products[order], starts, dtype=accumulator))
+        keys = keys[starts]
+        indices.append(keys % n)
+        counts[r0:r1] = np.bincount(keys // n - r0, minlength=r1 - r0)
+
+    C = out if out is not None else CSRMatrix.empty((m, n), A.dtype)
+    nnz = int(counts.sum())
+    idx = index_dtype(max(n, nnz))
+    C.shape = (m, n)
+    C.indptr = np.zeros(m + 1, dtype=idx)
+    np.cumsum(counts, out=C.indptr[1:])
+    C.indices = np.concatenate(indices).astype(idx) if indices else np.empty(0, dtype=idx)
+    C.data = np.concatenate(data) if data else np.empty(0, dtype=accumulator or A.dtype)
+    return C
+
+
+class SparseThresholds:
+    """
+    Dispatch thresholds measured by the density sweep, per (host, dtype, structure, size class)
+
+    Args:
+        cache_path: JSON cache, default $MATMUL_SPARSE_THRESHOLDS or
+            ~/.cache/matmul-bench/sparse.json
+    """
+
+    def __init__(self, cache_path=None):
+        self.cache_path = Path(cache_path or os.environ.get(THRESHOLDS_ENV) or DEFAULT_THRESHOLDS_CACHE)
+        self._cache = load_json(self.cache_path)
+
+    @staticmethod
+    def key(dtype, structure: str) -> str:
+        return f'{socket.gethostname()}/{np.dtype(dtype).name}/{structure}'
+
+    def lookup(self, n: int, dtype, structure: str) -> Dict[str, float]:
+        """Thresholds of the nearest measured size class, DEFAULT_THRESHOLDS when none is"""
+        measured = self._cache.get(self.key(dtype, structure), {})
+        if not measured:
+            return dict(DEFAULT_THRESHOLDS)
+        nearest = min(measured, key=lambda c: abs(math.log2(int(c)) - math.log2(size_class(n))))
+        return {**DEFAULT_THRESHOLDS, **measured[nearest]}
+
+    def store(self, n: int, dtype, structure: str, thresholds: Dict[str, float]):
+        """Record the thresholds measured at size n"""
+        # Re-read before writing so concurrent sweeps do not drop each other's entries
+        self._cache = load_json(self.cache_path)
+        self._cache.setdefault(self.key(dtype, structure), {})[str(size_class(n))] = thresholds
+        write_json(self.cache_path, self._cache)
+
+
+class SparseEngine(NumpyEngine):
+    """
+    Shared representation: CSRMatrix operands generated at a given density and structure
+
+    Args:
+        density: Fraction of nonzero elements of the generated inputs
+        structure: Nonzero pattern of the generated inputs (see STRUCTURES)
+    """
+    rectangular = True
+    sparse = True
+
+    def __init__(self, density: float = DEFAULT_DENSITY, structure: str = DEFAULT_STRUCTURE):
+        if not 0 < density <= 1:
+            raise ValueError(f"density must be in (0, 1], got {density}")
+        if structure not in STRUCTURES:
+            raise ValueError(f"Unknown sparsity structure '{structure}' (available: {', '.join(STRUCTURES)})")
+        self.density = density
+        self.structure = structure
+        self.last_stats = {}
+
+    def random_matrix(self, n: int, seed: int = 42, cols: int = None):
+        rng = np.random.default_rng(seed)
+        return CSRMatrix.from_dense(random_sparse(rng, (n, cols or n), self.density, self.structure, self.dtype))
+
+    def from_rows(self, rows):
+        return CSRMatrix.from_dense(super().from_rows(rows))
+
+    def to_rows(self, matrix):
+        return self.to_array(matrix).tolist()
+
+    def to_array(self, matrix):
+        return matrix.to_dense() if isinstance(matrix, CSRMatrix) else matrix
+
+    def operands(self, A, B):
+        self.last_stats = {'structure': self.structure, 'density': A.density, 'nnz': A.nnz}
+        return A, B
+
+
+@register
+class DenseOnSparseEngine(SparseEngine):
+    """The dense path: the sparse inputs as dense arrays through np.matmul"""
+    name = 'sparse_dense'
+    description = 'Sparse inputs multiplied densely (NumPy @)'
+
+    def operands(self, A, B):
+        super().operands(A, B)
+        return A.to_dense(), B.to_dense()
+
+    def multiply(self, A, B, out=None):
+        return np.matmul(A, B, out=out, dtype=self.accumulator)
+
+
+@register
+class CSRDenseEngine(SparseEngine):
+    """CSR A times dense B into dense C"""
+    name = 'sparse_csr_dense'
+    description = 'CSR x dense (row gather and segmented reduction)'
+
+    def operands(self, A, B):
+        super().operands(A, B)
+        return A, B.to_dense()
+
+    def multiply(self, A, B, out=None):
+        m, n = A.shape[0], B.shape[1]
+        return csr_dense(A, B, out if out is not None else self.allocate(m, n), self.accumulator)
+
+
+@register
+class CSRCSREngine(SparseEngine):
+    """CSR A times CSR B into CSR C"""
+    name = 'sparse_csr_csr'
+    description = 'CSR x CSR (Gustavson, expand-sort-compress)'
+
+    def allocate(self, n: int, cols: int = None):
+        return CSRMatrix.empty((n, cols or n), self.accumulator)
+
+    def multiply(self, A, B, out=None):
+        return csr_csr(A, B, out, self.accumulator)
+
+
+@register
+class DensityDispatchEngine(SparseEngine):
+    """
+    Chooses the dense, CSR x dense or CSR x CSR path per multiply
+
+    The density of A and B is known from their value counts; the structure
+    of A is estimated from its pattern (``estimate_structure``) and selects
+    the thresholds the sweep measured for that structure. The estimate and
+    the conversions the chosen path needs are part of the measured time.
+    The path taken goes to the sparse_path column.
+
+    Args:
+        thresholds: SparseThresholds to use, one reading the default cache when omitted
+    """
+    name = 'sparse_auto'
+    description = 'Density/structure dispatch between dense and CSR kernels'
+
+    def __init__(self, density: float = DEFAULT_DENSITY, structure: str = DEFAULT_STRUCTURE,
+                 thresholds: SparseThresholds = None):
+        super().__init__(density, structure)
+        self.thresholds = thresholds
+        self._scratch = {}
+
+    def _dense(self, role: str, matrix: CSRMatrix) -> np.ndarray:
+        """Dense copy of an operand in a scratch buffer reused while its shape and dtype stay the same"""
+        buffer = self._scratch.get(role)
+        if buffer is None or buffer.shape != matrix.shape or buffer.dtype != matrix.dtype:
+            buffer = self._scratch[role] = np.empty(matrix.shape, dtype=matrix.dtype)
+        return matrix.to_dense(out=buffer)
+
+    def choose(self, A: CSRMatrix, B: CSRMatrix) -> str:
+        if self.thresholds is None:
+            self.thresholds = SparseThresholds()
+        limits = self.thresholds.lookup(max(A.shape[0], B.shape[1]), self.dtype, estimate_structure(A))
+        if A.density >= limits['dense_above']:
+            return DENSE
+        if B.density < limits['csr_csr_below']:
+            return CSR_CSR
+        return CSR_DENSE
+
+    def multiply(self, A, B, out=None):
+        m, n = A.shape[0], B.shape[1]
+        C = out if out is not None else self.allocate(m, n)
+        path = self.choose(A, B)
+        if path == DENSE:
+            np.matmul(self._dense('A', A), self._dense('B', B), out=C, dtype=self.accumulator)
+        elif path == CSR_DENSE:
+            csr_dense(A, self._dense('B', B), C, self.accumulator)
+        else:
+            csr_csr(A, B, accumulator=self.accumulator).to_dense(out=C)
+        self.last_stats = {**self.last_stats, 'sparse_path': path}
+        return C
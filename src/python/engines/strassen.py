@@ -0,0 +1,199 @@
+"""
+Strassen and Strassen-Winograd engines
+
+Both recurse on 2x2 block partitions until the size drops to ``cutoff``, then
+hand the block to ``np.matmul``. Odd sizes are handled by dynamic peeling:
+the even leading (n-1) x (n-1) part recurses, and the last row, the last
+column and the rank-1 correction are applied with plain products.
+
+All temporaries live in one arena allocated in ``setup``: every recursion
+level owns a fixed slice of it (3 h x h blocks for Strassen, 2 for Winograd),
+so a multiply allocates nothing.
+"""
+
+import numpy as np
+
+from .base import register
+from .numpy_engines import NumpyEngine
+
+DEFAULT_CUTOFF = 128
+
+
+class _RecursiveEngine(NumpyEngine):
+    """
+    Shared recursion, peeling and arena handling
+
+    Args:
+        cutoff: Sizes at or below this are multiplied with np.matmul
+    """
+    # h x h temporaries each recursion level needs
+    temporaries = 0
+    # The sums of quadrants feeding each product add to the rounding
+    worst_case_rounding = True
+
+    def __init__(self, cutoff: int = DEFAULT_CUTOFF):
+        if cutoff < 1:
+            raise ValueError(f"cutoff must be positive, got {cutoff}")
+        self.cutoff = cutoff
+        self._arena = None
+        self._arena_key = None
+
+    @property
+    def block_size(self) -> str:
+        return str(self.cutoff)
+
+    def levels(self, n: int):
+        """Half-size h of every recursion level for an n x n multiply"""
+        halves = []
+        while n > self.cutoff:
+            n = (n - n % 2) // 2
+            halves.append(n)
+        return halves
+
+    def workspace_elements(self, n: int) -> int:
+        return sum(self.temporaries * h * h for h in self.levels(n))
+
+    def workspace_bytes(self, n: int) -> int:
+        return self.workspace_elements(n) * np.dtype(self.dtype).itemsize
+
+    def setup(self, n: int):
+        if self._arena_key != (n, self.dtype):
+            self._arena = np.empty(max(1, self.workspace_elements(n)), dtype=self.dtype)
+            self._arena_key = (n, self.dtype)
+
+    def multiply(self, A, B, out=None):
+        n = A.shape[0]
+        C = out if out is not None else self.allocate(n)
+        self.setup(n)
+        self._recurse(A, B, C, 0)
+        return C
+
+    def _blocks(self, offset: int, h: int):
+        """The level's temporaries, carved from the arena starting at offset"""
+        size = h * h
+        return [self._arena[offset + i * size:offset + (i + 1) * size].reshape(h, h)
+                for i in range(self.temporaries)]
+
+    def _recurse(self, A, B, C, offset: int):
+        n = A.shape[0]
+        if n <= self.cutoff:
+            np.matmul(A, B, out=C)
+            return
+
+        m = n - n % 2
+        h = m // 2
+        temps = self._blocks(offset, h)
+        deeper = offset + self.temporaries * h * h
+        self._step(A[:m, :m], B[:m, :m], C[:m, :m], h, temps, deeper)
+
+        if m != n:
+            self._peel(A, B, C, m, temps[0])
+
+    def _peel(self, A, B, C, m: int, scratch):
+        """Add the contribution of the peeled last row/column of an odd size"""
+        h = scratch.shape[0]
+        a_col = A[:m, m]
+        b_row = B[m, :m]
+        # Rank-1 correction of the even part, one h x h quadrant at a time
+        for r0 in (0, h):
+            for c0 in (0, h):
+                np.multiply.outer(a_col[r0:r0 + h], b_row[c0:c0 + h], out=scratch)
+                C[r0:r0 + h, c0:c0 + h] += scratch
+        np.matmul(A[:m, :], B[:, m], out=C[:m, m])
+        np.matmul(A[m, :], B, out=C[m, :])
+
+    def _step(self, A, B, C, h, temps, deeper):
+        raise NotImplementedError
+
+
+@register
+class StrassenEngine(_RecursiveEngine):
+    """Classic Strassen: 7 products and 18 additions per level"""
+    name = 'numpy_strassen'
+    description = 'Strassen recursion over np.matmul base cases'
+    temporaries = 3
+
+    def _step(self, A, B, C, h, temps, deeper):
+        S, T, P = temps
+        A11, A12, A21, A22 = A[:h, :h], A[:h, h:], A[h:, :h], A[h:, h:]
+        B11, B12, B21, B22 = B[:h, :h], B[:h, h:], B[h:, :h], B[h:, h:]
+        C11, C12, C21, C22 = C[:h, :h], C[:h, h:], C[h:, :h], C[h:, h:]
+
+        # M1 = (A11 + A22)(B11 + B22)
+        np.add(A11, A22, out=S)
+        np.add(B11, B22, out=T)
+        self._recurse(S, T, P, deeper)
+        C11[...] = P
+        C22[...] = P
+        # M2 = (A21 + A22) B11
+        np.add(A21, A22, out=S)
+        self._recurse(S, B11, P, deeper)
+        C21[...] = P
+        C22 -= P
+        # M3 = A11 (B12 - B22)
+        np.subtract(B12, B22, out=T)
+        self._recurse(A11, T, P, deeper)
+        C12[...] = P
+        C22 += P
+        # M4 = A22 (B21 - B11)
+        np.subtract(B21, B11, out=T)
+        self._recurse(A22, T, P, deeper)
+        C11 += P
+        C21 += P
+        # M5 = (A11 + A12) B22
+        np.add(A11, A12, out=S)
+        self._recurse(S, B22, P, deeper)
+        C11 -= P
+        C12 += P
+        # M6 = (A21 - A11)(B11 + B12)
+        np.subtract(A21, A11, out=S)
+        np.add(B11, B12, out=T)
+        self._recurse(S, T, P, deeper)
+        C22 += P
+        # M7 = (A12 - A22)(B21 + B22)
+        np.subtract(A12, A22, out=S)
+        np.add(B21, B22, out=T)
+        self._recurse(S, T, P, deeper)
+        C11 += P
+
+
+@register
+class WinogradEngine(_RecursiveEngine):
+    """
+    Strassen-Winograd: 7 products and 15 additions per level
+
+    Uses the two-temporary schedule of Boyer, Dumas, Pernet and Zhou (2009),
+    with the quadrants of C as the remaining scratch space.
+    """
+    name = 'numpy_winograd'
+    description = 'Strassen-Winograd recursion over np.matmul base cases'
+    temporaries = 2
+
+    def _step(self, A, B, C, h, temps, deeper):
+        X, Y = temps
+        A11, A12, A21, A22 = A[:h, :h], A[:h, h:], A[h:, :h], A[h:, h:]
+        B11, B12, B21, B22 = B[:h, :h], B[:h, h:], B[h:, :h], B[h:, h:]
+        C11, C12, C21, C22 = C[:h, :h], C[:h, h:], C[h:, :h], C[h:, h:]
+
+        np.subtract(A11, A21, out=X)            # S3
+        np.subtract(B22, B12, out=Y)            # T3
+        self._recurse(X, Y, C21, deeper)        # P7
+        np.add(A21, A22, out=X)                 # S1
+        np.subtract(B12, B11, out=Y)            # T1
+        self._recurse(X, Y, C22, deeper)        # P5
+        X -= A11                                # S2 = S1 - A11
+        np.subtract(B22, Y, out=Y)              # T2 = B22 - T1
+        self._recurse(X, Y, C12, deeper)        # P6
+        np.subtract(A12, X, out=X)              # S4 = A12 - S2
+        self._recurse(X, B22, C11, deeper)      # P3
+        self._recurse(A11, B11, X, deeper)      # P1
+        C12 += X                                # U2 = P1 + P6
+        C21 += C12                              # U3 = U2 + P7
+        C12 += C22                              # U4 = U2 + P5
+        C22 += C21                              # U7 = U3 + P5
+        C12 += C11                              # U5 = U4 + P3
+        Y -= B21                                # T4 = T2 - B21
+        self._recurse(A22, Y, C11, deeper)      # P4
+        C21 -= C11                              # U6 = U3 - P4
+        self._recurse(A12, B21, C11, deeper)    # P2
+        C11 += X                                # U1 = P1 + P2
@@ -0,0 +1,32 @@
+"""
+Python benchmark harness for the matrix multiplication implementations
+
+Runs the C binaries (and in-process Python engines) with warmup and adaptive
+repetitions and writes one structured record per measurement in the
+canonical 11-column CSV format, extended with host metadata.
+"""
+
+from .density import DensitySweep
+from .driver import RepetitionPolicy, measure
+from .journal import SweepJournal
+from .records import BINARY_COLUMNS, RECORD_COLUMNS, ResultWriter, parse_binary_output
+from .runners import BinaryBenchmark, EngineBenchmark
+from .scheduler import CoreScheduler
+from .shapes import Shape
+from .sweep import AdaptiveSweep
+
+__all__ = [
+    'BINARY_COLUMNS',
+    'RECORD_COLUMNS',
+    'AdaptiveSweep',
+    'BinaryBenchmark',
+    'CoreScheduler',
+    'DensitySweep',
+    'EngineBenchmark',
+    'RepetitionPolicy',
+    'ResultWriter',
+    'Shape',
+    'SweepJournal',
+    'measure',
+    'parse_binary_output',
+]
@@ -0,0 +1,32 @@
+"""
+Command-line options shared by the benchmark scripts in scripts/
+"""
+
+import argparse
+
+from .driver import RepetitionPolicy
+
+
+def add_policy_arguments(parser: argparse.ArgumentParser):
+    """Add the 'repetitions' option group read by policy_from_args"""
+    policy = parser.add_argument_group('repetitions')
+    policy.add_argument('--warmup', type=int, default=1, help='Discarded runs per configuration')
+    policy.add_argument('--min-reps', type=int, default=3)
+    policy.add_argument('--max-reps', type=int, default=30)
+    policy.add_argument('--target-ci', type=float, default=0.05,
+                        help='Stop when the median CI width / median falls below this')
+    policy.add_argument('--confidence', type=float, default=0.95)
+    policy.add_argument('--budget', type=float, default=300.0,
+                        help='Wall-clock seconds per configuration')
+    return policy
+
+
+def policy_from_args(args: argparse.Namespace) -> RepetitionPolicy:
+    return RepetitionPolicy(
+        warmup=args.warmup,
+        min_repetitions=args.min_reps,
+        max_repetitions=args.max_reps,
+        target_rel_ci=args.target_ci,
+        confidence=args.confidence,
+        time_budget_s=args.budget
+    )
@@ -0,0 +1,157 @@
+"""
+Density sweeps of the sparse engines
+
+For every (structure, size), the dense, CSR x dense and CSR x CSR paths
+multiply the same generated inputs at every density of a grid. Between
+neighbouring densities where two paths swap order, the crossover is
+interpolated on the log time ratio over log density. The crossover of the
+dense path with the faster sparse path, and of CSR x dense with CSR x CSR,
+are the dispatch thresholds of ``sparse_auto`` (see engines/sparse.py).
+"""
+
+import itertools
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from engines import DEFAULT_ELEMENT_TYPE, element_type, get_engine
+from engines.sparse import CSR_CSR, CSR_DENSE, DENSE
+
+from .driver import RepetitionPolicy, measure
+from .records import Record
+from .runners import BenchmarkError, EngineBenchmark
+from .shapes import Shape
+
+# Engine of every path
+PATH_ENGINES = {DENSE: 'sparse_dense', CSR_DENSE: 'sparse_csr_dense', CSR_CSR: 'sparse_csr_csr'}
+
+DEFAULT_DENSITIES = [0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5]
+
+
+def configuration_name(engine: str, dtype: str, structure: str, density: float) -> str:
+    """Result file stem of a sparse engine configuration, e.g. sparse_csr_dense_f32_banded_d0.01"""
+    return f'{engine}{element_type(dtype).suffix}_{structure}_d{density:g}'
+
+
+def _crossing(low: float, high: float, ratio_low: float, ratio_high: float) -> float:
+    """Density between low and high where the time ratio of two paths, linear in log-log, reaches 1"""
+    r_low, r_high = math.log(ratio_low), math.log(ratio_high)
+    return math.exp(math.log(low) + (math.log(high) - math.log(low)) * r_low / (r_low - r_high))
+
+
+@dataclass
+class DensityCrossover:
+    """Two paths swapping order between two neighbouring densities"""
+    structure: str
+    size: int
+    slower: str
+    faster: str
+    low: float
+    high: float
+    estimate: float
+
+    def describe(self) -> str:
+        return (f"{self.faster} overtakes {self.slower} near density {self.estimate:.3g} "
+                f"({self.structure}, N={self.size}; between {self.low:g} and {self.high:g})")
+
+
+@dataclass
+class DensitySweep:
+    """
+    Every path at every (structure, size, density) point
+
+    Args:
+        densities: Fractions of nonzero elements of the generated inputs
+        structures: Nonzero patterns (see engines.sparse.STRUCTURES)
+        sizes: Square sizes N
+        paths: Paths to measure (keys of PATH_ENGINES)
+        dtype: Element type of every engine
+        policy: Repetition policy for every measured point
+        verify_rounds: Freivalds rounds checking every product (0 disables it)
+        on_records: Called with the configuration name and the records of every measured run
+    """
+    densities: List[float]
+    structures: List[str]
+    sizes: List[int]
+    paths: List[str] = field(default_factory=lambda: list(PATH_ENGINES))
+    dtype: str = DEFAULT_ELEMENT_TYPE
+    policy: RepetitionPolicy = field(default_factory=RepetitionPolicy)
+    verify_rounds: int = 0
+    on_records: Optional[Callable[[str, List[Record]], None]] = None
+
+    def __post_init__(self):
+        # (path, structure, size) -> {density: median ms}
+        self.medians: Dict[Tuple[str, str, int], Dict[float, float]] = {}
+        self.errors: List[BenchmarkError] = []
+
+    def benchmark(self, path: str, structure: str, density: float) -> EngineBenchmark:
+        engine = get_engine(PATH_ENGINES[path], density=density, structure=structure)
+        engine.use_element_type(self.dtype)
+        return EngineBenchmark(engine, name=configuration_name(engine.name, self.dtype, structure, density),
+                               verify_rounds=self.verify_rounds)
+
+    def run(self) -> List[DensityCrossover]:
+        """Measure every point and return the located crossovers"""
+        for structure, size, density in itertools.product(self.structures, sorted(self.sizes),
+                                                          sorted(self.densities)):
+            for path in self.paths:
+                benchmark = self.benchmark(path, structure, density)
+                callback = None
+                if self.on_records is not None:
+                    callback = lambda records, name=benchmark.name: self.on_records(name, records)
+                try:
+                    result = measure(benchmark, Shape.square(size), self.policy, on_records=callback)
+                except BenchmarkError as e:
+                    self.errors.append(e)
+                    continue
+                self.medians.setdefault((path, structure, size), {})[density] = result.median_ms
+        return self.crossovers()
+
+    def _times(self, path: str, structure: str, size: int) -> Dict[float, float]:
+        return self.medians.get((path, structure, size), {})
+
+    def crossovers(self) -> List[DensityCrossover]:
+        """Every pair of paths swapping order between neighbouring measured densities"""
+        results = []
+        for structure, size in itertools.product(self.structures, sorted(self.sizes)):
+            for a, b in itertools.combinations(self.paths, 2):
+                times_a, times_b = self._times(a, structure, size), self._times(b, structure, size)
+                common = sorted(set(times_a) & set(times_b))
+                for low, high in zip(common, common[1:]):
+                    ratio_low, ratio_high = times_a[low] / times_b[low], times_a[high] / times_b[high]
+                    if (ratio_low - 1) * (ratio_high - 1) >= 0:
+                        continue
+                    slower, faster = (b, a) if ratio_low > 1 else (a, b)
+                    results.append(DensityCrossover(structure, size, slower, faster, low, high,
+                                                    _crossing(low, high, ratio_low, ratio_high)))
+        return results
+
+    def thresholds(self, structure: str, size: int) -> Optional[Dict[str, float]]:
+        """
+        Dispatch thresholds of one (structure, size), None unless all three paths were measured
+
+        dense_above is where the dense path overtakes the faster sparse path
+        for good (1.0 when it never does, the lowest density when it always
+        wins); csr_csr_below is where CSR x dense overtakes CSR x CSR for good.
+        """
+        dense, csr_dense, csr_csr = (self._times(path, structure, size) for path in (DENSE, CSR_DENSE, CSR_CSR))
+        densities = sorted(set(dense) & set(csr_dense) & set(csr_csr))
+        if not densities:
+            return None
+        sparse = {d: min(csr_dense[d], csr_csr[d]) for d in densities}
+        return {
+            'dense_above': self._overtaken(densities, dense, sparse),
+            'csr_csr_below': self._overtaken(densities, csr_dense, csr_csr),
+        }
+
+    @staticmethod
+    def _overtaken(densities: List[float], faster: Dict[float, float], slower: Dict[float, float]) -> float:
+        """Density from which ``faster`` wins at every higher measured density"""
+        losing = [i for i, d in enumerate(densities) if faster[d] >= slower[d]]
+        if not losing:
+            return densities[0]
+        i = losing[-1]
+        if i == len(densities) - 1:
+            return 1.0
+        low, high = densities[i], densities[i + 1]
+        return _crossing(low, high, faster[low] / slower[low], faster[high] / slower[high])
@@ -0,0 +1,147 @@
+"""
+Adaptive repetition driver
+
+Each (benchmark, size) configuration gets a number of discarded warmup runs,
+then is repeated until the distribution-free confidence interval of the
+median time is narrow enough relative to the median, the repetition cap is
+reached, or the per-configuration time budget runs out.
+"""
+
+import math
+import time
+from dataclasses import dataclass, field
+from statistics import NormalDist, median
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+from .records import Record, annotate
+from .shapes import Shape
+
+STOP_CONVERGED = 'converged'
+STOP_MAX_REPETITIONS = 'max_repetitions'
+STOP_TIME_BUDGET = 'time_budget'
+
+
+@dataclass
+class RepetitionPolicy:
+    """
+    When to stop repeating a configuration
+
+    Args:
+        warmup: Runs executed and discarded before measuring
+        min_repetitions: Measured runs always executed
+        max_repetitions: Hard cap on measured runs
+        target_rel_ci: Stop once the median's CI width divided by the median is at most this
+        confidence: Confidence level of the median's CI
+        time_budget_s: Wall-clock budget per configuration, warmup included
+    """
+    warmup: int = 1
+    min_repetitions: int = 3
+    max_repetitions: int = 30
+    target_rel_ci: float = 0.05
+    confidence: float = 0.95
+    time_budget_s: float = 300.0
+
+
+@dataclass
+class Measurement:
+    """Records of one configuration and why measuring stopped"""
+    records: List[Record] = field(default_factory=list)
+    times_ms: List[float] = field(default_factory=list)
+    stop_reason: str = ''
+    rel_ci: float = math.inf
+
+    @property
+    def median_ms(self) -> float:
+        return median(self.times_ms) if self.times_ms else math.nan
+
+
+def median_ci(samples: Sequence[float], confidence: float = 0.95) -> Tuple[float, float]:
+    """
+    Distribution-free confidence interval of the median from order statistics
+
+    Uses the normal approximation of the binomial ranks
+    n/2 -/+ z*sqrt(n)/2, clamped to the sample range.
+    """
+    values = sorted(samples)
+    n = len(values)
+    if n == 0:
+        return math.nan, math.nan
+    z = NormalDist().inv_cdf(0.5 + confidence / 2.0)
+    half_width = z * math.sqrt(n) / 2.0
+    lower = max(0, math.floor(n / 2.0 - half_width) - 1)
+    upper = min(n - 1, math.ceil(1 + n / 2.0 + half_width) - 1)
+    return values[lower], values[upper]
+
+
+def relative_ci_width(samples: Sequence[float], confidence: float = 0.95) -> float:
+    """Width of the median's confidence interval relative to the median"""
+    if len(samples) < 2:
+        return math.inf
+    low, high = median_ci(samples, confidence)
+    mid = median(samples)
+    return (high - low) / mid if mid > 0 else math.inf
+
+
+def satisfied(times_ms: Sequence[float], policy: RepetitionPolicy) -> str:
+    """Why the policy stops after these runs (converged or max_repetitions), '' while it needs more"""
+    n = len(times_ms)
+    if n >= policy.min_repetitions and relative_ci_width(times_ms, policy.confidence) <= policy.target_rel_ci:
+        return STOP_CONVERGED
+    if n >= policy.max_repetitions:
+        return STOP_MAX_REPETITIONS
+    return ''
+
+
+def measure(
+    benchmark,
+    size: Union[int, Shape],
+    policy: Optional[RepetitionPolicy] = None,
+    on_records: Optional[Callable[[List[Record]], None]] = None,
+    first_repetition: int = 0,
+    prior_times_ms: Sequence[float] = ()
+) -> Measurement:
+    """
+    Measure one configuration under a repetition policy
+
+    Args:
+        benchmark: Runner with ``run(size) -> records`` and an ``environment`` mapping
+        size: Matrix size or rectangular Shape passed to the benchmark
+        policy: Repetition policy (defaults to RepetitionPolicy())
+        on_records: Called with the annotated records of every measured run,
+            so results can be written as they are produced
+        first_repetition: Index given to the first measured run
+        prior_times_ms: Times of runs measured earlier (an interrupted
+            measurement being resumed); they count towards the policy, and
+            the repetitions continue after them
+
+    Returns:
+        Measurement with every newly measured record, and the times of the
+        prior and new runs
+    """
+    policy = policy or RepetitionPolicy()
+    result = Measurement(times_ms=list(prior_times_ms))
+    start = time.monotonic()
+
+    for _ in range(policy.warmup):
+        benchmark.run(size)
+        if time.monotonic() - start >= policy.time_budget_s:
+            break
+
+    repetition = first_repetition + len(prior_times_ms)
+    while True:
+        records = [annotate(r, repetition, benchmark.environment) for r in benchmark.run(size)]
+        repetition += 1
+        result.records.extend(records)
+        result.times_ms.append(float(records[0]['total_time_ms']))
+        if on_records is not None:
+            on_records(records)
+
+        result.rel_ci = relative_ci_width(result.times_ms, policy.confidence)
+        result.stop_reason = satisfied(result.times_ms, policy)
+        if result.stop_reason:
+            break
+        if time.monotonic() - start >= policy.time_budget_s:
+            result.stop_reason = STOP_TIME_BUDGET
+            break
+
+    return result
@@ -0,0 +1,212 @@
+"""
+Checkpoint journals: resumable and extensible sweeps
+
+Every configuration of a sweep keeps an append-only journal next to its
+result file, <output_dir>/.journal/<configuration>.jsonl, with one JSON line
+per event:
+
+- run: one measured repetition of a size, with its records
+- done: the repetition policy stopped measuring that size
+
+Each line is written with a single append and fsynced before the records
+reach the CSV file, so a line is either complete or torn at the end of the
+file, and a torn tail is cut off when the journal is reopened. The journal
+is authoritative: on reopening and on closing, a CSV file that disagrees
+with it is rewritten from the journaled records. That covers a crash between
+the two writes, and records with columns the file's header lacks (a resumed
+sweep adding --perf counters, say), which the appending writer leaves out.
+
+Measuring a size that is done, with at least the requested minimum
+repetitions, only returns the journaled measurement. An interrupted size
+continues after its last journaled repetition, with the earlier times
+counting towards the policy. New sizes and configurations are measured as
+usual, so an old sweep can be extended in place. A result file without a
+journal (a sweep from before journals) is imported first, every size in it
+counting as done.
+"""
+
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from .driver import Measurement, RepetitionPolicy, measure, relative_ci_width, satisfied
+from .records import Record, ResultWriter
+from .shapes import Shape, as_shape
+
+JOURNAL_DIRNAME = '.journal'
+
+RUN = 'run'
+DONE = 'done'
+# Stop reason of a size taken from the journal without measuring
+STOP_JOURNALED = 'journaled'
+
+
+def _size_key(record: Record) -> str:
+    """Shape label of a result row: MxNxK when it has m, n and k, else its matrix_size"""
+    try:
+        return str(Shape(*(int(float(record[c])) for c in ('m', 'n', 'k'))))
+    except (KeyError, TypeError, ValueError):
+        return str(as_shape(int(float(record['matrix_size']))))
+
+
+def _read_rows(path: Path) -> List[Record]:
+    try:
+        with open(path, newline='') as f:
+            return [row for row in csv.DictReader(f) if row.get('total_time_ms')]
+    except (OSError, csv.Error):
+        return []
+
+
+class ConfigurationJournal:
+    """
+    Journal of one configuration's measured sizes
+
+    Args:
+        directory: Sweep output directory (holds <configuration>.csv)
+        configuration: Configuration name
+    """
+
+    def __init__(self, directory, configuration: str):
+        self.csv_path = Path(directory) / f'{configuration}.csv'
+        self.path = Path(directory) / JOURNAL_DIRNAME / f'{configuration}.jsonl'
+        # size -> records of every journaled repetition, in order
+        self.runs: Dict[str, List[List[Record]]] = {}
+        self.done: Dict[str, str] = {}
+        # Every journaled record, in the order the result file holds them
+        self.records: List[Record] = []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            self._load()
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if not self.runs and not self.done:
+            self._import_csv()
+        self._reconcile()
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        complete = data[:data.rfind(b'\n') + 1]
+        if len(complete) != len(data):
+            # Torn final line: the append it belongs to never completed
+            os.truncate(self.path, len(complete))
+        for line in complete.splitlines():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            self._apply(event)
+
+    def _apply(self, event: dict):
+        if event['event'] == RUN:
+            self.runs.setdefault(event['size'], []).append(event['records'])
+            self.records.extend(event['records'])
+        elif event['event'] == DONE:
+            self.done[event['size']] = event['stop_reason']
+
+    def _append(self, event: dict):
+        line = (json.dumps(event, default=str) + '\n').encode()
+        written = 0
+        while written < len(line):
+            written += os.write(self._fd, line[written:])
+        os.fsync(self._fd)
+        self._apply(event)
+
+    def _import_csv(self):
+        """Journal the rows of a result file written without a journal, every size as done"""
+        rows = _read_rows(self.csv_path)
+        for row in rows:
+            self._append({'event': RUN, 'size': _size_key(row), 'records': [row]})
+        for size in dict.fromkeys(_size_key(row) for row in rows):
+            self._append({'event': DONE, 'size': size, 'stop_reason': STOP_JOURNALED})
+
+    def _reconcile(self):
+        """
+        Rewrite the result file from the journal when their rows differ, the
+        file ends in a torn row or the records have columns its header lacks
+        """
+        records = self.records
+        columns = None
+        if self.csv_path.exists() and self.csv_path.stat().st_size > 0:
+            with open(self.csv_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b'\n'
+            with open(self.csv_path, newline='') as f:
+                columns = next(csv.reader(f), None) or []
+            # Keys of the records, in order of appearance; None collects surplus fields of imported rows
+            missing = [key for key in dict.fromkeys(key for r in records for key in r)
+                       if key is not None and key not in columns]
+            if not torn and not missing and len(_read_rows(self.csv_path)) == len(records):
+                return
+            columns += missing
+        elif not records:
+            return
+        tmp = self.csv_path.with_name(f'{self.csv_path.name}.tmp-{os.getpid()}')
+        if records:
+            with ResultWriter(tmp, columns) as writer:
+                writer.write(records)
+            os.replace(tmp, self.csv_path)
+        elif self.csv_path.exists():
+            self.csv_path.unlink()
+
+    def times_ms(self, size: Union[int, Shape]) -> List[float]:
+        return [float(run[0]['total_time_ms']) for run in self.runs.get(str(as_shape(size)), [])]
+
+    def complete(self, size: Union[int, Shape], policy: RepetitionPolicy) -> bool:
+        """Whether the size is done and has the policy's minimum repetitions"""
+        key = str(as_shape(size))
+        return key in self.done and len(self.runs.get(key, [])) >= policy.min_repetitions
+
+    def measure(self, benchmark, size: Union[int, Shape], policy: RepetitionPolicy,
+                on_records: Optional[Callable[[List[Record]], None]] = None) -> Measurement:
+        """``driver.measure`` continuing from the journal; journaled sizes are not measured again"""
+        key = str(as_shape(size))
+        prior = self.times_ms(size)
+        if self.complete(size, policy) or (prior and satisfied(prior, policy)):
+            if key not in self.done:
+                self._append({'event': DONE, 'size': key, 'stop_reason': satisfied(prior, policy)})
+            return Measurement([r for run in self.runs[key] for r in run], prior, STOP_JOURNALED,
+                               relative_ci_width(prior, policy.confidence))
+
+        def journaled(records):
+            self._append({'event': RUN, 'size': key, 'records': records})
+            if on_records is not None:
+                on_records(records)
+
+        result = measure(benchmark, size, policy, on_records=journaled, prior_times_ms=prior)
+        self._append({'event': DONE, 'size': key, 'stop_reason': result.stop_reason})
+        return result
+
+    def close(self):
+        """Close the journal and bring the result file up to date with it (its writer closed first)"""
+        os.close(self._fd)
+        self._reconcile()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SweepJournal:
+    """Journals of every configuration of a sweep, opened on first use"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._journals: Dict[str, ConfigurationJournal] = {}
+
+    def configuration(self, name: str) -> ConfigurationJournal:
+        if name not in self._journals:
+            self._journals[name] = ConfigurationJournal(self.directory, name)
+        return self._journals[name]
+
+    def measure(self, benchmark, size: Union[int, Shape], policy: RepetitionPolicy,
+                on_records: Optional[Callable[[List[Record]], None]] = None) -> Measurement:
+        return self.configuration(benchmark.name).measure(benchmark, size, policy, on_records)
+
+    def close(self):
+        for journal in self._journals.values():
+            journal.close()
+        self._journals.clear()
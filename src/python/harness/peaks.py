@@ -0,0 +1,196 @@
+"""
+Machine-peak microbenchmarks for roofline analysis
+
+Measures, with NumPy, the two roofs of the roofline model on this host:
+
+- sustained memory bandwidth with the four STREAM kernels (copy, scale, add,
+  triad) over arrays far larger than the last-level cache
+- attainable FLOP rate with repeated GEMMs of every element type the
+  benchmarks compute in (float64, float32, float16 and int8 into int32,
+  single-threaded BLAS per process, so the rate is per core); the roof of a
+  result row is the rate of its dtype
+
+Both are measured on one core and on every core at once (one spawned process
+per core, started together at a barrier), and stored per hostname in a JSON
+cache so a host is only measured once. The analysis side
+(analysis/data_processing/roofline.py) reads the same file.
+"""
+
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from engines import ELEMENT_TYPES, element_type
+from engines.json_cache import CACHE_DIR, load_json, write_json
+from engines.pool import SPAWN, single_threaded_blas
+
+from . import sysinfo
+
+PEAKS_CACHE_ENV = 'MATMUL_PEAKS_CACHE'
+DEFAULT_PEAKS_CACHE = CACHE_DIR / 'peaks.json'
+
+# Elements per STREAM array summed over all processes (128 MiB of float64),
+# at least 4x the last-level cache of current server CPUs; each process gets
+# at least STREAM_MIN_ELEMENTS
+STREAM_ELEMENTS = 2 ** 24
+STREAM_MIN_ELEMENTS = 2 ** 20
+STREAM_SCALAR = 3.0
+# Elements per triad block: its scaled copy stays in L1/L2, so only the
+# three STREAM arrays travel to and from memory
+TRIAD_BLOCK = 2 ** 14
+
+# GEMM edge for the FLOP-rate benchmark: large enough to run at BLAS peak,
+# small enough to stay in cache-friendly territory on one core
+GEMM_SIZE = 1024
+# NumPy has no BLAS for float16 and integer products; their loops run at a
+# fraction of a GFLOPS and reach it at much smaller sizes
+GEMM_SIZES = {'float64': GEMM_SIZE, 'float32': GEMM_SIZE, 'float16': 256, 'int8': 256}
+
+
+def stream(elements: int, repeats: int = 10, barrier=None) -> Dict[str, float]:
+    """
+    Best bandwidth of each STREAM kernel in GB/s
+
+    Bytes are counted like STREAM (2 arrays for copy/scale, 3 for add/triad).
+    NumPy has no fused multiply-add, so triad (a = b + s c) runs block by
+    block through a cache-resident scratch; a, b and c each cross memory once.
+    """
+    a = np.full(elements, 1.0)
+    b = np.full(elements, 2.0)
+    c = np.zeros(elements)
+    scratch = np.empty(min(TRIAD_BLOCK, elements))
+    word = a.itemsize * elements
+
+    def triad():
+        for start in range(0, elements, TRIAD_BLOCK):
+            end = min(start + TRIAD_BLOCK, elements)
+            scaled = scratch[:end - start]
+            np.multiply(c[start:end], STREAM_SCALAR, out=scaled)
+            np.add(b[start:end], scaled, out=a[start:end])
+
+    kernels = {
+        'copy': (lambda: np.copyto(c, a), 2 * word),
+        'scale': (lambda: np.multiply(c, STREAM_SCALAR, out=b), 2 * word),
+        'add': (lambda: np.add(a, b, out=c), 3 * word),
+        'triad': (triad, 3 * word),
+    }
+    best = {name: float('inf') for name in kernels}
+    for _ in range(repeats):
+        for name, (kernel, _) in kernels.items():
+            if barrier is not None:
+                barrier.wait()
+            start = time.perf_counter()
+            kernel()
+            best[name] = min(best[name], time.perf_counter() - start)
+    return {name: nbytes / best[name] / 1e9 for name, (_, nbytes) in kernels.items()}
+
+
+def gemm(n: int = GEMM_SIZE, repeats: int = 5, dtype: str = 'float64', barrier=None) -> float:
+    """Best GEMM rate of one element type in GFLOPS, accumulating like the NumPy engines"""
+    rng = np.random.default_rng(0)
+    accumulator = element_type(dtype).accumulator
+    if np.issubdtype(dtype, np.integer):
+        A, B = (rng.integers(-128, 128, (n, n)).astype(dtype) for _ in range(2))
+    else:
+        A, B = (rng.random((n, n)).astype(dtype) for _ in range(2))
+    C = np.empty((n, n), dtype=accumulator)
+    np.matmul(A, B, out=C, dtype=accumulator)
+    best = float('inf')
+    for _ in range(repeats):
+        if barrier is not None:
+            barrier.wait()
+        start = time.perf_counter()
+        np.matmul(A, B, out=C, dtype=accumulator)
+        best = min(best, time.perf_counter() - start)
+    return 2.0 * n ** 3 / best / 1e9
+
+
+def _worker(kind, args, barrier, results):
+    results.put(stream(*args, barrier=barrier) if kind == 'stream' else gemm(*args, barrier=barrier))
+
+
+def run_concurrently(kind: str, processes: int, args: tuple) -> List:
+    """Run ``stream`` or ``gemm`` in ``processes`` single-threaded processes at once"""
+    barrier = SPAWN.Barrier(processes)
+    results = SPAWN.Queue()
+    with single_threaded_blas():
+        workers = [SPAWN.Process(target=_worker, args=(kind, args, barrier, results)) for _ in range(processes)]
+        for worker in workers:
+            worker.start()
+    outputs = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    return outputs
+
+
+def measure_peaks(cores: int = None, repeats: int = 10) -> dict:
+    """
+    Measure bandwidth and FLOP rate on one core and on ``cores`` cores
+
+    Returns:
+        Peaks record: bandwidth_gbs (best STREAM kernel) and gemm_gflops
+        (per element type) for the whole machine, the same per single core
+        (``*_core``), and every kernel's bandwidth; peak_gflops is the
+        float64 GEMM rate
+    """
+    cores = cores or sysinfo.core_count()
+    single = run_concurrently('stream', 1, (STREAM_ELEMENTS, repeats))[0]
+    per_process = max(STREAM_MIN_ELEMENTS, STREAM_ELEMENTS // cores)
+    every = run_concurrently('stream', cores, (per_process, repeats))
+    stream_all = {name: sum(result[name] for result in every) for name in single}
+    gflops_core, gflops_all = {}, {}
+    for dtype in ELEMENT_TYPES:
+        args = (GEMM_SIZES[dtype], max(3, repeats // 2), dtype)
+        gflops_core[dtype] = run_concurrently('gemm', 1, args)[0]
+        gflops_all[dtype] = sum(run_concurrently('gemm', cores, args))
+    return {
+        'host': sysinfo.hostname(),
+        'cpu_model': sysinfo.cpu_model(),
+        'cores': cores,
+        'measured': datetime.now().isoformat(timespec='seconds'),
+        'peak_gflops': gflops_all['float64'],
+        'peak_gflops_core': gflops_core['float64'],
+        'gemm_gflops': gflops_all,
+        'gemm_gflops_core': gflops_core,
+        'bandwidth_gbs': max(stream_all.values()),
+        'bandwidth_gbs_core': max(single.values()),
+        'stream_gbs': stream_all,
+        'stream_gbs_core': single,
+    }
+
+
+class PeaksCache:
+    """
+    Measured peaks per hostname in a JSON file
+
+    Args:
+        path: Cache file, default $MATMUL_PEAKS_CACHE or ~/.cache/matmul-bench/peaks.json
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or os.environ.get(PEAKS_CACHE_ENV) or DEFAULT_PEAKS_CACHE)
+
+    def load(self) -> Dict[str, dict]:
+        return load_json(self.path)
+
+    def get(self, host: str = None):
+        """Peaks of a host, None when it was not measured (or only before per-type GEMM peaks)"""
+        peaks = self.load().get(host or sysinfo.hostname())
+        return peaks if peaks and 'gemm_gflops' in peaks else None
+
+    def store(self, peaks: dict):
+        entries = self.load()
+        entries[peaks['host']] = peaks
+        write_json(self.path, entries)
+
+    def measure(self, force: bool = False, **options) -> dict:
+        """Peaks of this host, measured (and cached) unless already cached"""
+        peaks = None if force else self.get()
+        if peaks is None:
+            peaks = measure_peaks(**options)
+            self.store(peaks)
+        return peaks
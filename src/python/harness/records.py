@@ -0,0 +1,116 @@
+"""
+Benchmark records: parsing the C binaries' CSV rows and writing result files
+
+The C binaries print headerless rows with the 11 columns in BINARY_COLUMNS.
+The harness keeps those columns unchanged and appends measurement metadata,
+and writes a header line so the analysis loader can tell the columns apart.
+"""
+
+import csv
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from . import sysinfo
+from .shapes import SHAPE_COLUMNS
+
+# Column order printed by the C binaries (see src/baseline/matrix_mult.c)
+BINARY_COLUMNS = [
+    'timestamp', 'implementation', 'matrix_size', 'total_time_ms', 'total_gflops',
+    'kernel_time_ms', 'h2d_time_ms', 'd2h_time_ms', 'block_size', 'node', 'verification'
+]
+
+# Metadata appended by the harness; cpu_affinity is the cpulist the run was
+# allowed on (pinned by the scheduler, see scheduler.py) and numa_nodes its nodes
+EXTRA_COLUMNS = ['repetition', 'cpu_model', 'cores', 'cpu_affinity', 'numa_nodes', 'omp_num_threads']
+
+# Element type of the operands and the compulsory traffic of the multiply
+# (A and B read and C written once, in bytes)
+ELEMENT_COLUMNS = ['dtype', 'bytes_moved']
+
+# The product's M x N x K shape and element type follow the binary columns
+# (matrix_size is its equivalent size, see shapes.py)
+RECORD_COLUMNS = BINARY_COLUMNS + list(SHAPE_COLUMNS) + ELEMENT_COLUMNS + EXTRA_COLUMNS
+
+Record = Dict[str, object]
+
+
+def parse_binary_output(stdout: str) -> List[Record]:
+    """
+    Parse the CSV rows printed by a C binary
+
+    Header lines (CUDA prints one) and diagnostic lines are skipped.
+    """
+    records = []
+    for fields in csv.reader(stdout.splitlines()):
+        if len(fields) != len(BINARY_COLUMNS) or fields[1] == 'implementation':
+            continue
+        record: Record = dict(zip(BINARY_COLUMNS, fields))
+        try:
+            record['matrix_size'] = int(record['matrix_size'])
+            record['total_time_ms'] = float(record['total_time_ms'])
+            record['total_gflops'] = float(record['total_gflops'])
+        except ValueError:
+            continue
+        records.append(record)
+    return records
+
+
+def annotate(record: Record, repetition: int, env: Dict[str, str] = None) -> Record:
+    """Attach host metadata and the repetition index to a record"""
+    env = os.environ if env is None else env
+    record['repetition'] = repetition
+    record['cpu_model'] = sysinfo.cpu_model()
+    record['cores'] = sysinfo.core_count()
+    record['cpu_affinity'] = sysinfo.cpu_affinity()
+    record['numa_nodes'] = sysinfo.numa_nodes(record['cpu_affinity'])
+    record['omp_num_threads'] = env.get('OMP_NUM_THREADS', '')
+    return record
+
+
+class ResultWriter:
+    """
+    Append records to a headered CSV file, one row per measurement
+
+    Without explicit columns, the header is RECORD_COLUMNS plus any extra
+    keys of the first records written (e.g. an engine's I/O statistics).
+    Appending to an existing file keeps that file's header.
+    """
+
+    def __init__(self, path, columns: List[str] = None):
+        self.path = Path(path)
+        self.columns = list(columns) if columns else None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size > 0:
+            with open(self.path, newline='') as f:
+                self.columns = next(csv.reader(f))
+            self._write_header = False
+        else:
+            self._write_header = True
+        self._file = open(self.path, 'a', newline='')
+        self._writer = None
+
+    def _start(self, records: List[Record]):
+        if self.columns is None:
+            extra = [key for r in records for key in r if key not in RECORD_COLUMNS]
+            self.columns = RECORD_COLUMNS + list(dict.fromkeys(extra))
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction='ignore')
+        if self._write_header:
+            self._writer.writeheader()
+
+    def write(self, records: Iterable[Record]):
+        records = list(records)
+        if self._writer is None:
+            self._start(records)
+        for record in records:
+            self._writer.writerow(record)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,395 @@
+"""
+Benchmark runners: one configuration that can be executed for a matrix size
+"""
+
+import os
+import resource
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+from engines import EngineError, element_type, phases
+
+from . import sysinfo, verify
+from .records import Record, parse_binary_output
+from .shapes import Shape, as_shape
+
+
+class BenchmarkError(RuntimeError):
+    """A benchmark run failed or produced no parsable output"""
+
+
+# Exceptions of an engine's preparation or multiply that fail one size, not the sweep
+ENGINE_FAILURES = (ArithmeticError, EngineError, MemoryError, RuntimeError, ValueError)
+
+# Hardware counters requested from ``perf stat`` and the record column of each
+PERF_EVENTS = {'cycles': 'perf_cycles', 'instructions': 'perf_instructions', 'LLC-load-misses': 'perf_llc_misses'}
+
+
+def perf_available() -> bool:
+    return shutil.which('perf') is not None
+
+
+def rusage_columns(usage, launcher_rss_kb: int = 0) -> Record:
+    """
+    Resource usage of a reaped child (and its reaped descendants) as record columns
+
+    Linux carries a process's peak RSS across exec, so a child's ru_maxrss is
+    never below the peak RSS of the launcher that forked it. peak_rss_kb is
+    the raw ru_maxrss and launcher_rss_kb the launcher's peak at fork: when
+    the two are equal, the child's own peak is only known to be at most that.
+    """
+    return {
+        'peak_rss_kb': usage.ru_maxrss,
+        'launcher_rss_kb': launcher_rss_kb,
+        'minor_faults': usage.ru_minflt,
+        'major_faults': usage.ru_majflt,
+        'voluntary_ctx_switches': usage.ru_nvcsw,
+        'involuntary_ctx_switches': usage.ru_nivcsw,
+        'user_time_ms': usage.ru_utime * 1e3,
+        'system_time_ms': usage.ru_stime * 1e3,
+    }
+
+
+def parse_perf_stat(text: str) -> Record:
+    """
+    Counter columns from ``perf stat -x ,`` output
+
+    Counters perf could not read ("<not supported>", "<not counted>") are left out.
+    """
+    counters: Record = {}
+    for line in text.splitlines():
+        fields = line.split(',')
+        if len(fields) < 3 or fields[2] not in PERF_EVENTS:
+            continue
+        try:
+            counters[PERF_EVENTS[fields[2]]] = int(float(fields[0]))
+        except ValueError:
+            continue
+    if counters.get('perf_cycles') and 'perf_instructions' in counters:
+        counters['perf_ipc'] = counters['perf_instructions'] / counters['perf_cycles']
+    return counters
+
+
+@dataclass
+class BinaryBenchmark:
+    """
+    A C binary invoked as ``<command...> <size>`` that prints CSV rows
+
+    Rectangular shapes are passed as ``<command...> M N K``; records carry
+    the shape in the m, n and k columns, and the binaries' element type
+    (float32) in the dtype column with the bytes it implies in bytes_moved.
+
+    The child is reaped with ``os.wait4``, so every record also carries its
+    resource usage: peak RSS, minor/major page faults, voluntary/involuntary
+    context switches and user/system CPU time (for mpirun, summed over the
+    ranks it reaped; peak RSS is the largest single process, and only an
+    upper bound when it does not exceed the harness's own, see
+    ``rusage_columns``). With ``perf`` the command runs under ``perf stat``
+    and the cycle, instruction and last-level-cache miss counters are added
+    as well.
+
+    With ``verify_rounds`` the binary runs in its dump mode (MATMUL_DUMP_DIR
+    pointing at a temporary directory) and its product is checked with
+    ``verify_rounds`` rounds of Freivalds' algorithm; the verdict replaces
+    the verification column and the check's time goes to verification_time_ms.
+    Binaries built without dump support keep their own verification value.
+
+    Args:
+        name: Name of the configuration (also the result file stem), e.g. 'openmp_4t'
+        command: Command prefix, e.g. ['bin/openmp'] or ['mpirun', '-np', '4', 'bin/mpi']
+        env: Extra environment variables, e.g. {'OMP_NUM_THREADS': '4'}
+        timeout: Seconds before a run is killed
+        perf: Collect hardware counters with ``perf stat``
+        verify_rounds: Freivalds rounds of the result check (0 disables it)
+        verify_tolerance: Relative error bound of the check (see ``verify.freivalds``)
+    """
+    name: str
+    command: List[str]
+    env: Dict[str, str] = field(default_factory=dict)
+    timeout: Optional[float] = None
+    perf: bool = False
+    verify_rounds: int = 0
+    verify_tolerance: Optional[float] = None
+
+    # The C binaries take M N K as well as N
+    rectangular = True
+    # Every C kernel multiplies float matrices
+    dtype = 'float32'
+
+    @property
+    def environment(self) -> Dict[str, str]:
+        return {**os.environ, **self.env}
+
+    def _execute(self, command: List[str], env: Dict[str, str]):
+        """Run command to completion; returns (status, stdout, stderr, rusage, launcher peak RSS)"""
+        launcher_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        proc = subprocess.Popen(command, env=env, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True)
+        output = {}
+        readers = [threading.Thread(target=lambda k=k, f=f: output.__setitem__(k, f.read()), daemon=True)
+                   for k, f in (('stdout', proc.stdout), ('stderr', proc.stderr))]
+        for reader in readers:
+            reader.start()
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(self.timeout, kill) if self.timeout else None
+        if timer:
+            timer.start()
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+        finally:
+            if timer:
+                timer.cancel()
+        # Reaped here, so Popen must not wait for it again
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        for reader in readers:
+            reader.join()
+        proc.stdout.close()
+        proc.stderr.close()
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(command, self.timeout)
+        return proc.returncode, output.get('stdout', ''), output.get('stderr', ''), usage, launcher_rss_kb
+
+    def run(self, size: Union[int, Shape]) -> List[Record]:
+        shape = as_shape(size)
+        command = self.command + shape.arguments()
+        env = self.environment
+        perf_output = None
+        if self.perf:
+            handle, perf_output = tempfile.mkstemp(prefix='perf-stat-', suffix='.csv')
+            os.close(handle)
+            command = ['perf', 'stat', '-x', ',', '-e', ','.join(PERF_EVENTS), '-o', perf_output, '--'] + command
+        dump_dir = tempfile.mkdtemp(prefix='matmul-dump-') if self.verify_rounds else None
+        if dump_dir:
+            env[verify.DUMP_DIR_ENV] = dump_dir
+        try:
+            returncode, stdout, stderr, usage, launcher_rss_kb = self._execute(command, env)
+            counters = {}
+            if perf_output:
+                with open(perf_output) as f:
+                    counters = parse_perf_stat(f.read())
+            check = None
+            if dump_dir and returncode == 0:
+                dumped = verify.read_dump(dump_dir, shape)
+                if dumped is not None:
+                    check = verify.freivalds(*dumped, rounds=self.verify_rounds,
+                                             tolerance=self.verify_tolerance).columns()
+        except subprocess.TimeoutExpired:
+            raise BenchmarkError(f"{self.name} timed out after {self.timeout}s at size {shape}")
+        finally:
+            if perf_output:
+                os.unlink(perf_output)
+            if dump_dir:
+                shutil.rmtree(dump_dir, ignore_errors=True)
+
+        if returncode != 0:
+            raise BenchmarkError(
+                f"{self.name} exited with status {returncode} at size {shape}: {stderr.strip()}"
+            )
+
+        records = parse_binary_output(stdout)
+        if not records:
+            raise BenchmarkError(f"{self.name} printed no CSV rows at size {shape}")
+        resources = {
+            **shape.columns(),
+            'dtype': self.dtype,
+            'bytes_moved': element_type(self.dtype).traffic_bytes(*shape),
+            **rusage_columns(usage, launcher_rss_kb),
+            **counters,
+            **(check or {})
+        }
+        for record in records:
+            record.update(resources)
+        return records
+
+
+@dataclass
+class EngineBenchmark:
+    """
+    An in-process engine from src/python/engines, timed around ``multiply`` only
+
+    Inputs, the output buffer and the engine's own ``setup`` run once per size
+    and are reused across repetitions, so none of them is part of the measurement.
+
+    With phase timing enabled (``engines.phases.enable``), records split the
+    time into ``<phase>_time_ms`` columns: allocation and initialization of
+    the size (repeated in every record of that size), and the distribution,
+    compute and gather phases of the measured multiply. Compute, distribution
+    and gather also fill kernel_time_ms, h2d_time_ms and d2h_time_ms, unless
+    the engine reports its own kernel time in ``last_stats``.
+
+    Rectangular shapes need an engine with ``rectangular`` set: A is drawn
+    as M x K, B as K x N, and total_gflops counts 2 M N K operations.
+
+    Records carry the engine's element type (``engine.use_element_type``) in
+    the dtype column and the compulsory traffic of the multiply in
+    bytes_moved: A and B at the element size, C at the accumulator size.
+
+    Sparse engines (``engine.sparse``) draw their inputs at the engine's
+    density and structure and add structure, density and nnz (of A) columns.
+
+    Batched engines multiply ``engine.batch`` matrices per call: total_gflops
+    counts all of them, and the records add batch_size, the per-matrix
+    latency (matrix_latency_us) and the throughput (matrices_per_s).
+
+    With ``verify_rounds``, every product is checked with Freivalds' algorithm
+    after the measurement (see BinaryBenchmark); the check is the
+    verification phase.
+
+    Args:
+        engine: Engine instance (see ``engines.get_engine``)
+        seed: Seed of the random input matrices
+        name: Configuration and implementation name, defaults to the engine name
+        timeout: Accepted for interface parity with BinaryBenchmark; in-process
+            runs cannot be interrupted, so it is ignored
+        verify_rounds: Freivalds rounds of the result check (0 disables it)
+        verify_tolerance: Relative error bound of the check (see ``verify.freivalds``)
+    """
+    engine: object
+    seed: int = 42
+    name: str = ''
+    timeout: Optional[float] = None
+    verify_rounds: int = 0
+    verify_tolerance: Optional[float] = None
+    _inputs: tuple = field(default=None, init=False, repr=False)
+    _setup_seconds: dict = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        self.name = self.name or self.engine.name
+
+    @property
+    def rectangular(self) -> bool:
+        return self.engine.rectangular
+
+    @property
+    def environment(self) -> Dict[str, str]:
+        return dict(os.environ)
+
+    def _prepare(self, shape: Shape):
+        if self._inputs is None or self._inputs[0] != shape:
+            if not shape.is_square and not self.engine.rectangular:
+                raise BenchmarkError(f"{self.name} only multiplies square matrices, not {shape}")
+            # Release the previous size's operands before allocating the next ones
+            self._inputs = None
+            m, n, k = shape
+            phases.collect()
+            with phases.phase('initialization'):
+                if shape.is_square:
+                    A = self.engine.random_matrix(m, self.seed)
+                    B = self.engine.random_matrix(m, self.seed + 1)
+                else:
+                    A = self.engine.random_matrix(m, self.seed, cols=k)
+                    B = self.engine.random_matrix(k, self.seed + 1, cols=n)
+                A, B = self.engine.operands(A, B)
+            with phases.phase('allocation'):
+                C = self.engine.allocate(m) if shape.is_square else self.engine.allocate(m, cols=n)
+                if shape.is_square:
+                    self.engine.setup(m)
+                else:
+                    self.engine.setup(m, n, k)
+            self._inputs = (shape, A, B, C)
+            self._setup_seconds = phases.collect()
+        return self._inputs[1:]
+
+    def _prepared(self, shape: Shape):
+        """Inputs and output of a shape; an engine failing to set them up raises BenchmarkError"""
+        try:
+            return self._prepare(shape)
+        except BenchmarkError:
+            raise
+        except ENGINE_FAILURES as e:
+            raise BenchmarkError(f"{self.name} failed to prepare size {shape}: {type(e).__name__}: {e}")
+
+    def run(self, size: Union[int, Shape]) -> List[Record]:
+        shape = as_shape(size)
+        A, B, C = self._prepared(shape)
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        phases.collect()
+        try:
+            start = time.perf_counter()
+            with phases.phase('compute'):
+                self.engine.multiply(A, B, out=C)
+            elapsed_ms = (time.perf_counter() - start) * 1e3
+        except ENGINE_FAILURES as e:
+            raise BenchmarkError(f"{self.name} failed at size {shape}: {e}")
+
+        check = {'verification': 'N/A'}
+        if self.verify_rounds:
+            with phases.phase('verification'):
+                check = verify.freivalds(self.engine.to_array(A), self.engine.to_array(B),
+                                         self.engine.to_array(C), rounds=self.verify_rounds,
+                                         tolerance=self.verify_tolerance,
+                                         worst_case=self.engine.worst_case_rounding).columns()
+
+        timing = {'kernel_time_ms': elapsed_ms, 'h2d_time_ms': 0.0, 'd2h_time_ms': 0.0}
+        if phases.enabled():
+            seconds = {**self._setup_seconds, **phases.collect()}
+            timing = {
+                'kernel_time_ms': seconds.get('compute', 0.0) * 1e3,
+                'h2d_time_ms': seconds.get('distribution', 0.0) * 1e3,
+                'd2h_time_ms': seconds.get('gather', 0.0) * 1e3,
+                **phases.phase_columns(seconds)
+            }
+
+        batch = self.engine.batch
+        if self.engine.batched:
+            timing.update({
+                'batch_size': batch,
+                'matrix_latency_us': elapsed_ms * 1e3 / batch,
+                'matrices_per_s': batch / (elapsed_ms / 1e3) if elapsed_ms > 0 else 0.0,
+            })
+
+        gflops = batch * shape.flops / (elapsed_ms * 1e6) if elapsed_ms > 0 else 0.0
+        elements = element_type(self.engine.element_type)
+        return [{
+            'timestamp': timestamp,
+            'implementation': self.name,
+            'matrix_size': shape.equivalent_size,
+            'total_time_ms': elapsed_ms,
+            'total_gflops': gflops,
+            'block_size': self.engine.block_size,
+            'node': sysinfo.hostname(),
+            **shape.columns(),
+            'dtype': elements.name,
+            'bytes_moved': batch * elements.traffic_bytes(*shape),
+            **check,
+            **timing,
+            **self.engine.last_stats
+        }]
+
+    def operand_bytes(self, size: Union[int, Shape]) -> int:
+        """Bytes of A, B and C at a size, all ``engine.batch`` matrices of a batched engine"""
+        shape = as_shape(size)
+        return self.engine.batch * element_type(self.engine.element_type).traffic_bytes(*shape)
+
+    def peak_memory(self, size: Union[int, Shape]) -> int:
+        """
+        Peak bytes a multiply needs beyond its inputs and output
+
+        The engine's preallocated workspace plus the transient peak traced by
+        tracemalloc (which sees NumPy's allocations) during one untimed multiply.
+        """
+        shape = as_shape(size)
+        A, B, C = self._prepared(shape)
+        tracemalloc.start()
+        try:
+            self.engine.multiply(A, B, out=C)
+            _, transient = tracemalloc.get_traced_memory()
+        except ENGINE_FAILURES as e:
+            raise BenchmarkError(f"{self.name} failed at size {shape}: {e}")
+        finally:
+            tracemalloc.stop()
+        if shape.is_square:
+            return self.engine.workspace_bytes(shape.m) + transient
+        return self.engine.workspace_bytes(*shape) + transient
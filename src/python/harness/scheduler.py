@@ -0,0 +1,219 @@
+"""
+Concurrent benchmark scheduling on disjoint cores
+
+Configurations are independent, so a sweep can run several of them at once
+as long as none shares a core with another. Every job gets an exclusive set
+of physical cores (their SMT siblings stay idle) and runs in its own spawned
+process pinned to one CPU per core with ``os.sched_setaffinity``; OpenMP
+threads, mpirun ranks and engine workers inherit the mask.
+
+A job needs one core per thread or process it runs (``cores_needed``).
+Jobs are started widest first, and smaller ones fill the remaining cores:
+
+- a job that fits in one NUMA node goes to the node with the fewest free
+  cores that still holds it, which keeps whole nodes free for wide jobs
+- a job wider than every node takes free cores node by node, those of the
+  socket with the most free cores first
+- a job wider than all usable cores waits until nothing else runs and then
+  has the whole machine (oversubscribed, as in a sequential run)
+
+Co-running jobs still share the last-level cache and memory bandwidth of
+their socket; ``max_jobs`` (or a sequential run) bounds that interference.
+"""
+
+import contextlib
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from multiprocessing.connection import wait
+from typing import Callable, Dict, List, Optional
+
+from .runners import BinaryBenchmark, EngineBenchmark
+from .topology import Core, Topology, format_cpulist
+
+SPAWN = get_context('spawn')
+
+
+def cores_needed(benchmark) -> int:
+    """Threads or processes a benchmark runs: mpirun -np, OMP_NUM_THREADS, or the engine's workers/processes"""
+    if isinstance(benchmark, BinaryBenchmark):
+        if '-np' in benchmark.command:
+            return int(benchmark.command[benchmark.command.index('-np') + 1])
+        return int(benchmark.env.get('OMP_NUM_THREADS', 1))
+    if isinstance(benchmark, EngineBenchmark):
+        engine = benchmark.engine
+        if engine.distributed:
+            return engine.processes
+        if engine.parallel:
+            return engine.workers
+    return 1
+
+
+@dataclass
+class Job:
+    """
+    One unit of scheduled work
+
+    Args:
+        name: Label of the job's log lines
+        width: Cores it needs
+        payload: Argument of the runner (must pickle)
+        env: Environment variables of the job's process (e.g. BLAS thread counts)
+    """
+    name: str
+    width: int
+    payload: object
+    env: Dict[str, str] = field(default_factory=dict)
+
+
+@contextlib.contextmanager
+def _environment(env: Dict[str, str]):
+    """Set env while a process is spawned (the child copies os.environ at start)"""
+    saved = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _job_main(runner: Callable, job: Job, cpus: List[int], messages):
+    """Job process: pin to cpus, run ``runner(payload, log)`` and report its failure count"""
+    os.sched_setaffinity(0, cpus)
+
+    def log(text: str):
+        messages.send(('log', text))
+
+    try:
+        failures = runner(job.payload, log)
+    except Exception as e:
+        log(f"✗ {type(e).__name__}: {e}")
+        failures = 1
+    messages.send(('done', failures))
+    messages.close()
+
+
+@dataclass
+class _Running:
+    """A started job: its process, CPUs, message pipe and reported failure count"""
+    process: object
+    cpus: List[int]
+    messages: object
+    failures: Optional[int] = None
+
+
+class CoreScheduler:
+    """
+    Runs jobs concurrently on exclusive core sets
+
+    Args:
+        topology: Cores to schedule on, detected from sysfs when omitted
+        max_jobs: Most jobs running at once (no limit when omitted)
+    """
+
+    def __init__(self, topology: Topology = None, max_jobs: Optional[int] = None):
+        self.topology = topology or Topology.detect()
+        self.max_jobs = max_jobs
+        self._busy = set()
+
+    @property
+    def capacity(self) -> int:
+        return len(self.topology.cores)
+
+    def _free(self) -> Dict[int, List[Core]]:
+        return {node: [core for core in cores if core.cpu not in self._busy]
+                for node, cores in self.topology.nodes.items()}
+
+    def place(self, width: int) -> Optional[List[Core]]:
+        """Cores for a job of ``width``, or None when it has to wait"""
+        free = self._free()
+        if width > self.capacity:
+            return self.topology.cores if not self._busy else None
+        fitting = [node for node, cores in free.items() if len(cores) >= width]
+        if fitting:
+            node = min(fitting, key=lambda n: (len(free[n]), n))
+            return free[node][:width]
+        if any(len(cores) >= width for cores in self.topology.nodes.values()):
+            # Fits in one node once that node drains; do not spread it meanwhile
+            return None
+        if sum(len(cores) for cores in free.values()) < width:
+            return None
+        per_socket = Counter(core.socket for cores in free.values() for core in cores)
+        order = sorted(free, key=lambda n: (-per_socket[self.topology.nodes[n][0].socket],
+                                            self.topology.nodes[n][0].socket, -len(free[n]), n))
+        return [core for node in order for core in free[node]][:width]
+
+    def run(self, jobs: List[Job], runner: Callable, on_log: Callable[[str], None] = print) -> int:
+        """
+        Run every job and return the summed failure counts
+
+        ``runner(payload, log)`` runs in the job's pinned process; it must be
+        a module-level function and returns the job's number of failures.
+        """
+        pending = sorted(jobs, key=lambda job: -job.width)
+        running: Dict[str, _Running] = {}
+        failures = 0
+        try:
+            while pending or running:
+                for job in list(pending):
+                    if self.max_jobs and len(running) >= self.max_jobs:
+                        break
+                    cores = self.place(job.width)
+                    if cores is None:
+                        continue
+                    pending.remove(job)
+                    cpus = [core.cpu for core in cores]
+                    self._busy.update(cpus)
+                    reader, writer = SPAWN.Pipe(duplex=False)
+                    # Not a daemon: engine jobs spawn worker processes of their own
+                    process = SPAWN.Process(target=_job_main, args=(runner, job, cpus, writer))
+                    with _environment(job.env):
+                        process.start()
+                    # The child holds the only write end, so its death reads as EOF
+                    writer.close()
+                    running[job.name] = _Running(process, cpus, reader)
+                    width = f" (needs {job.width}, oversubscribed)" if job.width > len(cpus) else ''
+                    on_log(f"[{job.name}] started on CPUs {format_cpulist(cpus)}{width}")
+
+                # Wake on a message or on a job process exiting, whichever comes first
+                handles = {}
+                for name, job in running.items():
+                    handles[job.messages] = handles[job.process.sentinel] = name
+                for name in dict.fromkeys(handles[handle] for handle in wait(list(handles))):
+                    job = running[name]
+                    exited = self._drain(name, job, on_log)
+                    if job.failures is None and not exited:
+                        continue
+                    job.process.join()
+                    if job.failures is None:
+                        on_log(f"[{name}] ✗ job process exited with code {job.process.exitcode}")
+                        job.failures = 1
+                    job.messages.close()
+                    self._busy.difference_update(job.cpus)
+                    failures += job.failures
+                    del running[name]
+        finally:
+            for job in running.values():
+                job.process.terminate()
+                job.process.join()
+                job.messages.close()
+        return failures
+
+    @staticmethod
+    def _drain(name: str, job: _Running, on_log: Callable[[str], None]) -> bool:
+        """Handle the job's pending messages; True once its pipe is closed (the process exited)"""
+        while job.messages.poll():
+            try:
+                kind, value = job.messages.recv()
+            except EOFError:
+                return True
+            if kind == 'log':
+                on_log(f"[{name}] {value}")
+            else:
+                job.failures = value
+        return not job.process.is_alive()
@@ -0,0 +1,72 @@
+"""
+GEMM shapes: C (M x N) = A (M x K) @ B (K x N)
+
+Sizes are given as ``N`` for a square product or ``MxNxK`` for a
+rectangular one. The matrix_size column of a rectangular product holds its
+equivalent size, the edge of the square product with the same operation
+count (round(cbrt(M N K)), as printed by the C binaries), so GFLOPS and size
+axes stay comparable; the m, n and k columns hold the actual shape.
+"""
+
+import re
+from typing import NamedTuple, Union
+
+SHAPE_COLUMNS = ('m', 'n', 'k')
+
+_SHAPE_PATTERN = re.compile(r'^(\d+)(?:[x×](\d+)[x×](\d+))?$')
+
+
+class Shape(NamedTuple):
+    """Rows of A and C (m), columns of B and C (n), and the inner dimension (k)"""
+    m: int
+    n: int
+    k: int
+
+    @classmethod
+    def square(cls, n: int) -> 'Shape':
+        return cls(n, n, n)
+
+    @classmethod
+    def parse(cls, text: str) -> 'Shape':
+        """Shape from 'N' or 'MxNxK'"""
+        match = _SHAPE_PATTERN.match(text.strip())
+        if not match:
+            raise ValueError(f"Invalid shape '{text}' (expected N or MxNxK)")
+        if match.group(2) is None:
+            shape = cls.square(int(match.group(1)))
+        else:
+            shape = cls(*(int(g) for g in match.groups()))
+        if min(shape) < 1:
+            raise ValueError(f"Shape dimensions must be positive, got '{text}'")
+        return shape
+
+    @property
+    def is_square(self) -> bool:
+        return self.m == self.n == self.k
+
+    @property
+    def flops(self) -> float:
+        """Floating-point operations of the product (one multiply and one add per term)"""
+        return 2.0 * self.m * self.n * self.k
+
+    @property
+    def equivalent_size(self) -> int:
+        """Edge of the square product with the same operation count"""
+        if self.is_square:
+            return self.m
+        return round((self.m * self.n * self.k) ** (1.0 / 3.0))
+
+    def arguments(self) -> list:
+        """Command-line arguments of the C binaries: N, or M N K"""
+        return [str(self.m)] if self.is_square else [str(d) for d in self]
+
+    def columns(self) -> dict:
+        return dict(zip(SHAPE_COLUMNS, self))
+
+    def __str__(self) -> str:
+        return str(self.m) if self.is_square else f'{self.m}x{self.n}x{self.k}'
+
+
+def as_shape(size: Union[int, Shape]) -> Shape:
+    """A Shape from a square size or a Shape"""
+    return size if isinstance(size, Shape) else Shape.square(int(size))
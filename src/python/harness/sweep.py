@@ -0,0 +1,188 @@
+"""
+Adaptive size sweeps
+
+Instead of a fixed size grid, the sweep starts from a coarse grid and bisects
+only the intervals where something happens:
+
+- crossover: two implementations swap order (e.g. OpenMP overtaking baseline)
+- discontinuity: an implementation's GFLOPS changes by more than a threshold
+  between neighbouring sizes (e.g. falling off a cache cliff)
+
+Smooth intervals are never refined, so for a fixed wall-clock budget the
+resolution ends up concentrated where the curves are interesting.
+"""
+
+import heapq
+import itertools
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .driver import RepetitionPolicy, measure
+from .journal import SweepJournal
+from .records import Record
+from .runners import BenchmarkError
+
+CROSSOVER = 'crossover'
+DISCONTINUITY = 'discontinuity'
+
+
+def gflops(size: int, time_ms: float) -> float:
+    return 2.0 * size ** 3 / (time_ms * 1e6) if time_ms > 0 else math.nan
+
+
+@dataclass
+class Finding:
+    """
+    A located crossover or discontinuity between two neighbouring sizes
+
+    ``benchmarks`` is (overtaken, overtaker) for a crossover, the benchmark
+    faster at ``low`` first, and the single benchmark for a discontinuity.
+    """
+    kind: str
+    benchmarks: Tuple[str, ...]
+    low: int
+    high: int
+    estimate: float
+
+    def describe(self) -> str:
+        if self.kind == CROSSOVER:
+            return (f"{self.benchmarks[1]} overtakes {self.benchmarks[0]} near N={self.estimate:.0f} "
+                    f"(between {self.low} and {self.high})")
+        return f"{self.benchmarks[0]} GFLOPS discontinuity between N={self.low} and N={self.high}"
+
+
+@dataclass
+class AdaptiveSweep:
+    """
+    Bisection-refined size sweep over several benchmarks
+
+    Args:
+        benchmarks: Runners (``name``, ``run(size)``, ``environment``)
+        initial_sizes: Coarse starting grid
+        policy: Repetition policy for every measured point
+        budget_s: Total wall-clock budget; no new point is started after it runs out
+        min_gap: Intervals narrower than this are not split further
+        jump_threshold: Relative GFLOPS change flagged as a discontinuity
+        granularity: New sizes are rounded to a multiple of this
+        on_records: Called with the records of every measured run
+        reference: When set, only crossovers against this benchmark are refined
+            and reported (e.g. every candidate against one baseline kernel)
+        journal: Checkpoint journal of the sweep; points it already holds are
+            not measured again (see journal.py)
+    """
+    benchmarks: List
+    initial_sizes: List[int]
+    policy: RepetitionPolicy = field(default_factory=RepetitionPolicy)
+    budget_s: float = 3600.0
+    min_gap: int = 32
+    jump_threshold: float = 0.15
+    granularity: int = 8
+    on_records: Optional[Callable[[str, List[Record]], None]] = None
+    reference: Optional[str] = None
+    journal: Optional[SweepJournal] = None
+
+    def __post_init__(self):
+        self.medians: Dict[str, Dict[int, float]] = {b.name: {} for b in self.benchmarks}
+        self._by_name = {b.name: b for b in self.benchmarks}
+        self.errors: List[BenchmarkError] = []
+        self._deadline = None
+
+    def _measure(self, name: str, size: int):
+        """Measure one point; a benchmark that fails is dropped from the sweep"""
+        if name not in self.medians or size in self.medians[name]:
+            return
+        callback = None
+        if self.on_records is not None:
+            callback = lambda records: self.on_records(name, records)
+        try:
+            if self.journal is not None:
+                result = self.journal.measure(self._by_name[name], size, self.policy, on_records=callback)
+            else:
+                result = measure(self._by_name[name], size, self.policy, on_records=callback)
+        except BenchmarkError as e:
+            self.errors.append(e)
+            del self.medians[name]
+            return
+        self.medians[name][size] = result.median_ms
+
+    def _split(self, low: int, high: int) -> Optional[int]:
+        if high - low <= self.min_gap:
+            return None
+        mid = int(round((low + high) / 2.0 / self.granularity)) * self.granularity
+        if mid <= low or mid >= high:
+            mid = (low + high) // 2
+        return mid if low < mid < high else None
+
+    def _crossovers(self):
+        """Yield (priority, names, low, high) for intervals where a pair swaps order"""
+        for a, b in itertools.combinations(self.medians, 2):
+            if self.reference is not None and self.reference not in (a, b):
+                continue
+            common = sorted(set(self.medians[a]) & set(self.medians[b]))
+            for low, high in zip(common, common[1:]):
+                d_low = self.medians[a][low] - self.medians[b][low]
+                d_high = self.medians[a][high] - self.medians[b][high]
+                if d_low * d_high < 0:
+                    yield 0.0, (a, b), low, high
+
+    def _discontinuities(self):
+        """Yield (priority, names, low, high) for intervals with a large GFLOPS jump"""
+        for name, points in self.medians.items():
+            sizes = sorted(points)
+            for low, high in zip(sizes, sizes[1:]):
+                g_low, g_high = gflops(low, points[low]), gflops(high, points[high])
+                if not (g_low > 0 and g_high > 0):
+                    continue
+                jump = abs(g_high - g_low) / max(g_low, g_high)
+                if jump > self.jump_threshold:
+                    yield -jump, (name,), low, high
+
+    def _candidates(self):
+        heap = []
+        for priority, names, low, high in itertools.chain(self._crossovers(), self._discontinuities()):
+            if self._split(low, high) is not None:
+                heapq.heappush(heap, (priority, -(high - low), names, low, high))
+        return heap
+
+    def _out_of_time(self) -> bool:
+        return time.monotonic() >= self._deadline
+
+    def run(self) -> List[Finding]:
+        """Run the sweep and return the located crossovers and discontinuities"""
+        self._deadline = time.monotonic() + self.budget_s
+
+        for size in sorted(self.initial_sizes):
+            for name in list(self.medians):
+                if self._out_of_time():
+                    return self.findings()
+                self._measure(name, size)
+
+        while not self._out_of_time():
+            heap = self._candidates()
+            if not heap:
+                break
+            _, _, names, low, high = heapq.heappop(heap)
+            mid = self._split(low, high)
+            for name in names:
+                self._measure(name, mid)
+
+        return self.findings()
+
+    def findings(self) -> List[Finding]:
+        """Crossovers and discontinuities at the current resolution"""
+        results = []
+        for _, (a, b), low, high in self._crossovers():
+            d_low = self.medians[a][low] - self.medians[b][low]
+            d_high = self.medians[a][high] - self.medians[b][high]
+            # Linear interpolation of the time difference to its zero
+            estimate = low + (high - low) * d_low / (d_low - d_high)
+            overtaken, overtaker = (a, b) if d_low < 0 else (b, a)
+            results.append(Finding(CROSSOVER, (overtaken, overtaker), low, high, estimate))
+        for _, names, low, high in self._discontinuities():
+            results.append(Finding(DISCONTINUITY, names, low, high, (low + high) / 2.0))
+        return sorted(results, key=lambda f: (f.kind, f.low))
+
+    def measured_points(self) -> int:
+        return sum(len(points) for points in self.medians.values())
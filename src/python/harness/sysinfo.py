@@ -0,0 +1,55 @@
+"""
+Host metadata attached to every benchmark record
+"""
+
+import functools
+import os
+import platform
+import socket
+
+from . import topology
+
+
+@functools.lru_cache(maxsize=None)
+def cpu_model() -> str:
+    """CPU model name from /proc/cpuinfo (falls back to platform.processor())"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or 'unknown'
+
+
+def core_count() -> int:
+    """Cores this process may run on (respects affinity masks and cgroups)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def memory_bytes() -> int:
+    """Physical memory of the host (0 when unknown)"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+
+@functools.lru_cache(maxsize=None)
+def hostname() -> str:
+    return socket.gethostname() or 'unknown'
+
+
+def cpu_affinity() -> str:
+    """CPUs this process may run on, as a kernel cpulist ('0-3,8')"""
+    return topology.format_cpulist(topology.allowed_cpus())
+
+
+@functools.lru_cache(maxsize=None)
+def numa_nodes(cpus: str) -> str:
+    """NUMA nodes of a cpulist, space-separated ('' without NUMA information)"""
+    return ' '.join(str(node) for node in topology.numa_nodes(topology.parse_cpulist(cpus)))
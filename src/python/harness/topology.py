@@ -0,0 +1,111 @@
+"""
+CPU topology: NUMA nodes, sockets and physical cores this process may use
+
+NUMA nodes come from /sys/devices/system/node/node*/cpulist, sockets and
+SMT siblings from /sys/devices/system/cpu/cpu*/topology. Only CPUs in the
+process's affinity mask are kept. Without sysfs (macOS, some containers)
+every allowed CPU is its own core on a single node and socket.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+NODE_SYSFS = Path('/sys/devices/system/node')
+CPU_SYSFS = Path('/sys/devices/system/cpu')
+
+
+def parse_cpulist(text: str) -> List[int]:
+    """CPUs of a kernel cpulist such as '0-3,8,10-11'"""
+    cpus = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def format_cpulist(cpus: Iterable[int]) -> str:
+    """Kernel cpulist of a set of CPUs, ranges collapsed ('0-3,8')"""
+    ranges = []
+    for cpu in sorted(set(cpus)):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ','.join(str(a) if a == b else f'{a}-{b}' for a, b in ranges)
+
+
+def allowed_cpus() -> List[int]:
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def _read(path: Path) -> str:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return ''
+
+
+@dataclass(frozen=True)
+class Core:
+    """A physical core: the CPU jobs are pinned to, and its SMT siblings kept idle with it"""
+    cpu: int
+    siblings: Tuple[int, ...]
+    node: int
+    socket: int
+
+
+@dataclass
+class Topology:
+    """Physical cores grouped by NUMA node"""
+    nodes: Dict[int, List[Core]]
+
+    @classmethod
+    def detect(cls, node_sysfs: Path = NODE_SYSFS, cpu_sysfs: Path = CPU_SYSFS) -> 'Topology':
+        allowed = set(allowed_cpus())
+        node_of = {}
+        for node_dir in sorted(node_sysfs.glob('node[0-9]*')):
+            node = int(re.sub(r'\D', '', node_dir.name))
+            for cpu in parse_cpulist(_read(node_dir / 'cpulist')):
+                node_of[cpu] = node
+
+        nodes: Dict[int, List[Core]] = {}
+        seen = set()
+        for cpu in sorted(allowed):
+            if cpu in seen:
+                continue
+            topology = cpu_sysfs / f'cpu{cpu}' / 'topology'
+            siblings = [c for c in parse_cpulist(_read(topology / 'thread_siblings_list') or str(cpu))
+                        if c in allowed]
+            seen.update(siblings)
+            socket = int(_read(topology / 'physical_package_id') or 0)
+            node = node_of.get(cpu, 0)
+            nodes.setdefault(node, []).append(Core(cpu, tuple(siblings), node, max(socket, 0)))
+        return cls(nodes)
+
+    @property
+    def cores(self) -> List[Core]:
+        return [core for node in sorted(self.nodes) for core in self.nodes[node]]
+
+    def describe(self) -> str:
+        sockets = {core.socket for core in self.cores}
+        return (f"{len(self.cores)} cores on {len(self.nodes)} NUMA node(s), {len(sockets)} socket(s): "
+                + '; '.join(f"node {node}: {format_cpulist(c.cpu for c in cores)}"
+                            for node, cores in sorted(self.nodes.items())))
+
+
+def numa_nodes(cpus: Iterable[int], node_sysfs: Path = NODE_SYSFS) -> List[int]:
+    """NUMA nodes the given CPUs belong to"""
+    cpus = set(cpus)
+    nodes = []
+    for node_dir in sorted(node_sysfs.glob('node[0-9]*')):
+        if cpus & set(parse_cpulist(_read(node_dir / 'cpulist'))):
+            nodes.append(int(re.sub(r'\D', '', node_dir.name)))
+    return nodes
@@ -0,0 +1,201 @@
+"""
+Probabilistic verification of matrix products (Freivalds' algorithm)
+
+Checking C = A @ B by recomputing it costs as much as the benchmark. Freivalds'
+check compares A (B r) with C r for random +-1 vectors r instead, at O(n^2)
+per vector: a wrong C passes one vector with probability at most 1/2, so
+``rounds`` vectors bound the chance of accepting a wrong product by
+2^-rounds. All rounds are checked at once as an n x rounds matrix R. For
+n <= rounds, R is the identity instead, which checks every column of C
+deterministically at no extra cost.
+
+Rounding makes exact equality too strict. Each element of C may be off by
+``tolerance`` times the matching element of |A||B|. n times the unit
+roundoff u of C's dtype bounds the rounding of any summation order, but that
+worst case is loose, and summed over the n elements a vector combines, a
+single wrong element goes unnoticed unless it is off by about n^2 u (40% at
+n = 4096 in float32). Rounding errors of inner products behave like a random
+walk, so by default an element may be off by ROUNDING_MARGIN * sqrt(n) u,
+and as the random signs of r cancel any correlation between the errors of
+different elements, these add in quadrature (see ``_Bound``). Classical
+kernels (blocked, tiled, BLAS, sequential loops) stay well below that bound,
+and one wrong element is caught once it is off by about 10 n u.
+Strassen-type recursions grow faster than sqrt(n) and are checked with
+``worst_case``, the n u bound summed. Both add the rounding of the check
+itself (B R, A (B R) and C R in float64). The check catches wrong products,
+not a small loss of accuracy.
+
+Batches (batch, n, n) are checked matrix by matrix with the same vectors.
+
+C binaries take part through their dump mode: with MATMUL_DUMP_DIR set they
+write A, B and C as raw float32 files after the timed region.
+"""
+
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .shapes import as_shape
+
+DUMP_DIR_ENV = 'MATMUL_DUMP_DIR'
+DEFAULT_ROUNDS = 10
+# Unit roundoff of the check's own float64 arithmetic
+CHECK_UNIT_ROUNDOFF = np.finfo(np.float64).eps / 2
+# Multiple of sqrt(n) unit roundoffs the default tolerance allows; classical
+# kernels measure below 2
+ROUNDING_MARGIN = 10.0
+# Elements of an operand processed at once
+PANEL_ELEMENTS = 2 ** 22
+
+PASS = 'PASS'
+FAIL = 'FAIL'
+
+
+@dataclass
+class Verification:
+    """Verdict of one Freivalds check and what it cost"""
+    passed: bool
+    rounds: int
+    seconds: float
+    max_violation: float
+
+    def columns(self) -> dict:
+        """Record columns: the verification verdict and its cost"""
+        return {
+            'verification': PASS if self.passed else FAIL,
+            'verification_time_ms': self.seconds * 1e3,
+            'verification_rounds': self.rounds,
+        }
+
+
+def freivalds(A, B, C, rounds: int = DEFAULT_ROUNDS, tolerance: Optional[float] = None,
+              seed: Optional[int] = None, worst_case: bool = False) -> Verification:
+    """
+    Check C == A @ B with ``rounds`` random +-1 vectors
+
+    Args:
+        A, B, C: Matrices (any dtype; the check runs in float64)
+        rounds: Random vectors; a wrong C passes with probability <= 2^-rounds
+        tolerance: Relative rounding error allowed per element of C, default
+            ROUNDING_MARGIN * sqrt(n) unit roundoffs of C's dtype (n with
+            ``worst_case``); the check's own rounding is always added
+        seed: Seed of the random vectors
+        worst_case: Treat the rounding errors of C's elements as correlated,
+            for algorithms whose rounding grows faster than an inner
+            product's, like Strassen
+
+    Returns:
+        Verification with the verdict, the time it took and the largest
+        violation |A(BR) - CR| / bound (<= 1 passes)
+    """
+    start = time.perf_counter()
+    A, B, C = np.asarray(A), np.asarray(B), np.asarray(C)
+    if (A.ndim != B.ndim or A.shape[:-2] != B.shape[:-2] or A.shape[-1] != B.shape[-2]
+            or C.shape != A.shape[:-1] + B.shape[-1:]):
+        raise ValueError(f"Shapes do not multiply: {A.shape} @ {B.shape} -> {C.shape}")
+    n = A.shape[-1]
+    growth = n if worst_case else ROUNDING_MARGIN * math.sqrt(n)
+    if tolerance is None:
+        unit = np.finfo(C.dtype).eps / 2 if np.issubdtype(C.dtype, np.floating) else 0.0
+        tolerance = growth * unit
+    check_tolerance = growth * 3 * CHECK_UNIT_ROUNDOFF
+
+    if rounds >= B.shape[-1]:
+        # As many vectors as columns: checking every column costs no more and is exact
+        R = np.eye(B.shape[-1])
+    else:
+        R = np.random.default_rng(seed).integers(0, 2, size=(B.shape[-1], rounds)) * 2.0 - 1.0
+    bound = _Bound(tolerance, check_tolerance, worst_case)
+    worst = 0.0
+    if A.ndim == 3:
+        # Batches: every matrix is checked with the same vectors, a chunk of matrices at a time
+        for b0, b1 in _panels(A):
+            BR, B_terms = B[b0:b1] @ R, bound.b_terms(B[b0:b1], np.abs(R))
+            error = np.abs(A[b0:b1] @ BR - C[b0:b1] @ R)
+            worst = max(worst, _worst_violation(error, bound(A[b0:b1], *B_terms)))
+        return Verification(worst <= 1.0, rounds, time.perf_counter() - start, worst)
+
+    BR = np.empty((B.shape[0], R.shape[1]))
+    abs_BR = np.empty((B.shape[0], R.shape[1]))
+    column_sq = np.zeros(B.shape[1])
+    for r0, r1 in _panels(B):
+        BR[r0:r1] = B[r0:r1] @ R
+        abs_BR[r0:r1] = np.abs(B[r0:r1]) @ np.abs(R)
+        column_sq += np.square(B[r0:r1], dtype=np.float64).sum(axis=0)
+    B_terms = (abs_BR, np.sqrt(column_sq @ np.abs(R)))
+
+    for r0, r1 in _panels(A):
+        error = np.abs(A[r0:r1] @ BR - C[r0:r1] @ R)
+        worst = max(worst, _worst_violation(error, bound(A[r0:r1], *B_terms)))
+    return Verification(worst <= 1.0, rounds, time.perf_counter() - start, worst)
+
+
+class _Bound:
+    """
+    Rounding error allowed in every element of A (B R) - C R
+
+    The check's own float64 rounding is at most ``check_tolerance`` times
+    |A| (|B| |R|). The rounding of C is ``tolerance`` times |A||B| per
+    element; with ``worst_case`` these add up over the elements a vector
+    combines, otherwise the random signs make them add in quadrature.
+    Cauchy-Schwarz bounds the result, sqrt(sum_j |r_j| (|A||B|)_ij^2), by
+    ||a_i|| sqrt(sum_j |r_j| ||b_j||^2) (rows a_i of A, columns b_j of B),
+    which costs O(n^2) like the rest of the check.
+    """
+
+    def __init__(self, tolerance: float, check_tolerance: float, worst_case: bool):
+        self.tolerance = tolerance
+        self.check_tolerance = check_tolerance
+        self.worst_case = worst_case
+
+    @staticmethod
+    def b_terms(B, abs_R):
+        """|B| |R| and sqrt(sum_j |r_j| ||b_j||^2) of (a stack of) B"""
+        return np.abs(B) @ abs_R, np.sqrt(np.square(B, dtype=np.float64).sum(axis=-2) @ abs_R)
+
+    def __call__(self, A, abs_BR, column_norms):
+        magnitude = np.abs(A) @ abs_BR
+        if self.worst_case:
+            return (self.tolerance + self.check_tolerance) * magnitude
+        row_norms = np.sqrt(np.square(A, dtype=np.float64).sum(axis=-1))
+        return (self.tolerance * row_norms[..., :, None] * column_norms[..., None, :]
+                + self.check_tolerance * magnitude)
+
+
+def _worst_violation(error: np.ndarray, bound: np.ndarray) -> float:
+    """Largest error / bound; zero bounds (exact arithmetic, zero rows) must match exactly, NaN never passes"""
+    violation = np.divide(error, bound, out=np.where(error > 0, np.inf, 0.0), where=bound > 0)
+    if np.isnan(violation).any():
+        return np.inf
+    return float(np.max(violation, initial=0.0))
+
+
+def _panels(matrix):
+    """Ranges over the first axis of at most PANEL_ELEMENTS elements (memory-mapped operands are streamed)"""
+    rows = max(1, PANEL_ELEMENTS // max(math.prod(matrix.shape[1:]), 1))
+    return [(r0, min(r0 + rows, matrix.shape[0])) for r0 in range(0, matrix.shape[0], rows)]
+
+
+def read_dump(directory, size, dtype=np.float32):
+    """
+    A, B and C written by a C binary's dump mode, or None when it wrote none
+
+    Args:
+        directory: The binary's MATMUL_DUMP_DIR
+        size: Square size or Shape of the product
+    """
+    m, n, k = as_shape(size)
+    matrices = []
+    for name, shape in (('A', (m, k)), ('B', (k, n)), ('C', (m, n))):
+        path = os.path.join(directory, f'{name}.f32')
+        if not os.path.exists(path):
+            return None
+        matrix = np.fromfile(path, dtype=dtype)
+        if matrix.size != shape[0] * shape[1]:
+            return None
+        matrices.append(matrix.reshape(shape))
+    return matrices
@@ -0,0 +1,10 @@
+"""Put the harness (src/python) and analysis packages on the import path"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+for path in (ROOT / 'src' / 'python', ROOT / 'analysis'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,79 @@
+"""The blocked engine's tiles and the persisted tile autotuner"""
+
+import json
+
+import numpy as np
+import pytest
+
+from engines import get_engine
+from engines.autotune import (DEFAULT_TILE, FALLBACK_CACHE_SIZES, TileTuner, cache_sizes, candidate_tiles,
+                              size_class, tile_footprint)
+
+CACHES = {1: 32 * 1024, 2: 1024 * 1024, 3: 8 * 1024 * 1024}
+
+
+def _sysfs(root, entries):
+    for index, (level, kind, size) in enumerate(entries):
+        directory = root / f'index{index}'
+        directory.mkdir(parents=True)
+        (directory / 'level').write_text(f'{level}\n')
+        (directory / 'type').write_text(f'{kind}\n')
+        (directory / 'size').write_text(f'{size}\n')
+    return root
+
+
+def test_cache_sizes_from_sysfs(tmp_path):
+    sysfs = _sysfs(tmp_path, [(1, 'Data', '48K'), (1, 'Instruction', '32K'), (2, 'Unified', '2048K')])
+    assert cache_sizes(sysfs) == {1: 48 * 1024, 2: 2 * 1024 ** 2, 3: FALLBACK_CACHE_SIZES[3]}
+    assert cache_sizes(tmp_path / 'missing') == FALLBACK_CACHE_SIZES
+
+
+def test_size_class():
+    assert [size_class(n) for n in (1, 2, 3, 64, 65, 1000)] == [1, 2, 4, 64, 128, 1024]
+
+
+def test_candidates_fit_between_l1_and_l2():
+    candidates = candidate_tiles(1024, 8, CACHES, limit=4)
+    assert len(candidates) <= 5 and DEFAULT_TILE in candidates
+    for tile in candidates:
+        if tile != DEFAULT_TILE:
+            assert CACHES[1] < tile_footprint(tile, 8) <= CACHES[2]
+    tuned = [tile_footprint(t, 8) for t in candidates if t != DEFAULT_TILE]
+    assert tuned == sorted(tuned, reverse=True)
+
+
+def test_candidates_of_small_sizes():
+    # Nothing fits between the caches: the smallest tile is tried against the default
+    assert candidate_tiles(16, 8, CACHES) == [(16, 16, 16), DEFAULT_TILE]
+    assert all(max(t[:2]) <= 100 for t in candidate_tiles(100, 8, CACHES)[:-1])
+
+
+def test_tuner_persists_its_choice(tmp_path):
+    path = tmp_path / 'tiles.json'
+    tuner = TileTuner(path, repeats=1, limit=2)
+    tile = tuner.tile_for(96, np.float32)
+    entry = tuner.cached(96, np.float32)
+    assert entry['tile'] == list(tile)
+    assert entry['gflops'] >= max(entry['candidates'].values()) - 1e-9
+    assert tuner.cached(96, np.float64) is None
+
+    # Sizes of the same class reuse the stored tile without searching
+    reloaded = TileTuner(path)
+    reloaded.tune = pytest.fail
+    assert reloaded.tile_for(128, np.float32) == tile
+    assert list(json.loads(path.read_text())) == [TileTuner.key(96, np.float32)]
+
+
+def test_tuned_engine_product(tmp_path):
+    engine = get_engine('numpy_blocked_tuned', tuner=TileTuner(tmp_path / 'tiles.json', repeats=1, limit=2))
+    A, B = engine.random_matrix(80, seed=1), engine.random_matrix(80, seed=2)
+    engine.setup(80)
+    np.testing.assert_allclose(engine.multiply(A, B), A @ B, rtol=1e-12)
+    assert engine.block_size == 'x'.join(map(str, engine.tile))
+
+
+@pytest.mark.parametrize('tile', [(16, 16, 16), (32, 16, 64), (64, 64, 32)])
+def test_blocked_products_with_remainder_tiles(tile):
+    engine = get_engine('numpy_blocked', tile=tile)
+    A, B = engine.random_matrix(50, seed=1, cols=70), engine.random_matrix(70, seed=2, cols=45)
+    np.testing.assert_allclose(engine.multiply(A, B), A @ B, rtol=1e-12)
@@ -0,0 +1,80 @@
+"""Batched engines, their per-matrix records and the batch saturation summary"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.metrics_calculator import batch_saturation
+from engines import get_engine
+from harness.runners import EngineBenchmark
+
+
+@pytest.fixture
+def engines():
+    made = []
+
+    def make(name, **options):
+        made.append(get_engine(name, **options))
+        return made[-1]
+
+    yield make
+    for engine in made:
+        getattr(engine, 'close', lambda: None)()
+
+
+@pytest.mark.parametrize('name, options', [
+    ('numpy_batched_matmul', {}),
+    ('numpy_batched_blocked', {'chunk': 3}),
+    ('numpy_batched_blocked', {}),
+    ('numpy_batched_parallel', {'workers': 3}),
+])
+@pytest.mark.parametrize('batch', [1, 2, 7])
+def test_stacks_match_numpy(engines, name, options, batch):
+    engine = engines(name, batch=batch, **options)
+    A, B = engine.random_matrix(9, seed=1), engine.random_matrix(9, seed=2)
+    assert A.shape == (batch, 9, 9)
+    C = engine.multiply(A, B)
+    np.testing.assert_allclose(C, np.matmul(A, B), rtol=1e-12)
+
+    # Arrays the engine did not allocate work as well
+    A, B, out = np.array(A), np.array(B), np.empty_like(C)
+    assert engine.multiply(A, B, out) is out
+    np.testing.assert_allclose(out, np.matmul(A, B), rtol=1e-12)
+
+
+def test_from_rows_repeats_a_single_matrix():
+    engine = get_engine('numpy_batched_matmul', batch=3)
+    stack = engine.from_rows([[1, 2], [3, 4]])
+    assert stack.shape == (3, 2, 2) and stack.flags.c_contiguous
+    np.testing.assert_array_equal(stack[2], [[1, 2], [3, 4]])
+
+
+def test_batch_must_be_positive():
+    with pytest.raises(ValueError, match='Batch size must be positive'):
+        get_engine('numpy_batched_matmul', batch=0)
+
+
+def test_records_report_per_matrix_latency():
+    [record] = EngineBenchmark(get_engine('numpy_batched_matmul', batch=16)).run(8)
+    assert record['batch_size'] == 16
+    assert record['matrix_latency_us'] == pytest.approx(record['total_time_ms'] * 1e3 / 16)
+    assert record['matrices_per_s'] == pytest.approx(16 / (record['total_time_ms'] / 1e3))
+    assert record['total_gflops'] == pytest.approx(16 * 2 * 8 ** 3 / (record['total_time_ms'] * 1e6))
+    assert record['bytes_moved'] == 16 * 3 * 8 ** 2 * 8
+
+
+def test_batch_saturation():
+    latencies = {1: 10.0, 4: 3.0, 16: 1.05, 64: 1.0, 256: 1.02}
+    df = pd.DataFrame({
+        'implementation': [f'numpy_batched_matmul_b{batch}' for batch in latencies],
+        'matrix_size': 16,
+        'threads': 1,
+        'batch_size': list(latencies),
+        'matrix_latency_us': list(latencies.values()),
+    })
+    [row] = batch_saturation(df).to_dict('records')
+    assert row['family'] == 'numpy_batched_matmul'
+    assert (row['batch_size'], row['best_latency_us'], row['single_latency_us']) == (16, 1.0, 10.0)
+    assert row['overhead_fraction'] == pytest.approx(0.9)
+
+    assert batch_saturation(df.drop(columns='batch_size')).empty
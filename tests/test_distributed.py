@@ -0,0 +1,66 @@
+"""SUMMA and Cannon on local process grids, including sizes the grid does not divide"""
+
+import numpy as np
+import pytest
+
+from engines import get_engine
+from engines.distributed import DistributedMatrix, grid_shape, partition
+
+GRIDS = [('numpy_summa', 4, (2, 2)), ('numpy_summa', 6, (2, 3)),
+         ('numpy_cannon', 4, (2, 2)), ('numpy_cannon', 9, (3, 3))]
+
+
+@pytest.fixture
+def engines():
+    made = []
+
+    def make(name, **options):
+        made.append(get_engine(name, **options))
+        return made[-1]
+
+    yield make
+    for engine in made:
+        engine.close()
+
+
+def test_grid_shape_and_partition():
+    assert [grid_shape(p) for p in (1, 4, 6, 7, 9, 12)] == [(1, 1), (2, 2), (2, 3), (1, 7), (3, 3), (3, 4)]
+    assert partition(10, 3) == [(0, 4), (4, 7), (7, 10)]
+
+
+def test_distributed_matrix_round_trip():
+    source = np.arange(49.0).reshape(7, 7)
+    matrix = DistributedMatrix(7, (2, 3), np.float64)
+    matrix.scatter(source)
+    assert matrix.block(1, 2).shape == (3, 2)
+    np.testing.assert_array_equal(matrix.block(0, 0), source[:4, :3])
+    np.testing.assert_array_equal(matrix.gather(), source)
+    matrix.close()
+
+
+@pytest.mark.parametrize('name, processes, grid', GRIDS)
+@pytest.mark.parametrize('n', [12, 13, 17])
+def test_products_match(engines, name, processes, grid, n):
+    engine = engines(name, processes=processes)
+    assert engine.grid == grid
+    A, B = engine.random_matrix(n, seed=1), engine.random_matrix(n, seed=2)
+    C = engine.multiply(A, B)
+    np.testing.assert_allclose(engine.to_array(C), engine.to_array(A) @ engine.to_array(B), rtol=1e-12)
+    assert engine.last_stats['comm_bytes'] > 0
+
+
+@pytest.mark.parametrize('name, processes, grid', GRIDS[1:3])
+def test_plain_operands_and_output(engines, name, processes, grid):
+    engine = engines(name, processes=processes)
+    engine.use_element_type('float32')
+    rng = np.random.default_rng(0)
+    out = np.empty((11, 11), dtype=np.float32)
+    for n in (11, 7):
+        A, B = rng.random((n, n), dtype=np.float32), rng.random((n, n), dtype=np.float32)
+        C = engine.multiply(A, B, out[:n, :n])
+        np.testing.assert_allclose(C, A @ B, rtol=1e-5)
+
+
+def test_cannon_needs_a_square_grid():
+    with pytest.raises(ValueError, match='square process count'):
+        get_engine('numpy_cannon', processes=6)
@@ -0,0 +1,118 @@
+"""Adaptive repetitions, the C binaries' CSV rows and the records written for them"""
+
+import csv
+import math
+import sys
+import textwrap
+
+import pytest
+
+from harness.driver import (STOP_CONVERGED, STOP_MAX_REPETITIONS, STOP_TIME_BUDGET, RepetitionPolicy, measure,
+                            median_ci, relative_ci_width)
+from harness.records import RECORD_COLUMNS, ResultWriter, parse_binary_output
+from harness.runners import BenchmarkError, BinaryBenchmark
+
+ROW = '2024-03-01 10:00:00,openmp,{size},{time},1.0,{time},0.0,0.0,4t,node01,PASS'
+
+
+class ScriptedBenchmark:
+    """Returns the given times in order, one record per run"""
+
+    environment = {'OMP_NUM_THREADS': '4'}
+
+    def __init__(self, times):
+        self.times = list(times)
+        self.runs = 0
+
+    def run(self, size):
+        time_ms = self.times[min(self.runs, len(self.times) - 1)]
+        self.runs += 1
+        return [{'implementation': 'scripted', 'matrix_size': size, 'total_time_ms': time_ms}]
+
+
+def test_median_ci():
+    samples = list(range(1, 101))
+    low, high = median_ci(samples)
+    assert low < 50.5 < high
+    assert (low, high) == (40, 61)
+    assert all(math.isnan(bound) for bound in median_ci([]))
+    assert relative_ci_width([5.0]) == float('inf')
+    assert relative_ci_width([5.0] * 10) == 0.0
+
+
+def test_stable_configuration_converges_after_min_repetitions():
+    benchmark = ScriptedBenchmark([99.0, 10.0])
+    result = measure(benchmark, 64, RepetitionPolicy(warmup=1, min_repetitions=3))
+    assert result.stop_reason == STOP_CONVERGED
+    # The warmup run (99 ms) is discarded
+    assert result.times_ms == [10.0, 10.0, 10.0]
+    assert benchmark.runs == 4
+    assert [r['repetition'] for r in result.records] == [0, 1, 2]
+    assert {r['omp_num_threads'] for r in result.records} == {'4'}
+
+
+def test_noisy_configuration_stops_at_the_cap():
+    benchmark = ScriptedBenchmark([10.0, 20.0, 5.0, 40.0] * 10)
+    result = measure(benchmark, 64, RepetitionPolicy(warmup=0, max_repetitions=6))
+    assert result.stop_reason == STOP_MAX_REPETITIONS
+    assert len(result.times_ms) == 6
+
+
+def test_time_budget():
+    result = measure(ScriptedBenchmark([10.0, 20.0]), 64, RepetitionPolicy(warmup=3, time_budget_s=0.0))
+    assert result.stop_reason == STOP_TIME_BUDGET
+    assert len(result.times_ms) == 1
+
+
+def test_resumed_measurement_continues_the_repetitions():
+    result = measure(ScriptedBenchmark([10.0]), 64, RepetitionPolicy(warmup=0, min_repetitions=3),
+                     prior_times_ms=[10.0, 10.0])
+    assert result.times_ms == [10.0, 10.0, 10.0]
+    assert [r['repetition'] for r in result.records] == [2]
+
+
+def test_parse_binary_output_skips_headers_and_diagnostics():
+    stdout = '\n'.join([
+        'Matrix size: 64',
+        'timestamp,implementation,matrix_size,total_time_ms,total_gflops,kernel_time_ms,h2d_time_ms,'
+        'd2h_time_ms,block_size,node,verification',
+        ROW.format(size=64, time=2.5),
+        ROW.format(size='N/A', time=2.5),
+    ])
+    [record] = parse_binary_output(stdout)
+    assert (record['matrix_size'], record['total_time_ms'], record['block_size']) == (64, 2.5, '4t')
+
+
+@pytest.fixture
+def fake_binary(tmp_path):
+    script = tmp_path / 'fake_binary.py'
+    script.write_text(textwrap.dedent(f'''
+        import sys
+        size = sys.argv[1]
+        if size == '13':
+            sys.exit('unsupported size')
+        print('Computing...')
+        print({ROW!r}.format(size=size, time=1.5))
+    '''))
+    return [sys.executable, str(script)]
+
+
+def test_binary_records_are_written_with_a_header(tmp_path, fake_binary):
+    benchmark = BinaryBenchmark('openmp_4t', fake_binary, env={'OMP_NUM_THREADS': '4'})
+    result = measure(benchmark, 32, RepetitionPolicy(warmup=0, min_repetitions=2))
+    path = tmp_path / 'openmp_4t.csv'
+    with ResultWriter(path) as writer:
+        writer.write(result.records)
+
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0])[:len(RECORD_COLUMNS)] == RECORD_COLUMNS
+    assert [row['repetition'] for row in rows] == ['0', '1']
+    assert {(row['matrix_size'], row['m'], row['dtype'], row['omp_num_threads']) for row in rows} == {
+        ('32', '32', 'float32', '4')
+    }
+
+
+def test_binary_failures_are_benchmark_errors(fake_binary):
+    with pytest.raises(BenchmarkError, match='unsupported size'):
+        BinaryBenchmark('openmp_4t', fake_binary).run(13)
@@ -0,0 +1,84 @@
+"""Element types: every engine in every type it supports, int8 accumulation and the dtype comparison"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.formats import dtype_family
+from data_processing.metrics_calculator import dtype_comparison
+from engines import ELEMENT_TYPES, available_engines, element_type, get_engine
+from harness.runners import EngineBenchmark
+
+OPTIONS = {'numpy_batched_matmul': {'batch': 2}, 'numpy_batched_blocked': {'batch': 2},
+           'numpy_batched_parallel': {'batch': 2, 'workers': 2}, 'numpy_parallel': {'workers': 2},
+           'numpy_summa': {'processes': 4}, 'numpy_cannon': {'processes': 4}}
+
+
+def _configurations():
+    for name in available_engines():
+        engine = get_engine(name, **OPTIONS.get(name, {}))
+        yield from ((name, dtype) for dtype in engine.element_types if dtype != 'float64')
+        getattr(engine, 'close', lambda: None)()
+
+
+@pytest.fixture(autouse=True)
+def private_caches(tmp_path, monkeypatch):
+    monkeypatch.setenv('MATMUL_TUNING_CACHE', str(tmp_path / 'tiles.json'))
+    monkeypatch.setenv('MATMUL_SPARSE_THRESHOLDS', str(tmp_path / 'sparse.json'))
+    monkeypatch.setenv('MATMUL_OOC_WORKDIR', str(tmp_path / 'ooc'))
+
+
+def test_element_types():
+    assert element_type('int8').accumulator == 'int32'
+    assert element_type('float16').traffic_bytes(4, 2, 3) == (12 + 6 + 8) * 2
+    assert element_type('int8').traffic_bytes(4, 2, 3) == 12 + 6 + 8 * 4
+    with pytest.raises(ValueError, match="Unknown element type 'bfloat16'"):
+        element_type('bfloat16')
+    with pytest.raises(ValueError, match='does not support float32'):
+        get_engine('python_naive').use_element_type('float32')
+
+
+@pytest.mark.parametrize('name, dtype', list(_configurations()))
+def test_engine_products_verify(name, dtype):
+    engine = get_engine(name, **OPTIONS.get(name, {}))
+    engine.use_element_type(dtype)
+    try:
+        [record] = EngineBenchmark(engine, verify_rounds=8).run(20)
+    finally:
+        getattr(engine, 'close', lambda: None)()
+    assert record['verification'] == 'PASS'
+    assert record['dtype'] == dtype
+    assert record['bytes_moved'] == engine.batch * element_type(dtype).traffic_bytes(20, 20, 20)
+
+
+def test_int8_products_accumulate_exactly():
+    engine = get_engine('numpy_matmul')
+    engine.use_element_type('int8')
+    A, B = np.full((300, 300), -128, dtype=np.int8), np.full((300, 300), -128, dtype=np.int8)
+    C = engine.multiply(A, B)
+    assert C.dtype == np.int32
+    assert (C == 300 * 128 ** 2).all()
+
+
+def test_dtype_family():
+    assert dtype_family('numpy_matmul_f32', 'float32') == 'numpy_matmul'
+    assert dtype_family('numpy_parallel_i8_static_4t', 'int8') == 'numpy_parallel_static_4t'
+    assert dtype_family('numpy_matmul', 'float64') == 'numpy_matmul'
+    assert set(ELEMENT_TYPES) == {'float16', 'float32', 'float64', 'int8'}
+
+
+def test_dtype_comparison():
+    df = pd.DataFrame({
+        'implementation': ['numpy_matmul', 'numpy_matmul_f32', 'numpy_matmul_i8', 'python_naive'],
+        'matrix_size': 64,
+        'dtype': ['float64', 'float32', 'int8', 'float64'],
+        'gflops': [10.0, 20.0, 2.0, 0.1],
+        'execution_time_ms': [4.0, 2.0, 20.0, 400.0],
+        'bytes_moved': [3 * 64 ** 2 * 8.0, 3 * 64 ** 2 * 4.0, 64 ** 2 * 6.0, 3 * 64 ** 2 * 8.0],
+    })
+    result = dtype_comparison(df).set_index('dtype')
+    assert set(result['family']) == {'numpy_matmul'}
+    assert result.loc['float32', 'speedup'] == 2.0
+    assert result.loc['float32', 'memory_ratio'] == 0.5
+    assert result.loc['int8', 'memory_ratio'] == 0.25
+    assert result.loc['float64', 'bandwidth_gbs'] == pytest.approx(3 * 64 ** 2 * 8 / 4e6)
@@ -0,0 +1,50 @@
+"""The engine registry: every registered engine computes the product it is benchmarked on"""
+
+import numpy as np
+import pytest
+
+from engines import available_engines, get_engine
+from harness.runners import EngineBenchmark
+
+SMALL = {'numpy_batched_matmul': {'batch': 3}, 'numpy_batched_blocked': {'batch': 3},
+         'numpy_batched_parallel': {'batch': 3, 'workers': 2}, 'numpy_parallel': {'workers': 2},
+         'numpy_summa': {'processes': 4}, 'numpy_cannon': {'processes': 4}}
+
+
+@pytest.fixture(autouse=True)
+def private_caches(tmp_path, monkeypatch):
+    monkeypatch.setenv('MATMUL_TUNING_CACHE', str(tmp_path / 'tiles.json'))
+    monkeypatch.setenv('MATMUL_SPARSE_THRESHOLDS', str(tmp_path / 'sparse.json'))
+    monkeypatch.setenv('MATMUL_OOC_WORKDIR', str(tmp_path / 'ooc'))
+
+
+def test_every_module_registered_its_engines():
+    names = set(available_engines())
+    for family in ('python_', 'numpy_matmul', 'numpy_blocked', 'numpy_strassen', 'numpy_parallel',
+                   'numpy_summa', 'numpy_out_of_core', 'numpy_batched_', 'sparse_'):
+        assert any(name.startswith(family) for name in names), family
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError, match='Unknown engine'):
+        get_engine('numpy_nonexistent')
+
+
+@pytest.mark.parametrize('name', available_engines())
+def test_engine_products_verify(name):
+    engine = get_engine(name, **SMALL.get(name, {}))
+    benchmark = EngineBenchmark(engine, verify_rounds=8)
+    try:
+        records = benchmark.run(24)
+    finally:
+        getattr(engine, 'close', lambda: None)()
+    assert records[0]['verification'] == 'PASS'
+    assert float(records[0]['total_time_ms']) > 0
+
+
+def test_python_engines_round_trip_rows():
+    engine = get_engine('python_naive')
+    A = engine.from_rows([[1.0, 2.0], [3.0, 4.0]])
+    B = engine.from_rows([[5.0, 6.0], [7.0, 8.0]])
+    assert engine.to_rows(engine.multiply(A, B)) == [[19.0, 22.0], [43.0, 50.0]]
+    np.testing.assert_array_equal(engine.to_array(A), [[1.0, 2.0], [3.0, 4.0]])
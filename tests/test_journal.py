@@ -0,0 +1,175 @@
+"""Checkpoint journals: resuming, repairing and importing sweeps"""
+
+import csv
+
+import pytest
+
+from harness.driver import RepetitionPolicy
+from harness.journal import DONE, JOURNAL_DIRNAME, RUN, STOP_JOURNALED, ConfigurationJournal
+from harness.records import ResultWriter
+
+NAME = 'fake_engine'
+POLICY = RepetitionPolicy(warmup=0, min_repetitions=3, max_repetitions=3)
+
+
+class Interrupted(Exception):
+    pass
+
+
+class FakeBenchmark:
+    """Runner returning one record per run, interrupted after ``fail_after`` runs"""
+
+    name = NAME
+    environment = {}
+
+    def __init__(self, fail_after=None, extra=None):
+        self.fail_after = fail_after
+        self.extra = extra or {}
+        self.runs = 0
+
+    def run(self, size):
+        if self.fail_after is not None and self.runs >= self.fail_after:
+            raise Interrupted()
+        self.runs += 1
+        return [{'implementation': NAME, 'matrix_size': size, 'm': size, 'n': size, 'k': size,
+                 'total_time_ms': 10.0 + self.runs, **self.extra}]
+
+
+def _sweep(directory, benchmark, sizes, policy=POLICY):
+    """What run_benchmarks does per configuration: journal first, then the appending writer"""
+    with ConfigurationJournal(directory, NAME) as journal, \
+            ResultWriter(directory / f'{NAME}.csv') as writer:
+        return [journal.measure(benchmark, size, policy, on_records=writer.write) for size in sizes]
+
+
+def _rows(directory):
+    with open(directory / f'{NAME}.csv', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_interrupted_size_continues_after_its_last_repetition(tmp_path):
+    with pytest.raises(Interrupted):
+        _sweep(tmp_path, FakeBenchmark(fail_after=4), [64, 128])
+    assert len(_rows(tmp_path)) == 4
+
+    benchmark = FakeBenchmark()
+    results = _sweep(tmp_path, benchmark, [64, 128])
+
+    assert results[0].stop_reason == STOP_JOURNALED
+    assert benchmark.runs == 2
+    assert len(results[1].times_ms) == 3
+    rows = _rows(tmp_path)
+    assert [(row['matrix_size'], row['repetition']) for row in rows] == \
+        [('64', '0'), ('64', '1'), ('64', '2'), ('128', '0'), ('128', '1'), ('128', '2')]
+
+
+def test_finished_sweep_is_extended_with_new_sizes(tmp_path):
+    _sweep(tmp_path, FakeBenchmark(), [64])
+    benchmark = FakeBenchmark()
+    results = _sweep(tmp_path, benchmark, [64, 256])
+
+    assert results[0].stop_reason == STOP_JOURNALED
+    assert benchmark.runs == 3
+    assert [row['matrix_size'] for row in _rows(tmp_path)] == ['64'] * 3 + ['256'] * 3
+
+
+def test_torn_journal_tail_is_cut_off(tmp_path):
+    with pytest.raises(Interrupted):
+        _sweep(tmp_path, FakeBenchmark(fail_after=2), [64])
+    journal_path = tmp_path / JOURNAL_DIRNAME / f'{NAME}.jsonl'
+    complete = journal_path.read_bytes()
+    with open(journal_path, 'ab') as f:
+        f.write(b'{"event": "run", "size": "64", "reco')
+
+    with ConfigurationJournal(tmp_path, NAME) as journal:
+        assert journal_path.read_bytes() == complete
+        assert journal.times_ms(64) == [11.0, 12.0]
+        assert not journal.complete(64, POLICY)
+
+    benchmark = FakeBenchmark()
+    _sweep(tmp_path, benchmark, [64])
+    assert benchmark.runs == 1
+    assert len(_rows(tmp_path)) == 3
+
+
+def test_result_file_torn_mid_row_is_repaired(tmp_path):
+    _sweep(tmp_path, FakeBenchmark(), [64])
+    csv_path = tmp_path / f'{NAME}.csv'
+    expected = _rows(tmp_path)
+    with open(csv_path, 'a') as f:
+        f.write('fake_engine,64,64,64,6')
+
+    ConfigurationJournal(tmp_path, NAME).close()
+
+    assert csv_path.read_bytes().endswith(b'\n')
+    assert _rows(tmp_path) == expected
+
+
+def test_rows_lost_between_journal_and_result_file_are_restored(tmp_path):
+    _sweep(tmp_path, FakeBenchmark(), [64])
+    csv_path = tmp_path / f'{NAME}.csv'
+    expected = _rows(tmp_path)
+    lines = csv_path.read_text().splitlines(keepends=True)
+    csv_path.write_text(''.join(lines[:-1]))
+
+    ConfigurationJournal(tmp_path, NAME).close()
+
+    assert _rows(tmp_path) == expected
+
+
+def test_consistent_result_file_is_left_alone(tmp_path):
+    _sweep(tmp_path, FakeBenchmark(), [64])
+    csv_path = tmp_path / f'{NAME}.csv'
+    before = csv_path.stat().st_mtime_ns, csv_path.read_bytes()
+
+    ConfigurationJournal(tmp_path, NAME).close()
+
+    assert (csv_path.stat().st_mtime_ns, csv_path.read_bytes()) == before
+
+
+def test_sweep_without_journal_is_imported_as_done(tmp_path):
+    with ResultWriter(tmp_path / f'{NAME}.csv') as writer:
+        for size in (64, 128):
+            writer.write(FakeBenchmark().run(size) * 2)
+    csv_path = tmp_path / f'{NAME}.csv'
+    before = csv_path.read_bytes()
+
+    benchmark = FakeBenchmark()
+    with ConfigurationJournal(tmp_path, NAME) as journal:
+        assert set(journal.done) == {'64', '128'}
+        assert journal.done['64'] == STOP_JOURNALED
+        assert journal.complete(64, RepetitionPolicy(min_repetitions=2))
+        result = journal.measure(benchmark, 64, RepetitionPolicy(min_repetitions=2))
+
+    assert result.stop_reason == STOP_JOURNALED
+    assert result.times_ms == [11.0, 11.0]
+    assert benchmark.runs == 0
+    assert csv_path.read_bytes() == before
+    events = (tmp_path / JOURNAL_DIRNAME / f'{NAME}.jsonl').read_text().count
+    assert events(f'"{RUN}"') == 4 and events(f'"{DONE}"') == 2
+
+
+def test_imported_size_short_of_the_minimum_is_measured_further(tmp_path):
+    with ResultWriter(tmp_path / f'{NAME}.csv') as writer:
+        writer.write(FakeBenchmark().run(64))
+
+    benchmark = FakeBenchmark()
+    result = _sweep(tmp_path, benchmark, [64])[0]
+
+    assert benchmark.runs == 2
+    assert len(result.times_ms) == 3
+    assert len(_rows(tmp_path)) == 3
+
+
+def test_new_record_columns_are_added_on_close(tmp_path):
+    _sweep(tmp_path, FakeBenchmark(), [64])
+    _sweep(tmp_path, FakeBenchmark(extra={'perf_ipc': 2.5}), [128])
+
+    rows = _rows(tmp_path)
+    assert 'perf_ipc' in rows[0]
+    assert [row['perf_ipc'] for row in rows] == [''] * 3 + ['2.5'] * 3
+
+
+def test_empty_journal_creates_no_result_file(tmp_path):
+    ConfigurationJournal(tmp_path, NAME).close()
+    assert not (tmp_path / f'{NAME}.csv').exists()
@@ -0,0 +1,17 @@
+"""The per-host JSON caches shared by the tile tuner, the sparse thresholds and the machine peaks"""
+
+from engines.json_cache import load_json, write_json
+
+
+def test_missing_or_corrupt_files_read_as_empty(tmp_path):
+    assert load_json(tmp_path / 'missing.json') == {}
+    (tmp_path / 'corrupt.json').write_text('{"host": ')
+    assert load_json(tmp_path / 'corrupt.json') == {}
+
+
+def test_write_replaces_the_file(tmp_path):
+    path = tmp_path / 'nested' / 'tiles.json'
+    write_json(path, {'b': 1, 'a': {'64': [32, 32]}})
+    write_json(path, {**load_json(path), 'c': 2})
+    assert load_json(path) == {'a': {'64': [32, 32]}, 'b': 1, 'c': 2}
+    assert [p.name for p in path.parent.iterdir()] == ['tiles.json']
@@ -0,0 +1,65 @@
+"""Speedup and parallel efficiency against a baseline implementation"""
+
+import pandas as pd
+import pytest
+
+from data_processing.metrics_calculator import calculate_speedup
+
+
+def _measurements(rows):
+    return pd.DataFrame([
+        {'implementation': implementation, 'matrix_size': size, 'threads': threads, 'processes': processes,
+         'execution_time_ms': time_ms}
+        for implementation, size, threads, processes, times in rows
+        for time_ms in times
+    ])
+
+
+MEASUREMENTS = _measurements([
+    ('naive', 64, 1, 1, [10.0, 14.0]),
+    ('naive', 128, 1, 1, [80.0]),
+    ('naive', 128, 2, 1, [50.0]),
+    ('openmp', 64, 4, 1, [3.0, 3.0]),
+    ('openmp', 128, 4, 1, [20.0, 20.0]),
+    ('mpi', 128, 1, 4, [10.0]),
+    ('openmp', 256, 4, 1, [100.0]),
+])
+
+
+def _row(result, implementation, size, threads=1, processes=1):
+    match = result[(result['implementation'] == implementation) & (result['matrix_size'] == size)
+                   & (result['threads'] == threads) & (result['processes'] == processes)]
+    assert len(match) == 1
+    return match.iloc[0]
+
+
+def test_speedup_and_efficiency():
+    result = calculate_speedup(MEASUREMENTS)
+    openmp = _row(result, 'openmp', 64, threads=4)
+    assert (openmp['time_mean'], openmp['baseline_time_mean']) == (3.0, 12.0)
+    assert (openmp['speedup'], openmp['workers'], openmp['efficiency']) == (4.0, 4, 1.0)
+
+    mpi = _row(result, 'mpi', 128, processes=4)
+    assert (mpi['speedup'], mpi['efficiency']) == (8.0, 2.0)
+    assert _row(result, 'naive', 64)['speedup'] == 1.0
+
+
+def test_baseline_is_the_least_parallel_configuration():
+    result = calculate_speedup(MEASUREMENTS)
+    assert _row(result, 'openmp', 128, threads=4)['baseline_time_mean'] == 80.0
+    assert _row(result, 'naive', 128, threads=2)['speedup'] == pytest.approx(1.6)
+
+
+def test_sizes_without_a_baseline_are_dropped():
+    result = calculate_speedup(MEASUREMENTS)
+    assert 256 not in set(result['matrix_size'])
+    assert calculate_speedup(MEASUREMENTS, baseline='cuda').empty
+
+
+def test_bootstrap_intervals_bracket_the_speedup():
+    result = calculate_speedup(MEASUREMENTS, n_bootstrap=200)
+    assert (result['speedup_ci_low'] <= result['speedup'] + 1e-12).all()
+    assert (result['speedup'] <= result['speedup_ci_high'] + 1e-12).all()
+    # The baseline's runs at N=64 differ, so resampling them widens the interval
+    openmp = _row(result, 'openmp', 64, threads=4)
+    assert openmp['speedup_ci_low'] < 4.0 < openmp['speedup_ci_high']
@@ -0,0 +1,100 @@
+"""The out-of-core engine: tile edges under a memory budget, remainder tiles and the prefetcher"""
+
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from engines import get_engine
+from engines.base import EngineError
+from engines.out_of_core import TILE_BUFFERS, _Prefetcher, open_matrix_file, tile_edge
+
+
+def _budget(edge, itemsize=8):
+    return TILE_BUFFERS * edge * edge * itemsize
+
+
+def _product(tmp_path, n, memory_budget, dtype='float64'):
+    engine = get_engine('numpy_out_of_core', memory_budget=memory_budget, workdir=tmp_path)
+    engine.use_element_type(dtype)
+    A, B = engine.random_matrix(n, seed=1), engine.random_matrix(n, seed=2)
+    expected = np.asarray(A, dtype=np.float64) @ np.asarray(B, dtype=np.float64)
+    return engine, engine.multiply(A, B), expected
+
+
+def test_tile_edge():
+    assert tile_edge(100, 8, _budget(16)) == 16
+    assert tile_edge(100, 8, _budget(16) + 100) == 16
+    assert tile_edge(10, 8, _budget(16)) == 10
+    assert tile_edge(100, 4, _budget(16)) == 22
+    with pytest.raises(EngineError, match='too small'):
+        tile_edge(100, 8, TILE_BUFFERS * 8 - 1)
+
+
+@pytest.mark.parametrize('n, edge', [(32, 8), (37, 8), (20, 7), (5, 16)])
+def test_products_match(tmp_path, n, edge):
+    engine, C, expected = _product(tmp_path, n, _budget(edge))
+    assert engine.block_size == str(min(n, edge))
+    np.testing.assert_allclose(C, expected, rtol=1e-12)
+
+
+def test_io_stats_count_every_tile(tmp_path):
+    n, edge = 37, 8
+    engine, _, _ = _product(tmp_path, n, _budget(edge))
+    tiles = math.ceil(n / edge)
+    stats = engine.last_stats
+    # Every (i, j, k) step loads A_ik and B_kj: each operand is read once per tile row/column of C
+    assert stats['io_read_bytes'] == 2 * n * n * tiles * 8
+    assert stats['io_write_bytes'] == n * n * 8
+    assert stats['io_time_ms'] > 0 and stats['io_bandwidth_mbs'] > 0
+
+
+def test_float32_and_output_file(tmp_path):
+    engine = get_engine('numpy_out_of_core', memory_budget=_budget(6, 4), workdir=tmp_path)
+    engine.use_element_type('float32')
+    A, B = engine.random_matrix(15, seed=1), engine.random_matrix(15, seed=2)
+    out = engine.allocate(15)
+    assert engine.multiply(A, B, out) is out
+    np.testing.assert_allclose(open_matrix_file(out.filename), np.asarray(A) @ np.asarray(B), rtol=1e-5)
+    assert out.dtype == np.float32
+    assert all(path.parent == tmp_path for path in tmp_path.glob('*.npy'))
+
+
+def _buffers(edge):
+    return {kind: [np.empty(edge * edge) for _ in range(2)] for kind in ('A', 'B')}
+
+
+def test_prefetcher_loads_tiles_in_order():
+    n, edge = 7, 3
+    A, B = np.arange(n * n, dtype=float).reshape(n, n), -np.arange(n * n, dtype=float).reshape(n, n)
+    loader = _Prefetcher(A, B, edge, _buffers(edge))
+    loader.start()
+    for i0, j0, k0 in itertools.product(range(0, n, edge), repeat=3):
+        a_buffer, a_tile = loader.next('A')
+        b_buffer, b_tile = loader.next('B')
+        np.testing.assert_array_equal(a_tile, A[i0:i0 + edge, k0:k0 + edge])
+        np.testing.assert_array_equal(b_tile, B[k0:k0 + edge, j0:j0 + edge])
+        loader.release('A', a_buffer)
+        loader.release('B', b_buffer)
+    loader.join(timeout=5)
+    assert not loader.is_alive()
+    assert loader.bytes_read == 2 * n * n * math.ceil(n / edge) * 8
+
+
+def test_prefetcher_cancel_and_failure():
+    A = np.ones((8, 8))
+    loader = _Prefetcher(A, A, 2, _buffers(2))
+    loader.start()
+    loader.next('A')
+    loader.cancel()
+    loader.join(timeout=5)
+    assert not loader.is_alive()
+
+    loader = _Prefetcher(A, np.ones((4, 4)), 2, _buffers(1))
+    loader.start()
+    with pytest.raises(EngineError, match='tile loading failed'):
+        for kind in itertools.cycle('AB'):
+            buffer, _ = loader.next(kind)
+            loader.release(kind, buffer)
+    loader.join(timeout=5)
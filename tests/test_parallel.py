@@ -0,0 +1,127 @@
+"""The shared-memory pool engine: schedules, bands and the segments it keeps in /dev/shm"""
+
+import threading
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from engines import ELEMENT_TYPES, get_engine
+from engines.parallel import BANDS, SCHEDULES, _claims, choose_band, static_range
+
+
+def _product(engine, m, k, n, dtype='float64'):
+    engine.use_element_type(dtype)
+    A, B = engine.random_matrix(m, seed=1, cols=k), engine.random_matrix(k, seed=2, cols=n)
+    expected = engine.to_array(A).astype(np.float64) @ engine.to_array(B).astype(np.float64)
+    C = engine.multiply(*engine.operands(A, B))
+    return engine.to_array(C), expected
+
+
+@pytest.fixture
+def engines():
+    made = []
+
+    def make(**options):
+        made.append(get_engine('numpy_parallel', **options))
+        return made[-1]
+
+    yield make
+    for engine in made:
+        engine.close()
+
+
+def _all_claims(units, workers, schedule, chunk):
+    """Claims of every worker, interleaved one claim at a time as the pool would"""
+    task = {'units': units, 'workers': workers, 'schedule': schedule, 'chunk': chunk}
+    counter, lock = SimpleNamespace(value=0), threading.Lock()
+    claims = [_claims(task, index, counter, lock) for index in range(workers)]
+    ranges = []
+    while claims:
+        for claim in list(claims):
+            try:
+                ranges.append(next(claim))
+            except StopIteration:
+                claims.remove(claim)
+    return ranges
+
+
+@pytest.mark.parametrize('schedule', SCHEDULES)
+@pytest.mark.parametrize('chunk', [None, 1, 3])
+@pytest.mark.parametrize('units', [1, 7, 40])
+def test_claims_cover_every_unit_once(schedule, chunk, units):
+    ranges = _all_claims(units, 3, schedule, chunk)
+    covered = sorted(unit for start, stop in ranges for unit in range(start, stop))
+    assert covered == list(range(units))
+
+
+def test_static_range_spreads_the_remainder():
+    assert [static_range(10, 4, index) for index in range(4)] == [(0, 3), (3, 6), (6, 8), (8, 10)]
+    assert [static_range(2, 4, index) for index in range(4)] == [(0, 1), (1, 2), (2, 2), (2, 2)]
+
+
+def test_guided_claims_shrink():
+    sizes = [stop - start for start, stop in _all_claims(100, 4, 'guided', 2)]
+    assert sizes[0] == 25
+    assert sizes == sorted(sizes, reverse=True)
+    assert min(sizes[:-1]) >= 2
+
+
+def test_choose_band():
+    assert choose_band(100, 40, 100, 4) == 'rows'
+    assert choose_band(40, 100, 100, 4) == 'columns'
+    assert choose_band(3, 2, 500, 4) == 'depth'
+    assert choose_band(3, 2, 500, 1) == 'rows'
+    assert choose_band(3, 2, 2, 4) == 'rows'
+
+
+@pytest.mark.parametrize('schedule', SCHEDULES)
+@pytest.mark.parametrize('band', BANDS)
+def test_products_match(engines, schedule, band):
+    engine = engines(workers=2, schedule=schedule, chunk=3, band=band, tile=8)
+    C, expected = _product(engine, 37, 23, 29)
+    np.testing.assert_allclose(C, expected, rtol=1e-12)
+    assert engine.last_stats['partition'] == ('rows' if band == 'auto' else band)
+
+
+def test_depth_with_fewer_rows_than_workers(engines):
+    engine = engines(workers=4, schedule='dynamic')
+    C, expected = _product(engine, 2, 50, 3)
+    assert engine.last_stats['partition'] == 'depth'
+    np.testing.assert_allclose(C, expected, rtol=1e-12)
+
+    # The partials are zeroed per multiply, not accumulated across them
+    C, expected = _product(engine, 2, 50, 3)
+    np.testing.assert_allclose(C, expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize('dtype', ELEMENT_TYPES)
+def test_element_types(engines, dtype):
+    engine = engines(workers=2, band='tiles', tile=5)
+    C, expected = _product(engine, 12, 9, 11, dtype)
+    np.testing.assert_allclose(C, expected, rtol=1e-2 if dtype == 'float16' else 1e-5)
+
+
+def test_unknown_options():
+    with pytest.raises(ValueError, match='Unknown schedule'):
+        get_engine('numpy_parallel', schedule='auto')
+    with pytest.raises(ValueError, match='Unknown band'):
+        get_engine('numpy_parallel', band='diagonal')
+
+
+def test_new_size_frees_previous_segments(engines):
+    engine = engines(workers=2)
+    _product(engine, 16, 16, 16)
+    previous = set(engine._segments)
+    _product(engine, 24, 24, 24)
+    assert previous and not previous & set(engine._segments)
+    for name in previous:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+    current = set(engine._segments)
+    engine.close()
+    for name in current:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
@@ -0,0 +1,77 @@
+"""Phase timing: exclusive nested phases and the per-phase columns of engine records"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from engines import get_engine, phases
+from engines.phases import PHASES, phase, phase_columns, timed
+from harness.runners import EngineBenchmark
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A perf_counter advanced by hand, with phase timing on for the test"""
+    now = SimpleNamespace(value=0.0)
+    monkeypatch.setattr(phases, 'time', SimpleNamespace(perf_counter=lambda: now.value))
+    phases.enable()
+    yield now
+    phases.enable(False)
+
+
+def test_disabled_phases_record_nothing():
+    assert not phases.enabled()
+    with phase('compute'):
+        pass
+    assert phases.collect() == {}
+
+
+def test_nested_phases_are_exclusive(clock):
+    with phase('compute'):
+        clock.value += 2.0
+        with phase('distribution'):
+            clock.value += 0.5
+            with phase('io'):
+                clock.value += 0.25
+        clock.value += 1.0
+    assert phases.collect() == {'compute': 3.0, 'distribution': 0.5, 'io': 0.25}
+    assert phases.collect() == {}
+
+
+def test_timed_functions(clock):
+    @timed('gather')
+    def gather(seconds):
+        clock.value += seconds
+        return seconds
+
+    assert gather(0.5) + gather(0.25) == 0.75
+    assert phases.collect() == {'gather': 0.75}
+
+
+def test_phase_columns_cover_every_phase():
+    columns = phase_columns({'compute': 0.002})
+    assert list(columns) == [f'{name}_time_ms' for name in PHASES]
+    assert columns['compute_time_ms'] == 2.0 and columns['gather_time_ms'] == 0.0
+
+
+def test_engine_records_split_their_time():
+    engine = get_engine('numpy_parallel', workers=2)
+    phases.enable()
+    try:
+        [record] = EngineBenchmark(engine, verify_rounds=2).run(48)
+    finally:
+        phases.enable(False)
+        engine.close()
+    assert all(record[f'{name}_time_ms'] >= 0 for name in PHASES)
+    assert record['allocation_time_ms'] > 0 and record['verification_time_ms'] > 0
+    assert record['kernel_time_ms'] == record['compute_time_ms'] > 0
+    assert record['h2d_time_ms'] == record['distribution_time_ms']
+    # Distribution and gather run inside the multiply but are not counted as compute
+    assert record['compute_time_ms'] + record['distribution_time_ms'] + record['gather_time_ms'] \
+        <= record['total_time_ms'] * 1.01
+
+
+def test_engine_records_without_phase_timing():
+    [record] = EngineBenchmark(get_engine('numpy_matmul')).run(32)
+    assert 'compute_time_ms' not in record
+    assert record['kernel_time_ms'] == record['total_time_ms']
@@ -0,0 +1,73 @@
+"""Pandas-free summaries: the csv-module reader and the startup cost of summary/report"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from data_processing import quick_stats, schema
+from harness.records import ResultWriter
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _write_harness_csv(path):
+    records = [
+        {'implementation': 'openmp_4t', 'matrix_size': 512, 'total_time_ms': 12.5, 'total_gflops': 21.4,
+         'block_size': '4t', 'verification': 'PASS', 'dtype': 'float32', 'repetition': 0},
+        {'implementation': 'mpi_2p', 'matrix_size': 512, 'total_time_ms': 14.0, 'total_gflops': 19.2,
+         'block_size': '2p', 'repetition': 0},
+        {'implementation': 'numpy_matmul', 'matrix_size': 1024, 'm': 4096, 'n': 64, 'k': 4096,
+         'total_time_ms': 3.25, 'total_gflops': 41.3, 'block_size': 'N/A', 'dtype': 'float64'},
+        {'implementation': 'numpy_matmul', 'matrix_size': 1024, 'm': 4096, 'n': 64, 'k': 4096,
+         'total_time_ms': '', 'total_gflops': '', 'block_size': 'N/A', 'dtype': 'float64'},
+    ]
+    with ResultWriter(path) as writer:
+        writer.write(records)
+
+
+def test_headered_rows_match_the_schema_reader(tmp_path):
+    path = tmp_path / 'results.csv'
+    _write_harness_csv(path)
+
+    fast = list(quick_stats.iter_rows(path))
+    canonical = list(schema.iter_rows(path))
+
+    assert [row[:quick_stats.KEY_LENGTH] for row in fast] == [row[:quick_stats.KEY_LENGTH] for row in canonical]
+    assert fast[0][:quick_stats.KEY_LENGTH] == ('openmp_4t', 512, 4, 1, 512, 512, 512, 'float32')
+    assert fast[1][:quick_stats.KEY_LENGTH] == ('mpi_2p', 512, 1, 2, 512, 512, 512, 'float32')
+    for ours, theirs in zip(fast, canonical):
+        assert ours[-2:] == pytest.approx(theirs[-2:], rel=1e-6, nan_ok=True)
+
+
+def test_analysis_csv_with_threads_columns(tmp_path):
+    path = tmp_path / 'naive.csv'
+    path.write_text('timestamp,implementation,matrix_size,execution_time_ms,gflops,threads,processes,node\n'
+                    '2024-01-01 12:00:00,naive,256,30.0,1.1,1,1,n01\n'
+                    '2024-01-01 12:00:01,naive,256,31.0,1.08,,1,n01\n')
+
+    expected = [
+        ('naive', 256, 1, 1, 256, 256, 256, 'float64', 30.0, pytest.approx(1.1)),
+        ('naive', 256, 1, 1, 256, 256, 256, 'float64', 31.0, pytest.approx(1.08)),
+    ]
+    assert list(quick_stats.iter_rows(path)) == expected
+    assert list(schema.iter_rows(path)) == expected
+
+
+@pytest.mark.parametrize('command', ['summary', 'report'])
+def test_summary_of_a_fresh_run_does_not_import_pandas(tmp_path, command):
+    _write_harness_csv(tmp_path / 'raw' / '20240101_120000' / 'openmp_4t.csv')
+    script = (
+        "import runpy, sys\n"
+        f"sys.argv = ['analyze.py', {command!r}, {str(tmp_path / 'raw')!r}, '--latest']"
+        + (f" + ['--output-dir', {str(tmp_path / 'reports')!r}]\n" if command == 'report' else "\n")
+        + f"runpy.run_path({str(ROOT / 'scripts' / 'analyze.py')!r}, run_name='__main__')\n"
+        "heavy = [m for m in ('pandas', 'numpy', 'matplotlib') if m in sys.modules]\n"
+        "assert not heavy, heavy\n"
+    )
+
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert 'openmp_4t' in result.stdout or command == 'report'
@@ -0,0 +1,97 @@
+"""Rectangular (M x K) @ (K x N) products through the engines and the harness"""
+
+import numpy as np
+import pytest
+
+from engines import available_engines, get_engine
+from engines.autotune import TileTuner, candidate_tiles, shape_class
+from harness.runners import BenchmarkError, EngineBenchmark
+from harness.shapes import Shape
+
+SHAPES = ['96x40x72', '7x130x65', '200x3x1']
+
+
+@pytest.mark.parametrize('name', ['python_naive', 'numpy_matmul', 'numpy_einsum', 'numpy_blocked',
+                                  'numpy_parallel', 'sparse_csr_dense'])
+@pytest.mark.parametrize('label', SHAPES)
+def test_rectangular_engines_match_numpy(name, label):
+    m, n, k = Shape.parse(label)
+    engine = get_engine(name)
+    assert engine.rectangular
+    A, B = engine.random_matrix(m, seed=1, cols=k), engine.random_matrix(k, seed=2, cols=n)
+    A, B = engine.operands(A, B)
+    engine.setup(m, n, k)
+    C = engine.multiply(A, B, out=engine.allocate(m, n))
+    np.testing.assert_allclose(engine.to_array(C), engine.to_array(A) @ engine.to_array(B), rtol=1e-12)
+    getattr(engine, 'close', lambda: None)()
+
+
+def test_square_only_engines_are_skipped():
+    benchmark = EngineBenchmark(get_engine('numpy_strassen'), verify_rounds=0)
+    with pytest.raises(BenchmarkError):
+        benchmark.run(Shape.parse('64x32x16'))
+
+
+def test_blocked_setup_sizes_the_workspace_for_the_shape():
+    engine = get_engine('numpy_blocked')
+    engine.setup(4096, 64, 1024)
+    workspace = engine._workspace
+    assert workspace.packed_b.size == 1024 * 64
+
+    engine.multiply(engine.random_matrix(4096, cols=1024), engine.random_matrix(1024, cols=64))
+
+    assert engine._workspace is workspace
+    assert engine.workspace_bytes(4096, 64, 1024) < engine.workspace_bytes(1351)
+
+
+def test_peak_memory_counts_the_real_operand_shape():
+    benchmark = EngineBenchmark(get_engine('numpy_blocked'), verify_rounds=0)
+    shape = Shape.parse('4096x64x1024')
+    # The packed B alone: K x N float64 elements, not the equivalent size squared
+    assert 1024 * 64 * 8 <= benchmark.peak_memory(shape) < shape.equivalent_size ** 2 * 8
+
+
+def test_records_carry_the_shape():
+    benchmark = EngineBenchmark(get_engine('numpy_blocked'), verify_rounds=4)
+    record = benchmark.run(Shape.parse('128x32x64'))[0]
+    assert (int(record['m']), int(record['n']), int(record['k'])) == (128, 32, 64)
+    assert int(record['matrix_size']) == round((128 * 32 * 64) ** (1 / 3))
+    assert record['verification'] == 'PASS'
+
+
+def test_tuner_tunes_the_rectangular_shape(tmp_path):
+    tuner = TileTuner(tmp_path / 'tiles.json', repeats=1, limit=2)
+    tile = tuner.tile_for(256, np.float64, n=32, k=128)
+
+    assert tuner.cached(256, np.float64, n=32, k=128)['tile'] == list(tile)
+    assert tuner.cached(256, np.float64, n=32, k=128)['tuned_at_size'] == '256x32x128'
+    assert tuner.cached(256, np.float64) is None
+    assert shape_class(256, 32, 128) == '256x32x128'
+    assert shape_class(500) == shape_class(512, 512, 512) == '512'
+    assert all(tm <= 32 and tn <= 32 and tk <= 128
+               for tm, tn, tk in candidate_tiles(256, 8, n=32, k=128) if (tm, tn, tk) != (64, 64, 64))
+
+
+def test_store_manifest_keeps_shape_keys_and_stats_fields(tmp_path):
+    pytest.importorskip('pyarrow')
+    from data_processing.formats import STATS_FIELDS, STATS_KEYS
+    from data_processing.quick_stats import ConfigStats, collect_stats
+    from data_processing.result_store import ResultStore
+    from harness.records import ResultWriter
+
+    benchmark = EngineBenchmark(get_engine('numpy_matmul'), verify_rounds=0)
+    with ResultWriter(tmp_path / 'run1' / 'numpy_matmul.csv') as writer:
+        for label in ('64x16x32', '64x16x32', '48'):
+            writer.write(benchmark.run(Shape.parse(label)))
+    store = ResultStore(tmp_path)
+    store.refresh()
+
+    rows = next(iter(store._manifest.values()))['stats']
+    assert all(len(row) == len(STATS_KEYS) + len(STATS_FIELDS) for row in rows)
+    from_manifest = {tuple(row[:len(STATS_KEYS)]): ConfigStats.from_fields(row[len(STATS_KEYS):]) for row in rows}
+    assert from_manifest[('numpy_matmul', 32, 1, 1, 64, 16, 32, 'float64')].n == 2
+    assert from_manifest[('numpy_matmul', 48, 1, 1, 48, 48, 48, 'float64')].n == 1
+    # collect_stats reads the manifest now that the file is ingested
+    for config, stats in collect_stats(tmp_path).items():
+        assert stats.n == from_manifest[config].n
+        assert stats.time_sum == pytest.approx(from_manifest[config].time_sum)
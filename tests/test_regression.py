@@ -0,0 +1,109 @@
+"""Run history and Welch-test regression detection"""
+
+import numpy as np
+import pytest
+
+from data_processing.history import RunHistory
+from data_processing.quick_stats import ConfigStats
+from data_processing.regression import (IMPROVEMENT, INSUFFICIENT, NEW, REGRESSION, UNCHANGED,
+                                        detect_regressions, summarize, t_sf, welch_slower)
+
+HEADER = 'implementation,matrix_size,threads,processes,execution_time_ms,gflops,dtype\n'
+
+
+def _write_run(results_dir, run, times_by_implementation, size=512):
+    run_dir = results_dir / run
+    run_dir.mkdir(parents=True)
+    with open(run_dir / 'results.csv', 'w') as f:
+        f.write(HEADER)
+        for implementation, times in times_by_implementation.items():
+            for time_ms in times:
+                f.write(f'{implementation},{size},1,1,{time_ms},{2.0 * size ** 3 / (time_ms * 1e6)},float64\n')
+
+
+def _times(mean, n=10, seed=0):
+    return np.random.default_rng(seed).normal(mean, 0.01 * mean, n).round(4)
+
+
+def _verdicts(tmp_path, **kwargs):
+    history = RunHistory(tmp_path)
+    history.refresh()
+    return {v.implementation: v for v in detect_regressions(history, **kwargs)}
+
+
+def test_t_sf_matches_scipy():
+    stats = pytest.importorskip('scipy.stats')
+    for t, df in ((0.5, 3.0), (2.0, 7.5), (-1.5, 20.0), (4.0, 1.0)):
+        assert t_sf(t, df) == pytest.approx(stats.t.sf(t, df), rel=1e-8)
+
+
+def test_welch_without_spread():
+    slow, fast = ConfigStats(), ConfigStats()
+    for _ in range(3):
+        slow.add(2.0, 1.0)
+        fast.add(1.0, 2.0)
+    assert welch_slower(slow, fast) == 0.0
+    assert welch_slower(fast, slow) == 1.0
+
+
+def test_detects_only_the_slowed_configuration(tmp_path):
+    for i in range(3):
+        _write_run(tmp_path, f'2024010{i + 1}_120000',
+                   {'steady': _times(10.0, seed=i), 'slowed': _times(20.0, seed=10 + i),
+                    'sped_up': _times(30.0, seed=20 + i)})
+    _write_run(tmp_path, '20240104_120000',
+               {'steady': _times(10.0, seed=3), 'slowed': _times(24.0, seed=13),
+                'sped_up': _times(24.0, seed=23), 'added': _times(5.0)})
+
+    verdicts = _verdicts(tmp_path, window=5)
+
+    assert verdicts['steady'].status == UNCHANGED
+    assert verdicts['slowed'].status == REGRESSION
+    assert verdicts['slowed'].change == pytest.approx(0.2, abs=0.01)
+    assert verdicts['slowed'].p_value < 0.01
+    assert len(verdicts['slowed'].baseline_runs) == 3
+    assert verdicts['sped_up'].status == IMPROVEMENT
+    assert verdicts['added'].status == NEW
+    summary = summarize(list(verdicts.values()), '20240104_120000')
+    assert summary['regressed'] and summary['counts'][REGRESSION] == 1
+
+
+def test_changes_below_min_change_are_not_reported(tmp_path):
+    _write_run(tmp_path, '20240101_120000', {'engine': _times(10.0, n=50, seed=0)})
+    _write_run(tmp_path, '20240102_120000', {'engine': _times(10.3, n=50, seed=1)})
+
+    assert _verdicts(tmp_path, min_change=0.05)['engine'].status == UNCHANGED
+    assert _verdicts(tmp_path, min_change=0.01)['engine'].status == REGRESSION
+
+
+def test_window_and_earlier_latest(tmp_path):
+    for i, mean in enumerate((20.0, 10.0, 10.0, 10.0)):
+        _write_run(tmp_path, f'2024010{i + 1}_120000', {'engine': _times(mean, seed=i)})
+
+    # Only the last two earlier runs form the baseline, so the slow first run is ignored
+    verdict = _verdicts(tmp_path, window=2)['engine']
+    assert verdict.status == UNCHANGED
+    assert verdict.baseline_runs == ['20240102_120000', '20240103_120000']
+    assert _verdicts(tmp_path, latest='20240102_120000')['engine'].status == IMPROVEMENT
+
+
+def test_single_measurement_is_insufficient(tmp_path):
+    _write_run(tmp_path, '20240101_120000', {'engine': _times(10.0)})
+    _write_run(tmp_path, '20240102_120000', {'engine': [20.0]})
+
+    assert _verdicts(tmp_path)['engine'].status == INSUFFICIENT
+
+
+def test_history_follows_changed_and_deleted_files(tmp_path):
+    _write_run(tmp_path, '20240101_120000', {'engine': _times(10.0)})
+    _write_run(tmp_path, '20240102_120000', {'engine': _times(10.0, seed=1)})
+    history = RunHistory(tmp_path)
+    assert history.refresh() == 2
+    assert RunHistory(tmp_path).refresh() == 0
+
+    (tmp_path / '20240102_120000' / 'results.csv').unlink()
+    history = RunHistory(tmp_path)
+    history.refresh()
+    assert history.runs() == ['20240101_120000']
+    with pytest.raises(ValueError):
+        detect_regressions(history, latest='20240102_120000')
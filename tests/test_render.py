@@ -0,0 +1,52 @@
+"""The content-addressed plot cache: reuse of unchanged plots and eviction of old ones"""
+
+import os
+
+import pandas as pd
+
+from visualization.render import PlotJob, prune_cache, render_plots
+
+
+def write_table(df, output_dir, label='table'):
+    df.to_csv(output_dir / f'{label}.csv', index=False)
+    print(f"Saved: {output_dir / f'{label}.csv'}")
+
+
+DATA = pd.DataFrame({'implementation': ['a', 'b'], 'matrix_size': [64, 64], 'gflops': [1.5, 3.0]})
+
+
+def _job(label):
+    return PlotJob(write_table, DATA, {'label': label})
+
+
+def test_unchanged_jobs_come_from_the_cache(tmp_path, capsys):
+    output_dir, cache_dir = tmp_path / 'plots', tmp_path / 'cache'
+    produced = render_plots([_job('x'), _job('y')], output_dir, cache_dir, max_workers=1)
+    assert produced['write_table'] == [output_dir / 'y.csv']
+    assert sorted(p.name for p in output_dir.iterdir()) == ['x.csv', 'y.csv']
+    assert f"Saved: {output_dir / 'x.csv'}" in capsys.readouterr().out
+
+    render_plots([_job('x')], output_dir, cache_dir, max_workers=1)
+    assert 'unchanged, using cached plot' in capsys.readouterr().out
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    output_dir, cache_dir = tmp_path / 'plots', tmp_path / 'cache'
+    keys = {}
+    for label in 'abcde':
+        render_plots([_job(label)], output_dir, cache_dir, max_workers=1)
+        keys[label] = _job(label).cache_key()
+        # Older labels were used longer ago
+        for older, key in enumerate(keys.values()):
+            os.utime(cache_dir / key, ns=(0, (older + 1) * 10 ** 9))
+
+    render_plots([_job('a')], output_dir, cache_dir, max_workers=1, max_cache_entries=3)
+    assert {d.name for d in cache_dir.iterdir()} == {keys['a'], keys['d'], keys['e']}
+
+
+def test_prune_keeps_current_and_in_progress_entries(tmp_path):
+    for name in ('old', 'current', 'key.tmp-123'):
+        (tmp_path / name).mkdir()
+    assert prune_cache(tmp_path, ['current'], max_entries=0) == 1
+    assert sorted(d.name for d in tmp_path.iterdir()) == ['current', 'key.tmp-123']
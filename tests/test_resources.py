@@ -0,0 +1,76 @@
+"""Resource usage and perf counters of the benchmarked binaries"""
+
+import resource
+import sys
+import textwrap
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.metrics_calculator import resource_usage
+from harness.runners import BinaryBenchmark, parse_perf_stat
+
+ROW = '2024-03-01 10:00:00,baseline,{size},1.5,1.0,1.5,0.0,0.0,N/A,node01,PASS'
+
+
+@pytest.fixture
+def hungry_binary(tmp_path):
+    """Touches 256 MiB more than the harness holds before printing its row"""
+    script = tmp_path / 'hungry_binary.py'
+    script.write_text(textwrap.dedent(f'''
+        import sys
+        block = bytearray(int(sys.argv[1]) * 1024)
+        block[::4096] = b'x' * len(block[::4096])
+        print({ROW!r}.format(size=sys.argv[-1]))
+    '''))
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + 256 * 1024
+    return [sys.executable, str(script), str(peak_kb)], peak_kb
+
+
+def test_binary_records_carry_resource_usage(hungry_binary):
+    command, peak_kb = hungry_binary
+    [record] = BinaryBenchmark('baseline', command).run(32)
+    assert record['matrix_size'] == 32
+    assert record['peak_rss_kb'] >= peak_kb > record['launcher_rss_kb']
+    assert record['minor_faults'] > 0
+    assert record['user_time_ms'] + record['system_time_ms'] > 0
+    assert 'perf_cycles' not in record
+
+
+def test_parse_perf_stat():
+    text = textwrap.dedent('''
+        # started on Sat Mar  2 10:00:00 2024
+
+        4000000,,cycles,1000,100.00,,
+        6000000,,instructions,1000,100.00,1.50,insn per cycle
+        <not supported>,,LLC-load-misses,0,100.00,,
+    ''')
+    assert parse_perf_stat(text) == {'perf_cycles': 4000000, 'perf_instructions': 6000000, 'perf_ipc': 1.5}
+    assert parse_perf_stat('') == {}
+
+
+def test_resource_usage_per_configuration():
+    df = pd.DataFrame({
+        'implementation': ['baseline', 'baseline', 'openmp', 'numpy_matmul'],
+        'matrix_size': [512, 512, 512, 512],
+        'threads': [1, 1, 4, 1],
+        'processes': [1, 1, 1, 1],
+        'peak_rss_kb': [4096.0, 6144.0, 100_000.0, np.nan],
+        'launcher_rss_kb': [100_000.0, 100_000.0, 100_000.0, np.nan],
+        'minor_faults': [10.0, 30.0, 5.0, np.nan],
+        'perf_ipc': [np.nan] * 4,
+    })
+    result = resource_usage(df).set_index('implementation')
+    assert list(result.index) == ['baseline', 'openmp']
+    assert result.loc['baseline', 'runs'] == 2
+    assert result.loc['baseline', 'peak_rss_mib'] == 6.0
+    assert result.loc['baseline', 'minor_faults'] == 20.0
+    # A peak at the launcher's own only bounds the binary's from above
+    assert result['rss_upper_bound'].tolist() == [True, True]
+    assert 'perf_ipc' not in result.columns
+
+
+def test_resource_usage_without_binary_runs():
+    df = pd.DataFrame({'implementation': ['numpy_matmul'], 'matrix_size': [64], 'execution_time_ms': [1.0]})
+    assert resource_usage(df).empty
@@ -0,0 +1,122 @@
+"""The incremental result store: new, changed and deleted CSVs and the filters pushed down to Parquet"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from data_processing.csv_loader import load_benchmark_data
+from data_processing.formats import COMBINED_NAME, ROOT_RUN, SCHEMA_VERSION
+from data_processing.result_store import ResultStore
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+
+
+@pytest.fixture
+def results_dir(tmp_path):
+    """A root-level legacy file and two runs, one of binary rows and one headered"""
+    (tmp_path / 'run1').mkdir()
+    (tmp_path / 'run2').mkdir()
+    shutil.copy(FIXTURES / 'c_optimized_result.csv', tmp_path)
+    shutil.copy(FIXTURES / 'binary.csv', tmp_path / 'run1')
+    shutil.copy(FIXTURES / 'analysis.csv', tmp_path / 'run2')
+    return tmp_path
+
+
+def _manifest(store):
+    with open(store.manifest_path) as f:
+        return json.load(f)
+
+
+def test_first_refresh_ingests_everything(results_dir):
+    store = ResultStore(results_dir)
+    assert store.refresh() == 3
+    assert store.runs() == [ROOT_RUN, 'run1', 'run2']
+    assert len(store.load()) == 7
+
+    manifest = _manifest(store)
+    assert manifest['schema_version'] == SCHEMA_VERSION
+    for key, entry in manifest['sources'].items():
+        stat = (results_dir / key).stat()
+        assert (entry['mtime_ns'], entry['size']) == (stat.st_mtime_ns, stat.st_size)
+        assert all((store.store_dir / part).exists() for part in entry['files'])
+
+
+def test_unchanged_files_are_not_parsed_again(results_dir):
+    ResultStore(results_dir).refresh()
+    store = ResultStore(results_dir)
+    assert store.refresh() == 0
+    assert len(store.load()) == 7
+
+
+def test_new_and_combined_files(results_dir):
+    store = ResultStore(results_dir)
+    store.refresh()
+    (results_dir / 'run3').mkdir()
+    shutil.copy(FIXTURES / 'analysis.csv', results_dir / 'run3')
+    shutil.copy(FIXTURES / 'binary.csv', results_dir / 'run1' / COMBINED_NAME)
+    assert store.refresh() == 1
+    assert store.runs() == [ROOT_RUN, 'run1', 'run2', 'run3']
+    assert len(store.load()) == 9
+
+
+def test_changed_files_are_reingested(results_dir):
+    store = ResultStore(results_dir)
+    store.refresh()
+    path = results_dir / 'run2' / 'analysis.csv'
+    with open(path, 'a') as f:
+        f.write('2024-03-02 09:00:02,naive,512,250.0,1.07,4,1,node02\n')
+    assert store.refresh() == 1
+    assert sorted(store.load(runs=['run2'])['matrix_size']) == [256, 256, 512]
+    assert _manifest(store)['sources']['run2/analysis.csv']['size'] == path.stat().st_size
+
+    # Same size, newer mtime: still a change
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert store.refresh() == 1
+
+
+def test_deleted_files_are_forgotten(results_dir):
+    store = ResultStore(results_dir)
+    store.refresh()
+    parts = [store.store_dir / part for part in store._manifest['run1/binary.csv']['files']]
+    (results_dir / 'run1' / 'binary.csv').unlink()
+    assert store.refresh() == 0
+    assert 'run1/binary.csv' not in _manifest(store)['sources']
+    assert not any(part.exists() for part in parts)
+    assert store.runs() == [ROOT_RUN, 'run2']
+    assert len(store.load()) == 4
+
+
+def test_older_schema_version_is_rebuilt(results_dir):
+    store = ResultStore(results_dir)
+    store.refresh()
+    manifest = _manifest(store)
+    manifest['schema_version'] = SCHEMA_VERSION - 1
+    store.manifest_path.write_text(json.dumps(manifest))
+    assert ResultStore(results_dir).refresh() == 3
+
+
+def test_partition_and_size_filters(results_dir):
+    store = ResultStore(results_dir)
+    store.refresh()
+
+    mpi = store.load(implementation='mpi')
+    assert mpi['implementation'].astype(str).tolist() == ['mpi']
+    assert mpi['run'].astype(str).tolist() == ['run1']
+
+    run1 = store.load(runs=['run1'])
+    assert sorted(run1['implementation'].astype(str)) == ['cuda', 'mpi', 'openmp']
+
+    sizes = store.load(min_size=200, max_size=512)['matrix_size']
+    assert sorted(sizes) == [200, 256, 256, 512, 512]
+    assert store.load(implementation='naive', min_size=1000).empty
+    assert store.load(runs=['run9']).empty
+
+
+def test_csv_loader_reads_through_the_store(results_dir):
+    df = load_benchmark_data(str(results_dir), implementation='openmp', runs=['run1'])
+    assert df['threads'].tolist() == [8]
+    assert (results_dir / '.store').is_dir()
@@ -0,0 +1,91 @@
+"""Machine peaks per element type and the roofline annotation"""
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.roofline import annotate_roofline, gemm_peak
+from harness.peaks import PeaksCache, gemm, stream
+
+PEAKS = {
+    'node1': {
+        'host': 'node1', 'cores': 4,
+        'peak_gflops': 200.0, 'peak_gflops_core': 50.0,
+        'gemm_gflops': {'float64': 200.0, 'float32': 400.0, 'float16': 2.0, 'int8': 8.0},
+        'gemm_gflops_core': {'float64': 50.0, 'float32': 100.0, 'float16': 0.5, 'int8': 2.0},
+        'bandwidth_gbs': 40.0, 'bandwidth_gbs_core': 10.0,
+    },
+    'old': {'host': 'old', 'cores': 1, 'peak_gflops': 50.0, 'peak_gflops_core': 50.0,
+            'bandwidth_gbs': 10.0, 'bandwidth_gbs_core': 10.0},
+}
+
+
+def _rows(**columns):
+    n = len(columns['implementation'])
+    frame = {'matrix_size': [1024] * n, 'm': [1024] * n, 'n': [1024] * n, 'k': [1024] * n,
+             'threads': [1] * n, 'processes': [1] * n, 'gflops': [80.0] * n}
+    frame.update(columns)
+    return pd.DataFrame(frame)
+
+
+def test_compute_roof_follows_the_row_dtype():
+    df = _rows(implementation=['openmp_2t', 'numpy_matmul', 'numpy_matmul_f16', 'numpy_matmul_i8'],
+               dtype=['float32', 'float64', 'float16', 'int8'], threads=[2, 1, 1, 1], node=['node1'] * 4)
+
+    result = annotate_roofline(df, PEAKS)
+
+    assert result['peak_gflops'].tolist() == [200.0, 50.0, 0.5, 2.0]
+    assert result['pct_peak'].tolist() == [40.0, 160.0, 16000.0, 4000.0]
+    assert result['bound'].astype(str).tolist() == ['compute'] * 4
+
+
+def test_workers_are_capped_at_the_all_core_peak():
+    df = _rows(implementation=['openmp_8t'], dtype=['float32'], threads=[8], node=['node1'])
+    assert annotate_roofline(df, PEAKS)['peak_gflops'].tolist() == [400.0]
+
+
+def test_memory_bound_rows():
+    df = _rows(implementation=['numpy_matmul'], dtype=['float64'], m=[4096], n=[1], k=[4096], node=['node1'])
+    result = annotate_roofline(df, PEAKS)
+    intensity = 2.0 * 4096 * 4096 / ((4096 * 4096 + 4096 + 4096) * 8)
+    assert result['arithmetic_intensity'].iat[0] == pytest.approx(intensity)
+    assert result['roofline_gflops'].iat[0] == pytest.approx(intensity * 10.0)
+    assert result['bound'].iat[0] == 'memory'
+
+
+def test_peaks_from_before_per_dtype_gemms_only_roof_float64():
+    assert gemm_peak(PEAKS['old'], 'float64') == 50.0
+    assert math.isnan(gemm_peak(PEAKS['old'], 'float32', per_core=True))
+
+    df = _rows(implementation=['baseline', 'numpy_matmul'], dtype=['float32', 'float64'], node=['old', 'old'])
+    result = annotate_roofline(df, PEAKS)
+    assert math.isnan(result['peak_gflops'].iat[0])
+    assert pd.isna(result['bound'].iat[0])
+    assert result['peak_gflops'].iat[1] == 50.0
+
+
+def test_rows_of_unknown_hosts_use_the_default_host():
+    df = _rows(implementation=['baseline'], dtype=['float32'], node=['elsewhere'])
+    assert annotate_roofline(df, PEAKS, default_host='node1')['peak_gflops'].tolist() == [100.0]
+    assert math.isnan(annotate_roofline(df, PEAKS, default_host='nowhere')['peak_gflops'].iat[0])
+
+
+@pytest.mark.parametrize('dtype', ['float64', 'float32', 'float16', 'int8'])
+def test_gemm_rate_of_every_element_type(dtype):
+    assert gemm(64, repeats=1, dtype=dtype) > 0
+
+
+def test_stream_kernels():
+    rates = stream(2 ** 16, repeats=2)
+    assert set(rates) == {'copy', 'scale', 'add', 'triad'}
+    assert all(rate > 0 for rate in rates.values())
+
+
+def test_cache_ignores_entries_without_per_dtype_peaks(tmp_path):
+    cache = PeaksCache(tmp_path / 'peaks.json')
+    cache.store(PEAKS['old'])
+    cache.store(PEAKS['node1'])
+    assert cache.get('old') is None
+    assert cache.get('node1') == PEAKS['node1']
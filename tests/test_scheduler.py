@@ -0,0 +1,122 @@
+"""CPU topology detection and the core-aware scheduler: placement, pinning and failure counts"""
+
+import os
+
+from engines import get_engine
+from harness import topology
+from harness.runners import BinaryBenchmark, EngineBenchmark
+from harness.scheduler import CoreScheduler, Job, cores_needed
+from harness.topology import Core, Topology, format_cpulist, parse_cpulist
+
+
+def _topology(*node_sizes, sockets=None):
+    """Cores numbered consecutively over nodes of the given sizes, one socket per node by default"""
+    nodes, cpu = {}, 0
+    for node, size in enumerate(node_sizes):
+        socket = sockets[node] if sockets else node
+        nodes[node] = [Core(cpu + i, (cpu + i,), node, socket) for i in range(size)]
+        cpu += size
+    return Topology(nodes)
+
+
+def _cpus(cores):
+    return [core.cpu for core in cores]
+
+
+def report_affinity(payload, log):
+    """Runner of the scheduled jobs: logs its CPUs and environment, fails as asked"""
+    log(f"cpus={format_cpulist(os.sched_getaffinity(0))} flag={os.environ.get('SCHEDULER_TEST_FLAG')}")
+    if payload == 'raise':
+        raise RuntimeError('boom')
+    if payload == 'exit':
+        os._exit(3)
+    return payload
+
+
+def test_cpulists_round_trip():
+    assert parse_cpulist('0-3,8,10-11\n') == [0, 1, 2, 3, 8, 10, 11]
+    assert parse_cpulist('') == []
+    assert format_cpulist([11, 0, 2, 1, 3, 8, 10, 3]) == '0-3,8,10-11'
+    assert format_cpulist([]) == ''
+
+
+def test_detect_from_sysfs(tmp_path, monkeypatch):
+    node_sysfs, cpu_sysfs = tmp_path / 'node', tmp_path / 'cpu'
+    for node, cpulist in [(0, '0-1,4-5'), (1, '2-3,6-7')]:
+        (node_sysfs / f'node{node}').mkdir(parents=True)
+        (node_sysfs / f'node{node}' / 'cpulist').write_text(cpulist + '\n')
+    for cpu in range(8):
+        path = cpu_sysfs / f'cpu{cpu}' / 'topology'
+        path.mkdir(parents=True)
+        path.joinpath('thread_siblings_list').write_text(f'{cpu % 4},{cpu % 4 + 4}\n')
+        path.joinpath('physical_package_id').write_text(f'{cpu % 4 // 2}\n')
+    # CPU 7 is outside the affinity mask, so core 3 keeps only CPU 3
+    monkeypatch.setattr(topology, 'allowed_cpus', lambda: list(range(7)))
+
+    detected = Topology.detect(node_sysfs, cpu_sysfs)
+    assert [(core.cpu, core.siblings, core.node, core.socket) for core in detected.cores] == [
+        (0, (0, 4), 0, 0), (1, (1, 5), 0, 0), (2, (2, 6), 1, 1), (3, (3,), 1, 1)]
+    assert detected.describe() == '4 cores on 2 NUMA node(s), 2 socket(s): node 0: 0-1; node 1: 2-3'
+    assert topology.numa_nodes([1, 6], node_sysfs) == [0, 1]
+
+
+def test_detect_without_sysfs(tmp_path, monkeypatch):
+    monkeypatch.setattr(topology, 'allowed_cpus', lambda: [0, 2, 3])
+    detected = Topology.detect(tmp_path / 'node', tmp_path / 'cpu')
+    assert list(detected.nodes) == [0]
+    assert [(core.cpu, core.siblings) for core in detected.cores] == [(0, (0,)), (2, (2,)), (3, (3,))]
+
+
+def test_cores_needed():
+    assert cores_needed(BinaryBenchmark('baseline', ['bin/baseline'])) == 1
+    assert cores_needed(BinaryBenchmark('openmp', ['bin/openmp'], env={'OMP_NUM_THREADS': '6'})) == 6
+    assert cores_needed(BinaryBenchmark('mpi', ['mpirun', '-np', '4', 'bin/mpi'])) == 4
+    assert cores_needed(EngineBenchmark(get_engine('numpy_matmul'))) == 1
+
+    engine = get_engine('numpy_parallel', workers=3)
+    try:
+        assert cores_needed(EngineBenchmark(engine)) == 3
+    finally:
+        engine.close()
+
+
+def test_placement_packs_nodes():
+    scheduler = CoreScheduler(_topology(4, 4))
+    assert scheduler.capacity == 8
+    for width, expected in [(2, [0, 1]), (1, [2]), (3, [4, 5, 6])]:
+        # The node with the fewest free cores that still holds the job
+        cores = scheduler.place(width)
+        assert _cpus(cores) == expected
+        scheduler._busy.update(_cpus(cores))
+    # Fits in one node once it drains: waits rather than spreading over both
+    assert scheduler.place(2) is None
+
+
+def test_placement_of_jobs_wider_than_a_node():
+    scheduler = CoreScheduler(_topology(2, 2, 4, sockets=[0, 0, 1]))
+    scheduler._busy.update([4, 5])
+    # Socket 0 has the most free cores, so its nodes come first
+    assert _cpus(scheduler.place(5)) == [0, 1, 2, 3, 6]
+    assert scheduler.place(7) is None
+
+    # Wider than the machine: only alone, on every core
+    assert scheduler.place(9) is None
+    scheduler._busy.clear()
+    assert _cpus(scheduler.place(9)) == list(range(8))
+
+
+def test_run_pins_jobs_and_counts_failures():
+    cpu = min(os.sched_getaffinity(0))
+    scheduler = CoreScheduler(Topology({0: [Core(cpu, (cpu,), 0, 0)]}))
+    jobs = [Job('ok', 1, 0, env={'SCHEDULER_TEST_FLAG': 'set'}), Job('failed', 1, 2),
+            Job('raised', 1, 'raise'), Job('exited', 1, 'exit'), Job('wide', 2, 0)]
+    lines = []
+    assert scheduler.run(jobs, report_affinity, on_log=lines.append) == 2 + 1 + 1
+    assert 'SCHEDULER_TEST_FLAG' not in os.environ
+    assert not scheduler._busy
+
+    assert lines[0] == f'[wide] started on CPUs {cpu} (needs 2, oversubscribed)'
+    assert f'[ok] cpus={cpu} flag=set' in lines
+    assert f'[failed] cpus={cpu} flag=None' in lines
+    assert '[raised] ✗ RuntimeError: boom' in lines
+    assert '[exited] ✗ job process exited with code 3' in lines
@@ -0,0 +1,105 @@
+"""Normalization of the three on-disk result formats to the canonical schema"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.formats import BINARY, HEADERED, LEGACY, detect_schema
+from data_processing.schema import (CANONICAL_COLUMNS, CANONICAL_DTYPES, concat_normalized, iter_results_file,
+                                    read_results_file)
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+LEGACY_FILE, BINARY_FILE, ANALYSIS_FILE = (FIXTURES / name for name in
+                                           ('c_optimized_result.csv', 'binary.csv', 'analysis.csv'))
+
+
+@pytest.mark.parametrize('path, expected', [(LEGACY_FILE, LEGACY), (BINARY_FILE, BINARY),
+                                            (ANALYSIS_FILE, HEADERED)])
+def test_detect_schema(path, expected):
+    assert detect_schema(path) == expected
+
+
+def test_unrecognized_format(tmp_path):
+    path = tmp_path / 'notes.csv'
+    path.write_text('a,b,c\n1,2,3\n')
+    with pytest.raises(ValueError, match='Unrecognized result format'):
+        detect_schema(path)
+
+
+@pytest.mark.parametrize('path', [LEGACY_FILE, BINARY_FILE, ANALYSIS_FILE])
+def test_canonical_columns_and_dtypes(path):
+    df = read_results_file(path)
+    assert list(df.columns) == CANONICAL_COLUMNS
+    for column, dtype in CANONICAL_DTYPES.items():
+        if dtype == 'category':
+            assert isinstance(df[column].dtype, pd.CategoricalDtype), column
+        else:
+            assert df[column].dtype == dtype, column
+
+
+def test_legacy_file():
+    df = read_results_file(LEGACY_FILE)
+    assert df['implementation'].tolist() == ['c_optimized', 'c_optimized']
+    assert df['matrix_size'].tolist() == [100, 200]
+    assert df['execution_time_ms'].tolist() == pytest.approx([2.0, 16.0])
+    assert df['gflops'].tolist() == pytest.approx([1.0, 1.0])
+    assert (df[['m', 'n', 'k']].to_numpy() == df[['matrix_size']].to_numpy()).all()
+    assert df['threads'].tolist() == [1, 1] and df['processes'].tolist() == [1, 1]
+    assert df['dtype'].astype(str).tolist() == ['float64', 'float64']
+    assert df['bytes_moved'].tolist() == [3 * 100 ** 2 * 8, 3 * 200 ** 2 * 8]
+    assert df['timestamp'].isna().all()
+
+
+def test_binary_file():
+    df = read_results_file(BINARY_FILE)
+    assert df['implementation'].astype(str).tolist() == ['openmp', 'mpi', 'cuda']
+    assert df['execution_time_ms'].tolist() == [12.5, 14.0, 3.2]
+    assert df['gflops'].tolist() == pytest.approx([21.47, 19.17, 671.09])
+    # Parallelism comes from the '8t' / '4p' block_size tags
+    assert df['threads'].tolist() == [8, 1, 1]
+    assert df['processes'].tolist() == [1, 4, 1]
+    assert df['dtype'].astype(str).tolist() == ['float32'] * 3
+    assert df['bytes_moved'].tolist() == [3 * 512 ** 2 * 4, 3 * 512 ** 2 * 4, 3 * 1024 ** 2 * 4]
+    assert df['verification'].astype(str).tolist() == ['PASS', 'PASS', 'FAIL']
+    assert df['timestamp'].iloc[0] == pd.Timestamp('2024-03-01 10:00:00')
+    assert df['h2d_time_ms'].tolist() == pytest.approx([0.0, 0.0, 0.9])
+
+
+def test_headered_analysis_file():
+    df = read_results_file(ANALYSIS_FILE)
+    assert df['implementation'].astype(str).tolist() == ['naive', 'naive']
+    assert df['threads'].tolist() == [1, 2]
+    assert df['node'].astype(str).tolist() == ['node02', 'node02']
+    assert df['dtype'].astype(str).tolist() == ['float64', 'float64']
+    assert df['kernel_time_ms'].isna().all()
+    assert df['block_size'].isna().all()
+
+
+def test_headered_file_with_shape_and_extra_columns(tmp_path):
+    path = tmp_path / 'harness.csv'
+    path.write_text('timestamp,implementation,matrix_size,total_time_ms,total_gflops,block_size,m,n,k,dtype,'
+                    'peak_rss_kb,repetition\n'
+                    '2024-03-03 08:00:00,numpy_matmul_f32,32,0.5,4.2,N/A,64,16,32,float32,2048,0\n')
+    df = read_results_file(path)
+    assert list(df.columns) == CANONICAL_COLUMNS + ['peak_rss_kb', 'repetition']
+    assert df[['m', 'n', 'k']].iloc[0].tolist() == [64, 16, 32]
+    assert df['bytes_moved'].iloc[0] == (64 * 32 + 32 * 16 + 64 * 16) * 4
+    assert df['peak_rss_kb'].dtype == np.float64
+
+
+@pytest.mark.parametrize('path', [LEGACY_FILE, BINARY_FILE, ANALYSIS_FILE])
+def test_chunks_match_the_whole_file(path):
+    chunks = list(iter_results_file(path, chunksize=1))
+    assert len(chunks) == len(read_results_file(path))
+    # Concatenation may store the categories in another string dtype
+    pd.testing.assert_frame_equal(concat_normalized(chunks), read_results_file(path),
+                                  check_dtype=False, check_categorical=False)
+
+
+def test_concat_keeps_categories():
+    df = concat_normalized([read_results_file(path) for path in (LEGACY_FILE, BINARY_FILE, ANALYSIS_FILE)])
+    assert len(df) == 7
+    assert isinstance(df['implementation'].dtype, pd.CategoricalDtype)
+    assert set(df['implementation'].cat.categories) == {'c_optimized', 'openmp', 'mpi', 'cuda', 'naive'}
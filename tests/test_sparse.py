@@ -0,0 +1,144 @@
+"""CSR engines, the density dispatcher and the density sweep's thresholds"""
+
+import numpy as np
+import pytest
+
+from engines import get_engine
+from engines.sparse import (CSR_CSR, CSR_DENSE, DEFAULT_THRESHOLDS, DENSE, STRUCTURES, CSRMatrix,
+                            SparseThresholds, csr_csr, csr_dense, estimate_structure, random_sparse)
+from harness.density import DensitySweep, configuration_name
+from harness.driver import RepetitionPolicy
+
+SPARSE_ENGINES = ['sparse_dense', 'sparse_csr_dense', 'sparse_csr_csr', 'sparse_auto']
+
+
+def _product(name, m, k, n, dtype='float64', tmp_path=None, **options):
+    if name == 'sparse_auto':
+        options['thresholds'] = SparseThresholds(tmp_path / 'sparse.json')
+    engine = get_engine(name, **options)
+    engine.use_element_type(dtype)
+    A, B = engine.random_matrix(m, seed=1, cols=k), engine.random_matrix(k, seed=2, cols=n)
+    expected = engine.to_array(A).astype(np.float64) @ engine.to_array(B).astype(np.float64)
+    C = engine.multiply(*engine.operands(A, B))
+    return engine, engine.to_array(C), expected
+
+
+@pytest.mark.parametrize('name', SPARSE_ENGINES)
+@pytest.mark.parametrize('structure', STRUCTURES)
+@pytest.mark.parametrize('density', [0.01, 0.1, 0.6])
+def test_products_match_dense(tmp_path, name, structure, density):
+    _, C, expected = _product(name, 96, 80, 70, tmp_path=tmp_path, density=density, structure=structure)
+    assert C.shape == (96, 70)
+    np.testing.assert_allclose(C, expected, rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize('name', SPARSE_ENGINES)
+def test_float32_products(tmp_path, name):
+    _, C, expected = _product(name, 64, 64, 64, 'float32', tmp_path=tmp_path, density=0.2)
+    np.testing.assert_allclose(C, expected, rtol=1e-5)
+
+
+def test_csr_round_trip_and_empty_rows():
+    dense = np.zeros((5, 4))
+    dense[1, 3], dense[3, 0], dense[3, 2] = 1.5, -2.0, 4.0
+    A = CSRMatrix.from_dense(dense)
+    assert A.nnz == 3
+    assert A.indptr.tolist() == [0, 0, 1, 1, 3, 3]
+    assert A.indices.dtype == np.int32
+    np.testing.assert_array_equal(A.to_dense(), dense)
+
+    B = np.arange(12.0).reshape(4, 3)
+    np.testing.assert_array_equal(csr_dense(A, B, np.empty((5, 3))), dense @ B)
+    np.testing.assert_array_equal(csr_csr(A, CSRMatrix.from_dense(B)).to_dense(), dense @ B)
+
+
+def test_all_zero_operands():
+    A = CSRMatrix.empty((6, 5))
+    B = np.ones((5, 4))
+    np.testing.assert_array_equal(csr_dense(A, B, np.full((6, 4), np.nan)), np.zeros((6, 4)))
+    C = csr_csr(A, CSRMatrix.from_dense(B))
+    assert C.nnz == 0 and C.shape == (6, 4)
+
+
+@pytest.mark.parametrize('structure', STRUCTURES)
+def test_structure_estimate(structure):
+    rng = np.random.default_rng(0)
+    A = CSRMatrix.from_dense(random_sparse(rng, (512, 512), 0.05, structure, np.float64))
+    assert estimate_structure(A) == structure
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        get_engine('sparse_csr_dense', density=0.0)
+    with pytest.raises(ValueError):
+        get_engine('sparse_csr_dense', structure='diagonal')
+
+
+def test_thresholds_cache(tmp_path):
+    path = tmp_path / 'sparse.json'
+    thresholds = SparseThresholds(path)
+    assert thresholds.lookup(512, np.float64, 'uniform') == DEFAULT_THRESHOLDS
+
+    thresholds.store(512, np.float64, 'uniform', {'dense_above': 0.2, 'csr_csr_below': 0.01})
+    reloaded = SparseThresholds(path)
+    assert reloaded.lookup(600, np.float64, 'uniform') == {'dense_above': 0.2, 'csr_csr_below': 0.01}
+    assert reloaded.lookup(512, np.float32, 'uniform') == DEFAULT_THRESHOLDS
+    assert reloaded.lookup(512, np.float64, 'banded') == DEFAULT_THRESHOLDS
+
+
+@pytest.mark.parametrize('density, path', [(0.005, CSR_CSR), (0.05, CSR_DENSE), (0.3, DENSE)])
+def test_auto_dispatch(tmp_path, density, path):
+    thresholds = SparseThresholds(tmp_path / 'sparse.json')
+    thresholds.store(128, np.float64, 'uniform', {'dense_above': 0.1, 'csr_csr_below': 0.01})
+    engine = get_engine('sparse_auto', density=density, thresholds=thresholds)
+    engine.use_element_type('float64')
+    A, B = engine.random_matrix(128, seed=1), engine.random_matrix(128, seed=2)
+
+    C = engine.multiply(*engine.operands(A, B))
+
+    assert engine.last_stats['sparse_path'] == path
+    np.testing.assert_allclose(C, A.to_dense() @ B.to_dense(), rtol=1e-12, atol=1e-12)
+
+
+def test_sweep_thresholds_from_medians():
+    sweep = DensitySweep(densities=[0.01, 0.1, 1.0], structures=['uniform'], sizes=[256])
+    # CSR x CSR wins below ~0.03, dense above ~0.3
+    sweep.medians = {
+        (DENSE, 'uniform', 256): {0.01: 10.0, 0.1: 10.0, 1.0: 10.0},
+        (CSR_DENSE, 'uniform', 256): {0.01: 2.0, 0.1: 5.0, 1.0: 40.0},
+        (CSR_CSR, 'uniform', 256): {0.01: 1.0, 0.1: 8.0, 1.0: 400.0},
+    }
+
+    limits = sweep.thresholds('uniform', 256)
+
+    assert 0.1 < limits['dense_above'] < 1.0
+    assert 0.01 < limits['csr_csr_below'] < 0.1
+    found = {(c.slower, c.faster) for c in sweep.crossovers()}
+    assert found == {(CSR_CSR, CSR_DENSE), (CSR_DENSE, DENSE), (CSR_CSR, DENSE)}
+    assert sweep.thresholds('banded', 256) is None
+
+
+def test_sweep_thresholds_without_crossover():
+    sweep = DensitySweep(densities=[0.01, 0.1], structures=['uniform'], sizes=[64])
+    sweep.medians = {
+        (DENSE, 'uniform', 64): {0.01: 1.0, 0.1: 1.0},
+        (CSR_DENSE, 'uniform', 64): {0.01: 2.0, 0.1: 3.0},
+        (CSR_CSR, 'uniform', 64): {0.01: 4.0, 0.1: 9.0},
+    }
+    assert sweep.thresholds('uniform', 64) == {'dense_above': 0.01, 'csr_csr_below': 0.01}
+
+
+def test_sweep_measures_and_verifies_every_path():
+    policy = RepetitionPolicy(warmup=0, min_repetitions=1, max_repetitions=1)
+    seen = []
+    sweep = DensitySweep(densities=[0.01, 0.2], structures=['banded'], sizes=[64], policy=policy,
+                         verify_rounds=4, on_records=lambda name, records: seen.extend(records))
+
+    sweep.run()
+
+    assert not sweep.errors
+    assert set(sweep.medians) == {(path, 'banded', 64) for path in (DENSE, CSR_DENSE, CSR_CSR)}
+    assert len(seen) == 6
+    assert {record['verification'] for record in seen} == {'PASS'}
+    assert sweep.thresholds('banded', 64) is not None
+    assert configuration_name('sparse_csr_csr', 'float32', 'banded', 0.01) == 'sparse_csr_csr_f32_banded_d0.01'
@@ -0,0 +1,131 @@
+"""Per-configuration outlier filtering and percentile/bootstrap statistics"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.csv_loader import aggregate_runs, filter_outliers, outlier_mask
+from data_processing.metrics_calculator import (bootstrap_group_means, bootstrap_group_quantiles,
+                                                group_quantiles, sort_groups)
+
+
+def _measurements(times_by_config):
+    rows = []
+    for (implementation, size), times in times_by_config.items():
+        for time_ms in times:
+            rows.append({'implementation': implementation, 'matrix_size': size, 'threads': 1,
+                         'processes': 1, 'execution_time_ms': time_ms,
+                         'gflops': 2.0 * size ** 3 / (time_ms * 1e6)})
+    return pd.DataFrame(rows)
+
+
+def test_group_quantiles_match_numpy():
+    rng = np.random.default_rng(1)
+    counts = [1, 2, 7, 50]
+    codes = np.repeat(np.arange(len(counts)), counts)
+    values = rng.lognormal(size=len(codes))
+    quantiles = [0.05, 0.25, 0.5, 0.75, 0.99]
+
+    table = group_quantiles(*sort_groups(values, codes, len(counts)), quantiles)
+
+    for group in range(len(counts)):
+        expected = np.quantile(values[codes == group], quantiles)
+        np.testing.assert_allclose(table[:, group], expected)
+
+
+def test_empty_group_quantiles_are_nan():
+    table = group_quantiles(*sort_groups(np.array([1.0, 2.0]), np.array([0, 0]), 2), [0.5])
+    assert table[0, 0] == 1.5
+    assert np.isnan(table[0, 1])
+
+
+@pytest.mark.parametrize('method', ['mad', 'iqr'])
+def test_outliers_are_judged_within_their_configuration(method):
+    fast = [1.0, 1.01, 0.99, 1.02, 0.98, 1.0, 1.01, 5.0]
+    slow = [1000.0, 1010.0, 990.0, 1020.0, 980.0, 1000.0, 1005.0, 995.0]
+    df = _measurements({('fast', 64): fast, ('slow', 4096): slow})
+
+    mask = outlier_mask(df, method=method)
+
+    # 5 ms is far outside its own group even though it is tiny next to the slow group
+    assert mask.tolist() == [False] * 7 + [True] + [False] * 8
+    assert len(filter_outliers(df, method=method)) == 15
+
+
+def test_mad_of_zero_falls_back_to_mean_deviation():
+    df = _measurements({('timer', 64): [2.0] * 9 + [3.0], ('flat', 64): [4.0] * 10})
+
+    mask = outlier_mask(df, method='mad')
+
+    assert mask.tolist() == [False] * 9 + [True] + [False] * 10
+
+
+def test_outlier_method_is_validated():
+    with pytest.raises(ValueError):
+        outlier_mask(_measurements({('a', 64): [1.0, 2.0]}), method='zscore')
+
+
+def test_aggregate_runs_percentiles():
+    rng = np.random.default_rng(2)
+    times = {('a', 64): rng.lognormal(size=20), ('b', 128): rng.lognormal(size=33)}
+    df = _measurements(times)
+
+    aggregated = aggregate_runs(df, percentiles=(5, 25, 75, 95, 99))
+
+    assert len(aggregated) == 2
+    for _, row in aggregated.iterrows():
+        expected = times[(row['implementation'], row['matrix_size'])]
+        assert row['execution_time_ms_count'] == len(expected)
+        assert row['execution_time_ms_median'] == pytest.approx(np.median(expected))
+        for p in (5, 25, 75, 95, 99):
+            assert row[f'execution_time_ms_p{p}'] == pytest.approx(np.percentile(expected, p))
+    assert 'execution_time_ms_median_ci_low' not in aggregated.columns
+
+
+def test_aggregate_runs_median_confidence_interval():
+    pytest.importorskip('scipy')
+    rng = np.random.default_rng(3)
+    df = _measurements({('a', 64): rng.normal(10.0, 1.0, 40), ('b', 64): rng.normal(50.0, 5.0, 15)})
+
+    first = aggregate_runs(df, n_bootstrap=2000, seed=7)
+    again = aggregate_runs(df, n_bootstrap=2000, seed=7)
+
+    pd.testing.assert_frame_equal(first, again)
+    low, high = first['execution_time_ms_median_ci_low'], first['execution_time_ms_median_ci_high']
+    assert (low <= first['execution_time_ms_median']).all()
+    assert (first['execution_time_ms_median'] <= high).all()
+    assert (low < high).all()
+
+
+def test_bootstrap_quantiles_match_direct_resampling():
+    pytest.importorskip('scipy')
+    values = np.array([1.0, 2.0, 3.0, 4.0, 5.0, 10.0, 20.0, 30.0])
+    codes = np.array([0, 0, 0, 0, 0, 1, 1, 1])
+    n_resamples = 20000
+
+    medians = bootstrap_group_quantiles(values, codes, 2, 0.5, n_resamples, seed=0)
+
+    assert medians.shape == (n_resamples, 2)
+    rng = np.random.default_rng(1)
+    for group, size in ((0, 5), (1, 3)):
+        group_values = np.sort(values[codes == group])
+        assert np.isin(medians[:, group], group_values).all()
+        # Reference: draw every resample explicitly and take the same order statistic
+        draws = np.sort(rng.choice(group_values, (n_resamples, size)), axis=1)[:, round(0.5 * (size - 1))]
+        for value in group_values:
+            assert np.mean(medians[:, group] == value) == pytest.approx(np.mean(draws == value), abs=0.015)
+
+
+def test_bootstrap_group_means():
+    values = np.array([1.0, 3.0, 10.0, 20.0, 30.0, 7.0])
+    codes = np.array([0, 0, 1, 1, 1, 3])
+
+    means = bootstrap_group_means(values, codes, 4, n_resamples=5000, seed=0)
+
+    assert means.shape == (5000, 4)
+    assert np.isnan(means[:, 2]).all()
+    assert (means[:, 3] == 7.0).all()
+    assert ((means[:, 0] >= 1.0) & (means[:, 0] <= 3.0)).all()
+    assert means[:, 0].mean() == pytest.approx(2.0, abs=0.05)
+    assert means[:, 1].mean() == pytest.approx(20.0, abs=0.3)
+    np.testing.assert_array_equal(means, bootstrap_group_means(values, codes, 4, n_resamples=5000, seed=0))
@@ -0,0 +1,54 @@
+"""Strassen and Winograd: cutoffs, odd-size peeling and the preallocated arena"""
+
+import numpy as np
+import pytest
+
+from engines import get_engine
+
+ENGINES = ['numpy_strassen', 'numpy_winograd']
+
+
+@pytest.mark.parametrize('name', ENGINES)
+@pytest.mark.parametrize('n, cutoff', [(64, 8), (33, 4), (47, 5), (100, 7), (12, 16)])
+def test_products_match(name, n, cutoff):
+    engine = get_engine(name, cutoff=cutoff)
+    A, B = engine.random_matrix(n, seed=1), engine.random_matrix(n, seed=2)
+    np.testing.assert_allclose(engine.multiply(A, B), A @ B, rtol=1e-10)
+
+
+@pytest.mark.parametrize('name', ENGINES)
+def test_float32_products(name):
+    engine = get_engine(name, cutoff=8)
+    engine.use_element_type('float32')
+    A, B = engine.random_matrix(45, seed=1), engine.random_matrix(45, seed=2)
+    C = engine.multiply(A, B)
+    assert C.dtype == np.float32
+    np.testing.assert_allclose(C, A.astype(np.float64) @ B.astype(np.float64), rtol=1e-4)
+
+
+def test_levels_and_workspace():
+    strassen, winograd = get_engine('numpy_strassen', cutoff=10), get_engine('numpy_winograd', cutoff=10)
+    assert strassen.levels(100) == [50, 25, 12, 6]
+    assert strassen.levels(10) == []
+    assert strassen.workspace_elements(100) == 3 * (50 ** 2 + 25 ** 2 + 12 ** 2 + 6 ** 2)
+    assert winograd.workspace_elements(100) == 2 * (50 ** 2 + 25 ** 2 + 12 ** 2 + 6 ** 2)
+    assert strassen.workspace_bytes(100) == strassen.workspace_elements(100) * 8
+
+
+def test_arena_is_allocated_once_per_size():
+    engine = get_engine('numpy_strassen', cutoff=8)
+    A, B = engine.random_matrix(40, seed=1), engine.random_matrix(40, seed=2)
+    out = engine.allocate(40)
+    engine.multiply(A, B, out)
+    arena = engine._arena
+    engine.multiply(A, B, out)
+    assert engine._arena is arena
+    assert arena.size == engine.workspace_elements(40)
+
+    engine.multiply(engine.random_matrix(24), engine.random_matrix(24))
+    assert engine._arena is not arena
+
+
+def test_cutoff_must_be_positive():
+    with pytest.raises(ValueError, match='cutoff must be positive'):
+        get_engine('numpy_strassen', cutoff=0)
@@ -0,0 +1,32 @@
+"""Crossovers and discontinuities located by the adaptive size sweep"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from harness.sweep import CROSSOVER, DISCONTINUITY, AdaptiveSweep
+
+
+def _sweep(medians, **options):
+    sweep = AdaptiveSweep([SimpleNamespace(name=name) for name in medians], [], **options)
+    sweep.medians = medians
+    return sweep
+
+
+@pytest.mark.parametrize('order', [('blocked', 'strassen'), ('strassen', 'blocked')])
+def test_crossover_names_the_overtaken_benchmark_first(order):
+    medians = {'blocked': {64: 1.0, 128: 10.0}, 'strassen': {64: 2.0, 128: 5.0}}
+    [finding] = _sweep({name: medians[name] for name in order}, jump_threshold=10.0).findings()
+    assert finding.kind == CROSSOVER
+    assert finding.benchmarks == ('blocked', 'strassen')
+    assert finding.estimate == pytest.approx(64 + 64 / 6)
+    assert finding.describe() == 'strassen overtakes blocked near N=75 (between 64 and 128)'
+
+
+def test_discontinuity():
+    # 2 * 64^3 FLOPs in 0.05 ms and 2 * 128^3 in 4 ms: 10.5 then 1.0 GFLOPS
+    findings = _sweep({'numpy_blocked': {64: 0.05, 128: 4.0}}).findings()
+    assert [(f.kind, f.benchmarks, f.low, f.high) for f in findings] == [
+        (DISCONTINUITY, ('numpy_blocked',), 64, 128)
+    ]
+    assert findings[0].describe() == 'numpy_blocked GFLOPS discontinuity between N=64 and N=128'
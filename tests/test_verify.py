@@ -0,0 +1,115 @@
+"""Freivalds verification of matrix products"""
+
+import numpy as np
+import pytest
+
+from engines import get_engine
+from harness.shapes import Shape
+from harness.verify import FAIL, PASS, freivalds, read_dump
+
+
+def _operands(n, dtype, seed=0, batch=None):
+    rng = np.random.default_rng(seed)
+    shape = (n, n) if batch is None else (batch, n, n)
+    return rng.random(shape).astype(dtype), rng.random(shape).astype(dtype)
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32, np.float16])
+def test_correct_products_pass(dtype):
+    A, B = _operands(256, dtype)
+    result = freivalds(A, B, A @ B, seed=1)
+    assert result.passed
+    assert result.max_violation < 0.5
+    assert result.columns()['verification'] == PASS
+
+
+def test_sequential_float32_accumulation_passes():
+    A, B = _operands(512, np.float32)
+    C = np.zeros((512, 512), dtype=np.float32)
+    for k in range(512):
+        C += np.outer(A[:, k], B[k])
+    assert freivalds(A, B, C, seed=1).passed
+
+
+def test_single_wrong_element_fails():
+    A, B = _operands(1024, np.float32)
+    C = A @ B
+    C[17, 900] *= 1.01
+    result = freivalds(A, B, C, seed=1)
+    assert not result.passed
+    assert result.columns()['verification'] == FAIL
+
+
+def test_integer_products_are_exact():
+    rng = np.random.default_rng(0)
+    A = rng.integers(-128, 128, (64, 64)).astype(np.int8)
+    B = rng.integers(-128, 128, (64, 64)).astype(np.int8)
+    C = A.astype(np.int32) @ B.astype(np.int32)
+    assert freivalds(A, B, C, rounds=8, seed=1).passed
+    C[3, 5] += 1
+    assert not freivalds(A, B, C, rounds=8, seed=1).passed
+
+
+def test_batches_are_checked_matrix_by_matrix():
+    A, B = _operands(64, np.float32, batch=8)
+    C = A @ B
+    assert freivalds(A, B, C, seed=1).passed
+    C[5] *= 1.01
+    assert not freivalds(A, B, C, seed=1).passed
+
+
+def test_rectangular_and_small_products():
+    rng = np.random.default_rng(0)
+    A, B = rng.random((300, 40)), rng.random((40, 7))
+    C = A @ B
+    # Fewer columns than rounds: every column is checked with the identity
+    assert freivalds(A, B, C).passed
+    C[299, 6] += 1e-9
+    assert not freivalds(A, B, C).passed
+
+
+def test_nan_never_passes():
+    A, B = _operands(32, np.float64)
+    C = A @ B
+    C[0, 0] = np.nan
+    assert not freivalds(A, B, C, seed=1).passed
+
+
+def test_shape_mismatch_raises():
+    A, B = _operands(16, np.float64)
+    with pytest.raises(ValueError):
+        freivalds(A, B, np.zeros((16, 15)))
+    with pytest.raises(ValueError):
+        freivalds(A, B[:8], np.zeros((16, 16)))
+
+
+def test_worst_case_bound_is_looser():
+    A, B = _operands(1024, np.float32)
+    C = A @ B
+    C[100, 200] *= 1.01
+    assert not freivalds(A, B, C, seed=1).passed
+    assert freivalds(A, B, C, seed=1, worst_case=True).passed
+
+
+def test_strassen_passes_with_its_worst_case_bound():
+    engine = get_engine('numpy_strassen')
+    assert engine.worst_case_rounding
+    engine.use_element_type('float32')
+    engine.setup(512)
+    A, B = engine.random_matrix(512, seed=1), engine.random_matrix(512, seed=2)
+    C = engine.multiply(A, B)
+    result = freivalds(engine.to_array(A), engine.to_array(B), engine.to_array(C),
+                       seed=1, worst_case=engine.worst_case_rounding)
+    assert result.passed
+
+
+def test_read_dump(tmp_path):
+    rng = np.random.default_rng(0)
+    A, B = rng.random((6, 4), dtype=np.float32), rng.random((4, 5), dtype=np.float32)
+    for name, matrix in (('A', A), ('B', B), ('C', A @ B)):
+        matrix.tofile(tmp_path / f'{name}.f32')
+
+    dumped = read_dump(tmp_path, Shape.parse('6x5x4'))
+    assert freivalds(*dumped).passed
+    np.testing.assert_array_equal(dumped[0], A)
+    assert read_dump(tmp_path, 8) is None